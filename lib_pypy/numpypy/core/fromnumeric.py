@@ -558,7 +558,13 @@ def sort(a, axis=-1, kind='quicksort', order=None):
           dtype=[('name', '|S10'), ('height', '<f8'), ('age', '<i4')])
 
     """
-    raise NotImplementedError('Waiting on interp level method')
+    if axis is None:
+        a = numpypy.array(a).flatten()
+        axis = -1
+    else:
+        a = numpypy.array(a)
+    a.sort(axis, kind, order)
+    return a
 
 
 def argsort(a, axis=-1, kind='quicksort', order=None):
@@ -639,7 +645,9 @@ def argsort(a, axis=-1, kind='quicksort', order=None):
     array([0, 1])
 
     """
-    raise NotImplementedError('Waiting on interp level method')
+    if not hasattr(a, 'argsort'):
+        a = numpypy.array(a)
+    return a.argsort(axis, kind, order)
 
 
 def argmax(a, axis=None):
@@ -760,7 +768,9 @@ def searchsorted(a, v, side='left'):
     array([0, 5, 1, 2])
 
     """
-    raise NotImplementedError('Waiting on interp level method')
+    if not hasattr(a, 'searchsorted'):
+        a = numpypy.array(a)
+    return a.searchsorted(v, side)
 
 
 def resize(a, new_shape):
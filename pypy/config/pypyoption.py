@@ -34,7 +34,7 @@ working_modules.update(dict.fromkeys(
      "thread", "itertools", "pyexpat", "_ssl", "cpyext", "array",
      "_bisect", "binascii", "_multiprocessing", '_warnings',
      "_collections", "_multibytecodec", "micronumpy", "_ffi",
-     "_continuation"]
+     "_continuation", "_csv", "datetime"]
 ))
 
 translation_modules = default_modules.copy()
@@ -73,12 +73,14 @@ if sys.platform == "sunos5":
     del working_modules["_minimal_curses"]
     del working_modules["termios"]
     del working_modules["_multiprocessing"]   # depends on rctime
+    del working_modules["datetime"]   # depends on rctime
 
 
 
 module_dependencies = {
     '_multiprocessing': [('objspace.usemodules.rctime', True),
                          ('objspace.usemodules.thread', True)],
+    'datetime': [('objspace.usemodules.rctime', True)],
     }
 module_suggests = {
     # the reason you want _rawffi is for ctypes, which
@@ -253,6 +255,12 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    "use specialised tuples",
                    default=False),
 
+        BoolOption("withunwrappedtuple",
+                   "store tuples of ints, floats or strs unwrapped",
+                   default=False,
+                   requires=[("objspace.std.withsmallint", False)]),
+                             #  ^^^ items are rewrapped as W_IntObject
+
         BoolOption("withrope", "use ropes as the string implementation",
                    default=False,
                    requires=[("objspace.std.withstrslice", False),
@@ -276,6 +284,10 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    requires=[("objspace.std.getattributeshortcut", True),
                              ("objspace.std.withmethodcache", True),
                        ]),
+        BoolOption("withunboxedattributes",
+                   "store int and float attributes of instances unboxed",
+                   default=False,
+                   requires=[("objspace.std.withmapdict", True)]),
 
         BoolOption("withrangelist",
                    "enable special range list implementation that does not "
@@ -654,9 +654,10 @@ class GcLLDescr_framework(GcLLDescription):
         self.GCClass = None
 
     def _check_valid_gc(self):
-        # we need the hybrid or minimark GC for rgc._make_sure_does_not_move()
-        # to work
-        if self.gcdescr.config.translation.gc not in ('hybrid', 'minimark'):
+        # we need the hybrid or (inc)minimark GC for
+        # rgc._make_sure_does_not_move() to work
+        if self.gcdescr.config.translation.gc not in ('hybrid', 'minimark',
+                                                      'incminimark'):
             raise NotImplementedError("--gc=%s not implemented with the JIT" %
                                       (gcdescr.config.translation.gc,))
 
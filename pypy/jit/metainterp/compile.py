@@ -13,7 +13,7 @@ from pypy.jit.metainterp.resoperation import ResOperation, rop, get_deep_immutab
 from pypy.jit.metainterp.history import TreeLoop, Box, History, JitCellToken, TargetToken
 from pypy.jit.metainterp.history import AbstractFailDescr, BoxInt
 from pypy.jit.metainterp.history import BoxPtr, BoxObj, BoxFloat, Const, ConstInt
-from pypy.jit.metainterp import history
+from pypy.jit.metainterp import history, memmgr
 from pypy.jit.metainterp.typesystem import llhelper, oohelper
 from pypy.jit.metainterp.optimize import InvalidLoop
 from pypy.jit.metainterp.inliner import Inliner
@@ -178,6 +178,65 @@ def compile_loop(metainterp, greenkey, start,
     record_loop_or_bridge(metainterp_sd, loop)
     return all_target_tokens[0]
 
+class PendingLoop(object):
+    """A loop that was traced while the 'async_compile' parameter was
+    set, and that waits in the CompileQueue for compile_loop() to be
+    called on it.  The MetaInterp is kept alive for its history.
+    """
+    def __init__(self, metainterp, greenkey, start, inputargs, jumpargs,
+                 resume_at_jump_descr):
+        self.metainterp = metainterp
+        self.greenkey = greenkey
+        self.start = start
+        self.inputargs = inputargs
+        self.jumpargs = jumpargs
+        self.resume_at_jump_descr = resume_at_jump_descr
+
+    def compile(self):
+        metainterp = self.metainterp
+        warmstate = metainterp.jitdriver_sd.warmstate
+        cell = warmstate.jit_cell_at_key(self.greenkey)
+        token = cell.get_procedure_token()
+        if token is not None and token.target_tokens is not None:
+            return           # a loop was compiled there in the meantime
+        debug_start('jit-compile-pending')
+        try:
+            target_token = compile_loop(metainterp, self.greenkey, self.start,
+                                        self.inputargs, self.jumpargs,
+                                        self.resume_at_jump_descr)
+        finally:
+            debug_stop('jit-compile-pending')
+        if target_token is None:
+            # the loop is invalid; count again from zero
+            if cell.counter == -3:
+                cell.counter = 0
+            return
+        jitcell_token = target_token.targeting_jitcell_token
+        warmstate.attach_procedure_to_interp(self.greenkey, jitcell_token)
+        metainterp.staticdata.stats.add_jitcell_token(jitcell_token)
+
+class CompileQueue(object):
+    """The loops waiting to be compiled.  They are compiled by
+    compile_pending(), which is called by rlib.jit.compile_pending_loops()
+    at a time chosen by the interpreter, e.g. from a thread that would
+    otherwise be idle, instead of by the thread that traced them.
+    """
+    def __init__(self):
+        self.pending = []
+        self.tracing = 0      # number of traces currently in progress
+
+    def append(self, pending_loop):
+        self.pending.append(pending_loop)
+
+    def compile_pending(self):
+        # the backend is not reentrant: if we are called by a residual
+        # call while tracing, leave the loops in the queue for next time
+        if self.tracing > 0:
+            return
+        while self.pending:
+            pending_loop = self.pending.pop(0)
+            pending_loop.compile()
+
 def compile_retrace(metainterp, greenkey, start,
                     inputargs, jumpargs,
                     resume_at_jump_descr, partial_trace, resumekey):
@@ -304,6 +363,13 @@ def do_compile_bridge(metainterp_sd, faildescr, inputargs, operations,
     return metainterp_sd.cpu.compile_bridge(faildescr, inputargs, operations,
                                             original_loop_token, log=log)
 
+def estimate_memory_size(operations, asminfo):
+    if asminfo is not None:
+        asmlen = asminfo.asmlen
+    else:
+        asmlen = 0
+    return memmgr.estimate_memory_size(operations, asmlen)
+
 def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type):
     vinfo = jitdriver_sd.virtualizable_info
     if vinfo is not None:
@@ -354,6 +420,8 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type):
                                       type, ops_offset,
                                       name=loopname)
     #
+    original_jitcell_token.memory_size += estimate_memory_size(
+        loop.operations, asminfo)
     if metainterp_sd.warmrunnerdesc is not None:    # for tests
         metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(original_jitcell_token)
 
@@ -395,6 +463,8 @@ def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
     else:
         ops_offset = None
     metainterp_sd.logger_ops.log_bridge(inputargs, operations, n, ops_offset)
+    original_loop_token.memory_size += estimate_memory_size(operations,
+                                                            asminfo)
     #
     #if metainterp_sd.warmrunnerdesc is not None:    # for tests
     #    metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(
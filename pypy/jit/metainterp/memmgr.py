@@ -1,7 +1,8 @@
 import math
-from pypy.rlib.rarithmetic import r_int64
+from pypy.rlib.rarithmetic import r_int64, LONG_BIT
 from pypy.rlib.debug import debug_start, debug_print, debug_stop
 from pypy.rlib.objectmodel import we_are_translated
+from pypy.rlib.listsort import make_timsort_class
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,6 +20,38 @@ from pypy.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# In addition, if a memory budget is given, the loops are freed in
+# least-recently-used order as soon as the estimated memory of the loops
+# in 'alive_loops' exceeds it.  The 'generation' of a LoopToken is the
+# generation in which it was last entered, so the least recently used
+# loops are the ones with the smallest 'generation'.  The estimate,
+# 'memory_size' on the LoopToken, counts the machine code of the loop
+# and of its bridges, plus the resume data of their guards.
+#
+
+# a rough estimate of the memory used by the resume data of one guard:
+# the ResumeGuardDescr, its snapshot numbering and the fail_args list,
+# not counting one word per fail_arg
+GUARD_RESUME_SIZE = 64
+WORD_SIZE = LONG_BIT // 8
+
+def estimate_memory_size(operations, asmlen):
+    """Estimate the memory used by a newly compiled loop or bridge."""
+    size = asmlen
+    for op in operations:
+        if op.is_guard():
+            size += GUARD_RESUME_SIZE
+            failargs = op.getfailargs()
+            if failargs is not None:
+                size += WORD_SIZE * len(failargs)
+    return size
+
+LoopTokenBaseTimSort = make_timsort_class()
+
+class LoopTokenSort(LoopTokenBaseTimSort):
+    def lt(self, a, b):
+        return a.generation < b.generation
+
 
 class MemoryManager(object):
 
@@ -38,6 +71,9 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.max_bytes = 0
+        self.evicted_loops = 0      # loops freed because of the budget
+        self.recompiled_loops = 0   # loops compiled again after being freed
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,11 +85,16 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if self.max_bytes > 0:
+            self._kill_loops_over_budget()
 
     def keep_loop_alive(self, looptoken):
         if looptoken.generation != self.current_generation:
@@ -81,3 +122,37 @@ class MemoryManager(object):
             # a single one is not enough for all tests :-(
             rgc.collect(); rgc.collect(); rgc.collect()
         debug_stop("jit-mem-collect")
+
+    def get_total_memory(self):
+        total = 0
+        for looptoken in self.alive_loops:
+            total += looptoken.memory_size
+        return total
+
+    def _kill_loops_over_budget(self):
+        total = self.get_total_memory()
+        if total <= self.max_bytes:
+            return
+        debug_start("jit-mem-budget")
+        debug_print("Memory before:", total)
+        # free down to 3/4 of the budget, to avoid doing it again and
+        # again after each new loop
+        target = self.max_bytes - (self.max_bytes >> 2)
+        looptokens = self.alive_loops.keys()
+        LoopTokenSort(looptokens).sort()
+        freed = 0
+        for looptoken in looptokens:
+            if total <= target:
+                break
+            total -= looptoken.memory_size
+            del self.alive_loops[looptoken]
+            freed += 1
+        self.evicted_loops += freed
+        debug_print("Loop tokens evicted:", freed)
+        debug_print("Memory after: ", total)
+        if not we_are_translated():
+            looptoken = None
+            looptokens = None
+            from pypy.rlib import rgc
+            rgc.collect(); rgc.collect(); rgc.collect()
+        debug_stop("jit-mem-budget")
@@ -1413,6 +1413,7 @@ class MetaInterpStaticData(object):
         self.profiler.cpu = cpu
         self.warmrunnerdesc = warmrunnerdesc
         if warmrunnerdesc:
+            self.profiler.memmgr = warmrunnerdesc.memory_manager
             self.config = warmrunnerdesc.translator.config
         else:
             from pypy.config.pypyoption import get_pypy_config
@@ -1424,6 +1425,7 @@ class MetaInterpStaticData(object):
 
         self._addr2name_keys = []
         self._addr2name_values = []
+        self.compile_queue = compile.CompileQueue()
 
         self.__dict__.update(compile.make_done_loop_tokens())
 
@@ -1872,10 +1874,12 @@ class MetaInterp(object):
         assert jitdriver_sd is self.jitdriver_sd
         self.staticdata.try_to_free_some_loops()
         self.create_empty_history()
+        self.staticdata.compile_queue.tracing += 1
         try:
             original_boxes = self.initialize_original_boxes(jitdriver_sd, *args)
             return self._compile_and_run_once(original_boxes)
         finally:
+            self.staticdata.compile_queue.tracing -= 1
             self.staticdata.profiler.end_tracing()
             debug_stop('jit-tracing')
 
@@ -1902,9 +1906,11 @@ class MetaInterp(object):
         self.resumekey_original_loop_token = key.wref_original_loop_token()
         self.staticdata.try_to_free_some_loops()
         self.initialize_state_from_guard_failure(key)
+        self.staticdata.compile_queue.tracing += 1
         try:
             return self._handle_guard_failure(key)
         finally:
+            self.staticdata.compile_queue.tracing -= 1
             self.resumekey_original_loop_token = None
             self.staticdata.profiler.end_tracing()
             debug_stop('jit-tracing')
@@ -2030,12 +2036,7 @@ class MetaInterp(object):
         # interpreted mode, but it should come back very quickly to the
         # JIT, find probably the same 'loop_token', and execute it.
         if we_are_translated():
-            num_green_args = self.jitdriver_sd.num_green_args
-            gi, gr, gf = self._unpack_boxes(live_arg_boxes, 0, num_green_args)
-            ri, rr, rf = self._unpack_boxes(live_arg_boxes, num_green_args,
-                                            len(live_arg_boxes))
-            CRN = self.staticdata.ContinueRunningNormally
-            raise CRN(gi, gr, gf, ri, rr, rf)
+            self._raise_continue_running_normally(live_arg_boxes)
         else:
             # However, in order to keep the existing tests working
             # (which are based on the assumption that 'loop_token' is
@@ -2043,6 +2044,14 @@ class MetaInterp(object):
             self._nontranslated_run_directly(live_arg_boxes, loop_token)
             assert 0, "unreachable"
 
+    def _raise_continue_running_normally(self, live_arg_boxes):
+        num_green_args = self.jitdriver_sd.num_green_args
+        gi, gr, gf = self._unpack_boxes(live_arg_boxes, 0, num_green_args)
+        ri, rr, rf = self._unpack_boxes(live_arg_boxes, num_green_args,
+                                        len(live_arg_boxes))
+        CRN = self.staticdata.ContinueRunningNormally
+        raise CRN(gi, gr, gf, ri, rr, rf)
+
     def _nontranslated_run_directly(self, live_arg_boxes, loop_token):
         "NOT_RPYTHON"
         args = []
@@ -2111,6 +2120,11 @@ class MetaInterp(object):
         if not self.partial_trace:
             assert self.get_procedure_token(greenkey) is None or \
                    self.get_procedure_token(greenkey).target_tokens is None
+        if (not self.partial_trace and
+                self.jitdriver_sd.warmstate.async_compile):
+            self.defer_compile_loop(greenkey, start,
+                                    original_boxes[num_green_args:],
+                                    live_arg_boxes, resume_at_jump_descr)
         if self.partial_trace:
             target_token = compile.compile_retrace(self, greenkey, start,
                                                    original_boxes[num_green_args:],
@@ -2133,6 +2147,23 @@ class MetaInterp(object):
             jitcell_token = target_token.targeting_jitcell_token
             self.raise_continue_running_normally(live_arg_boxes, jitcell_token)
 
+    def defer_compile_loop(self, greenkey, start, inputargs, live_arg_boxes,
+                           resume_at_jump_descr):
+        # Put the loop in the compile queue and go back to interpreting.
+        # The history is kept alive by the PendingLoop, so that the
+        # optimizer and the backend can run later.
+        num_green_args = self.jitdriver_sd.num_green_args
+        cell = self.jitdriver_sd.warmstate.jit_cell_at_key(greenkey)
+        if cell.counter != -3:     # else, already queued by another trace
+            pending_loop = compile.PendingLoop(self, greenkey, start,
+                                       inputargs,
+                                       live_arg_boxes[num_green_args:],
+                                       resume_at_jump_descr)
+            self.staticdata.compile_queue.append(pending_loop)
+            cell.counter = -3
+            self.staticdata.log('loop queued for compilation')
+        self._raise_continue_running_normally(live_arg_boxes)
+
     def compile_trace(self, live_arg_boxes, resume_at_jump_descr):
         num_green_args = self.jitdriver_sd.num_green_args
         greenkey = live_arg_boxes[:num_green_args]
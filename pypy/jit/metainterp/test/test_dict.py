@@ -153,13 +153,12 @@ class DictTests:
 
         res = self.meta_interp(f, [100], listops=True)
         assert res == f(50)
-        self.check_resops({'new_array': 2, 'getfield_gc': 2,
-                           'guard_true': 2, 'jump': 1,
+        self.check_resops({'new_array': 4, 'getfield_gc': 2,
+                           'guard_true': 4, 'jump': 1,
                            'new_with_vtable': 2, 'getinteriorfield_gc': 2,
-                           'setfield_gc': 6, 'int_gt': 2, 'int_sub': 2,
-                           'call': 10, 'int_and': 2,
-                           'guard_no_exception': 8, 'new': 2,
-                           'guard_false': 2, 'int_is_true': 2})
+                           'setfield_gc': 8, 'int_gt': 2, 'int_sub': 2,
+                           'call': 10, 'int_ge': 2,
+                           'guard_no_exception': 8, 'new': 2})
 
 
 class TestOOtype(DictTests, OOJitMixin):
@@ -15,12 +15,14 @@ from pypy.jit.metainterp.memmgr import MemoryManager
 from pypy.jit.metainterp.test.support import LLJitMixin
 from pypy.rlib.jit import JitDriver, dont_look_inside
 from pypy.jit.metainterp.warmspot import get_stats
+from pypy.jit.metainterp import pyjitpl
 from pypy.jit.metainterp.warmstate import JitCell
 from pypy.rlib import rgc
 
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    memory_size = 100
 
 
 class _TestMemoryManager:
@@ -78,6 +80,30 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def test_budget(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_bytes(400)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        # each time the budget is exceeded, free the least recently
+        # used loops until 3/4 of the budget is used
+        assert memmgr.alive_loops == dict.fromkeys(tokens[6:])
+        assert memmgr.evicted_loops == 6
+        assert memmgr.get_total_memory() == 400
+
+    def test_budget_lru(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_bytes(400)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.keep_loop_alive(tokens[0])
+            memmgr.next_generation()
+        assert tokens[0] in memmgr.alive_loops
+        assert memmgr.get_total_memory() <= 400
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
@@ -224,6 +250,28 @@ class _TestIntegration(LLJitMixin):
         # Loop with number 0, h(), has not been freed
         assert 0 in [t.number for t in tokens if t]
 
+    def test_memory_budget(self):
+        myjitdriver = JitDriver(greens=['m'], reds=['n'])
+        def g(m):
+            n = 10
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n, m=m)
+                myjitdriver.jit_merge_point(n=n, m=m)
+                n = n - 1
+            return 21
+        def f():
+            for i in range(4):
+                for m in range(1, 11):
+                    g(m)
+            return 42
+
+        res = self.meta_interp(f, [], memory_budget=1)
+        assert res == 42
+        memmgr = pyjitpl._warmrunnerdesc.memory_manager
+        assert memmgr.evicted_loops > 0
+        assert memmgr.recompiled_loops > 0
+        assert memmgr.get_total_memory() <= 1024
+
 # ____________________________________________________________
 
 def test_all():
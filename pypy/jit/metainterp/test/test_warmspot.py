@@ -1,6 +1,7 @@
 import py
 from pypy.jit.metainterp.warmspot import get_stats
 from pypy.rlib.jit import JitDriver, set_param, unroll_safe
+from pypy.rlib.jit import compile_pending_loops
 from pypy.jit.backend.llgraph import runner
 
 from pypy.jit.metainterp.test.support import LLJitMixin, OOJitMixin
@@ -107,6 +108,35 @@ class WarmspotTests(object):
         assert res == 0
         self.check_resops(new_with_vtable=0)
 
+    def test_async_compile(self):
+        myjitdriver = JitDriver(greens = [], reds = ['n', 'total'])
+
+        def g(n):
+            total = 0
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n, total=total)
+                myjitdriver.jit_merge_point(n=n, total=total)
+                total += n
+                n -= 1
+            return total
+        def f(n, compile_between):
+            res = g(n)
+            if compile_between:
+                compile_pending_loops()
+            return res + g(n)
+
+        # the traced loop waits in the queue, and is not traced again
+        res = self.meta_interp(f, [30, 0], async_compile=1)
+        assert res == f(30, 0)
+        self.check_jitcell_token_count(0)
+        self.check_enter_count(1)
+        self.check_aborted_count(0)
+
+        res = self.meta_interp(f, [30, 1], async_compile=1)
+        assert res == f(30, 1)
+        self.check_jitcell_token_count(1)
+        self.check_enter_count(1)
+
     def test_unwanted_loops(self):
         mydriver = JitDriver(reds = ['n', 'total', 'm'], greens = [])
 
@@ -133,9 +133,14 @@ def test_make_jitcell_getter_custom():
         rtyper = FakeRTyper()
         cpu = None
         memory_manager = None
+    def is_known_hot(x, y):
+        return x == 41
+    IS_KNOWN_HOT = lltype.Ptr(lltype.FuncType([lltype.Signed, lltype.Float],
+                                              lltype.Bool))
     class FakeJitDriverSD:
         _get_jitcell_at_ptr = llhelper(GETTER, getter)
         _set_jitcell_at_ptr = llhelper(SETTER, setter)
+        _is_known_hot_ptr = llhelper(IS_KNOWN_HOT, is_known_hot)
     #
     state = WarmEnterState(FakeWarmRunnerDesc(), FakeJitDriverSD())
     get_jitcell = state._make_jitcell_getter_custom()
@@ -143,9 +148,11 @@ def test_make_jitcell_getter_custom():
     assert isinstance(cell1, JitCell)
     assert cell1.x == 5
     assert cell1.y == 42.5
+    assert cell1.counter == 0
     cell2 = get_jitcell(True, 5, 42.5)
     assert cell2 is cell1
     cell3 = get_jitcell(True, 41, 42.5)
+    assert cell3.counter == state.THRESHOLD_LIMIT     # known to be hot
     assert get_jitcell(False, 42, 0.25) is None
     cell4 = get_jitcell(True, 42, 0.25)
     assert get_jitcell(False, 42, 0.25) is cell4
@@ -65,8 +65,9 @@ def ll_meta_interp(function, args, backendopt=False, type_system='lltype',
 
 def jittify_and_run(interp, graph, args, repeat=1, graph_and_interp_only=False,
                     backendopt=False, trace_limit=sys.maxint,
-                    inline=False, loop_longevity=0, retrace_limit=5,
-                    function_threshold=4,
+                    inline=False, loop_longevity=0, memory_budget=0,
+                    retrace_limit=5,
+                    function_threshold=4, async_compile=0,
                     enable_opts=ALL_OPTS_NAMES, max_retrace_guards=15, **kwds):
     from pypy.config.config import ConfigError
     translator = interp.typer.annotator.translator
@@ -90,9 +91,11 @@ def jittify_and_run(interp, graph, args, repeat=1, graph_and_interp_only=False,
         jd.warmstate.set_param_trace_limit(trace_limit)
         jd.warmstate.set_param_inlining(inline)
         jd.warmstate.set_param_loop_longevity(loop_longevity)
+        jd.warmstate.set_param_memory_budget(memory_budget)
         jd.warmstate.set_param_retrace_limit(retrace_limit)
         jd.warmstate.set_param_max_retrace_guards(max_retrace_guards)
         jd.warmstate.set_param_enable_opts(enable_opts)
+        jd.warmstate.set_param_async_compile(async_compile)
     warmrunnerdesc.finish()
     if graph_and_interp_only:
         return interp, graph
@@ -151,6 +154,9 @@ def locate_jit_merge_point(graph):
 def find_set_param(graphs):
     return _find_jit_marker(graphs, 'set_param')
 
+def find_compile_pending_loops(graphs):
+    return _find_jit_marker(graphs, 'compile_pending_loops', False)
+
 def find_force_quasi_immutable(graphs):
     results = []
     for graph in graphs:
@@ -222,6 +228,7 @@ class WarmRunnerDesc(object):
         self.codewriter.make_jitcodes(verbose=verbose)
         self.rewrite_can_enter_jits()
         self.rewrite_set_param()
+        self.rewrite_compile_pending_loops()
         self.rewrite_force_virtual(vrefinfo)
         self.rewrite_force_quasi_immutable()
         self.add_finish()
@@ -500,6 +507,8 @@ class WarmRunnerDesc(object):
             jd._should_unroll_one_iteration_ptr = self._make_hook_graph(jd,
                 annhelper, jd.jitdriver.should_unroll_one_iteration,
                 annmodel.s_Bool)
+            jd._is_known_hot_ptr = self._make_hook_graph(jd,
+                annhelper, jd.jitdriver.is_known_hot, annmodel.s_Bool)
         annhelper.finish()
 
     def _make_hook_graph(self, jitdriver_sd, annhelper, func,
@@ -907,6 +916,21 @@ class WarmRunnerDesc(object):
             op.opname = 'direct_call'
             op.args[:3] = [closures[key]]
 
+    def rewrite_compile_pending_loops(self):
+        found = find_compile_pending_loops(self.translator.graphs)
+        if not found:
+            return
+        _, PTR_FUNCTYPE = self.cpu.ts.get_FuncType([], lltype.Void)
+        compile_queue = self.metainterp_sd.compile_queue
+        def compile_pending_loops():
+            compile_queue.compile_pending()
+        funcptr = self.helper_func(PTR_FUNCTYPE, compile_pending_loops)
+        c_func = Constant(funcptr, PTR_FUNCTYPE)
+        for graph, block, i in found:
+            op = block.operations[i]
+            op.opname = 'direct_call'
+            op.args = [c_func]
+
     def rewrite_force_virtual(self, vrefinfo):
         if self.cpu.ts.name != 'lltype':
             py.test.skip("rewrite_force_virtual: port it to ootype")
@@ -149,6 +149,7 @@ class JitCell(BaseJitCell):
     #     counter >=  0: not yet traced, wait till threshold is reached
     #     counter == -1: there is an entry bridge for this cell
     #     counter == -2: tracing is currently going on for this cell
+    #     counter == -3: a loop was traced, and waits in the compile queue
     counter = 0
     dont_trace_here = False
     extra_delay = chr(0)
@@ -164,6 +165,11 @@ class JitCell(BaseJitCell):
     def set_procedure_token(self, token):
         self.wref_procedure_token = self._makeref(token)
 
+    def procedure_token_was_freed(self):
+        # a loop was compiled here, but the memory manager freed it
+        return (self.wref_procedure_token is not None and
+                self.wref_procedure_token() is None)
+
     def _makeref(self, token):
         assert token is not None
         return weakref.ref(token)
@@ -213,6 +219,9 @@ class WarmEnterState(object):
     def set_param_inlining(self, value):
         self.inlining = value
 
+    def set_param_async_compile(self, value):
+        self.async_compile = value
+
     def set_param_enable_opts(self, value):
         from pypy.jit.metainterp.optimizeopt import ALL_OPTS_DICT, ALL_OPTS_NAMES
 
@@ -234,6 +243,12 @@ class WarmEnterState(object):
             self.warmrunnerdesc.memory_manager is not None):   # all for tests
             self.warmrunnerdesc.memory_manager.set_max_age(value)
 
+    def set_param_memory_budget(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_max_bytes(value * 1024)
+
     def set_param_retrace_limit(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -260,6 +275,10 @@ class WarmEnterState(object):
     def attach_procedure_to_interp(self, greenkey, procedure_token):
         cell = self.jit_cell_at_key(greenkey)
         old_token = cell.get_procedure_token()
+        if (cell.procedure_token_was_freed() and
+            self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # for tests
+            self.warmrunnerdesc.memory_manager.recompiled_loops += 1
         cell.set_procedure_token(procedure_token)
         cell.counter = -1       # valid procedure bridge attached
         if old_token is not None:
@@ -370,9 +389,10 @@ class WarmEnterState(object):
                     return
             else:
                 if cell.counter != -1:
-                    assert cell.counter == -2
+                    assert cell.counter == -2 or cell.counter == -3
                     # tracing already happening in some outer invocation of
-                    # this function. don't trace a second time.
+                    # this function, or the loop waits to be compiled.
+                    # don't trace a second time.
                     return
                 if not confirm_enter_jit(*args):
                     return
@@ -516,12 +536,18 @@ class WarmEnterState(object):
         rtyper = self.warmrunnerdesc.rtyper
         get_jitcell_at_ptr = self.jitdriver_sd._get_jitcell_at_ptr
         set_jitcell_at_ptr = self.jitdriver_sd._set_jitcell_at_ptr
+        is_known_hot_ptr = self.jitdriver_sd._is_known_hot_ptr
         lltohlhack = {}
         # note that there is no equivalent of _maybe_cleanup_dict()
         # in the case of custom getters.  We assume that the interpreter
         # stores the JitCells on some objects that can go away by GC,
         # like the PyCode objects in PyPy.
         #
+        # The interpreter can also tell that a new cell is at a location
+        # that was hot in a previous run, e.g. by saving these locations
+        # to a file.  Then we start tracing it as soon as possible,
+        # instead of counting up to the threshold again.
+        #
         def get_jitcell(build, *greenargs):
             fn = support.maybe_on_top_of_llinterp(rtyper, get_jitcell_at_ptr)
             cellref = fn(*greenargs)
@@ -561,6 +587,11 @@ class WarmEnterState(object):
                 fn = support.maybe_on_top_of_llinterp(rtyper,
                                                       set_jitcell_at_ptr)
                 fn(cellref, *greenargs)
+                if is_known_hot_ptr is not None:
+                    fn = support.maybe_on_top_of_llinterp(rtyper,
+                                                          is_known_hot_ptr)
+                    if fn(*greenargs):
+                        cell.counter = self.THRESHOLD_LIMIT
             return cell
         return get_jitcell
 
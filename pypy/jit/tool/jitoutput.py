@@ -30,6 +30,8 @@ REGEXES = [
     (('total_compiled_bridges',), '^Total # of bridges:\s+(\d+)$'),
     (('total_freed_loops',),      '^Freed # of loops:\s+(\d+)$'),
     (('total_freed_bridges',),    '^Freed # of bridges:\s+(\d+)$'),
+    (('evicted_loops',),          '^Evicted # of loops:\s+(\d+)$'),
+    (('recompiled_loops',),       '^Recompiled # of loops:\s+(\d+)$'),
     ]
 
 class Ops(object):
@@ -0,0 +1,4 @@
+# NOT_RPYTHON
+
+class Error(Exception):
+    pass
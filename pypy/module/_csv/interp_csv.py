@@ -0,0 +1,293 @@
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, NoneNotWrapped
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+
+
+QUOTE_MINIMAL, QUOTE_ALL, QUOTE_NONNUMERIC, QUOTE_NONE = range(4)
+
+# an unset delimiter, escapechar or quotechar; lines containing a NUL
+# byte are rejected by the reader, so it never matches a real character
+NOCHAR = '\0'
+
+DIALECT_ATTRIBUTES = ['delimiter', 'doublequote', 'escapechar',
+                      'lineterminator', 'quotechar', 'quoting',
+                      'skipinitialspace', 'strict']
+
+
+class State:
+    """ The registered dialects and the field size limit. """
+
+    def __init__(self, space):
+        self.w_dialects = space.newdict()
+        self.field_limit = 128 * 1024    # max parsed field size
+
+def get_state(space):
+    return space.fromcache(State)
+
+def csv_error(space, msg):
+    w_module = space.getbuiltinmodule('_csv')
+    w_error = space.getattr(w_module, space.wrap('Error'))
+    return OperationError(w_error, space.wrap(msg))
+
+
+class W_Dialect(Wrappable):
+    """CSV dialect
+
+The Dialect type records CSV parsing and generation options."""
+
+    _immutable_fields_ = ['delimiter', 'doublequote', 'escapechar',
+                          'lineterminator', 'quotechar', 'quoting',
+                          'skipinitialspace', 'strict']
+
+    def __init__(self):
+        # the settings of the 'excel' dialect
+        self.delimiter = ','
+        self.doublequote = True
+        self.escapechar = NOCHAR
+        self.lineterminator = '\r\n'
+        self.quotechar = '"'
+        self.quoting = QUOTE_MINIMAL
+        self.skipinitialspace = False
+        self.strict = False
+
+    def descr__new__(space, w_subtype, __args__):
+        args_w, kwds_w = __args__.unpack()
+        w_dialect = _dialect_from_args(space, args_w, kwds_w)
+        if space.is_w(w_subtype, space.gettypeobject(W_Dialect.typedef)):
+            return w_dialect
+        # copy the settings into an instance of the subclass
+        dialect = space.interp_w(W_Dialect, w_dialect)
+        w_self = space.allocate_instance(W_Dialect, w_subtype)
+        space.interp_w(W_Dialect, w_self).copy_from(dialect)
+        return w_self
+
+    def copy_from(self, other):
+        self.delimiter = other.delimiter
+        self.doublequote = other.doublequote
+        self.escapechar = other.escapechar
+        self.lineterminator = other.lineterminator
+        self.quotechar = other.quotechar
+        self.quoting = other.quoting
+        self.skipinitialspace = other.skipinitialspace
+        self.strict = other.strict
+
+    def _wrap_char(self, space, c):
+        if c == NOCHAR:
+            return space.w_None
+        return space.wrap(c)
+
+    def get_delimiter(self, space):
+        return self._wrap_char(space, self.delimiter)
+
+    def get_doublequote(self, space):
+        return space.newbool(self.doublequote)
+
+    def get_escapechar(self, space):
+        return self._wrap_char(space, self.escapechar)
+
+    def get_lineterminator(self, space):
+        return space.wrap(self.lineterminator)
+
+    def get_quotechar(self, space):
+        return self._wrap_char(space, self.quotechar)
+
+    def get_quoting(self, space):
+        return space.wrap(self.quoting)
+
+    def get_skipinitialspace(self, space):
+        return space.newbool(self.skipinitialspace)
+
+    def get_strict(self, space):
+        return space.newbool(self.strict)
+
+
+def _get_char(space, name, w_value):
+    if space.is_w(w_value, space.w_None):
+        return NOCHAR
+    if space.isinstance_w(w_value, space.w_str):
+        value = space.str_w(w_value)
+        if len(value) == 0:
+            return NOCHAR
+        if len(value) == 1:
+            return value[0]
+    raise operationerrfmt(space.w_TypeError,
+                          '"%s" must be an 1-character string', name)
+
+def _get_str(space, name, w_value):
+    if not space.isinstance_w(w_value, space.w_str):
+        raise operationerrfmt(space.w_TypeError,
+                              '"%s" must be a string', name)
+    return space.str_w(w_value)
+
+def _get_quoting(space, w_value):
+    if space.isinstance_w(w_value, space.w_int):
+        quoting = space.int_w(w_value)
+        if QUOTE_MINIMAL <= quoting <= QUOTE_NONE:
+            return quoting
+    raise OperationError(space.w_TypeError,
+                         space.wrap('bad "quoting" value'))
+
+def _is_string(space, w_obj):
+    return (space.isinstance_w(w_obj, space.w_str) or
+            space.isinstance_w(w_obj, space.w_unicode))
+
+def _get_value(space, w_dialect, kwds_w, name):
+    # the keyword argument, or else the attribute of the dialect, or None
+    w_value = kwds_w.get(name, None)
+    if w_value is None and w_dialect is not None:
+        w_value = space.findattr(w_dialect, space.wrap(name))
+    return w_value
+
+def make_dialect(space, w_dialect, kwds_w):
+    """ Returns the W_Dialect for the 'dialect' argument and the
+    keyword arguments of reader(), writer(), register_dialect() or
+    Dialect().
+    """
+    for name in kwds_w:
+        if name not in DIALECT_ATTRIBUTES:
+            raise operationerrfmt(space.w_TypeError,
+                "'%s' is an invalid keyword argument for this function",
+                name)
+    if w_dialect is not None:
+        if _is_string(space, w_dialect):
+            w_dialect = get_dialect(space, w_dialect)
+        # can we reuse this instance?
+        if (not kwds_w and
+                space.is_w(space.type(w_dialect),
+                           space.gettypeobject(W_Dialect.typedef))):
+            return w_dialect
+
+    dialect = W_Dialect()
+    w_value = _get_value(space, w_dialect, kwds_w, 'delimiter')
+    if w_value is not None:
+        dialect.delimiter = _get_char(space, 'delimiter', w_value)
+    w_value = _get_value(space, w_dialect, kwds_w, 'doublequote')
+    if w_value is not None:
+        dialect.doublequote = space.is_true(w_value)
+    w_value = _get_value(space, w_dialect, kwds_w, 'escapechar')
+    if w_value is not None:
+        dialect.escapechar = _get_char(space, 'escapechar', w_value)
+    w_value = _get_value(space, w_dialect, kwds_w, 'lineterminator')
+    if w_value is not None:
+        dialect.lineterminator = _get_str(space, 'lineterminator', w_value)
+    w_quotechar = _get_value(space, w_dialect, kwds_w, 'quotechar')
+    if w_quotechar is not None:
+        dialect.quotechar = _get_char(space, 'quotechar', w_quotechar)
+    w_value = _get_value(space, w_dialect, kwds_w, 'quoting')
+    if w_value is not None:
+        dialect.quoting = _get_quoting(space, w_value)
+    elif w_quotechar is not None and space.is_w(w_quotechar, space.w_None):
+        dialect.quoting = QUOTE_NONE
+    w_value = _get_value(space, w_dialect, kwds_w, 'skipinitialspace')
+    if w_value is not None:
+        dialect.skipinitialspace = space.is_true(w_value)
+    w_value = _get_value(space, w_dialect, kwds_w, 'strict')
+    if w_value is not None:
+        dialect.strict = space.is_true(w_value)
+
+    if dialect.delimiter == NOCHAR:
+        raise OperationError(space.w_TypeError,
+                             space.wrap("delimiter must be set"))
+    if dialect.quoting != QUOTE_NONE and dialect.quotechar == NOCHAR:
+        raise OperationError(space.w_TypeError,
+                             space.wrap("quotechar must be set if quoting "
+                                        "enabled"))
+    if not dialect.lineterminator:
+        raise OperationError(space.w_TypeError,
+                             space.wrap("lineterminator must be set"))
+    return space.wrap(dialect)
+
+def _dialect_from_args(space, args_w, kwds_w):
+    # the positional arguments are only the dialect, which can also be
+    # given as a keyword
+    w_dialect = kwds_w.pop('dialect', None)
+    if len(args_w) > 1 or (args_w and w_dialect is not None):
+        raise OperationError(space.w_TypeError,
+                             space.wrap("expected at most one dialect"))
+    if args_w:
+        w_dialect = args_w[0]
+    return make_dialect(space, w_dialect, kwds_w)
+
+def dialect_from_args(space, args_w, kwds_w):
+    return space.interp_w(W_Dialect,
+                          _dialect_from_args(space, args_w, kwds_w))
+
+
+def _readonly_property(name):
+    def fset(self, space, w_value):
+        raise operationerrfmt(space.w_AttributeError,
+            "attribute '%s' of '_csv.Dialect' objects is not writable", name)
+    def fdel(self, space):
+        raise operationerrfmt(space.w_AttributeError,
+            "attribute '%s' of '_csv.Dialect' objects is not writable", name)
+    fset.func_name = 'fset_' + name
+    fdel.func_name = 'fdel_' + name
+    return GetSetProperty(getattr(W_Dialect, 'get_' + name), fset, fdel,
+                          cls=W_Dialect)
+
+W_Dialect.typedef = TypeDef("Dialect",
+    __module__ = "_csv",
+    __doc__ = W_Dialect.__doc__,
+    __new__ = interp2app(W_Dialect.descr__new__.im_func),
+    delimiter = _readonly_property('delimiter'),
+    doublequote = _readonly_property('doublequote'),
+    escapechar = _readonly_property('escapechar'),
+    lineterminator = _readonly_property('lineterminator'),
+    quotechar = _readonly_property('quotechar'),
+    quoting = _readonly_property('quoting'),
+    skipinitialspace = _readonly_property('skipinitialspace'),
+    strict = _readonly_property('strict'),
+)
+
+# ____________________________________________________________
+# the registry of dialects
+
+def register_dialect(space, w_name, __args__):
+    """Create a mapping from a string name to a dialect class.
+    dialect = csv.register_dialect(name, dialect)"""
+    if not _is_string(space, w_name):
+        raise OperationError(space.w_TypeError,
+                             space.wrap("dialect name must be a string or "
+                                        "unicode"))
+    args_w, kwds_w = __args__.unpack()
+    w_dialect = _dialect_from_args(space, args_w, kwds_w)
+    space.setitem(get_state(space).w_dialects, w_name, w_dialect)
+
+def unregister_dialect(space, w_name):
+    """Delete the name/dialect mapping associated with a string name.
+    csv.unregister_dialect(name)"""
+    try:
+        space.delitem(get_state(space).w_dialects, w_name)
+    except OperationError, e:
+        if not e.match(space, space.w_KeyError):
+            raise
+        raise csv_error(space, "unknown dialect")
+
+def get_dialect(space, w_name):
+    """Return the dialect instance associated with name.
+    dialect = csv.get_dialect(name)"""
+    w_dialect = space.finditem(get_state(space).w_dialects, w_name)
+    if w_dialect is None:
+        raise csv_error(space, "unknown dialect")
+    return w_dialect
+
+def list_dialects(space):
+    """Return a list of all know dialect names.
+    names = csv.list_dialects()"""
+    return space.call_method(get_state(space).w_dialects, 'keys')
+
+def field_size_limit(space, w_limit=NoneNotWrapped):
+    """Sets an upper limit on parsed fields.
+    csv.field_size_limit([limit])
+
+Returns old limit. If limit is not given, no new limit is set and
+the old limit is returned"""
+    state = get_state(space)
+    old_limit = state.field_limit
+    if w_limit is not None:
+        if not space.isinstance_w(w_limit, space.w_int):
+            raise OperationError(space.w_TypeError,
+                                 space.wrap("limit must be an integer"))
+        state.field_limit = space.int_w(w_limit)
+    return space.wrap(old_limit)
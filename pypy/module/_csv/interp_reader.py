@@ -0,0 +1,263 @@
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, interp_attrproperty
+from pypy.interpreter.typedef import interp_attrproperty_w
+from pypy.module._csv.interp_csv import (csv_error, dialect_from_args,
+    get_state, QUOTE_NONE, QUOTE_NONNUMERIC)
+from pypy.rlib.rstring import StringBuilder
+
+(START_RECORD, START_FIELD, ESCAPED_CHAR, IN_FIELD, IN_QUOTED_FIELD,
+ ESCAPE_IN_QUOTED_FIELD, QUOTE_IN_QUOTED_FIELD, EAT_CRNL) = range(8)
+
+
+class W_Reader(Wrappable):
+    """CSV reader
+
+Reader objects are responsible for reading and parsing tabular data
+in CSV format."""
+
+    def __init__(self, space, dialect, w_iter):
+        self.space = space
+        self.dialect = dialect
+        self.w_iter = w_iter
+        self.line_num = 0
+        self.parse_reset()
+
+    def parse_reset(self):
+        self.state = START_RECORD
+        self.fields = []
+        # only used with QUOTE_NONNUMERIC: which fields become floats
+        self.numeric_fields = []
+        self.numeric_field = False
+        self.field_builder = StringBuilder()
+        self.field_len = 0
+
+    def error(self, msg):
+        return csv_error(self.space, msg)
+
+    def add_slice(self, line, start, end):
+        self.field_len += end - start
+        if self.field_len > get_state(self.space).field_limit:
+            raise self.error("field larger than field limit (%d)" %
+                             (get_state(self.space).field_limit,))
+        self.field_builder.append_slice(line, start, end)
+
+    def add_char(self, c):
+        self.field_len += 1
+        if self.field_len > get_state(self.space).field_limit:
+            raise self.error("field larger than field limit (%d)" %
+                             (get_state(self.space).field_limit,))
+        self.field_builder.append(c)
+
+    def save_field(self):
+        self.fields.append(self.field_builder.build())
+        if self.dialect.quoting == QUOTE_NONNUMERIC:
+            self.numeric_fields.append(self.numeric_field)
+            self.numeric_field = False
+        self.field_builder = StringBuilder()
+        self.field_len = 0
+
+    def parse_line(self, line):
+        """ Runs the state machine over the characters of 'line'.  The
+        characters that cannot end an unquoted or a quoted field are
+        copied to the field as whole slices.
+        """
+        dialect = self.dialect
+        delimiter = dialect.delimiter
+        escapechar = dialect.escapechar
+        quotechar = dialect.quotechar
+        if dialect.quoting == QUOTE_NONE:
+            quotechar = '\0'
+        i = 0
+        end = len(line)
+        while i < end:
+            state = self.state
+            c = line[i]
+            if state == IN_FIELD:
+                start = i
+                while (c != delimiter and c != escapechar and
+                       c != '\n' and c != '\r'):
+                    i += 1
+                    if i == end:
+                        break
+                    c = line[i]
+                if i > start:
+                    self.add_slice(line, start, i)
+                if i == end:
+                    break
+                if c == escapechar:
+                    self.state = ESCAPED_CHAR
+                elif c == delimiter:
+                    self.save_field()
+                    self.state = START_FIELD
+                else:
+                    self.save_field()
+                    self.state = EAT_CRNL
+            elif state == IN_QUOTED_FIELD:
+                start = i
+                while c != quotechar and c != escapechar:
+                    i += 1
+                    if i == end:
+                        break
+                    c = line[i]
+                if i > start:
+                    self.add_slice(line, start, i)
+                if i == end:
+                    break
+                if c == escapechar:
+                    self.state = ESCAPE_IN_QUOTED_FIELD
+                elif dialect.doublequote:
+                    self.state = QUOTE_IN_QUOTED_FIELD
+                else:
+                    # end of the quoted part of the field
+                    self.state = IN_FIELD
+            elif state == START_RECORD:
+                if c == '\n' or c == '\r':
+                    self.state = EAT_CRNL
+                else:
+                    # process the same character again
+                    self.state = START_FIELD
+                    continue
+            elif state == START_FIELD:
+                if c == '\n' or c == '\r':
+                    # save an empty field
+                    self.save_field()
+                    self.state = EAT_CRNL
+                elif c == quotechar:
+                    self.state = IN_QUOTED_FIELD
+                elif c == escapechar:
+                    self.state = ESCAPED_CHAR
+                elif c == ' ' and dialect.skipinitialspace:
+                    pass
+                elif c == delimiter:
+                    # save an empty field
+                    self.save_field()
+                else:
+                    # begin a new unquoted field
+                    if dialect.quoting == QUOTE_NONNUMERIC:
+                        self.numeric_field = True
+                    self.add_char(c)
+                    self.state = IN_FIELD
+            elif state == ESCAPED_CHAR:
+                self.add_char(c)
+                self.state = IN_FIELD
+            elif state == ESCAPE_IN_QUOTED_FIELD:
+                self.add_char(c)
+                self.state = IN_QUOTED_FIELD
+            elif state == QUOTE_IN_QUOTED_FIELD:
+                # doublequote: a quote was seen in a quoted field
+                if c == quotechar:
+                    # save "" as "
+                    self.add_char(c)
+                    self.state = IN_QUOTED_FIELD
+                elif c == delimiter:
+                    self.save_field()
+                    self.state = START_FIELD
+                elif c == '\n' or c == '\r':
+                    self.save_field()
+                    self.state = EAT_CRNL
+                elif not dialect.strict:
+                    self.add_char(c)
+                    self.state = IN_FIELD
+                else:
+                    raise self.error("'%s' expected after '%s'" %
+                                     (delimiter, dialect.quotechar))
+            else:
+                assert state == EAT_CRNL
+                if c != '\n' and c != '\r':
+                    raise self.error("new-line character seen in unquoted "
+                                     "field - do you need to open the file "
+                                     "in universal-newline mode?")
+            i += 1
+
+    def parse_eol(self):
+        state = self.state
+        if state == EAT_CRNL:
+            self.state = START_RECORD
+        elif state == START_RECORD:
+            # empty line: return []
+            pass
+        elif state == IN_FIELD or state == START_FIELD:
+            self.save_field()
+            self.state = START_RECORD
+        elif state == ESCAPED_CHAR:
+            self.add_char('\n')
+            self.state = IN_FIELD
+        elif state == IN_QUOTED_FIELD:
+            pass
+        elif state == ESCAPE_IN_QUOTED_FIELD:
+            self.add_char('\n')
+            self.state = IN_QUOTED_FIELD
+        else:
+            assert state == QUOTE_IN_QUOTED_FIELD
+            self.save_field()
+            self.state = START_RECORD
+
+    def descr_iter(self, space):
+        return space.wrap(self)
+
+    def descr_next(self, space):
+        self.parse_reset()
+        while True:
+            try:
+                w_line = space.next(self.w_iter)
+            except OperationError, e:
+                if (e.match(space, space.w_StopIteration) and
+                        self.field_len > 0):
+                    raise self.error("newline inside string")
+                raise
+            self.line_num += 1
+            if space.isinstance_w(w_line, space.w_unicode):
+                w_line = space.call_method(w_line, 'encode')
+            elif not space.isinstance_w(w_line, space.w_str):
+                raise self.error("expected string or Unicode object, %s "
+                                 "found" % (space.type(w_line).getname(space),))
+            line = space.str_w(w_line)
+            if line.find('\0') >= 0:
+                raise self.error("line contains NULL byte")
+            self.parse_line(line)
+            self.parse_eol()
+            if self.state == START_RECORD:
+                break
+        fields = self.fields
+        self.fields = []
+        if self.dialect.quoting != QUOTE_NONNUMERIC:
+            return space.newlist_str(fields)
+        fields_w = [None] * len(fields)
+        for i in range(len(fields)):
+            w_field = space.wrap(fields[i])
+            if self.numeric_fields[i]:
+                w_field = space.call_function(space.w_float, w_field)
+            fields_w[i] = w_field
+        return space.newlist(fields_w)
+
+W_Reader.typedef = TypeDef("_csv.reader",
+    __module__ = "_csv",
+    __doc__ = W_Reader.__doc__,
+    __iter__ = interp2app(W_Reader.descr_iter),
+    next = interp2app(W_Reader.descr_next),
+    dialect = interp_attrproperty_w("dialect", W_Reader),
+    line_num = interp_attrproperty("line_num", W_Reader),
+)
+W_Reader.typedef.acceptable_as_base_class = False
+
+def csv_reader(space, w_iterator, __args__):
+    """
+    csv_reader = reader(iterable [, dialect='excel']
+                       [optional keyword args])
+    for row in csv_reader:
+        process(row)
+
+    The "iterable" argument can be any object that returns a line
+    of input for each iteration, such as a file object or a list.  The
+    optional "dialect" parameter is discussed below.  The function
+    also accepts optional keyword arguments which override settings
+    provided by the dialect.
+
+    The returned object is an iterator.  Each iteration returns a row
+    of the CSV file (which can span multiple input lines)"""
+    w_iter = space.iter(w_iterator)
+    args_w, kwds_w = __args__.unpack()
+    dialect = dialect_from_args(space, args_w, kwds_w)
+    return space.wrap(W_Reader(space, dialect, w_iter))
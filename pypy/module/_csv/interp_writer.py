@@ -0,0 +1,179 @@
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef, interp_attrproperty_w
+from pypy.module._csv.interp_csv import (csv_error, dialect_from_args, NOCHAR,
+    QUOTE_ALL, QUOTE_NONE, QUOTE_NONNUMERIC)
+from pypy.rlib.rstring import StringBuilder
+
+
+class W_Writer(Wrappable):
+    """CSV writer
+
+Writer objects are responsible for generating tabular data
+in CSV format from sequence input."""
+
+    def __init__(self, space, dialect, w_write):
+        self.space = space
+        self.dialect = dialect
+        self.w_write = w_write
+
+    def error(self, msg):
+        return csv_error(self.space, msg)
+
+    def is_special(self, c):
+        dialect = self.dialect
+        return (c == dialect.delimiter or
+                (c == dialect.escapechar and c != NOCHAR) or
+                (c == dialect.quotechar and c != NOCHAR) or
+                dialect.lineterminator.find(c) >= 0)
+
+    def append_field(self, builder, field, quoted, quote_empty):
+        """ Appends 'field' to 'builder', quoting and escaping it as
+        required by the dialect.
+        """
+        dialect = self.dialect
+        for i in range(len(field)):
+            if self.is_special(field[i]):
+                break
+        else:
+            # nothing to escape, the field is copied as a whole
+            if not field and quote_empty:
+                if dialect.quoting == QUOTE_NONE:
+                    raise self.error("single empty field record must be "
+                                     "quoted")
+                quoted = True
+            if quoted:
+                builder.append(dialect.quotechar)
+                builder.append(field)
+                builder.append(dialect.quotechar)
+            else:
+                builder.append(field)
+            return
+        body = StringBuilder(len(field) + 8)
+        for c in field:
+            if self.is_special(c):
+                want_escape = False
+                if dialect.quoting == QUOTE_NONE:
+                    want_escape = True
+                else:
+                    if c == dialect.quotechar:
+                        if dialect.doublequote:
+                            body.append(c)
+                        else:
+                            want_escape = True
+                    if not want_escape:
+                        quoted = True
+                if want_escape:
+                    if dialect.escapechar == NOCHAR:
+                        raise self.error("need to escape, but no escapechar "
+                                         "set")
+                    body.append(dialect.escapechar)
+            body.append(c)
+        if quoted:
+            builder.append(dialect.quotechar)
+            builder.append(body.build())
+            builder.append(dialect.quotechar)
+        else:
+            builder.append(body.build())
+
+    def field_str(self, w_field):
+        space = self.space
+        if space.is_w(w_field, space.w_None):
+            return ''
+        if space.is_w(space.type(w_field), space.w_str):
+            return space.str_w(w_field)
+        return space.str_w(space.str(w_field))
+
+    def is_quoted(self, w_field):
+        quoting = self.dialect.quoting
+        if quoting == QUOTE_ALL:
+            return True
+        if quoting == QUOTE_NONNUMERIC:
+            space = self.space
+            return not (space.isinstance_w(w_field, space.w_int) or
+                        space.isinstance_w(w_field, space.w_long) or
+                        space.isinstance_w(w_field, space.w_float))
+        return False
+
+    def descr_writerow(self, space, w_fields):
+        """writerow(sequence)
+
+Construct and write a CSV record from a sequence of fields.  Non-string
+elements will be converted to string."""
+        try:
+            length = space.len_w(w_fields)
+        except OperationError, e:
+            if not e.match(space, space.w_TypeError):
+                raise
+            raise self.error("sequence expected")
+        builder = StringBuilder()
+        delimiter = self.dialect.delimiter
+        quote_empty = length == 1
+        # a list of strs is written without wrapping its items
+        fields = None
+        if (space.is_w(space.type(w_fields), space.w_list) and
+                self.dialect.quoting != QUOTE_ALL and
+                self.dialect.quoting != QUOTE_NONNUMERIC):
+            fields = space.listview_str(w_fields)
+        if fields is not None:
+            for i in range(len(fields)):
+                if i > 0:
+                    builder.append(delimiter)
+                self.append_field(builder, fields[i], False, quote_empty)
+        else:
+            fields_w = space.fixedview(w_fields)
+            for i in range(len(fields_w)):
+                if i > 0:
+                    builder.append(delimiter)
+                w_field = fields_w[i]
+                self.append_field(builder, self.field_str(w_field),
+                                  self.is_quoted(w_field), quote_empty)
+        builder.append(self.dialect.lineterminator)
+        return space.call_function(self.w_write, space.wrap(builder.build()))
+
+    def descr_writerows(self, space, w_rows):
+        """writerows(sequence of sequences)
+
+Construct and write a series of sequences to a csv file.  Non-string
+elements will be converted to string."""
+        w_iter = space.iter(w_rows)
+        while True:
+            try:
+                w_row = space.next(w_iter)
+            except OperationError, e:
+                if not e.match(space, space.w_StopIteration):
+                    raise
+                break
+            self.descr_writerow(space, w_row)
+
+W_Writer.typedef = TypeDef("_csv.writer",
+    __module__ = "_csv",
+    __doc__ = W_Writer.__doc__,
+    writerow = interp2app(W_Writer.descr_writerow),
+    writerows = interp2app(W_Writer.descr_writerows),
+    dialect = interp_attrproperty_w("dialect", W_Writer),
+)
+W_Writer.typedef.acceptable_as_base_class = False
+
+def csv_writer(space, w_fileobj, __args__):
+    """
+    csv_writer = csv.writer(fileobj [, dialect='excel']
+                            [optional keyword args])
+    for row in sequence:
+        csv_writer.writerow(row)
+
+    [or]
+
+    csv_writer = csv.writer(fileobj [, dialect='excel']
+                            [optional keyword args])
+    csv_writer.writerows(rows)
+
+    The "fileobj" argument can be any object that supports the file API."""
+    w_write = space.findattr(w_fileobj, space.wrap('write'))
+    if w_write is None or not space.is_true(space.callable(w_write)):
+        raise OperationError(space.w_TypeError, space.wrap(
+            'argument 1 must have a "write" method'))
+    args_w, kwds_w = __args__.unpack()
+    dialect = dialect_from_args(space, args_w, kwds_w)
+    return space.wrap(W_Writer(space, dialect, w_write))
@@ -0,0 +1,219 @@
+from pypy.conftest import gettestobjspace
+
+
+class AppTestCsv:
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=('_csv',))
+
+    def test_module(self):
+        import _csv
+        assert _csv.reader.__module__ == '_csv'
+        assert _csv.Dialect.__module__ == '_csv'
+        assert issubclass(_csv.Error, Exception)
+        assert _csv.QUOTE_MINIMAL == 0
+        assert _csv.QUOTE_NONE == 3
+        assert _csv.__version__ == "1.0"
+
+    def test_dialect(self):
+        import _csv
+        d = _csv.Dialect()
+        assert d.delimiter == ','
+        assert d.quotechar == '"'
+        assert d.escapechar is None
+        assert d.doublequote is True
+        assert d.lineterminator == '\r\n'
+        assert d.quoting == _csv.QUOTE_MINIMAL
+        assert d.skipinitialspace is False
+        assert d.strict is False
+        raises(AttributeError, setattr, d, 'quoting', 1)
+        raises(AttributeError, delattr, d, 'quoting')
+        d = _csv.Dialect(delimiter=';', quotechar=None)
+        assert d.delimiter == ';'
+        assert d.quotechar is None
+        assert d.quoting == _csv.QUOTE_NONE
+        class excel_tab:
+            delimiter = '\t'
+        assert _csv.Dialect(excel_tab).delimiter == '\t'
+        assert _csv.Dialect(dialect=excel_tab, delimiter='|').delimiter == '|'
+        class MyDialect(_csv.Dialect):
+            pass
+        d = MyDialect(delimiter=':')
+        assert type(d) is MyDialect
+        assert d.delimiter == ':'
+
+    def test_bad_dialect(self):
+        import _csv
+        raises(TypeError, _csv.Dialect, delimiter='')
+        raises(TypeError, _csv.Dialect, delimiter='::')
+        raises(TypeError, _csv.Dialect, delimiter=1)
+        raises(TypeError, _csv.Dialect, quoting=7)
+        raises(TypeError, _csv.Dialect, quotechar=None,
+               quoting=_csv.QUOTE_ALL)
+        raises(TypeError, _csv.Dialect, lineterminator='')
+        raises(TypeError, _csv.Dialect, lineterminator=4)
+        raises(TypeError, _csv.Dialect, badargument=1)
+        raises(TypeError, _csv.Dialect, 'excel', 'excel')
+
+    def test_registry(self):
+        import _csv
+        _csv.register_dialect('semi', delimiter=';')
+        try:
+            assert 'semi' in _csv.list_dialects()
+            assert _csv.get_dialect('semi').delimiter == ';'
+            r = _csv.reader(['a;b'], 'semi')
+            assert r.dialect.delimiter == ';'
+            assert list(r) == [['a', 'b']]
+        finally:
+            _csv.unregister_dialect('semi')
+        raises(_csv.Error, _csv.get_dialect, 'semi')
+        raises(_csv.Error, _csv.unregister_dialect, 'semi')
+        raises(_csv.Error, _csv.reader, [], 'semi')
+        raises(TypeError, _csv.register_dialect, None)
+        raises(TypeError, _csv.register_dialect, 'x', delimiter=4)
+
+    def test_field_size_limit(self):
+        import _csv
+        old = _csv.field_size_limit()
+        assert old == 128 * 1024
+        assert _csv.field_size_limit(5) == old
+        try:
+            assert list(_csv.reader(['12345'])) == [['12345']]
+            raises(_csv.Error, list, _csv.reader(['123456']))
+            raises(_csv.Error, list, _csv.reader(['"123","456"\n',
+                                                  '"1234\n',
+                                                  '5"']))
+        finally:
+            _csv.field_size_limit(old)
+        raises(TypeError, _csv.field_size_limit, 'x')
+        raises(TypeError, _csv.field_size_limit, 1, 2)
+
+    def test_reader(self):
+        import _csv
+        def parse(lines, **kwds):
+            return list(_csv.reader(lines, **kwds))
+        assert parse([]) == []
+        assert parse(['']) == [[]]
+        assert parse(['abc,def,ghi\r\n', 'x\n']) == [['abc', 'def', 'ghi'],
+                                                     ['x']]
+        assert parse([',']) == [['', '']]
+        assert parse(['a,"b,c",d']) == [['a', 'b,c', 'd']]
+        assert parse(['"a""b"']) == [['a"b']]
+        assert parse(['"a\n', 'b"\n', 'c']) == [['a\nb'], ['c']]
+        assert parse(['a, b'], skipinitialspace=True) == [['a', 'b']]
+        assert parse(['a\\,b'], escapechar='\\') == [['a,b']]
+        assert parse(['"a\\"b"'], escapechar='\\', doublequote=False) == [
+            ['a"b']]
+        assert parse(['a"b"c']) == [['a"b"c']]
+        assert parse(['"a"b']) == [['ab']]
+        assert parse(['"a",b'], quoting=_csv.QUOTE_NONE) == [['"a"', 'b']]
+        assert parse([u'a,b']) == [['a', 'b']]
+        assert type(parse(['x'])[0][0]) is str
+
+    def test_reader_errors(self):
+        import _csv
+        def parse(lines, **kwds):
+            return list(_csv.reader(lines, **kwds))
+        raises(_csv.Error, parse, ['"a'])
+        raises(_csv.Error, parse, ['a\0b'])
+        raises(_csv.Error, parse, [42])
+        raises(_csv.Error, parse, ['a\rb'])
+        raises(_csv.Error, parse, ['"a"b'], strict=True)
+        raises(TypeError, _csv.reader)
+        raises(TypeError, _csv.reader, None)
+        raises(TypeError, _csv.reader, [], foo=1)
+
+    def test_reader_iterator(self):
+        import _csv
+        def lines():
+            for i in range(3):
+                yield '%d,"x%d"\n' % (i, i)
+        r = _csv.reader(lines())
+        assert iter(r) is r
+        assert r.line_num == 0
+        assert r.next() == ['0', 'x0']
+        assert r.line_num == 1
+        assert list(r) == [['1', 'x1'], ['2', 'x2']]
+        assert r.line_num == 3
+        raises(StopIteration, r.next)
+
+    def test_reader_nonnumeric(self):
+        import _csv
+        r = _csv.reader(['1,"2",3.5,,"x"'], quoting=_csv.QUOTE_NONNUMERIC)
+        assert r.next() == [1.0, '2', 3.5, '', 'x']
+        r = _csv.reader(['a'], quoting=_csv.QUOTE_NONNUMERIC)
+        raises(ValueError, r.next)
+
+    def test_writer(self):
+        import _csv
+        class Output(object):
+            def __init__(self):
+                self.data = []
+            def write(self, s):
+                self.data.append(s)
+        def write(row, **kwds):
+            out = Output()
+            _csv.writer(out, **kwds).writerow(row)
+            return ''.join(out.data)
+        assert write([]) == '\r\n'
+        assert write(['a', 'b']) == 'a,b\r\n'
+        assert write(['a,b', 'c"d', 'e\nf']) == '"a,b","c""d","e\nf"\r\n'
+        assert write([1, 2.5, 0.1, None, u'x']) == '1,2.5,0.1,,x\r\n'
+        assert write(('a', 1)) == 'a,1\r\n'
+        assert write(['']) == '""\r\n'
+        assert write(['', '']) == ',\r\n'
+        assert write(['a'], lineterminator='\n') == 'a\n'
+        assert write(['a', 'b'], quoting=_csv.QUOTE_ALL) == '"a","b"\r\n'
+        assert write(['a', 1, 2.5], quoting=_csv.QUOTE_NONNUMERIC) == \
+               '"a",1,2.5\r\n'
+        assert write(['a,b', 'c"d'], quoting=_csv.QUOTE_NONE,
+                     escapechar='\\') == 'a\\,b,c\\"d\r\n'
+        assert write(['c"d'], doublequote=False, escapechar='\\') == \
+               'c\\"d\r\n'
+        assert write(['a|b'], delimiter='|') == '"a|b"\r\n'
+
+    def test_writer_errors(self):
+        import _csv
+        class Output(object):
+            def write(self, s):
+                return len(s)
+        w = _csv.writer(Output())
+        assert w.writerow(['ab']) == 4
+        raises(_csv.Error, w.writerow, 42)
+        raises(_csv.Error, _csv.writer(Output(),
+                                       quoting=_csv.QUOTE_NONE).writerow, [''])
+        raises(_csv.Error, _csv.writer(Output(),
+                                       quoting=_csv.QUOTE_NONE).writerow,
+               ['a,b'])
+        raises(_csv.Error, _csv.writer(Output(), doublequote=False).writerow,
+               ['a"b'])
+        raises(TypeError, _csv.writer, None)
+        raises(TypeError, _csv.writer)
+
+    def test_writerows(self):
+        import _csv
+        class Output(object):
+            def __init__(self):
+                self.data = []
+            def write(self, s):
+                self.data.append(s)
+        out = Output()
+        w = _csv.writer(out)
+        w.writerows(iter([['a', 'b'], [1, 2]]))
+        assert out.data == ['a,b\r\n', '1,2\r\n']
+        assert w.dialect.delimiter == ','
+
+    def test_roundtrip(self):
+        import _csv
+        class Output(object):
+            def __init__(self):
+                self.data = []
+            def write(self, s):
+                self.data.append(s)
+        rows = [['a', 'b,c', 'd"e'], ['', 'x\r\ny', ' z '], ['1']]
+        for kwds in [{}, {'quoting': _csv.QUOTE_ALL},
+                     {'delimiter': '\t', 'lineterminator': '\n'}]:
+            out = Output()
+            _csv.writer(out, **kwds).writerows(rows)
+            text = ''.join(out.data)
+            lines = text.splitlines(True)
+            assert list(_csv.reader(lines, **kwds)) == rows
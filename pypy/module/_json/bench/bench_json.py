@@ -0,0 +1,73 @@
+""" Times json.loads() and json.dumps() on a few payloads that look like
+the ones real programs exchange.  Run it with a pypy-c, with and without
+the _json module, or with CPython to compare:
+
+    pypy-c bench_json.py [repetitions]
+"""
+
+import sys, time, random
+import json
+
+def count_operation(name, function, repeat):
+    t0 = time.time()
+    for i in xrange(repeat):
+        function()
+    tk = time.time()
+    print "%-30s takes: %f" % (name, tk - t0)
+
+def make_api_records(n):
+    # the answer of a REST API: a list of small objects with the same keys
+    rnd = random.Random(42)
+    return [{"id": i,
+             "login": "user%d" % i,
+             "email": "user%d@example.com" % i,
+             "score": rnd.random() * 100,
+             "admin": i % 17 == 0,
+             "tags": ["tag%d" % rnd.randrange(20) for j in range(3)],
+             "manager": None if i % 5 else i - 1}
+            for i in range(n)]
+
+def make_config(depth, width):
+    # a deeply nested configuration document
+    if depth == 0:
+        return {"enabled": True, "timeout": 30, "path": "/var/lib/app"}
+    return dict(("section%d" % i, make_config(depth - 1, width))
+                for i in range(width))
+
+def make_numeric(n):
+    # columns of numbers, like a time series
+    rnd = random.Random(42)
+    return {"timestamps": range(1300000000, 1300000000 + n),
+            "values": [rnd.gauss(0, 1) for i in range(n)],
+            "counts": [rnd.randrange(1000) for i in range(n)]}
+
+def make_text(n):
+    # a list of messages with non-ASCII text and escapes
+    base = u"Gr\xfc\xdfe aus K\xf6ln \u2014 \u65e5\u672c\u8a9e \"quoted\"\n"
+    return [{"author": u"\xe9crivain%d" % i, "text": base * (1 + i % 4)}
+            for i in range(n)]
+
+PAYLOADS = [
+    ("api records", make_api_records(2000)),
+    ("nested config", make_config(5, 4)),
+    ("numeric columns", make_numeric(20000)),
+    ("unicode text", make_text(2000)),
+]
+
+def main(repeat):
+    for name, data in PAYLOADS:
+        text = json.dumps(data)
+        print "%s: %d bytes" % (name, len(text))
+        count_operation("  dumps", lambda: json.dumps(data), repeat)
+        count_operation("  dumps(sort_keys, indent)",
+                        lambda: json.dumps(data, sort_keys=True, indent=2),
+                        repeat)
+        count_operation("  loads", lambda: json.loads(text), repeat)
+        assert json.loads(text) == json.loads(json.dumps(json.loads(text)))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        repeat = int(sys.argv[1])
+    else:
+        repeat = 20
+    main(repeat)
@@ -0,0 +1,524 @@
+""" The decoding half of _json: scanstring() and the scanner returned by
+make_scanner().
+
+The scanner parses a whole JSON document at interp-level and builds the
+resulting objects directly: arrays are created with space.newlist(), so
+that lists of ints or floats get their unwrapped strategy right away, and
+objects are filled key by key into space.newdict(), which switches to the
+unicode strategy since all the keys are unicodes.  Numbers are converted
+without going through int() or float() unless the decoder was given its
+own parse_int or parse_float.
+"""
+
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef
+from pypy.interpreter.unicodehelper import PyUnicode_DecodeUTF8
+from pypy.rlib import rstackovf
+from pypy.rlib.objectmodel import specialize
+from pypy.rlib.rarithmetic import ovfcheck
+from pypy.rlib.rfloat import rstring_to_float
+from pypy.rlib.rstring import StringBuilder, UnicodeBuilder
+from pypy.rlib.runicode import MAXUNICODE
+
+DEFAULT_ENCODING = "utf-8"
+
+def _is_whitespace(c):
+    return c == ord(' ') or c == ord('\t') or c == ord('\n') or c == ord('\r')
+
+def _is_digit(c):
+    return ord('0') <= c <= ord('9')
+
+def _hexdigit(c):
+    if ord('0') <= c <= ord('9'):
+        return c - ord('0')
+    if ord('a') <= c <= ord('f'):
+        return c - (ord('a') - 10)
+    if ord('A') <= c <= ord('F'):
+        return c - (ord('A') - 10)
+    return -1
+
+def _char_repr(c):
+    # like repr() of the character, for the error messages
+    if 0x20 <= c < 0x7f and c != ord("'") and c != ord('\\'):
+        return "'%s'" % (chr(c),)
+    if c < 0x100:
+        prefix, width = "'\\x", 2
+    elif c < 0x10000:
+        prefix, width = "u'\\u", 4
+    else:
+        prefix, width = "u'\\U", 8
+    digits = ['0'] * width
+    for i in range(width):
+        digits[width - 1 - i] = "0123456789abcdef"[c & 0xf]
+        c >>= 4
+    return prefix + ''.join(digits) + "'"
+
+# the characters that follow a backslash, other than 'u'
+_ESCAPES = {'"': u'"', '\\': u'\\', '/': u'/', 'b': u'\b', 'f': u'\f',
+            'n': u'\n', 'r': u'\r', 't': u'\t'}
+
+
+def make_decoder_class(is_unicode):
+    """ Returns a class that decodes either a str or a unicode; its
+    instances only live for the duration of one scanstring() or one
+    call to a scanner.
+    """
+
+    class Decoder(object):
+        def __init__(self, space, s, encoding, strict):
+            self.space = space
+            self.s = s
+            self.encoding = encoding
+            self.strict = strict
+            self.pos = 0
+            self.scanner = None
+            # the same keys are usually found many times in a document:
+            # share their unicode objects
+            self.key_memo = {}
+
+        def error(self, msg, pos):
+            s = self.s
+            lineno = 1
+            last_newline = -1
+            for i in range(min(pos, len(s))):
+                if ord(s[i]) == ord('\n'):
+                    lineno += 1
+                    last_newline = i
+            if lineno == 1:
+                colno = pos
+            else:
+                colno = pos - last_newline
+            return OperationError(self.space.w_ValueError, self.space.wrap(
+                "%s: line %d column %d (char %d)" % (msg, lineno, colno, pos)))
+
+        def ascii_slice(self, start, end):
+            # the slice is known to contain only ASCII characters
+            assert 0 <= start <= end
+            if is_unicode:
+                builder = StringBuilder(end - start)
+                for i in range(start, end):
+                    builder.append(chr(ord(self.s[i])))
+                return builder.build()
+            else:
+                return self.s[start:end]
+
+        def skip_whitespace(self, i):
+            s = self.s
+            length = len(s)
+            while i < length and _is_whitespace(ord(s[i])):
+                i += 1
+            return i
+
+        def startswith(self, i, prefix):
+            s = self.s
+            if i + len(prefix) > len(s):
+                return False
+            for j in range(len(prefix)):
+                if ord(s[i + j]) != ord(prefix[j]):
+                    return False
+            return True
+
+        # ____________________________________________________________
+        # strings
+
+        def append_chunk(self, builder, start, end, has_high):
+            s = self.s
+            if is_unicode:
+                builder.append_slice(s, start, end)
+            elif not has_high:
+                for i in range(start, end):
+                    builder.append(unichr(ord(s[i])))
+            else:
+                assert 0 <= start <= end
+                chunk = s[start:end]
+                space = self.space
+                if self.encoding == DEFAULT_ENCODING:
+                    builder.append(PyUnicode_DecodeUTF8(space, chunk))
+                else:
+                    w_chunk = space.call_method(space.wrap(chunk), 'decode',
+                                                space.wrap(self.encoding))
+                    builder.append(space.unicode_w(w_chunk))
+
+        def read_hex4(self, i):
+            # the value of the 4 hex digits at 'i', or -1
+            s = self.s
+            if i + 4 > len(s):
+                return -1
+            value = 0
+            for j in range(i, i + 4):
+                digit = _hexdigit(ord(s[j]))
+                if digit < 0:
+                    return -1
+                value = (value << 4) | digit
+            return value
+
+        def scan_string(self, end):
+            """ Decodes the JSON string starting after the quote at
+            'end - 1'.  Sets self.pos after the closing quote.
+            """
+            s = self.s
+            length = len(s)
+            begin = end - 1
+            builder = UnicodeBuilder()
+            while True:
+                i = end
+                has_high = False
+                while i < length:
+                    c = ord(s[i])
+                    if c == ord('"') or c == ord('\\') or c < 0x20:
+                        break
+                    if c >= 0x80:
+                        has_high = True
+                    i += 1
+                if i >= length:
+                    raise self.error("Unterminated string starting at", begin)
+                if i > end:
+                    self.append_chunk(builder, end, i, has_high)
+                terminator = ord(s[i])
+                end = i + 1
+                if terminator == ord('"'):
+                    break
+                if terminator != ord('\\'):
+                    if self.strict:
+                        raise self.error("Invalid control character %s at"
+                                         % (_char_repr(terminator),), i)
+                    builder.append(unichr(terminator))
+                    continue
+                if end >= length:
+                    raise self.error("Unterminated string starting at", begin)
+                esc = ord(s[end])
+                if esc != ord('u'):
+                    if esc >= 0x80 or chr(esc) not in _ESCAPES:
+                        raise self.error("Invalid \\escape: %s"
+                                         % (_char_repr(esc),), end)
+                    builder.append(_ESCAPES[chr(esc)])
+                    end += 1
+                    continue
+                uni = self.read_hex4(end + 1)
+                if uni < 0:
+                    raise self.error("Invalid \\uXXXX escape", end)
+                next_end = end + 5
+                if 0xd800 <= uni <= 0xdbff and MAXUNICODE > 65535:
+                    msg = "Invalid \\uXXXX\\uXXXX surrogate pair"
+                    if not (next_end + 1 < length and
+                            ord(s[next_end]) == ord('\\') and
+                            ord(s[next_end + 1]) == ord('u')):
+                        raise self.error(msg, end)
+                    uni2 = self.read_hex4(next_end + 2)
+                    if uni2 < 0:
+                        raise self.error(msg, end)
+                    uni = 0x10000 + (((uni - 0xd800) << 10) |
+                                     (uni2 - 0xdc00))
+                    next_end += 6
+                builder.append(unichr(uni))
+                end = next_end
+            self.pos = end
+            return builder.build()
+
+        def decode_key(self, i):
+            key = self.scan_string(i)
+            w_key = self.key_memo.get(key, None)
+            if w_key is None:
+                w_key = self.space.wrap(key)
+                self.key_memo[key] = w_key
+            return w_key
+
+        # ____________________________________________________________
+        # the scanner
+
+        def decode_any(self, i):
+            """ Decodes the value at 'i' and sets self.pos after it.
+            Returns None if no value starts at 'i'.
+            """
+            s = self.s
+            space = self.space
+            if i >= len(s):
+                return None
+            c = ord(s[i])
+            if c == ord('"'):
+                return space.wrap(self.scan_string(i + 1))
+            elif c == ord('{'):
+                return self.decode_object(i + 1)
+            elif c == ord('['):
+                return self.decode_array(i + 1)
+            elif c == ord('n') and self.startswith(i, 'null'):
+                self.pos = i + 4
+                return space.w_None
+            elif c == ord('t') and self.startswith(i, 'true'):
+                self.pos = i + 4
+                return space.w_True
+            elif c == ord('f') and self.startswith(i, 'false'):
+                self.pos = i + 5
+                return space.w_False
+            elif c == ord('N') and self.startswith(i, 'NaN'):
+                return self.decode_constant(i, 'NaN')
+            elif c == ord('I') and self.startswith(i, 'Infinity'):
+                return self.decode_constant(i, 'Infinity')
+            elif c == ord('-') and self.startswith(i, '-Infinity'):
+                return self.decode_constant(i, '-Infinity')
+            return self.decode_number(i)
+
+        def decode_constant(self, i, name):
+            self.pos = i + len(name)
+            return self.space.call_function(self.scanner.w_parse_constant,
+                                            self.space.wrap(name))
+
+        def decode_number(self, i):
+            s = self.s
+            space = self.space
+            length = len(s)
+            start = i
+            if i < length and ord(s[i]) == ord('-'):
+                i += 1
+            if i >= length:
+                return None
+            c = ord(s[i])
+            if c == ord('0'):
+                i += 1
+            elif ord('1') <= c <= ord('9'):
+                i += 1
+                while i < length and _is_digit(ord(s[i])):
+                    i += 1
+            else:
+                return None
+            int_end = i
+            is_float = False
+            if (i + 1 < length and ord(s[i]) == ord('.') and
+                    _is_digit(ord(s[i + 1]))):
+                is_float = True
+                i += 2
+                while i < length and _is_digit(ord(s[i])):
+                    i += 1
+            if i < length and (ord(s[i]) == ord('e') or ord(s[i]) == ord('E')):
+                exp_start = i
+                i += 1
+                if i < length and (ord(s[i]) == ord('-') or ord(s[i]) == ord('+')):
+                    i += 1
+                digits_start = i
+                while i < length and _is_digit(ord(s[i])):
+                    i += 1
+                if i > digits_start:
+                    is_float = True
+                else:
+                    i = exp_start
+            self.pos = i
+            scanner = self.scanner
+            if is_float:
+                if scanner.w_parse_float is None:
+                    return space.newfloat(
+                        rstring_to_float(self.ascii_slice(start, i)))
+                return space.call_function(scanner.w_parse_float,
+                                           space.wrap(self.ascii_slice(start, i)))
+            if scanner.w_parse_int is not None:
+                return space.call_function(scanner.w_parse_int,
+                                           space.wrap(self.ascii_slice(start, i)))
+            digits_start = start
+            if ord(s[start]) == ord('-'):
+                digits_start += 1
+            value = 0
+            try:
+                for j in range(digits_start, int_end):
+                    value = ovfcheck(value * 10)
+                    value = ovfcheck(value + (ord(s[j]) - ord('0')))
+            except OverflowError:
+                return space.call_function(space.w_int,
+                                           space.wrap(self.ascii_slice(start, i)))
+            if digits_start != start:
+                value = -value
+            return space.wrap(value)
+
+        def decode_array(self, i):
+            s = self.s
+            space = self.space
+            length = len(s)
+            items_w = []
+            i = self.skip_whitespace(i)
+            if i < length and ord(s[i]) == ord(']'):
+                self.pos = i + 1
+                return space.newlist(items_w)
+            while True:
+                w_item = self.decode_any(i)
+                if w_item is None:
+                    raise self.error("Expecting object", i)
+                items_w.append(w_item)
+                i = self.skip_whitespace(self.pos)
+                if i < length and ord(s[i]) == ord(']'):
+                    break
+                if i >= length or ord(s[i]) != ord(','):
+                    raise self.error("Expecting , delimiter", i)
+                i = self.skip_whitespace(i + 1)
+            self.pos = i + 1
+            return space.newlist(items_w)
+
+        def decode_object(self, i):
+            s = self.s
+            space = self.space
+            length = len(s)
+            w_pairs_hook = self.scanner.w_object_pairs_hook
+            if w_pairs_hook is not None:
+                pairs_w = []
+                w_dict = None
+            else:
+                pairs_w = None
+                w_dict = space.newdict()
+            i = self.skip_whitespace(i)
+            if i < length and ord(s[i]) == ord('}'):
+                i += 1
+            else:
+                while True:
+                    if i >= length or ord(s[i]) != ord('"'):
+                        raise self.error("Expecting property name", i)
+                    w_key = self.decode_key(i + 1)
+                    i = self.skip_whitespace(self.pos)
+                    if i >= length or ord(s[i]) != ord(':'):
+                        raise self.error("Expecting : delimiter", i)
+                    i = self.skip_whitespace(i + 1)
+                    w_value = self.decode_any(i)
+                    if w_value is None:
+                        raise self.error("Expecting object", i)
+                    if pairs_w is not None:
+                        pairs_w.append(space.newtuple([w_key, w_value]))
+                    else:
+                        space.setitem(w_dict, w_key, w_value)
+                    i = self.skip_whitespace(self.pos)
+                    if i < length and ord(s[i]) == ord('}'):
+                        i += 1
+                        break
+                    if i >= length or ord(s[i]) != ord(','):
+                        raise self.error("Expecting , delimiter", i)
+                    i = self.skip_whitespace(i + 1)
+            self.pos = i
+            if pairs_w is not None:
+                return space.call_function(w_pairs_hook,
+                                           space.newlist(pairs_w))
+            if self.scanner.w_object_hook is not None:
+                return space.call_function(self.scanner.w_object_hook, w_dict)
+            return w_dict
+
+    Decoder.__name__ = 'UnicodeDecoder' if is_unicode else 'StrDecoder'
+    return Decoder
+
+StrDecoder = make_decoder_class(False)
+UnicodeDecoder = make_decoder_class(True)
+
+def _recursion_error(space):
+    return OperationError(space.w_RuntimeError, space.wrap(
+        "maximum recursion depth exceeded while decoding a JSON document"))
+
+def _check_end(space, end, length):
+    if end < 0 or end > length:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("end is out of bounds"))
+
+@unwrap_spec(end=int, strict=bool)
+def scanstring(space, w_s, end, w_encoding=None, strict=True):
+    """scanstring(basestring, end, encoding, strict=True) -> (str, end)
+
+Scan the string s for a JSON string. End is the index of the
+character in s after the quote that started the JSON string.
+Unescapes all valid JSON string escape sequences and raises ValueError
+on attempt to decode an invalid string. If strict is False then literal
+control characters are allowed in the string.
+
+Returns a tuple of the decoded string and the index of the character in s
+after the end quote."""
+    if space.isinstance_w(w_s, space.w_unicode):
+        s = space.unicode_w(w_s)
+        _check_end(space, end, len(s))
+        return _scanstring(space, UnicodeDecoder(space, s, DEFAULT_ENCODING,
+                                                 strict), end)
+    elif space.isinstance_w(w_s, space.w_str):
+        if space.is_w(w_encoding, space.w_None):
+            encoding = DEFAULT_ENCODING
+        else:
+            encoding = space.str_w(w_encoding)
+        s = space.str_w(w_s)
+        _check_end(space, end, len(s))
+        return _scanstring(space, StrDecoder(space, s, encoding, strict), end)
+    else:
+        raise operationerrfmt(space.w_TypeError,
+            "first argument must be a string, not %s",
+            space.type(w_s).getname(space))
+
+@specialize.argtype(1)
+def _scanstring(space, decoder, end):
+    result = decoder.scan_string(end)
+    return space.newtuple([space.wrap(result), space.wrap(decoder.pos)])
+
+class W_Scanner(Wrappable):
+    """JSON scanner object"""
+
+    def __init__(self, space, w_context):
+        self.strict = space.is_true(space.getattr(w_context,
+                                                  space.wrap('strict')))
+        w_encoding = space.getattr(w_context, space.wrap('encoding'))
+        if space.is_w(w_encoding, space.w_None):
+            self.encoding = DEFAULT_ENCODING
+        else:
+            self.encoding = space.str_w(w_encoding)
+        self.w_object_hook = self._get_hook(space, w_context, 'object_hook')
+        self.w_object_pairs_hook = self._get_hook(space, w_context,
+                                                  'object_pairs_hook')
+        # None stands for the default float() and int(), which are
+        # done here without calling them
+        w_parse_float = space.getattr(w_context, space.wrap('parse_float'))
+        if space.is_w(w_parse_float, space.w_float):
+            w_parse_float = None
+        self.w_parse_float = w_parse_float
+        w_parse_int = space.getattr(w_context, space.wrap('parse_int'))
+        if space.is_w(w_parse_int, space.w_int):
+            w_parse_int = None
+        self.w_parse_int = w_parse_int
+        self.w_parse_constant = space.getattr(w_context,
+                                              space.wrap('parse_constant'))
+
+    @staticmethod
+    def _get_hook(space, w_context, name):
+        w_hook = space.getattr(w_context, space.wrap(name))
+        if space.is_w(w_hook, space.w_None):
+            return None
+        return w_hook
+
+    def descr__new__(space, w_subtype, w_context):
+        w_self = space.allocate_instance(W_Scanner, w_subtype)
+        W_Scanner.__init__(space.interp_w(W_Scanner, w_self), space,
+                           w_context)
+        return w_self
+
+    @unwrap_spec(idx=int)
+    def descr_call(self, space, w_string, idx):
+        if space.isinstance_w(w_string, space.w_unicode):
+            s = space.unicode_w(w_string)
+            return self.scan(space, UnicodeDecoder(space, s, self.encoding,
+                                                   self.strict), idx)
+        elif space.isinstance_w(w_string, space.w_str):
+            s = space.str_w(w_string)
+            return self.scan(space, StrDecoder(space, s, self.encoding,
+                                               self.strict), idx)
+        else:
+            raise operationerrfmt(space.w_TypeError,
+                "first argument must be a string, not %s",
+                space.type(w_string).getname(space))
+
+    @specialize.argtype(2)
+    def scan(self, space, decoder, idx):
+        decoder.scanner = self
+        w_result = None
+        if idx >= 0:
+            try:
+                w_result = decoder.decode_any(idx)
+            except rstackovf.StackOverflow:
+                rstackovf.check_stack_overflow()
+                raise _recursion_error(space)
+        if w_result is None:
+            raise OperationError(space.w_StopIteration, space.wrap(idx))
+        return space.newtuple([w_result, space.wrap(decoder.pos)])
+
+W_Scanner.typedef = TypeDef("Scanner",
+    __module__ = "_json",
+    __doc__ = W_Scanner.__doc__,
+    __new__ = interp2app(W_Scanner.descr__new__.im_func),
+    __call__ = interp2app(W_Scanner.descr_call),
+)
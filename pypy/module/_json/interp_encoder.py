@@ -0,0 +1,376 @@
+""" The encoding half of _json: encode_basestring_ascii() and the encoder
+returned by make_encoder().
+
+The encoder writes the whole JSON text of an object into a single
+StringBuilder, instead of producing chunks that are joined at the end.
+Lists and dicts whose strategy stores unwrapped ints or strs are walked
+without wrapping their items again.
+"""
+
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef
+from pypy.interpreter.unicodehelper import PyUnicode_DecodeUTF8
+from pypy.rlib import rstackovf
+from pypy.rlib.rfloat import formatd, isfinite, isinf, DTSF_ADD_DOT_0
+from pypy.rlib.rstring import StringBuilder
+
+HEXDIGITS = "0123456789abcdef"
+
+def _append_unicode_escape(builder, c):
+    builder.append('\\u')
+    builder.append(HEXDIGITS[(c >> 12) & 0xf])
+    builder.append(HEXDIGITS[(c >> 8) & 0xf])
+    builder.append(HEXDIGITS[(c >> 4) & 0xf])
+    builder.append(HEXDIGITS[c & 0xf])
+
+def _append_escaped_char(builder, c):
+    if c == ord('"'):
+        builder.append('\\"')
+    elif c == ord('\\'):
+        builder.append('\\\\')
+    elif c == ord('\n'):
+        builder.append('\\n')
+    elif c == ord('\r'):
+        builder.append('\\r')
+    elif c == ord('\t'):
+        builder.append('\\t')
+    elif c == ord('\b'):
+        builder.append('\\b')
+    elif c == ord('\f'):
+        builder.append('\\f')
+    elif c >= 0x10000:
+        # surrogate pair
+        c -= 0x10000
+        _append_unicode_escape(builder, 0xd800 | ((c >> 10) & 0x3ff))
+        _append_unicode_escape(builder, 0xdc00 | (c & 0x3ff))
+    else:
+        _append_unicode_escape(builder, c)
+
+def _needs_escape(c):
+    return c < 0x20 or c >= 0x7f or c == ord('"') or c == ord('\\')
+
+def _escape_ascii_unicode(builder, u):
+    for ch in u:
+        c = ord(ch)
+        if _needs_escape(c):
+            _append_escaped_char(builder, c)
+        else:
+            builder.append(chr(c))
+
+def _escape_ascii_str(space, builder, s):
+    for ch in s:
+        if ord(ch) >= 0x80:
+            _escape_ascii_unicode(builder, PyUnicode_DecodeUTF8(space, s))
+            return
+    # copy the runs of characters that need no escaping as slices
+    start = 0
+    for i in range(len(s)):
+        c = ord(s[i])
+        if _needs_escape(c):
+            builder.append_slice(s, start, i)
+            _append_escaped_char(builder, c)
+            start = i + 1
+    builder.append_slice(s, start, len(s))
+
+def escape_ascii_str(space, builder, s):
+    """ Appends the quoted, ASCII-only JSON representation of the UTF-8
+    string 's' to 'builder'.
+    """
+    builder.append('"')
+    _escape_ascii_str(space, builder, s)
+    builder.append('"')
+
+def escape_ascii(space, builder, w_s):
+    """ Appends the quoted, ASCII-only JSON representation of the str or
+    unicode 'w_s' to 'builder'.
+    """
+    builder.append('"')
+    if space.isinstance_w(w_s, space.w_unicode):
+        _escape_ascii_unicode(builder, space.unicode_w(w_s))
+    else:
+        _escape_ascii_str(space, builder, space.str_w(w_s))
+    builder.append('"')
+
+def encode_basestring_ascii(space, w_s):
+    """encode_basestring_ascii(basestring) -> str
+
+Return an ASCII-only JSON representation of a Python string"""
+    if not (space.isinstance_w(w_s, space.w_str) or
+            space.isinstance_w(w_s, space.w_unicode)):
+        raise operationerrfmt(space.w_TypeError,
+            "first argument must be a string, not %s",
+            space.type(w_s).getname(space))
+    builder = StringBuilder()
+    escape_ascii(space, builder, w_s)
+    return space.wrap(builder.build())
+
+
+class W_Encoder(Wrappable):
+    """_iterencode(obj, _current_indent_level) -> iterable"""
+
+    def __init__(self, space, w_markers, w_default, w_encoder, w_indent,
+                 key_separator, item_separator, sort_keys, skipkeys,
+                 allow_nan):
+        self.space = space
+        self.check_circular = not space.is_w(w_markers, space.w_None)
+        self.w_default = w_default
+        self.w_encoder = w_encoder
+        # if the string encoder is our own encode_basestring_ascii(), the
+        # strings are escaped directly into the builder
+        w_module = space.getbuiltinmodule('_json')
+        self.fast_encode = space.is_w(
+            w_encoder, space.getattr(w_module,
+                                     space.wrap('encode_basestring_ascii')))
+        if space.is_w(w_indent, space.w_None):
+            self.indent = -1
+        else:
+            self.indent = space.int_w(w_indent)
+        self.key_separator = key_separator
+        self.item_separator = item_separator
+        self.sort_keys = sort_keys
+        self.skipkeys = skipkeys
+        self.allow_nan = allow_nan
+        self.markers = {}
+
+    @unwrap_spec(key_separator=str, item_separator=str, sort_keys=bool,
+                 skipkeys=bool, allow_nan=bool)
+    def descr__new__(space, w_subtype, w_markers, w_default, w_encoder,
+                     w_indent, key_separator, item_separator, sort_keys,
+                     skipkeys, allow_nan):
+        w_self = space.allocate_instance(W_Encoder, w_subtype)
+        W_Encoder.__init__(space.interp_w(W_Encoder, w_self), space,
+                           w_markers, w_default, w_encoder, w_indent,
+                           key_separator, item_separator, sort_keys,
+                           skipkeys, allow_nan)
+        return w_self
+
+    @unwrap_spec(current_indent_level=int)
+    def descr_call(self, space, w_obj, current_indent_level):
+        builder = StringBuilder()
+        self.markers = {}
+        try:
+            self.encode(builder, w_obj, current_indent_level)
+        except rstackovf.StackOverflow:
+            rstackovf.check_stack_overflow()
+            raise OperationError(space.w_RuntimeError, space.wrap(
+                "maximum recursion depth exceeded while encoding a JSON "
+                "object"))
+        finally:
+            self.markers = {}
+        return space.newtuple([space.wrap(builder.build())])
+
+    # ____________________________________________________________
+
+    def floatstr(self, x):
+        if isfinite(x):
+            return formatd(x, 'r', 0, DTSF_ADD_DOT_0)
+        if isinf(x):
+            if x > 0.0:
+                text = 'Infinity'
+            else:
+                text = '-Infinity'
+        else:
+            text = 'NaN'
+        if not self.allow_nan:
+            space = self.space
+            raise OperationError(space.w_ValueError, space.wrap(
+                "Out of range float values are not JSON compliant: " + text))
+        return text
+
+    def append_string(self, builder, w_s):
+        space = self.space
+        if self.fast_encode:
+            escape_ascii(space, builder, w_s)
+        else:
+            w_res = space.call_function(self.w_encoder, w_s)
+            builder.append(space.str_w(w_res))
+
+    def append_str(self, builder, s):
+        if self.fast_encode:
+            escape_ascii_str(self.space, builder, s)
+        else:
+            self.append_string(builder, self.space.wrap(s))
+
+    def mark(self, w_obj):
+        if self.check_circular:
+            if w_obj in self.markers:
+                space = self.space
+                raise OperationError(space.w_ValueError,
+                                     space.wrap("Circular reference detected"))
+            self.markers[w_obj] = None
+
+    def unmark(self, w_obj):
+        if self.check_circular:
+            del self.markers[w_obj]
+
+    def newline_indent(self, builder, level):
+        builder.append('\n')
+        builder.append(' ' * (self.indent * level))
+
+    def encode(self, builder, w_obj, level):
+        space = self.space
+        w_type = space.type(w_obj)
+        if w_type is space.w_str or w_type is space.w_unicode:
+            self.append_string(builder, w_obj)
+        elif space.is_w(w_obj, space.w_None):
+            builder.append('null')
+        elif space.is_w(w_obj, space.w_True):
+            builder.append('true')
+        elif space.is_w(w_obj, space.w_False):
+            builder.append('false')
+        elif w_type is space.w_int:
+            builder.append(str(space.int_w(w_obj)))
+        elif w_type is space.w_float:
+            builder.append(self.floatstr(space.float_w(w_obj)))
+        elif w_type is space.w_list:
+            self.encode_list(builder, w_obj, level)
+        elif w_type is space.w_dict:
+            self.encode_dict(builder, w_obj, level)
+        elif (space.isinstance_w(w_obj, space.w_str) or
+                space.isinstance_w(w_obj, space.w_unicode)):
+            self.append_string(builder, w_obj)
+        elif (space.isinstance_w(w_obj, space.w_int) or
+                space.isinstance_w(w_obj, space.w_long)):
+            builder.append(space.str_w(space.str(w_obj)))
+        elif space.isinstance_w(w_obj, space.w_float):
+            builder.append(self.floatstr(space.float_w(w_obj)))
+        elif (space.isinstance_w(w_obj, space.w_list) or
+                space.isinstance_w(w_obj, space.w_tuple)):
+            self.encode_list(builder, w_obj, level)
+        elif space.isinstance_w(w_obj, space.w_dict):
+            self.encode_dict(builder, w_obj, level)
+        else:
+            self.mark(w_obj)
+            w_res = space.call_function(self.w_default, w_obj)
+            self.encode(builder, w_res, level)
+            self.unmark(w_obj)
+
+    def encode_list(self, builder, w_list, level):
+        space = self.space
+        if space.len_w(w_list) == 0:
+            builder.append('[]')
+            return
+        self.mark(w_list)
+        builder.append('[')
+        if self.indent >= 0:
+            level += 1
+            self.newline_indent(builder, level)
+        intlist = None
+        strlist = None
+        if space.type(w_list) is space.w_list:
+            intlist = space.listview_int(w_list)
+            if intlist is None:
+                strlist = space.listview_str(w_list)
+        if intlist is not None:
+            for i in range(len(intlist)):
+                if i > 0:
+                    self.item_separator_indent(builder, level)
+                builder.append(str(intlist[i]))
+        elif strlist is not None:
+            for i in range(len(strlist)):
+                if i > 0:
+                    self.item_separator_indent(builder, level)
+                self.append_str(builder, strlist[i])
+        else:
+            items_w = space.fixedview(w_list)
+            for i in range(len(items_w)):
+                if i > 0:
+                    self.item_separator_indent(builder, level)
+                self.encode(builder, items_w[i], level)
+        if self.indent >= 0:
+            self.newline_indent(builder, level - 1)
+        builder.append(']')
+        self.unmark(w_list)
+
+    def item_separator_indent(self, builder, level):
+        builder.append(self.item_separator)
+        if self.indent >= 0:
+            self.newline_indent(builder, level)
+
+    def encode_dict(self, builder, w_dict, level):
+        space = self.space
+        if space.len_w(w_dict) == 0:
+            builder.append('{}')
+            return
+        self.mark(w_dict)
+        builder.append('{')
+        if self.indent >= 0:
+            level += 1
+            self.newline_indent(builder, level)
+        first = True
+        keys = None
+        if space.type(w_dict) is space.w_dict and not self.sort_keys:
+            keys = space.listview_str(w_dict)
+        if keys is not None:
+            # a dict with the str strategy: the keys are never converted
+            for key in keys:
+                if first:
+                    first = False
+                else:
+                    self.item_separator_indent(builder, level)
+                self.append_str(builder, key)
+                builder.append(self.key_separator)
+                self.encode(builder, space.finditem_str(w_dict, key), level)
+        else:
+            if self.sort_keys:
+                w_items = space.call_method(w_dict, 'items')
+                w_items = space.call_function(
+                    space.builtin.get('sorted'), w_items)
+            else:
+                w_items = space.call_method(w_dict, 'iteritems')
+            w_iter = space.iter(w_items)
+            while True:
+                try:
+                    w_item = space.next(w_iter)
+                except OperationError, e:
+                    if not e.match(space, space.w_StopIteration):
+                        raise
+                    break
+                w_key, w_value = space.fixedview(w_item, 2)
+                w_key = self.convert_key(w_key)
+                if w_key is None:
+                    continue
+                if first:
+                    first = False
+                else:
+                    self.item_separator_indent(builder, level)
+                self.append_string(builder, w_key)
+                builder.append(self.key_separator)
+                self.encode(builder, w_value, level)
+        if self.indent >= 0:
+            self.newline_indent(builder, level - 1)
+        builder.append('}')
+        self.unmark(w_dict)
+
+    def convert_key(self, w_key):
+        # returns the key as a string, or None if it is to be skipped
+        space = self.space
+        if (space.isinstance_w(w_key, space.w_str) or
+                space.isinstance_w(w_key, space.w_unicode)):
+            return w_key
+        # JavaScript is weakly typed for these, so it makes sense to
+        # also allow them, like json.encoder does
+        if space.isinstance_w(w_key, space.w_float):
+            return space.wrap(self.floatstr(space.float_w(w_key)))
+        if space.is_w(w_key, space.w_True):
+            return space.wrap('true')
+        if space.is_w(w_key, space.w_False):
+            return space.wrap('false')
+        if space.is_w(w_key, space.w_None):
+            return space.wrap('null')
+        if (space.isinstance_w(w_key, space.w_int) or
+                space.isinstance_w(w_key, space.w_long)):
+            return space.str(w_key)
+        if self.skipkeys:
+            return None
+        raise operationerrfmt(space.w_TypeError, "key %s is not a string",
+                              space.str_w(space.repr(w_key)))
+
+W_Encoder.typedef = TypeDef("Encoder",
+    __module__ = "_json",
+    __doc__ = W_Encoder.__doc__,
+    __new__ = interp2app(W_Encoder.descr__new__.im_func),
+    __call__ = interp2app(W_Encoder.descr_call),
+)
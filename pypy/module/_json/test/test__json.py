@@ -0,0 +1,227 @@
+from pypy.conftest import gettestobjspace
+
+
+class AppTestJson:
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=('_json', 'struct',
+                                                'binascii'))
+
+    def test_module(self):
+        import _json, json
+        assert _json.make_scanner.__module__ == '_json'
+        assert _json.scanstring.__module__ == '_json'
+        assert json.scanner.make_scanner is _json.make_scanner
+        assert json.decoder.scanstring is _json.scanstring
+        assert json.encoder.encode_basestring_ascii is \
+               _json.encode_basestring_ascii
+        raises(AttributeError, _json.make_scanner, 1)
+        raises(TypeError, _json.make_encoder, None, "xyz", None)
+
+    def test_scanstring(self):
+        from _json import scanstring
+        assert scanstring('"abc" x', 1) == (u'abc', 5)
+        assert scanstring(u'"abc"', 1) == (u'abc', 5)
+        assert type(scanstring('"abc"', 1)[0]) is unicode
+        assert scanstring(r'"a\n\"\\\/\b\f\r\tb"', 1) == (
+            u'a\n"\\/\b\f\r\tb', 20)
+        assert scanstring(r'"\u1234\u00e9"', 1) == (u'\u1234\xe9', 14)
+        assert scanstring('"\xc3\xa9t\xc3\xa9"', 1) == (u'\xe9t\xe9', 7)
+        assert scanstring('"\xe9t\xe9"', 1, 'latin-1') == (u'\xe9t\xe9', 5)
+        assert scanstring('"a\tb"', 1, None, False) == (u'a\tb', 5)
+        raises(ValueError, scanstring, '"a\tb"', 1)
+        raises(ValueError, scanstring, '"abc', 1)
+        raises(ValueError, scanstring, r'"\x"', 1)
+        raises(ValueError, scanstring, r'"\u12"', 1)
+        raises(ValueError, scanstring, 'xxx', 1, "xxx")
+        raises(ValueError, scanstring, 'xxx', -1)
+        raises(TypeError, scanstring, 42, 1)
+
+    def test_scanstring_surrogates(self):
+        import sys
+        from _json import scanstring
+        if sys.maxunicode == 65535:
+            skip("needs a wide unicode build")
+        assert scanstring(r'"\ud834\udd20x"', 1) == (u'\U0001d120x', 15)
+        raises(ValueError, scanstring, r'"\ud834x"', 1)
+        raises(ValueError, scanstring, r'"\ud834\u12"', 1)
+
+    def test_error_message(self):
+        import json
+        try:
+            json.loads('{\n  "a": 1,\n  "b" 2}')
+        except ValueError, e:
+            assert str(e) == \
+                   'Expecting : delimiter: line 3 column 7 (char 18)'
+        else:
+            assert False
+
+    def test_loads(self):
+        import json
+        assert json.loads('null') is None
+        assert json.loads(' true ') is True
+        assert json.loads('false') is False
+        assert json.loads('[]') == []
+        assert json.loads('{}') == {}
+        assert json.loads('[1, -2, 3.5, -1e3, 0, 1E+2, "x"]') == [
+            1, -2, 3.5, -1000.0, 0, 100.0, u'x']
+        assert json.loads('{"a": {"b": [null, true]}, "c": "d"}') == {
+            u'a': {u'b': [None, True]}, u'c': u'd'}
+        big = json.loads('123456789012345678901234567890')
+        assert big == 123456789012345678901234567890
+        assert json.loads('-9223372036854775809') == -9223372036854775809
+        assert json.loads(u'[" \u1234 "]') == [u' \u1234 ']
+        assert json.loads('[1, 2] ') == [1, 2]
+
+    def test_loads_errors(self):
+        import json
+        for s in ['', '[', '[1,', '[1 2]', '{"a" 1}', '{"a": }', '{1: 2}',
+                  '{"a": 1,}', '[1,]', 'nul', '-', '01', '1.', '[1] x',
+                  '"abc', '{"a": 1 "b": 2}']:
+            raises(ValueError, json.loads, s)
+
+    def test_constants(self):
+        import json, math
+        assert math.isnan(json.loads('NaN'))
+        assert json.loads('[Infinity, -Infinity]') == [float('inf'),
+                                                      float('-inf')]
+        assert json.loads('NaN', parse_constant=str) == 'NaN'
+
+    def test_hooks(self):
+        import json
+        from collections import OrderedDict
+        s = '{"x": 1, "b": 2.5, "a": {"z": 3}}'
+        d = json.loads(s, object_pairs_hook=OrderedDict)
+        assert type(d) is OrderedDict
+        assert d.keys() == ['x', 'b', 'a']
+        assert type(d['a']) is OrderedDict
+        assert json.loads('{}', object_pairs_hook=list) == []
+        assert json.loads(s, object_hook=len) == 3
+        assert json.loads(s, parse_int=float) == {
+            'x': 1.0, 'b': 2.5, 'a': {'z': 3.0}}
+        assert json.loads('[1.5, 2]', parse_float=str) == ['1.5', 2]
+        assert json.loads('[1.5]', parse_int=str) == [1.5]
+
+    def test_shared_keys(self):
+        import json
+        l = json.loads('[{"key": 1}, {"key": 2}]')
+        assert l[0].keys()[0] is l[1].keys()[0]
+
+    def test_scanner(self):
+        import json
+        from _json import make_scanner
+        scan_once = make_scanner(json.JSONDecoder())
+        assert scan_once('xx[1, 2]', 2) == ([1, 2], 8)
+        raises(StopIteration, scan_once, 'xx', 2)
+        raises(StopIteration, scan_once, 'x', 0)
+        raises(StopIteration, scan_once, '[]', -1)
+
+    def test_too_deep(self):
+        import json
+        raises(RuntimeError, json.loads, '[' * 100000 + ']' * 100000)
+        raises(RuntimeError, json.loads, '{"a":' * 100000 + '1' +
+                                         '}' * 100000)
+
+    def test_encode_basestring_ascii(self):
+        from _json import encode_basestring_ascii as enc
+        assert enc('abc') == '"abc"'
+        assert enc(u'abc') == '"abc"'
+        assert type(enc(u'abc')) is str
+        assert enc('a"b\\c\n\r\t\b\f\x00\x1f\x7f') == \
+               r'"a\"b\\c\n\r\t\b\f\u0000\u001f\u007f"'
+        assert enc(u'\xe9\u1234') == r'"\u00e9\u1234"'
+        assert enc('\xc3\xa9') == r'"\u00e9"'
+        assert enc(u'\U0001d120') == r'"\ud834\udd20"'
+        raises(UnicodeDecodeError, enc, 'xx\xff')
+        raises(TypeError, enc, 42)
+
+    def test_dumps(self):
+        import json
+        assert json.dumps(None) == 'null'
+        assert json.dumps([True, False]) == '[true, false]'
+        assert json.dumps([1, -2, 2 ** 70, 1.5, 1e100, 0.1]) == \
+               '[1, -2, 1180591620717411303424, 1.5, 1e+100, 0.1]'
+        assert json.dumps([float('inf'), float('-inf')]) == \
+               '[Infinity, -Infinity]'
+        assert json.dumps(['a', u'\xe9', ('x',), []]) == \
+               '["a", "\\u00e9", ["x"], []]'
+        assert json.dumps({'a': {}}) == '{"a": {}}'
+        assert json.dumps({2: 2, 1.5: 3, None: 4, False: 5},
+                          sort_keys=True) == \
+               '{"null": 4, "false": 5, "1.5": 3, "2": 2}'
+        assert json.dumps([1, 2], separators=(',', ':')) == '[1,2]'
+        assert type(json.dumps(u'x')) is str
+
+    def test_dumps_strategies(self):
+        import json
+        assert json.dumps(range(5)) == '[0, 1, 2, 3, 4]'
+        assert json.dumps(['a', 'b"']) == '["a", "b\\""]'
+        assert json.dumps([1.5, 2.5]) == '[1.5, 2.5]'
+        assert json.dumps({'a': 1, 'b': [2]}, sort_keys=True) == \
+               '{"a": 1, "b": [2]}'
+        d = json.loads('{"x": [1, 2, 3], "y": ["a", "b"]}')
+        assert json.dumps(d, sort_keys=True) == \
+               '{"x": [1, 2, 3], "y": ["a", "b"]}'
+
+    def test_dumps_indent(self):
+        import json
+        assert json.dumps({'a': [1, 2], 'b': {}}, indent=2,
+                          sort_keys=True) == \
+               '{\n  "a": [\n    1, \n    2\n  ], \n  "b": {}\n}'
+        assert json.dumps([[]], indent=0) == '[\n[]\n]'
+
+    def test_dumps_subclasses(self):
+        import json
+        from collections import OrderedDict
+        class MyInt(int):
+            def __str__(self):
+                return 'myint'
+        class MyList(list):
+            pass
+        d = OrderedDict([('z', 1), ('a', MyList([2]))])
+        assert json.dumps(d) == '{"z": 1, "a": [2]}'
+        assert json.dumps([MyInt(5)]) == '[myint]'
+
+    def test_dumps_keys(self):
+        import json
+        raises(TypeError, json.dumps, {(1, 2): 3})
+        assert json.dumps({(1, 2): 3, 'a': 4}, skipkeys=True) == '{"a": 4}'
+
+    def test_dumps_errors(self):
+        import json
+        raises(ValueError, json.dumps, float('nan'), allow_nan=False)
+        raises(TypeError, json.dumps, object())
+        l = []
+        l.append(l)
+        raises(ValueError, json.dumps, l)
+        d = {}
+        d['d'] = d
+        raises(ValueError, json.dumps, d)
+        raises(ValueError, json.dumps, [object()], default=lambda o: [o])
+
+    def test_dumps_default(self):
+        import json
+        class Point(object):
+            def __init__(self, x, y):
+                self.x = x
+                self.y = y
+        def default(o):
+            return {'x': o.x, 'y': o.y}
+        assert json.dumps([Point(1, 2)], default=default,
+                          sort_keys=True) == '[{"x": 1, "y": 2}]'
+
+    def test_dumps_too_deep(self):
+        import json
+        l = []
+        for i in range(100000):
+            l = [l]
+        raises(RuntimeError, json.dumps, l)
+
+    def test_roundtrip(self):
+        import json
+        data = {u'users': [{u'id': i, u'name': u'user%d' % i,
+                            u'score': i * 1.5, u'tags': [u'a', u'\u1234'],
+                            u'active': i % 2 == 0, u'extra': None}
+                           for i in range(50)],
+                u'total': 50}
+        assert json.loads(json.dumps(data)) == data
+        assert json.loads(json.dumps(data, indent=4)) == data
@@ -158,12 +158,30 @@ class ArrayBuffer(RWBuffer):
         array._charbuf_stop()
         return char
 
+    def getslice(self, start, stop, step, size):
+        if step != 1:
+            return RWBuffer.getslice(self, start, stop, step, size)
+        if size == 0:
+            return ''
+        array = self.array
+        data = array._charbuf_start()
+        s = rffi.charpsize2str(rffi.ptradd(data, start), size)
+        array._charbuf_stop()
+        return s
+
     def setitem(self, index, char):
         array = self.array
         data = array._charbuf_start()
         data[index] = char
         array._charbuf_stop()
 
+    def setslice(self, start, string):
+        array = self.array
+        data = array._charbuf_start()
+        for i in range(len(string)):
+            data[start + i] = string[i]
+        array._charbuf_stop()
+
 
 def make_array(mytype):
     W_ArrayBase = globals()['W_ArrayBase']
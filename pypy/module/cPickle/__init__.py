@@ -0,0 +1,26 @@
+# Package initialisation
+from pypy.interpreter.mixedmodule import MixedModule
+
+class Module(MixedModule):
+    """Fast implementation of the pickle protocol."""
+
+    appleveldefs = {
+        'PickleError':        'app_pickle.PickleError',
+        'PicklingError':      'app_pickle.PicklingError',
+        'UnpicklingError':    'app_pickle.UnpicklingError',
+        'UnpickleableError':  'app_pickle.UnpickleableError',
+        'BadPickleGet':       'app_pickle.BadPickleGet',
+        'format_version':     'app_pickle.format_version',
+        'compatible_formats': 'app_pickle.compatible_formats',
+        '__version__':        'app_pickle.__version__',
+    }
+
+    interpleveldefs = {
+        'Pickler':          'interp_pickle.W_Pickler',
+        'Unpickler':        'interp_pickle.W_Unpickler',
+        'dump':             'interp_pickle.dump',
+        'dumps':            'interp_pickle.dumps',
+        'load':             'interp_pickle.load',
+        'loads':            'interp_pickle.loads',
+        'HIGHEST_PROTOCOL': 'space.wrap(interp_pickle.HIGHEST_PROTOCOL)',
+    }
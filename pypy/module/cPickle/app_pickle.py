@@ -0,0 +1,11 @@
+# NOT_RPYTHON
+# the exceptions are shared with pickle.py, as in lib_pypy/cPickle.py
+
+from pickle import PickleError, PicklingError, UnpicklingError
+
+BadPickleGet = KeyError
+UnpickleableError = PicklingError
+
+__version__ = "1.71"
+format_version = "2.0"
+compatible_formats = ["1.0", "1.1", "1.2", "1.3", "2.0"]
@@ -0,0 +1,1451 @@
+""" Interp-level implementation of the cPickle module.
+
+The Pickler writes the opcodes of the protocols 0 to 2 directly into a
+string builder, which is only handed over to the file's write() method
+when a whole pickle is done (or the builder gets big).  Its memo is an
+identity dict of the objects already pickled, plus a dict keyed by value
+for strs.  The common builtin types are pickled without going through
+the object space's multimethods; lists and dicts using the int or str
+strategies are even pickled from their unwrapped items.  Everything else
+goes through copy_reg and __reduce_ex__(), as in pickle.py.
+
+The Unpickler dispatches on the opcodes at interp-level, keeping its
+stack and its memo (a dict from ints to objects) in RPython lists and
+dicts.
+"""
+
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.interpreter.pyparser.parsestring import PyString_DecodeEscape
+from pypy.interpreter.unicodehelper import PyUnicode_EncodeUTF8
+from pypy.interpreter.unicodehelper import PyUnicode_DecodeUTF8
+from pypy.interpreter.unicodehelper import PyUnicode_DecodeRawUnicodeEscape
+from pypy.rlib import rstackovf
+from pypy.rlib.objectmodel import specialize
+from pypy.rlib.rbigint import rbigint
+from pypy.rlib.rstring import StringBuilder
+from pypy.rlib.rstruct import ieee
+
+HIGHEST_PROTOCOL = 2
+
+# the opcodes, as in pickle.py
+MARK            = '('
+STOP            = '.'
+POP             = '0'
+POP_MARK        = '1'
+DUP             = '2'
+FLOAT           = 'F'
+INT             = 'I'
+BININT          = 'J'
+BININT1         = 'K'
+LONG            = 'L'
+BININT2         = 'M'
+NONE            = 'N'
+PERSID          = 'P'
+BINPERSID       = 'Q'
+REDUCE          = 'R'
+STRING          = 'S'
+BINSTRING       = 'T'
+SHORT_BINSTRING = 'U'
+UNICODE         = 'V'
+BINUNICODE      = 'X'
+APPEND          = 'a'
+BUILD           = 'b'
+GLOBAL          = 'c'
+DICT            = 'd'
+EMPTY_DICT      = '}'
+APPENDS         = 'e'
+GET             = 'g'
+BINGET          = 'h'
+INST            = 'i'
+LONG_BINGET     = 'j'
+LIST            = 'l'
+EMPTY_LIST      = ']'
+OBJ             = 'o'
+PUT             = 'p'
+BINPUT          = 'q'
+LONG_BINPUT     = 'r'
+SETITEM         = 's'
+TUPLE           = 't'
+EMPTY_TUPLE     = ')'
+SETITEMS        = 'u'
+BINFLOAT        = 'G'
+PROTO           = '\x80'
+NEWOBJ          = '\x81'
+EXT1            = '\x82'
+EXT2            = '\x83'
+EXT4            = '\x84'
+TUPLE1          = '\x85'
+TUPLE2          = '\x86'
+TUPLE3          = '\x87'
+NEWTRUE         = '\x88'
+NEWFALSE        = '\x89'
+LONG1           = '\x8a'
+LONG4           = '\x8b'
+
+TUPLE_OPCODES = [EMPTY_TUPLE, TUPLE1, TUPLE2, TUPLE3]
+
+# items of lists and dicts are appended or set by groups of this size
+BATCHSIZE = 1000
+
+# the output of a Pickler is written to its file when it gets this big
+FLUSH_SIZE = 65536
+
+# in fast mode, cycles are looked for from this nesting level on
+FAST_NESTING_LIMIT = 50
+
+HEXDIGITS = '0123456789abcdef'
+
+
+class State:
+    """ The objects of copy_reg and types used by the picklers. """
+
+    def __init__(self, space):
+        self.w_dispatch_table = None
+
+    def fetch(self, space):
+        w_copy_reg = _import(space, 'copy_reg')
+        w_types = _import(space, 'types')
+        self.w_extension_registry = space.getattr(
+            w_copy_reg, space.wrap('_extension_registry'))
+        self.w_inverted_registry = space.getattr(
+            w_copy_reg, space.wrap('_inverted_registry'))
+        self.w_extension_cache = space.getattr(
+            w_copy_reg, space.wrap('_extension_cache'))
+        self.w_ClassType = space.getattr(w_types, space.wrap('ClassType'))
+        self.w_InstanceType = space.getattr(w_types,
+                                            space.wrap('InstanceType'))
+        self.w_FunctionType = space.getattr(w_types,
+                                            space.wrap('FunctionType'))
+        self.w_BuiltinFunctionType = space.getattr(
+            w_types, space.wrap('BuiltinFunctionType'))
+        self.w_dispatch_table = space.getattr(w_copy_reg,
+                                              space.wrap('dispatch_table'))
+
+def get_state(space):
+    state = space.fromcache(State)
+    if state.w_dispatch_table is None:
+        state.fetch(space)
+    return state
+
+def _import(space, modulename):
+    w_modulename = space.wrap(modulename)
+    space.call_function(space.builtin.get('__import__'), w_modulename)
+    return space.getitem(space.sys.get('modules'), w_modulename)
+
+def _error(space, name, msg):
+    w_module = space.getbuiltinmodule('cPickle')
+    w_error = space.getattr(w_module, space.wrap(name))
+    return OperationError(w_error, space.wrap(msg))
+
+def pickling_error(space, msg):
+    return _error(space, 'PicklingError', msg)
+
+def unpickling_error(space, msg):
+    return _error(space, 'UnpicklingError', msg)
+
+def _recursion_error(space):
+    return OperationError(space.w_RuntimeError, space.wrap(
+        "maximum recursion depth exceeded while pickling an object"))
+
+def _get_protocol(space, w_protocol):
+    if space.is_w(w_protocol, space.w_None):
+        return 0
+    protocol = space.int_w(w_protocol)
+    if protocol < 0:
+        return HIGHEST_PROTOCOL
+    if protocol > HIGHEST_PROTOCOL:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "pickle protocol %d asked for; the highest available protocol "
+            "is %d" % (protocol, HIGHEST_PROTOCOL)))
+    return protocol
+
+def _attribute_or_none(space, w_obj, name):
+    # the getset attributes give None when they are not set
+    w_value = space.findattr(w_obj, space.wrap(name))
+    if w_value is None or space.is_w(w_value, space.w_None):
+        return None
+    return w_value
+
+# ____________________________________________________________
+# longs are stored as little-endian two's complement by LONG1 and LONG4
+
+def encode_long(big):
+    """ Returns the shortest two's complement little-endian string of
+    bytes representing 'big', with no bytes at all for 0.
+    """
+    if big.sign == 0:
+        return ''
+    if big.sign > 0:
+        digits = big.format(HEXDIGITS)
+        if len(digits) & 1:
+            digits = '0' + digits
+        elif digits[0] >= '8':
+            # the high bit is set: an extra byte gives the sign
+            digits = '00' + digits
+    else:
+        nibbles = len(big.neg().format(HEXDIGITS))
+        if nibbles & 1:
+            nibbles += 1
+        digits = big.add(rbigint.fromint(1).lshift(nibbles * 4)).format(
+            HEXDIGITS)
+        if len(digits) < nibbles:
+            digits = '0' * (nibbles - len(digits)) + digits
+        if digits[0] < '8':
+            digits = 'ff' + digits
+    n = len(digits) // 2
+    result = ['\x00'] * n
+    for i in range(n):
+        high = HEXDIGITS.find(digits[2 * i])
+        low = HEXDIGITS.find(digits[2 * i + 1])
+        result[n - 1 - i] = chr(high * 16 + low)
+    return ''.join(result)
+
+def decode_long(data):
+    n = len(data)
+    if n == 0:
+        return rbigint.fromint(0)
+    big = _decode_unsigned(data, 0, n)
+    if ord(data[n - 1]) >= 0x80:
+        big = big.sub(rbigint.fromint(1).lshift(8 * n))
+    return big
+
+def _decode_unsigned(data, start, stop):
+    # split in halves, so that n bytes take O(n log n) time instead of
+    # the quadratic time of parsing them as a string of digits
+    if stop - start <= 3:
+        value = 0
+        for i in range(stop - 1, start - 1, -1):
+            value = (value << 8) | ord(data[i])
+        return rbigint.fromint(value)
+    middle = (start + stop) // 2
+    low = _decode_unsigned(data, start, middle)
+    high = _decode_unsigned(data, middle, stop)
+    return high.lshift(8 * (middle - start)).or_(low)
+
+def _read_int4(s):
+    top = ord(s[3])
+    if top >= 0x80:
+        top -= 0x100
+    return (ord(s[0]) + (ord(s[1]) << 8) + (ord(s[2]) << 16) +
+            (top << 24))
+
+# ____________________________________________________________
+
+class W_Pickler(Wrappable):
+    """Pickler(file, protocol=0) -- Create a pickler.
+
+This takes a file-like object for writing a pickle data stream.  With
+an int instead of a file, the pickle is kept internally and returned
+by getvalue()."""
+
+    def __init__(self, space, w_file, protocol):
+        self.space = space
+        self.w_file = w_file       # None to keep the pickle internally
+        self.proto = protocol
+        self.bin = protocol >= 1
+        self.fast = False
+        self.builder = StringBuilder()
+        self.memo = {}             # identity dict: object -> memo index
+        self.str_memo = {}         # str value -> memo index
+        self.fast_memo = {}        # objects being saved, in fast mode
+        self.nesting = 0
+        self.w_persistent_id = None
+        self.w_persistent_id_attr = None
+
+    def descr__new__(space, w_subtype, w_file=None, w_protocol=None):
+        w_self = space.allocate_instance(W_Pickler, w_subtype)
+        self = space.interp_w(W_Pickler, w_self)
+        if (space.is_w(w_file, space.w_None) or
+                space.isinstance_w(w_file, space.w_int)):
+            # Pickler() or Pickler(protocol)
+            if space.is_w(w_protocol, space.w_None):
+                w_protocol = w_file
+            W_Pickler.__init__(self, space, None,
+                               _get_protocol(space, w_protocol))
+        else:
+            protocol = _get_protocol(space, w_protocol)
+            w_write = space.findattr(w_file, space.wrap('write'))
+            if w_write is None:
+                raise OperationError(space.w_TypeError, space.wrap(
+                    "argument must have 'write' attribute"))
+            W_Pickler.__init__(self, space, w_write, protocol)
+        return w_self
+
+    def write(self, s):
+        self.builder.append(s)
+
+    def flush(self):
+        if self.w_file is not None and self.builder.getlength() > 0:
+            data = self.builder.build()
+            self.builder = StringBuilder()
+            self.space.call_function(self.w_file, self.space.wrap(data))
+
+    def maybe_flush(self):
+        if self.w_file is not None and self.builder.getlength() >= FLUSH_SIZE:
+            self.flush()
+
+    def dump(self, w_obj):
+        """dump(object) -- Write an object in pickle format to the
+object's pickle stream."""
+        space = self.space
+        self.w_persistent_id = _attribute_or_none(space, space.wrap(self),
+                                                  'persistent_id')
+        self.nesting = 0
+        if self.w_file is not None:
+            self.builder = StringBuilder()
+        if self.proto >= 2:
+            self.write(PROTO)
+            self.write(chr(self.proto))
+        try:
+            self.save(w_obj)
+        except rstackovf.StackOverflow:
+            rstackovf.check_stack_overflow()
+            raise _recursion_error(space)
+        self.write(STOP)
+        self.flush()
+
+    @unwrap_spec(clear=bool)
+    def getvalue(self, clear=True):
+        """getvalue() -- Finish picking a list-based pickle"""
+        data = self.builder.build()
+        if clear:
+            self.builder = StringBuilder()
+        return self.space.wrap(data)
+
+    def clear_memo(self):
+        """clear_memo() -- Clear the picklers memo"""
+        self.memo.clear()
+        self.str_memo.clear()
+
+    # ____________________________________________________________
+    # the memo
+
+    def memoize(self, w_obj):
+        if self.fast:
+            return
+        index = len(self.memo) + len(self.str_memo) + 1
+        self.memo[w_obj] = index
+        self.write_put(index)
+
+    def write_put(self, index):
+        if self.bin:
+            if index < 256:
+                self.write(BINPUT)
+                self.write(chr(index))
+            else:
+                self.write(LONG_BINPUT)
+                self.write_int4(index)
+        else:
+            self.write(PUT)
+            self.write(str(index))
+            self.write('\n')
+
+    def write_get(self, index):
+        if self.bin:
+            if index < 256:
+                self.write(BINGET)
+                self.write(chr(index))
+            else:
+                self.write(LONG_BINGET)
+                self.write_int4(index)
+        else:
+            self.write(GET)
+            self.write(str(index))
+            self.write('\n')
+
+    def write_int4(self, i):
+        self.write(chr(i & 0xff))
+        self.write(chr((i >> 8) & 0xff))
+        self.write(chr((i >> 16) & 0xff))
+        self.write(chr((i >> 24) & 0xff))
+
+    def get_memo(self, space):
+        w_memo = space.newdict()
+        for w_obj, index in self.memo.items():
+            space.setitem(w_memo, space.id(w_obj),
+                          space.newtuple([space.wrap(index), w_obj]))
+        for s, index in self.str_memo.items():
+            w_obj = space.wrap(s)
+            space.setitem(w_memo, space.id(w_obj),
+                          space.newtuple([space.wrap(index), w_obj]))
+        return w_memo
+
+    def set_memo(self, space, w_memo):
+        memo = {}
+        str_memo = {}
+        w_values = space.call_method(w_memo, 'values')
+        for w_value in space.listview(w_values):
+            w_index, w_obj = space.fixedview(w_value, 2)
+            index = space.int_w(w_index)
+            if space.is_w(space.type(w_obj), space.w_str):
+                str_memo[space.str_w(w_obj)] = index
+            else:
+                memo[w_obj] = index
+        self.memo = memo
+        self.str_memo = str_memo
+
+    # ____________________________________________________________
+    # saving objects
+
+    def save(self, w_obj):
+        space = self.space
+        if self.w_persistent_id is not None and self.save_pers(w_obj):
+            return
+        # the atoms, which are never memoized
+        w_type = space.type(w_obj)
+        if space.is_w(w_obj, space.w_None):
+            self.write(NONE)
+            return
+        if space.is_w(w_type, space.w_int):
+            self.save_int(space.int_w(w_obj))
+            return
+        if space.is_w(w_type, space.w_bool):
+            self.save_bool(space.is_true(w_obj))
+            return
+        if space.is_w(w_type, space.w_float):
+            self.save_float(space.float_w(w_obj))
+            return
+        if space.is_w(w_type, space.w_str):
+            self.save_str(space.str_w(w_obj))
+            return
+        if not self.fast:
+            index = self.memo.get(w_obj, 0)
+            if index:
+                self.write_get(index)
+                return
+        # too deeply nested objects end up in a StackOverflow, see dump()
+        self.nesting += 1
+        try:
+            if self.fast and self.nesting > FAST_NESTING_LIMIT:
+                if w_obj in self.fast_memo:
+                    raise OperationError(space.w_ValueError, space.wrap(
+                        "fast mode: can't pickle cyclic objects including "
+                        "object type %s" % (space.type(w_obj).getname(space),)))
+                self.fast_memo[w_obj] = None
+                try:
+                    self.save_object(w_obj, w_type)
+                finally:
+                    del self.fast_memo[w_obj]
+            else:
+                self.save_object(w_obj, w_type)
+        finally:
+            self.nesting -= 1
+        self.maybe_flush()
+
+    def save_object(self, w_obj, w_type):
+        space = self.space
+        if space.is_w(w_type, space.w_long):
+            self.save_long(space.bigint_w(w_obj))
+        elif space.is_w(w_type, space.w_unicode):
+            self.save_unicode(space.unicode_w(w_obj))
+            self.memoize(w_obj)
+        elif space.is_w(w_type, space.w_tuple):
+            self.save_tuple(w_obj)
+        elif space.is_w(w_type, space.w_list):
+            self.save_list(w_obj)
+        elif space.is_w(w_type, space.w_dict):
+            self.save_dict(w_obj)
+        else:
+            self.save_other(w_obj, w_type)
+
+    def save_pers(self, w_obj):
+        space = self.space
+        w_pid = space.call_function(self.w_persistent_id, w_obj)
+        if space.is_w(w_pid, space.w_None):
+            return False
+        if self.bin:
+            self.save(w_pid)
+            self.write(BINPERSID)
+        else:
+            self.write(PERSID)
+            self.write(space.str_w(space.str(w_pid)))
+            self.write('\n')
+        return True
+
+    def save_int(self, i):
+        if self.bin:
+            if i >= 0:
+                if i <= 0xff:
+                    self.write(BININT1)
+                    self.write(chr(i))
+                    return
+                if i <= 0xffff:
+                    self.write(BININT2)
+                    self.write(chr(i & 0xff))
+                    self.write(chr(i >> 8))
+                    return
+            # ints that don't fit in 32 bits are written as text
+            high_bits = i >> 31
+            if high_bits == 0 or high_bits == -1:
+                self.write(BININT)
+                self.write_int4(i)
+                return
+        self.write(INT)
+        self.write(str(i))
+        self.write('\n')
+
+    def save_bool(self, value):
+        if self.proto >= 2:
+            if value:
+                self.write(NEWTRUE)
+            else:
+                self.write(NEWFALSE)
+        elif value:
+            self.write(INT + '01\n')
+        else:
+            self.write(INT + '00\n')
+
+    def save_float(self, x):
+        if self.bin:
+            self.write(BINFLOAT)
+            ieee.pack_float(self.builder, x, 8, True)
+        else:
+            space = self.space
+            self.write(FLOAT)
+            self.write(space.str_w(space.repr(space.newfloat(x))))
+            self.write('\n')
+
+    def save_long(self, big):
+        if self.proto >= 2:
+            data = encode_long(big)
+            if len(data) < 256:
+                self.write(LONG1)
+                self.write(chr(len(data)))
+            else:
+                self.write(LONG4)
+                self.write_int4(len(data))
+            self.write(data)
+        else:
+            self.write(LONG)
+            self.write(big.str())
+            self.write('L\n')
+
+    def save_str(self, s):
+        if not self.fast:
+            index = self.str_memo.get(s, 0)
+            if index:
+                self.write_get(index)
+                return
+        if self.bin:
+            if len(s) < 256:
+                self.write(SHORT_BINSTRING)
+                self.write(chr(len(s)))
+            else:
+                self.write(BINSTRING)
+                self.write_int4(len(s))
+            self.write(s)
+        else:
+            space = self.space
+            self.write(STRING)
+            self.write(space.str_w(space.repr(space.wrap(s))))
+            self.write('\n')
+        if not self.fast:
+            index = len(self.memo) + len(self.str_memo) + 1
+            self.str_memo[s] = index
+            self.write_put(index)
+
+    def save_unicode(self, u):
+        if self.bin:
+            data = PyUnicode_EncodeUTF8(self.space, u)
+            self.write(BINUNICODE)
+            self.write_int4(len(data))
+            self.write(data)
+            return
+        # raw-unicode-escape, with backslashes and newlines escaped too
+        self.write(UNICODE)
+        for c in u:
+            code = ord(c)
+            if code < 256 and c != u'\\' and c != u'\n':
+                self.write(chr(code))
+            elif code < 0x10000:
+                self.write('\\u')
+                self.write_hex(code, 4)
+            else:
+                self.write('\\U')
+                self.write_hex(code, 8)
+        self.write('\n')
+
+    def write_hex(self, code, ndigits):
+        for i in range(ndigits - 1, -1, -1):
+            self.write(HEXDIGITS[(code >> (4 * i)) & 0xf])
+
+    def save_tuple(self, w_tuple):
+        space = self.space
+        items_w = space.fixedview(w_tuple)
+        n = len(items_w)
+        if n == 0:
+            if self.bin:
+                self.write(EMPTY_TUPLE)
+            else:
+                self.write(MARK + TUPLE)
+            return
+        if n <= 3 and self.proto >= 2:
+            for w_item in items_w:
+                self.save(w_item)
+            # a recursive tuple is in the memo now
+            index = self.memo.get(w_tuple, 0)
+            if index:
+                self.builder.append_multiple_char(POP, n)
+                self.write_get(index)
+            else:
+                self.write(TUPLE_OPCODES[n])
+                self.memoize(w_tuple)
+            return
+        self.write(MARK)
+        for w_item in items_w:
+            self.save(w_item)
+        index = self.memo.get(w_tuple, 0)
+        if index:
+            if self.bin:
+                self.write(POP_MARK)
+            else:
+                self.builder.append_multiple_char(POP, n + 1)
+            self.write_get(index)
+            return
+        self.write(TUPLE)
+        self.memoize(w_tuple)
+
+    def save_list(self, w_list):
+        space = self.space
+        if self.bin:
+            self.write(EMPTY_LIST)
+        else:
+            self.write(MARK + LIST)
+        self.memoize(w_list)
+        if self.w_persistent_id is None:
+            # lists using the int or str strategy
+            ints = space.listview_int(w_list)
+            if ints is not None:
+                self.batch_appends(ints[:], 'int')
+                return
+            strs = space.listview_str(w_list)
+            if strs is not None:
+                self.batch_appends(strs[:], 'str')
+                return
+        self.batch_appends(space.listview(w_list)[:], 'obj')
+
+    @specialize.arg(2)
+    def save_item(self, item, kind):
+        if kind == 'int':
+            self.save_int(item)
+        elif kind == 'str':
+            self.save_str(item)
+        else:
+            self.save(item)
+
+    @specialize.arg(2)
+    def batch_appends(self, items, kind):
+        if not self.bin:
+            for item in items:
+                self.save_item(item, kind)
+                self.write(APPEND)
+            return
+        n = len(items)
+        i = 0
+        while i < n:
+            end = min(i + BATCHSIZE, n)
+            if end - i > 1:
+                self.write(MARK)
+                for j in range(i, end):
+                    self.save_item(items[j], kind)
+                self.write(APPENDS)
+            else:
+                self.save_item(items[i], kind)
+                self.write(APPEND)
+            self.maybe_flush()
+            i = end
+
+    def save_dict(self, w_dict):
+        space = self.space
+        if self.bin:
+            self.write(EMPTY_DICT)
+        else:
+            self.write(MARK + DICT)
+        self.memoize(w_dict)
+        if self.w_persistent_id is None:
+            # dicts using the str or int strategy
+            strs = space.listview_str(w_dict)
+            if strs is not None:
+                self.batch_setitems(w_dict, strs, None, 'str')
+                return
+            ints = space.listview_int(w_dict)
+            if ints is not None:
+                self.batch_setitems(w_dict, ints, None, 'int')
+                return
+        self.save_dict_items(space.call_method(w_dict, 'iteritems'))
+
+    def save_dict_items(self, w_iterator):
+        space = self.space
+        keys_w = []
+        values_w = []
+        for w_item in space.listview(w_iterator):
+            w_key, w_value = space.fixedview(w_item, 2)
+            keys_w.append(w_key)
+            values_w.append(w_value)
+        self.batch_setitems(None, keys_w, values_w, 'obj')
+
+    @specialize.arg(5)
+    def save_key_value(self, w_dict, keys, values_w, j, kind):
+        space = self.space
+        if kind == 'obj':
+            self.save(keys[j])
+            self.save(values_w[j])
+            return
+        if kind == 'str':
+            self.save_str(keys[j])
+            w_value = space.finditem_str(w_dict, keys[j])
+        else:
+            self.save_int(keys[j])
+            w_value = space.finditem(w_dict, space.wrap(keys[j]))
+        if w_value is None:
+            raise OperationError(space.w_RuntimeError, space.wrap(
+                "dictionary changed size during iteration"))
+        self.save(w_value)
+
+    @specialize.arg(4)
+    def batch_setitems(self, w_dict, keys, values_w, kind):
+        if not self.bin:
+            for j in range(len(keys)):
+                self.save_key_value(w_dict, keys, values_w, j, kind)
+                self.write(SETITEM)
+            return
+        n = len(keys)
+        i = 0
+        while i < n:
+            end = min(i + BATCHSIZE, n)
+            if end - i > 1:
+                self.write(MARK)
+                for j in range(i, end):
+                    self.save_key_value(w_dict, keys, values_w, j, kind)
+                self.write(SETITEMS)
+            else:
+                self.save_key_value(w_dict, keys, values_w, i, kind)
+                self.write(SETITEM)
+            self.maybe_flush()
+            i = end
+
+    def save_other(self, w_obj, w_type):
+        space = self.space
+        state = get_state(space)
+        if space.is_w(w_type, state.w_InstanceType):
+            self.save_inst(w_obj)
+            return
+        if (space.is_w(w_type, state.w_ClassType) or
+                space.is_w(w_type, state.w_FunctionType) or
+                space.is_w(w_type, state.w_BuiltinFunctionType) or
+                space.is_true(space.issubtype(w_type, space.w_type))):
+            self.save_global(w_obj, None)
+            return
+        w_reduce = space.finditem(state.w_dispatch_table, w_type)
+        if w_reduce is not None:
+            w_rv = space.call_function(w_reduce, w_obj)
+        else:
+            w_reduce = space.findattr(w_obj, space.wrap('__reduce_ex__'))
+            if w_reduce is not None:
+                w_rv = space.call_function(w_reduce, space.wrap(self.proto))
+            else:
+                w_reduce = space.findattr(w_obj, space.wrap('__reduce__'))
+                if w_reduce is None:
+                    raise pickling_error(space,
+                        "Can't pickle '%s' object: %s" % (
+                            w_type.getname(space),
+                            space.str_w(space.repr(w_obj))))
+                w_rv = space.call_function(w_reduce)
+        if space.is_w(space.type(w_rv), space.w_str):
+            self.save_global(w_obj, space.str_w(w_rv))
+            return
+        if not space.is_w(space.type(w_rv), space.w_tuple):
+            raise pickling_error(space, "%s must return string or tuple" %
+                                 (space.str_w(space.str(w_reduce)),))
+        rv_w = space.fixedview(w_rv)
+        if not 2 <= len(rv_w) <= 5:
+            raise pickling_error(space,
+                "Tuple returned by %s must have two to five elements" %
+                (space.str_w(space.str(w_reduce)),))
+        w_state = w_listitems = w_dictitems = None
+        if len(rv_w) > 2:
+            w_state = rv_w[2]
+        if len(rv_w) > 3:
+            w_listitems = rv_w[3]
+        if len(rv_w) > 4:
+            w_dictitems = rv_w[4]
+        self.save_reduce(rv_w[0], rv_w[1], w_state, w_listitems,
+                         w_dictitems, w_obj)
+
+    def save_reduce(self, w_func, w_args, w_state, w_listitems, w_dictitems,
+                    w_obj):
+        space = self.space
+        if not space.is_true(space.isinstance(w_args, space.w_tuple)):
+            raise pickling_error(space,
+                                 "args from reduce() should be a tuple")
+        if space.findattr(w_func, space.wrap('__call__')) is None:
+            raise pickling_error(space,
+                                 "func from reduce should be callable")
+        newobj = False
+        if self.proto >= 2:
+            w_name = space.findattr(w_func, space.wrap('__name__'))
+            newobj = (w_name is not None and
+                      space.eq_w(w_name, space.wrap('__newobj__')))
+        if newobj:
+            args_w = space.fixedview(w_args)
+            if len(args_w) == 0:
+                raise pickling_error(space, "__newobj__ arglist is empty")
+            w_cls = args_w[0]
+            if space.findattr(w_cls, space.wrap('__new__')) is None:
+                raise pickling_error(space,
+                    "args[0] from __newobj__ args has no __new__")
+            if w_obj is not None and not space.is_w(
+                    w_cls, space.getattr(w_obj, space.wrap('__class__'))):
+                raise pickling_error(space,
+                    "args[0] from __newobj__ args has the wrong class")
+            self.save(w_cls)
+            self.save(space.newtuple(args_w[1:]))
+            self.write(NEWOBJ)
+        else:
+            self.save(w_func)
+            self.save(w_args)
+            self.write(REDUCE)
+        if w_obj is not None:
+            self.memoize(w_obj)
+        if w_listitems is not None and not space.is_w(w_listitems,
+                                                      space.w_None):
+            self.batch_appends(space.listview(w_listitems)[:], 'obj')
+        if w_dictitems is not None and not space.is_w(w_dictitems,
+                                                      space.w_None):
+            self.save_dict_items(w_dictitems)
+        if w_state is not None and not space.is_w(w_state, space.w_None):
+            self.save(w_state)
+            self.write(BUILD)
+
+    def save_inst(self, w_obj):
+        space = self.space
+        w_cls = space.getattr(w_obj, space.wrap('__class__'))
+        w_getinitargs = space.findattr(w_obj, space.wrap('__getinitargs__'))
+        if w_getinitargs is not None:
+            args_w = space.fixedview(space.call_function(w_getinitargs))
+        else:
+            args_w = []
+        self.write(MARK)
+        if self.bin:
+            self.save(w_cls)
+            for w_arg in args_w:
+                self.save(w_arg)
+            self.write(OBJ)
+        else:
+            for w_arg in args_w:
+                self.save(w_arg)
+            self.write(INST)
+            self.write(space.str_w(space.getattr(w_cls,
+                                                 space.wrap('__module__'))))
+            self.write('\n')
+            self.write(space.str_w(space.getattr(w_cls,
+                                                 space.wrap('__name__'))))
+            self.write('\n')
+        self.memoize(w_obj)
+        w_getstate = space.findattr(w_obj, space.wrap('__getstate__'))
+        if w_getstate is not None:
+            w_state = space.call_function(w_getstate)
+        else:
+            w_state = space.getattr(w_obj, space.wrap('__dict__'))
+        self.save(w_state)
+        self.write(BUILD)
+
+    def save_global(self, w_obj, name):
+        space = self.space
+        if name is None:
+            name = space.str_w(space.getattr(w_obj, space.wrap('__name__')))
+        w_name = space.wrap(name)
+        w_module = space.findattr(w_obj, space.wrap('__module__'))
+        if w_module is None or space.is_w(w_module, space.w_None):
+            w_pickle = _import(space, 'pickle')
+            w_module = space.call_method(w_pickle, 'whichmodule', w_obj,
+                                         w_name)
+        module = space.str_w(w_module)
+        try:
+            w_klass = space.getattr(_import(space, module), w_name)
+        except OperationError, e:
+            if not (e.match(space, space.w_ImportError) or
+                    e.match(space, space.w_KeyError) or
+                    e.match(space, space.w_AttributeError)):
+                raise
+            raise pickling_error(space,
+                "Can't pickle %s: it's not found as %s.%s" % (
+                    space.str_w(space.repr(w_obj)), module, name))
+        if not space.is_w(w_klass, w_obj):
+            raise pickling_error(space,
+                "Can't pickle %s: it's not the same object as %s.%s" % (
+                    space.str_w(space.repr(w_obj)), module, name))
+        if self.proto >= 2:
+            state = get_state(space)
+            w_code = space.finditem(state.w_extension_registry,
+                                    space.newtuple([w_module, w_name]))
+            if w_code is not None:
+                code = space.int_w(w_code)
+                if code <= 0xff:
+                    self.write(EXT1)
+                    self.write(chr(code))
+                elif code <= 0xffff:
+                    self.write(EXT2)
+                    self.write(chr(code & 0xff))
+                    self.write(chr(code >> 8))
+                else:
+                    self.write(EXT4)
+                    self.write_int4(code)
+                return
+        self.write(GLOBAL)
+        self.write(module)
+        self.write('\n')
+        self.write(name)
+        self.write('\n')
+        self.memoize(w_obj)
+
+    def get_fast(self, space):
+        return space.newbool(self.fast)
+
+    def set_fast(self, space, w_fast):
+        self.fast = space.is_true(w_fast)
+
+    def get_persistent_id(self, space):
+        if self.w_persistent_id_attr is None:
+            return space.w_None
+        return self.w_persistent_id_attr
+
+    def set_persistent_id(self, space, w_persistent_id):
+        self.w_persistent_id_attr = w_persistent_id
+
+W_Pickler.typedef = TypeDef("Pickler",
+    __module__ = "cPickle",
+    __doc__ = W_Pickler.__doc__,
+    __new__ = interp2app(W_Pickler.descr__new__.im_func),
+    dump = interp2app(W_Pickler.dump),
+    getvalue = interp2app(W_Pickler.getvalue),
+    clear_memo = interp2app(W_Pickler.clear_memo),
+    memo = GetSetProperty(W_Pickler.get_memo, W_Pickler.set_memo),
+    fast = GetSetProperty(W_Pickler.get_fast, W_Pickler.set_fast),
+    persistent_id = GetSetProperty(W_Pickler.get_persistent_id,
+                                   W_Pickler.set_persistent_id),
+)
+
+# ____________________________________________________________
+
+class W_Unpickler(Wrappable):
+    """Unpickler(file) -- Create an unpickler.
+
+This takes a file-like object with read() and readline() methods for
+reading a pickle data stream."""
+
+    def __init__(self, space, w_file, data):
+        self.space = space
+        # either w_file is None and the pickle is read from 'data', or
+        # w_read and w_readline are the methods of the file
+        self.w_read = None
+        self.w_readline = None
+        if w_file is not None:
+            self.w_read = space.findattr(w_file, space.wrap('read'))
+            self.w_readline = space.findattr(w_file, space.wrap('readline'))
+            if self.w_read is None or self.w_readline is None:
+                raise OperationError(space.w_TypeError, space.wrap(
+                    "argument must have 'read' and 'readline' attributes"))
+        self.data = data
+        self.pos = 0
+        self.memo = {}           # memo index -> object
+        self.stack_w = []
+        self.marks = []          # positions of the MARKs in stack_w
+        self.w_persistent_load = None
+        self.w_persistent_load_attr = None
+        self.w_find_global = None
+        self.w_find_class = None
+
+    def descr__new__(space, w_subtype, w_file):
+        w_self = space.allocate_instance(W_Unpickler, w_subtype)
+        W_Unpickler.__init__(space.interp_w(W_Unpickler, w_self), space,
+                             w_file, '')
+        return w_self
+
+    # ____________________________________________________________
+    # reading the input
+
+    def read(self, n):
+        space = self.space
+        if self.w_read is None:
+            pos = self.pos
+            if n > len(self.data) - pos:
+                raise OperationError(space.w_EOFError, space.w_None)
+            end = pos + n
+            assert end >= 0
+            self.pos = end
+            return self.data[pos:end]
+        s = space.str_w(space.call_function(self.w_read, space.wrap(n)))
+        if len(s) != n:
+            raise OperationError(space.w_EOFError, space.w_None)
+        return s
+
+    def read1(self):
+        if self.w_read is None:
+            pos = self.pos
+            if pos >= len(self.data):
+                raise OperationError(self.space.w_EOFError,
+                                     self.space.w_None)
+            self.pos = pos + 1
+            return self.data[pos]
+        return self.read(1)[0]
+
+    def readline(self, eof_ok=False):
+        """ Returns the next line, without its newline.  With 'eof_ok',
+        a last line without a newline is returned as it is. """
+        space = self.space
+        if self.w_read is None:
+            pos = self.pos
+            end = self.data.find('\n', pos)
+            if end < 0:
+                if not eof_ok:
+                    raise unpickling_error(space, "pickle data was truncated")
+                end = len(self.data)
+            self.pos = end + 1
+            assert pos >= 0
+            return self.data[pos:end]
+        s = space.str_w(space.call_function(self.w_readline))
+        end = len(s) - 1
+        if end < 0 or s[end] != '\n':
+            if not eof_ok:
+                raise unpickling_error(space, "pickle data was truncated")
+            return s
+        return s[:end]
+
+    def read_int4(self):
+        return _read_int4(self.read(4))
+
+    # ____________________________________________________________
+    # the stack
+
+    def append(self, w_obj):
+        self.stack_w.append(w_obj)
+
+    def pop(self):
+        if not self.stack_w:
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w.pop()
+
+    def top(self):
+        if not self.stack_w:
+            raise unpickling_error(self.space, "unpickling stack underflow")
+        return self.stack_w[-1]
+
+    def pop_mark(self):
+        """ Removes and returns the objects above the last MARK. """
+        if not self.marks:
+            raise unpickling_error(self.space, "could not find MARK")
+        k = min(self.marks.pop(), len(self.stack_w))
+        items_w = self.stack_w[k:]
+        del self.stack_w[k:]
+        return items_w
+
+    # ____________________________________________________________
+
+    def load(self):
+        """load() -- Load a pickle"""
+        space = self.space
+        w_self = space.wrap(self)
+        self.w_persistent_load = _attribute_or_none(space, w_self,
+                                                    'persistent_load')
+        self.w_find_class = space.findattr(w_self, space.wrap('find_class'))
+        self.stack_w = []
+        self.marks = []
+        while True:
+            opcode = self.read1()
+            if opcode == STOP:
+                break
+            self.dispatch(opcode)
+        return self.pop()
+
+    def dispatch(self, opcode):
+        space = self.space
+        if opcode == MARK:
+            self.marks.append(len(self.stack_w))
+        elif opcode == NONE:
+            self.append(space.w_None)
+        elif opcode == BININT1:
+            self.append(space.wrap(ord(self.read1())))
+        elif opcode == BININT2:
+            s = self.read(2)
+            self.append(space.wrap(ord(s[0]) | (ord(s[1]) << 8)))
+        elif opcode == BININT:
+            self.append(space.wrap(self.read_int4()))
+        elif opcode == NEWTRUE:
+            self.append(space.w_True)
+        elif opcode == NEWFALSE:
+            self.append(space.w_False)
+        elif opcode == BINFLOAT:
+            self.append(space.newfloat(ieee.unpack_float(self.read(8), True)))
+        elif opcode == SHORT_BINSTRING:
+            self.append(space.wrap(self.read(ord(self.read1()))))
+        elif opcode == BINSTRING:
+            self.load_binstring(self.read_int4())
+        elif opcode == BINUNICODE:
+            n = self.read_int4()
+            if n < 0:
+                raise unpickling_error(space, "BINUNICODE pickle has "
+                                       "negative byte count")
+            self.append(space.wrap(PyUnicode_DecodeUTF8(space, self.read(n))))
+        elif opcode == LONG1:
+            self.load_long_binary(ord(self.read1()))
+        elif opcode == LONG4:
+            self.load_long_binary(self.read_int4())
+        elif opcode == EMPTY_TUPLE:
+            self.append(space.newtuple([]))
+        elif opcode == TUPLE1:
+            w_item = self.pop()
+            self.append(space.newtuple([w_item]))
+        elif opcode == TUPLE2:
+            w_item2 = self.pop()
+            w_item1 = self.pop()
+            self.append(space.newtuple([w_item1, w_item2]))
+        elif opcode == TUPLE3:
+            w_item3 = self.pop()
+            w_item2 = self.pop()
+            w_item1 = self.pop()
+            self.append(space.newtuple([w_item1, w_item2, w_item3]))
+        elif opcode == TUPLE:
+            self.append(space.newtuple(self.pop_mark()))
+        elif opcode == EMPTY_LIST:
+            self.append(space.newlist([]))
+        elif opcode == LIST:
+            self.append(space.newlist(self.pop_mark()))
+        elif opcode == EMPTY_DICT:
+            self.append(space.newdict())
+        elif opcode == DICT:
+            items_w = self.pop_mark()
+            w_dict = space.newdict()
+            self.setitems(w_dict, items_w)
+            self.append(w_dict)
+        elif opcode == APPEND:
+            w_value = self.pop()
+            self.appends(self.top(), [w_value])
+        elif opcode == APPENDS:
+            items_w = self.pop_mark()
+            self.appends(self.top(), items_w)
+        elif opcode == SETITEM:
+            w_value = self.pop()
+            w_key = self.pop()
+            space.setitem(self.top(), w_key, w_value)
+        elif opcode == SETITEMS:
+            items_w = self.pop_mark()
+            self.setitems(self.top(), items_w)
+        elif opcode == BINPUT:
+            self.memo[ord(self.read1())] = self.top()
+        elif opcode == LONG_BINPUT:
+            self.memo[self.read_int4()] = self.top()
+        elif opcode == PUT:
+            self.memo[self.read_index()] = self.top()
+        elif opcode == BINGET:
+            self.load_get(ord(self.read1()))
+        elif opcode == LONG_BINGET:
+            self.load_get(self.read_int4())
+        elif opcode == GET:
+            self.load_text_get()
+        elif opcode == POP:
+            if self.marks and self.marks[-1] == len(self.stack_w):
+                self.marks.pop()
+            else:
+                self.pop()
+        elif opcode == POP_MARK:
+            self.pop_mark()
+        elif opcode == DUP:
+            self.append(self.top())
+        elif opcode == PROTO:
+            proto = ord(self.read1())
+            if proto > HIGHEST_PROTOCOL:
+                raise OperationError(space.w_ValueError, space.wrap(
+                    "unsupported pickle protocol: %d" % proto))
+        elif opcode == GLOBAL:
+            module = self.readline()
+            name = self.readline()
+            self.append(self.find_class(space.wrap(module), space.wrap(name)))
+        elif opcode == EXT1:
+            self.load_extension(ord(self.read1()))
+        elif opcode == EXT2:
+            s = self.read(2)
+            self.load_extension(ord(s[0]) | (ord(s[1]) << 8))
+        elif opcode == EXT4:
+            self.load_extension(self.read_int4())
+        elif opcode == REDUCE:
+            w_args = self.pop()
+            w_func = self.pop()
+            self.append(space.call(w_func, w_args))
+        elif opcode == NEWOBJ:
+            w_args = self.pop()
+            w_cls = self.pop()
+            args_w = [w_cls] + space.fixedview(w_args)
+            w_new = space.getattr(w_cls, space.wrap('__new__'))
+            self.append(space.call(w_new, space.newtuple(args_w)))
+        elif opcode == BUILD:
+            w_state = self.pop()
+            self.load_build(self.top(), w_state)
+        elif opcode == OBJ:
+            items_w = self.pop_mark()
+            if not items_w:
+                raise unpickling_error(space, "unpickling stack underflow")
+            self.instantiate(items_w[0], items_w[1:])
+        elif opcode == INST:
+            module = self.readline()
+            name = self.readline()
+            w_klass = self.find_class(space.wrap(module), space.wrap(name))
+            self.instantiate(w_klass, self.pop_mark())
+        elif opcode == BINPERSID:
+            self.load_persid(self.pop())
+        elif opcode == PERSID:
+            self.load_persid(space.wrap(self.readline()))
+        elif opcode == INT:
+            line = self.readline()
+            if line == '00':
+                self.append(space.w_False)
+            elif line == '01':
+                self.append(space.w_True)
+            else:
+                self.append(space.call_function(space.w_int,
+                                                space.wrap(line)))
+        elif opcode == LONG:
+            self.append(space.call_function(space.w_long,
+                                            space.wrap(self.readline()),
+                                            space.wrap(0)))
+        elif opcode == FLOAT:
+            self.append(space.call_function(space.w_float,
+                                            space.wrap(self.readline())))
+        elif opcode == STRING:
+            self.load_string(self.readline())
+        elif opcode == UNICODE:
+            self.append(space.wrap(PyUnicode_DecodeRawUnicodeEscape(
+                space, self.readline())))
+        else:
+            raise unpickling_error(space, "invalid load key, '%s'." % opcode)
+
+    def read_index(self):
+        space = self.space
+        return space.int_w(space.call_function(space.w_int,
+                                               space.wrap(self.readline())))
+
+    def load_get(self, index):
+        try:
+            self.append(self.memo[index])
+        except KeyError:
+            space = self.space
+            # BadPickleGet is KeyError
+            raise OperationError(space.w_KeyError, space.wrap(index))
+
+    def load_text_get(self):
+        # like cPickle, any key that is not in the memo is a BadPickleGet,
+        # including a malformed or truncated one
+        space = self.space
+        line = self.readline(eof_ok=True)
+        try:
+            w_index = space.call_function(space.w_int, space.wrap(line))
+            index = space.int_w(w_index)
+        except OperationError, e:
+            if not (e.match(space, space.w_ValueError) or
+                    e.match(space, space.w_OverflowError)):
+                raise
+            raise OperationError(space.w_KeyError, space.wrap(line))
+        self.load_get(index)
+
+    def load_binstring(self, n):
+        if n < 0:
+            raise unpickling_error(self.space, "BINSTRING pickle has "
+                                   "negative byte count")
+        self.append(self.space.wrap(self.read(n)))
+
+    def load_string(self, line):
+        space = self.space
+        # strip the quotes, which must match
+        end = len(line) - 1
+        if end >= 1 and line[0] == line[end] and line[0] in '"\'':
+            self.append(space.wrap(PyString_DecodeEscape(
+                space, line[1:end], None)))
+        else:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("insecure string pickle"))
+
+    def load_long_binary(self, n):
+        if n < 0:
+            raise unpickling_error(self.space, "LONG pickle has negative "
+                                   "byte count")
+        self.append(self.space.newlong_from_rbigint(
+            decode_long(self.read(n))))
+
+    def appends(self, w_list, items_w):
+        space = self.space
+        if space.is_w(space.type(w_list), space.w_list):
+            space.call_method(w_list, 'extend', space.newlist(items_w))
+        else:
+            w_append = space.getattr(w_list, space.wrap('append'))
+            for w_item in items_w:
+                space.call_function(w_append, w_item)
+
+    def setitems(self, w_dict, items_w):
+        space = self.space
+        if len(items_w) & 1:
+            raise unpickling_error(space, "odd number of items for "
+                                   "SETITEMS")
+        for i in range(0, len(items_w), 2):
+            space.setitem(w_dict, items_w[i], items_w[i + 1])
+
+    def load_build(self, w_inst, w_state):
+        space = self.space
+        w_setstate = space.findattr(w_inst, space.wrap('__setstate__'))
+        if w_setstate is not None:
+            space.call_function(w_setstate, w_state)
+            return
+        w_slotstate = None
+        if (space.is_w(space.type(w_state), space.w_tuple) and
+                space.len_w(w_state) == 2):
+            w_state, w_slotstate = space.fixedview(w_state, 2)
+        if space.is_true(w_state):
+            w_dict = space.getattr(w_inst, space.wrap('__dict__'))
+            keys = space.listview_str(w_state)
+            if keys is not None:
+                for key in keys:
+                    w_value = space.finditem_str(w_state, key)
+                    if w_value is not None:
+                        space.setitem_str(w_dict, key, w_value)
+            else:
+                space.call_method(w_dict, 'update', w_state)
+        if w_slotstate is not None and space.is_true(w_slotstate):
+            w_items = space.call_method(w_slotstate, 'items')
+            for w_item in space.listview(w_items):
+                w_key, w_value = space.fixedview(w_item, 2)
+                space.setattr(w_inst, w_key, w_value)
+
+    def instantiate(self, w_klass, args_w):
+        space = self.space
+        state = get_state(space)
+        if (not args_w and
+                space.isinstance_w(w_klass, state.w_ClassType) and
+                space.findattr(w_klass,
+                               space.wrap('__getinitargs__')) is None):
+            # an old-style instance, without calling __init__
+            self.append(space.call_function(state.w_InstanceType, w_klass))
+            return
+        try:
+            w_value = space.call(w_klass, space.newtuple(args_w))
+        except OperationError, e:
+            if not e.match(space, space.w_TypeError):
+                raise
+            w_name = space.findattr(w_klass, space.wrap('__name__'))
+            if w_name is None:
+                raise
+            raise OperationError(space.w_TypeError, space.wrap(
+                "in constructor for %s: %s" % (
+                    space.str_w(space.str(w_name)),
+                    space.str_w(space.str(e.get_w_value(space))))))
+        self.append(w_value)
+
+    def load_persid(self, w_pid):
+        space = self.space
+        if self.w_persistent_load is None:
+            raise unpickling_error(space,
+                "A load persistent id instruction was encountered,\n"
+                "but no persistent_load function was specified.")
+        self.append(space.call_function(self.w_persistent_load, w_pid))
+
+    def load_extension(self, code):
+        space = self.space
+        state = get_state(space)
+        w_code = space.wrap(code)
+        w_obj = space.finditem(state.w_extension_cache, w_code)
+        if w_obj is None:
+            w_key = space.finditem(state.w_inverted_registry, w_code)
+            if w_key is None:
+                raise OperationError(space.w_ValueError, space.wrap(
+                    "unregistered extension code %d" % code))
+            w_module, w_name = space.fixedview(w_key, 2)
+            w_obj = self.find_class(w_module, w_name)
+            space.setitem(state.w_extension_cache, w_code, w_obj)
+        self.append(w_obj)
+
+    def find_class(self, w_module, w_name):
+        space = self.space
+        if self.w_find_global is not None:
+            return space.call_function(self.w_find_global, w_module, w_name)
+        if self.w_find_class is not None:
+            return space.call_function(self.w_find_class, w_module, w_name)
+        return space.getattr(_import(space, space.str_w(w_module)), w_name)
+
+    def get_memo(self, space):
+        w_memo = space.newdict()
+        for index, w_obj in self.memo.items():
+            space.setitem(w_memo, space.wrap(index), w_obj)
+        return w_memo
+
+    def set_memo(self, space, w_memo):
+        memo = {}
+        w_items = space.call_method(w_memo, 'items')
+        for w_item in space.listview(w_items):
+            w_index, w_obj = space.fixedview(w_item, 2)
+            w_index = space.call_function(space.w_int, w_index)
+            memo[space.int_w(w_index)] = w_obj
+        self.memo = memo
+
+    def get_persistent_load(self, space):
+        if self.w_persistent_load_attr is None:
+            return space.w_None
+        return self.w_persistent_load_attr
+
+    def set_persistent_load(self, space, w_persistent_load):
+        self.w_persistent_load_attr = w_persistent_load
+
+    def get_find_global(self, space):
+        if self.w_find_global is None:
+            return space.w_None
+        return self.w_find_global
+
+    def set_find_global(self, space, w_find_global):
+        if space.is_w(w_find_global, space.w_None):
+            self.w_find_global = None
+        else:
+            self.w_find_global = w_find_global
+
+W_Unpickler.typedef = TypeDef("Unpickler",
+    __module__ = "cPickle",
+    __doc__ = W_Unpickler.__doc__,
+    __new__ = interp2app(W_Unpickler.descr__new__.im_func),
+    load = interp2app(W_Unpickler.load),
+    memo = GetSetProperty(W_Unpickler.get_memo, W_Unpickler.set_memo),
+    persistent_load = GetSetProperty(W_Unpickler.get_persistent_load,
+                                     W_Unpickler.set_persistent_load),
+    find_global = GetSetProperty(W_Unpickler.get_find_global,
+                                 W_Unpickler.set_find_global),
+)
+
+# ____________________________________________________________
+
+def dump(space, w_obj, w_file, w_protocol=None):
+    """dump(obj, file, protocol=0) -- Write an object in pickle format to
+the given file."""
+    if w_protocol is None:
+        w_protocol = space.w_None
+    w_write = space.findattr(w_file, space.wrap('write'))
+    if w_write is None:
+        raise OperationError(space.w_TypeError, space.wrap(
+            "argument must have 'write' attribute"))
+    pickler = W_Pickler(space, w_write, _get_protocol(space, w_protocol))
+    pickler.dump(w_obj)
+
+def dumps(space, w_obj, w_protocol=None):
+    """dumps(obj, protocol=0) -- Return a string containing an object in
+pickle format."""
+    if w_protocol is None:
+        w_protocol = space.w_None
+    pickler = W_Pickler(space, None, _get_protocol(space, w_protocol))
+    pickler.dump(w_obj)
+    return space.wrap(pickler.builder.build())
+
+def load(space, w_file):
+    """load(file) -- Load a pickle from the given file"""
+    return W_Unpickler(space, w_file, '').load()
+
+@unwrap_spec(data='bufferstr')
+def loads(space, data):
+    """loads(string) -- Load a pickle from the given string"""
+    return W_Unpickler(space, None, data).load()
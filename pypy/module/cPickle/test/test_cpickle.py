@@ -0,0 +1,296 @@
+from pypy.conftest import gettestobjspace
+
+
+class AppTestCPickle:
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=('cPickle', 'struct',
+                                                'binascii', 'cStringIO'))
+
+    def test_builtin_module(self):
+        import cPickle
+        assert cPickle.Pickler.__module__ == 'cPickle'
+        assert cPickle.HIGHEST_PROTOCOL == 2
+        import pickle
+        assert cPickle.PicklingError is pickle.PicklingError
+        assert cPickle.BadPickleGet is KeyError
+
+    def test_atoms(self):
+        import cPickle, sys
+        for proto in range(3):
+            for x in [None, True, False, 0, 1, -1, 255, 256, 65535, 65536,
+                      -65536, 2 ** 31 - 1, -2 ** 31, sys.maxint, -sys.maxint,
+                      0.0, -1.5, 1e300, float('inf'), 0L, 1L, -1L, 255L,
+                      -128L, -129L, 2L ** 64, -2L ** 64, 3L ** 1000, '',
+                      'abc', 'x' * 300, '\n\\\x00"\'', u'', u'abc\xe9',
+                      u'\u1234\n\\', u'\U00012345', 'x' * 70000]:
+                s = cPickle.dumps(x, proto)
+                y = cPickle.loads(s)
+                assert y == x
+                assert type(y) is type(x)
+
+    def test_long_sizes(self):
+        import cPickle
+        for nbits in range(0, 300, 7):
+            for x in [2L ** nbits - 1, 2L ** nbits, 2L ** nbits + 1]:
+                for proto in range(3):
+                    assert cPickle.loads(cPickle.dumps(x, proto)) == x
+                    assert cPickle.loads(cPickle.dumps(-x, proto)) == -x
+
+    def test_exact_output(self):
+        import cPickle
+        assert cPickle.dumps(5) == 'I5\n.'
+        assert cPickle.dumps(5, 1) == 'K\x05.'
+        assert cPickle.dumps(True, 2) == '\x80\x02\x88.'
+        assert cPickle.dumps(True) == 'I01\n.'
+        assert cPickle.dumps(None, 1) == 'N.'
+        assert cPickle.dumps(1000, 1) == 'M\xe8\x03.'
+        assert cPickle.dumps(-1, 1) == 'J\xff\xff\xff\xff.'
+        assert cPickle.dumps(255L, 2) == '\x80\x02\x8a\x02\xff\x00.'
+        assert cPickle.dumps(-256L, 2) == '\x80\x02\x8a\x02\x00\xff.'
+        assert cPickle.dumps(7L) == 'L7L\n.'
+        assert cPickle.dumps(1.5, 1) == 'G?\xf8\x00\x00\x00\x00\x00\x00.'
+        assert cPickle.dumps('ab', 1) == 'U\x02abq\x01.'
+        assert cPickle.dumps((1, 2), 2) == '\x80\x02K\x01K\x02\x86q\x01.'
+        assert cPickle.dumps([], 1) == ']q\x01.'
+        assert cPickle.dumps([1, 2], 0) == '(lp1\nI1\naI2\na.'
+
+    def test_containers(self):
+        import cPickle
+        d = {'a': [1, 2, 3], 'b': ('x', 1.5, None), 'c': {}}
+        l = [d, d, [], (), ((),), range(2500), [str(i) for i in range(2500)],
+             dict.fromkeys(range(1500), 'v'), {(1, 2): 3, None: u'x'}]
+        for proto in range(3):
+            result = cPickle.loads(cPickle.dumps(l, proto))
+            assert result == l
+            assert result[0] is result[1]
+            assert type(result[6][0]) is str
+
+    def test_shared_strings(self):
+        import cPickle
+        s = 'hello world'
+        l = [s, s + '', 'hello ' + 'world']
+        result = cPickle.loads(cPickle.dumps(l, 2))
+        assert result == l
+        assert result[0] is result[1] is result[2]
+
+    def test_recursive(self):
+        import cPickle
+        for proto in range(3):
+            l = [1]
+            l.append(l)
+            result = cPickle.loads(cPickle.dumps(l, proto))
+            assert result[1] is result
+            d = {}
+            d['self'] = d
+            result = cPickle.loads(cPickle.dumps(d, proto))
+            assert result['self'] is result
+            t = ([],)
+            t[0].append(t)
+            result = cPickle.loads(cPickle.dumps(t, proto))
+            assert result[0][0] is result
+
+    def test_too_deep(self):
+        import cPickle
+        l = []
+        for i in range(50000):
+            l = [l]
+        raises(RuntimeError, cPickle.dumps, l, 2)
+
+    def test_classes_and_instances(self):
+        import cPickle
+        import pickletest_module as m
+        for proto in range(3):
+            for obj in [m.Old(5), m.New(6), m.Slots(7), m.Initargs(8),
+                        m.ListSub([1, 2]), m.DictSub(a=1)]:
+                result = cPickle.loads(cPickle.dumps(obj, proto))
+                assert type(result) is type(obj)
+                assert result == obj
+            assert cPickle.loads(cPickle.dumps(m.Old, proto)) is m.Old
+            assert cPickle.loads(cPickle.dumps(len, proto)) is len
+            assert cPickle.loads(cPickle.dumps(m.func, proto)) is m.func
+        raises(cPickle.PicklingError, cPickle.dumps, lambda: 1)
+
+    def test_extension_registry(self):
+        import cPickle, copy_reg
+        import pickletest_module as m
+        copy_reg.add_extension('pickletest_module', 'New', 0x1234)
+        try:
+            s = cPickle.dumps(m.New, 2)
+            assert s == '\x80\x02\x83\x34\x12.'
+            assert cPickle.loads(s) is m.New
+        finally:
+            copy_reg.remove_extension('pickletest_module', 'New', 0x1234)
+
+    def test_pickler_file(self):
+        import cPickle, cStringIO
+        f = cStringIO.StringIO()
+        p = cPickle.Pickler(f, 2)
+        p.dump([1, 2])
+        p.dump('abc')
+        f.seek(0)
+        u = cPickle.Unpickler(f)
+        assert u.load() == [1, 2]
+        assert u.load() == 'abc'
+        raises(EOFError, u.load)
+        f = cStringIO.StringIO()
+        cPickle.dump({'a': 1}, f, 1)
+        f.seek(0)
+        assert cPickle.load(f) == {'a': 1}
+        raises(TypeError, cPickle.Pickler, 42.5)
+
+    def test_list_based_pickler(self):
+        import cPickle
+        p = cPickle.Pickler(1)
+        p.dump((1, 2))
+        assert cPickle.loads(p.getvalue()) == (1, 2)
+        for proto in range(3):
+            p = cPickle.Pickler(proto)
+            p.dump([5])
+            assert p.getvalue() == cPickle.dumps([5], proto)
+        p = cPickle.Pickler()
+        p.dump([5])
+        assert p.getvalue() == cPickle.dumps([5], 0)
+
+    def test_memo(self):
+        import cPickle, cStringIO
+        l = [1, 2]
+        f = cStringIO.StringIO()
+        p = cPickle.Pickler(f, 2)
+        p.dump(l)
+        assert p.memo[id(l)] == (1, l)
+        p.dump(l)
+        assert len(f.getvalue()) > 2 * 3
+        assert f.getvalue().endswith('h\x01.')
+        p.clear_memo()
+        assert p.memo == {}
+        f.seek(0)
+        u = cPickle.Unpickler(f)
+        a = u.load()
+        assert u.load() is a
+        assert u.memo == {1: a}
+        u2 = cPickle.Unpickler(cStringIO.StringIO('\x80\x02h\x01.'))
+        u2.memo = u.memo
+        assert u2.load() is a
+
+    def test_fast(self):
+        import cPickle, cStringIO
+        p = cPickle.Pickler(cStringIO.StringIO(), 2)
+        p.fast = 1
+        assert p.fast
+        l = []
+        l.append(l)
+        raises(ValueError, p.dump, l)
+
+    def test_persistent(self):
+        import cPickle, cStringIO
+        def persistent_id(obj):
+            if isinstance(obj, int) and obj % 2:
+                return str(obj)
+            return None
+        for proto in range(3):
+            f = cStringIO.StringIO()
+            p = cPickle.Pickler(f, proto)
+            p.persistent_id = persistent_id
+            p.dump([1, 2, 3, 'x'])
+            f.seek(0)
+            u = cPickle.Unpickler(f)
+            u.persistent_load = lambda pid: int(pid) * 10
+            assert u.load() == [10, 2, 30, 'x']
+        raises(cPickle.UnpicklingError, cPickle.loads, 'Pfoo\n.')
+
+    def test_subclass(self):
+        import cPickle, cStringIO
+        class MyPickler(cPickle.Pickler):
+            def persistent_id(self, obj):
+                if obj == 'secret':
+                    return 'id'
+        class MyUnpickler(cPickle.Unpickler):
+            def persistent_load(self, pid):
+                return 'loaded ' + pid
+            def find_class(self, module, name):
+                return (module, name)
+        f = cStringIO.StringIO()
+        MyPickler(f, 2).dump(['secret', 'public', len])
+        f.seek(0)
+        result = MyUnpickler(f).load()
+        assert result == ['loaded id', 'public', ('__builtin__', 'len')]
+
+    def test_find_global(self):
+        import cPickle, cStringIO
+        u = cPickle.Unpickler(cStringIO.StringIO('cos\nsep\n.'))
+        u.find_global = lambda module, name: module + '.' + name
+        assert u.load() == 'os.sep'
+
+    def test_bad_input(self):
+        import cPickle
+        raises(EOFError, cPickle.loads, '')
+        raises(EOFError, cPickle.loads, 'K')
+        raises(cPickle.UnpicklingError, cPickle.loads, '0')
+        raises(cPickle.UnpicklingError, cPickle.loads, 'Z')
+        raises(cPickle.UnpicklingError, cPickle.loads, 't.')
+        raises(cPickle.BadPickleGet, cPickle.loads, 'h\x05.')
+        raises(cPickle.BadPickleGet, cPickle.loads, 'garyp')
+        raises(ValueError, cPickle.loads, "S'abc\n.")
+        raises(ValueError, cPickle.loads, '\x80\x03N.')
+        raises(ValueError, cPickle.dumps, 1, 3)
+
+    def test_protocol_0_strings(self):
+        import cPickle
+        assert cPickle.loads("S'a\\nb'\np0\n.") == 'a\nb'
+        assert cPickle.loads('S"it\'s"\n.') == "it's"
+        assert cPickle.loads('Vab\\u1234\np0\n.') == u'ab\u1234'
+        assert cPickle.loads('L12345678901234567890L\n.') == \
+               12345678901234567890L
+        assert cPickle.loads('F1.25\n.') == 1.25
+
+    def test_compatible_with_pickle(self):
+        import cPickle, pickle
+        import pickletest_module as m
+        data = [1, 2L ** 70, 'x', u'y', (1,), {'a': [m.New(3)]},
+                m.Old(4), m.func, None, True]
+        for proto in range(3):
+            assert pickle.loads(cPickle.dumps(data, proto)) == data
+            assert cPickle.loads(pickle.dumps(data, proto)) == data
+
+    def setup_method(self, meth):
+        self.space.appexec([], """():
+            import sys, types
+            if 'pickletest_module' in sys.modules:
+                return
+            m = types.ModuleType('pickletest_module')
+            exec '''
+class Base:
+    def __eq__(self, other):
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+class Old(Base):
+    def __init__(self, x):
+        self.x = x
+class Initargs(Base):
+    def __init__(self, x):
+        self.x = x
+    def __getinitargs__(self):
+        return (self.x,)
+class New(object):
+    def __init__(self, x):
+        self.x = x
+    def __eq__(self, other):
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+class Slots(object):
+    __slots__ = ['x']
+    def __init__(self, x):
+        self.x = x
+    def __getstate__(self):
+        return self.x
+    def __setstate__(self, x):
+        self.x = x
+    def __eq__(self, other):
+        return type(self) is type(other) and self.x == other.x
+class ListSub(list):
+    pass
+class DictSub(dict):
+    pass
+def func():
+    pass
+''' in m.__dict__
+            sys.modules['pickletest_module'] = m
+        """)
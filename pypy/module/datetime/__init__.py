@@ -0,0 +1,17 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+class Module(MixedModule):
+    """Fast implementation of the datetime type."""
+
+    appleveldefs = {
+    }
+
+    interpleveldefs = {
+        'MINYEAR': 'space.wrap(support.MINYEAR)',
+        'MAXYEAR': 'space.wrap(support.MAXYEAR)',
+        'date': 'interp_datetime.W_Date',
+        'datetime': 'interp_datetime.W_DateTime',
+        'time': 'interp_datetime.W_Time',
+        'tzinfo': 'interp_datetime.W_TZInfo',
+        'timedelta': 'interp_timedelta.W_TimeDelta',
+    }
@@ -0,0 +1,1428 @@
+import math
+
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec, NoneNotWrapped
+from pypy.interpreter.typedef import TypeDef, GetSetProperty, generic_new_descr
+from pypy.module.datetime import support
+from pypy.module.datetime.support import (pack_date, ymd_year, ymd_month,
+    ymd_day, ymd_ordinal, ord_to_ymd, pack_time, hms_hour, hms_minute,
+    hms_second, hms_seconds, append_int, MINYEAR, MAXYEAR, MAXORDINAL)
+from pypy.module.datetime.interp_timedelta import (W_TimeDelta, new_delta,
+    hash_ints, cmp_ints, cmperror, US_PER_SECOND, SECONDS_PER_DAY)
+from pypy.rlib.objectmodel import specialize
+from pypy.rlib.rarithmetic import ovfcheck_float_to_int
+from pypy.rlib.rfloat import round_away
+from pypy.rlib.rstring import StringBuilder
+from pypy.rpython.lltypesystem import lltype, rffi
+from pypy.tool.sourcetools import func_with_new_name
+
+# the utc offsets are ints counting minutes, or NO_OFFSET for None
+NO_OFFSET = -1 << 20
+
+# the results of _cmp(), besides -1, 0 and 1
+CMP_NOTIMPLEMENTED = 2
+CMP_UNORDERED = 3       # only == and != are defined
+
+
+# ____________________________________________________________
+# arguments
+
+def _int_arg(space, w_value, default):
+    if w_value is None:
+        return default
+    if space.isinstance_w(w_value, space.w_float):
+        raise OperationError(space.w_TypeError, space.wrap(
+            "integer argument expected, got float"))
+    return space.int_w(w_value)
+
+def _required_arg(space, w_value, name, pos):
+    if w_value is None:
+        raise operationerrfmt(space.w_TypeError,
+                              "Required argument '%s' (pos %d) not found",
+                              name, pos)
+    return _int_arg(space, w_value, 0)
+
+def check_date(space, year, month, day):
+    """ Returns the packed date, after checking the fields. """
+    if not MINYEAR <= year <= MAXYEAR:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("year is out of range"))
+    if not 1 <= month <= 12:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("month must be in 1..12"))
+    if not 1 <= day <= support.days_in_month(year, month):
+        raise OperationError(space.w_ValueError,
+                             space.wrap("day is out of range for month"))
+    return pack_date(year, month, day)
+
+def check_time(space, hour, minute, second, microsecond):
+    """ Returns the packed time, after checking the fields. """
+    if not 0 <= hour <= 23:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("hour must be in 0..23"))
+    if not 0 <= minute <= 59:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("minute must be in 0..59"))
+    if not 0 <= second <= 59:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("second must be in 0..59"))
+    if not 0 <= microsecond < US_PER_SECOND:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("microsecond must be in 0..999999"))
+    return pack_time(hour, minute, second)
+
+def check_tzinfo(space, w_tzinfo):
+    """ Returns the W_TZInfo, or None for None. """
+    if w_tzinfo is None or space.is_w(w_tzinfo, space.w_None):
+        return None
+    if not isinstance(w_tzinfo, W_TZInfo):
+        raise operationerrfmt(space.w_TypeError,
+                              "tzinfo argument must be None or of a tzinfo "
+                              "subclass, not type '%s'",
+                              space.type(w_tzinfo).getname(space))
+    return w_tzinfo
+
+def _state_tzinfo(space, w_tzinfo):
+    # the tzinfo argument given with a pickled state
+    if w_tzinfo is None or space.is_w(w_tzinfo, space.w_None):
+        return None
+    if not isinstance(w_tzinfo, W_TZInfo):
+        raise OperationError(space.w_TypeError,
+                             space.wrap("bad tzinfo state arg"))
+    return w_tzinfo
+
+def _format_str(space, w_format):
+    if space.isinstance_w(w_format, space.w_unicode):
+        w_format = space.str(w_format)
+    return space.str_w(w_format)
+
+# ____________________________________________________________
+# tzinfo calls
+
+def call_offset(space, w_tzinfo, name, w_arg):
+    """ Calls tzinfo.utcoffset() or tzinfo.dst() and checks the result.
+    Returns the offset in minutes, or NO_OFFSET. """
+    if w_tzinfo is None:
+        return NO_OFFSET
+    w_offset = space.call_method(w_tzinfo, name, w_arg)
+    if space.is_w(w_offset, space.w_None):
+        return NO_OFFSET
+    if not isinstance(w_offset, W_TimeDelta):
+        raise operationerrfmt(space.w_TypeError,
+                              "tzinfo.%s() must return None or timedelta, "
+                              "not '%s'", name,
+                              space.type(w_offset).getname(space))
+    if w_offset.microseconds or w_offset.seconds % 60:
+        raise operationerrfmt(space.w_ValueError,
+                              "tzinfo.%s() must return a whole number of "
+                              "minutes", name)
+    if not -1 <= w_offset.days <= 0:
+        raise operationerrfmt(space.w_ValueError,
+                              "tzinfo.%s() returned %s; must be in "
+                              "-1439 .. 1439", name,
+                              space.str_w(space.str(w_offset)))
+    offset = w_offset.days * 24 * 60 + w_offset.seconds // 60
+    if not -1440 < offset < 1440:
+        raise operationerrfmt(space.w_ValueError,
+                              "tzinfo.%s() returned %d; must be in "
+                              "-1439 .. 1439", name, offset)
+    return offset
+
+def call_tzname(space, w_tzinfo, w_arg):
+    if w_tzinfo is None:
+        return space.w_None
+    w_name = space.call_method(w_tzinfo, 'tzname', w_arg)
+    if not (space.is_w(w_name, space.w_None) or
+            space.isinstance_w(w_name, space.w_str)):
+        raise operationerrfmt(space.w_TypeError,
+                              "tzinfo.tzname() must return None or a string, "
+                              "not '%s'", space.type(w_name).getname(space))
+    return w_name
+
+def wrap_offset(space, offset):
+    if offset == NO_OFFSET:
+        return space.w_None
+    return space.wrap(new_delta(space, 0, offset * 60, 0))
+
+def _dst_flag(dst):
+    if dst == NO_OFFSET:
+        return -1
+    if dst:
+        return 1
+    return 0
+
+# ____________________________________________________________
+# the time module
+
+def _time_module(space):
+    return space.getbuiltinmodule('time')
+
+def _timetuple_w(space, year, month, day, hour, minute, second, dstflag):
+    ordinal = support.ymd_to_ord(year, month, day)
+    yday = support.days_before_month(year, month) + day
+    return space.newtuple([space.wrap(year), space.wrap(month),
+                           space.wrap(day), space.wrap(hour),
+                           space.wrap(minute), space.wrap(second),
+                           space.wrap((ordinal + 6) % 7), space.wrap(yday),
+                           space.wrap(dstflag)])
+
+def _struct_time(space, w_timetuple):
+    w_struct_time = space.getattr(_time_module(space),
+                                  space.wrap('struct_time'))
+    return space.call_function(w_struct_time, w_timetuple)
+
+def _time_fields(space, w_tm):
+    # the six first fields of a struct_time
+    return [space.int_w(space.getitem(w_tm, space.wrap(i)))
+            for i in range(6)]
+
+def _current_time_w(space):
+    return space.call_method(_time_module(space), 'time')
+
+# ____________________________________________________________
+# formatting
+
+def _append_state_date(builder, ymd):
+    year = ymd_year(ymd)
+    builder.append(chr(year >> 8))
+    builder.append(chr(year & 0xff))
+    builder.append(chr(ymd_month(ymd)))
+    builder.append(chr(ymd_day(ymd)))
+
+def _append_state_time(builder, hms, microsecond):
+    builder.append(chr(hms_hour(hms)))
+    builder.append(chr(hms_minute(hms)))
+    builder.append(chr(hms_second(hms)))
+    builder.append(chr(microsecond >> 16))
+    builder.append(chr((microsecond >> 8) & 0xff))
+    builder.append(chr(microsecond & 0xff))
+
+def _append_tzinfo_repr(space, builder, w_tzinfo):
+    if w_tzinfo is not None:
+        builder.append(', tzinfo=')
+        builder.append(space.str_w(space.repr(w_tzinfo)))
+    builder.append(')')
+
+@specialize.argtype(1)
+def strftime(space, w_obj, format):
+    """ Like time.strftime(), with the directives %z, %Z and %f.  The
+    numeric directives are formatted here; if the format uses others,
+    the result comes from time.strftime().
+    """
+    ymd = w_obj.strftime_ymd()
+    hms = w_obj.strftime_hms()
+    year = ymd_year(ymd)
+    if year < 1900:
+        raise operationerrfmt(space.w_ValueError,
+                              "year=%d is before 1900; the datetime "
+                              "strftime() methods require year >= 1900", year)
+    result = StringBuilder()
+    newformat = StringBuilder()   # the format for time.strftime()
+    complete = True
+    i = 0
+    while i < len(format):
+        c = format[i]
+        i += 1
+        if c != '%':
+            result.append(c)
+            newformat.append(c)
+            continue
+        if i == len(format):
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("strftime format ends with raw %"))
+        c = format[i]
+        i += 1
+        if c == 'z':
+            offset = w_obj.strftime_offset(space)
+            if offset != NO_OFFSET:
+                builder = StringBuilder(5)
+                support.append_offset(builder, offset, '')
+                s = builder.build()
+                result.append(s)
+                newformat.append(s)
+            continue
+        if c == 'Z':
+            w_name = w_obj.strftime_tzname(space)
+            if not space.is_w(w_name, space.w_None):
+                result.append(space.str_w(w_name))
+                newformat.append(_escape_tzname(space, w_name))
+            continue
+        if c == 'f':
+            append_int(result, w_obj.strftime_microsecond(), 6)
+            append_int(newformat, w_obj.strftime_microsecond(), 6)
+            continue
+        newformat.append('%')
+        newformat.append(c)
+        if c == 'Y':
+            append_int(result, year, 4)
+        elif c == 'y':
+            append_int(result, year % 100, 2)
+        elif c == 'm':
+            append_int(result, ymd_month(ymd), 2)
+        elif c == 'd':
+            append_int(result, ymd_day(ymd), 2)
+        elif c == 'j':
+            yday = support.days_before_month(year, ymd_month(ymd))
+            append_int(result, yday + ymd_day(ymd), 3)
+        elif c == 'H':
+            append_int(result, hms_hour(hms), 2)
+        elif c == 'M':
+            append_int(result, hms_minute(hms), 2)
+        elif c == 'S':
+            append_int(result, hms_second(hms), 2)
+        elif c == '%':
+            result.append('%')
+        else:
+            complete = False
+    if complete:
+        return space.wrap(result.build())
+    return space.call_method(_time_module(space), 'strftime',
+                             space.wrap(newformat.build()),
+                             w_obj.strftime_timetuple(space))
+
+def _escape_tzname(space, w_name):
+    # doubles the '%' for time.strftime(), with the replace() method of str
+    # subclasses, like CPython
+    if not space.is_w(space.type(w_name), space.w_str):
+        w_name = space.call_method(w_name, 'replace', space.wrap('%'),
+                                   space.wrap('%%'))
+        if not space.isinstance_w(w_name, space.w_str):
+            raise OperationError(space.w_TypeError, space.wrap(
+                "tzname.replace() did not return a string"))
+        return space.str_w(w_name)
+    name = space.str_w(w_name)
+    builder = StringBuilder(len(name))
+    for c in name:
+        if c == '%':
+            builder.append('%')
+        builder.append(c)
+    return builder.build()
+
+def descr_format(space, w_self, w_format):
+    if not (space.isinstance_w(w_format, space.w_str) or
+            space.isinstance_w(w_format, space.w_unicode)):
+        raise operationerrfmt(space.w_ValueError,
+                              "__format__ expects str or unicode, not %s",
+                              space.type(w_format).getname(space))
+    if space.len_w(w_format) == 0:
+        return space.str(w_self)
+    return space.call_method(w_self, 'strftime', w_format)
+
+# ____________________________________________________________
+# comparisons
+
+def _richcompare_methods():
+    # one set of functions per class, calling the _cmp() method of the class
+    def make(op):
+        def descr_richcompare(self, space, w_other):
+            c = self._cmp(space, w_other)
+            if c == CMP_NOTIMPLEMENTED:
+                return space.w_NotImplemented
+            if c == CMP_UNORDERED:
+                if op == 'eq':
+                    return space.w_False
+                if op == 'ne':
+                    return space.w_True
+                raise cmperror(space, self, w_other)
+            if op == 'eq':
+                return space.newbool(c == 0)
+            if op == 'ne':
+                return space.newbool(c != 0)
+            if op == 'lt':
+                return space.newbool(c < 0)
+            if op == 'le':
+                return space.newbool(c <= 0)
+            if op == 'gt':
+                return space.newbool(c > 0)
+            return space.newbool(c >= 0)
+        return func_with_new_name(descr_richcompare, 'descr_' + op)
+    return [make(op) for op in ['eq', 'ne', 'lt', 'le', 'gt', 'ge']]
+
+def _cmp_fields(ymd1, hms1, us1, ymd2, hms2, us2):
+    if ymd1 != ymd2:
+        return cmp_ints(ymd1, ymd2)
+    if hms1 != hms2:
+        return cmp_ints(hms1, hms2)
+    return cmp_ints(us1, us2)
+
+def _utc_minutes(hms, offset):
+    return hms_hour(hms) * 60 + hms_minute(hms) - offset
+
+# ____________________________________________________________
+
+class W_Date(Wrappable):
+    """date(year, month, day) --> date object"""
+
+    _immutable_fields_ = ['ymd']
+
+    def __init__(self, ymd):
+        self.ymd = ymd
+
+    def descr__new__(space, w_subtype, w_year, w_month=NoneNotWrapped,
+                     w_day=NoneNotWrapped):
+        if (w_month is None and w_day is None and
+                space.isinstance_w(w_year, space.w_str) and
+                space.len_w(w_year) == 4):
+            state = space.str_w(w_year)
+            if 1 <= ord(state[2]) <= 12:
+                # unpickling
+                ymd = pack_date(ord(state[0]) * 256 + ord(state[1]),
+                                ord(state[2]), ord(state[3]))
+                return new_date(space, w_subtype, ymd)
+        ymd = check_date(space, _int_arg(space, w_year, 0),
+                         _required_arg(space, w_month, 'month', 2),
+                         _required_arg(space, w_day, 'day', 3))
+        return new_date(space, w_subtype, ymd)
+
+    def descr_fromtimestamp(space, w_type, w_timestamp):
+        """timestamp -> local date from a POSIX timestamp (like
+time.time())."""
+        _check_time_t(space, space.float_w(w_timestamp))
+        w_tm = space.call_method(_time_module(space), 'localtime',
+                                 w_timestamp)
+        fields = _time_fields(space, w_tm)
+        return make_date(space, w_type,
+                         check_date(space, fields[0], fields[1], fields[2]))
+
+    def descr_today(space, w_type):
+        """Current date or datetime:  same as
+self.__class__.fromtimestamp(time.time())."""
+        return space.call_method(w_type, 'fromtimestamp',
+                                 _current_time_w(space))
+
+    @unwrap_spec(n=int)
+    def descr_fromordinal(space, w_type, n):
+        """int -> date corresponding to a proleptic Gregorian ordinal."""
+        if n < 1:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("ordinal must be >= 1"))
+        if n > MAXORDINAL:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("year is out of range"))
+        return make_date(space, w_type, ord_to_ymd(n))
+
+    def descr_get_year(self, space):
+        return space.wrap(ymd_year(self.ymd))
+
+    def descr_get_month(self, space):
+        return space.wrap(ymd_month(self.ymd))
+
+    def descr_get_day(self, space):
+        return space.wrap(ymd_day(self.ymd))
+
+    def descr_repr(self, space):
+        builder = StringBuilder()
+        builder.append('datetime.')
+        builder.append(space.type(self).getname(space))
+        builder.append('(')
+        builder.append(str(ymd_year(self.ymd)))
+        builder.append(', ')
+        builder.append(str(ymd_month(self.ymd)))
+        builder.append(', ')
+        builder.append(str(ymd_day(self.ymd)))
+        builder.append(')')
+        return space.wrap(builder.build())
+
+    def descr_isoformat(self, space):
+        """Return string in ISO 8601 format, YYYY-MM-DD."""
+        builder = StringBuilder(10)
+        support.append_date(builder, self.ymd, '-')
+        return space.wrap(builder.build())
+
+    def descr_str(self, space):
+        builder = StringBuilder(10)
+        support.append_date(builder, self.ymd, '-')
+        return space.wrap(builder.build())
+
+    def descr_ctime(self, space):
+        """Return ctime() style string."""
+        builder = StringBuilder(24)
+        support.append_ctime(builder, self.ymd, 0)
+        return space.wrap(builder.build())
+
+    def descr_strftime(self, space, w_format):
+        """format -> strftime() style string."""
+        return strftime(space, self, _format_str(space, w_format))
+
+    def descr_timetuple(self, space):
+        """Return time tuple, compatible with time.localtime()."""
+        return _struct_time(space, self.strftime_timetuple(space))
+
+    def descr_toordinal(self, space):
+        """Return proleptic Gregorian ordinal.  January 1 of year 1 is day
+1."""
+        return space.wrap(ymd_ordinal(self.ymd))
+
+    def descr_weekday(self, space):
+        """Return the day of the week represented by the date.
+Monday == 0 ... Sunday == 6"""
+        return space.wrap(support.weekday(self.ymd))
+
+    def descr_isoweekday(self, space):
+        """Return the day of the week represented by the date.
+Monday == 1 ... Sunday == 7"""
+        return space.wrap(support.weekday(self.ymd) + 1)
+
+    def descr_isocalendar(self, space):
+        """Return a 3-tuple containing ISO year, week number, and weekday."""
+        year = ymd_year(self.ymd)
+        today = ymd_ordinal(self.ymd)
+        week1monday = support.iso_week1_monday(year)
+        if today < week1monday:
+            year -= 1
+            week1monday = support.iso_week1_monday(year)
+        elif (today - week1monday >= 52 * 7 and
+                  today >= support.iso_week1_monday(year + 1)):
+            year += 1
+            week1monday = support.iso_week1_monday(year)
+        week = (today - week1monday) // 7
+        day = (today - week1monday) % 7
+        return space.newtuple([space.wrap(year), space.wrap(week + 1),
+                               space.wrap(day + 1)])
+
+    def descr_replace(self, space, w_year=NoneNotWrapped,
+                      w_month=NoneNotWrapped, w_day=NoneNotWrapped):
+        """Return date with new specified fields."""
+        ymd = check_date(space, _int_arg(space, w_year, ymd_year(self.ymd)),
+                         _int_arg(space, w_month, ymd_month(self.ymd)),
+                         _int_arg(space, w_day, ymd_day(self.ymd)))
+        return new_date(space, space.type(self), ymd)
+
+    def _cmp(self, space, w_other):
+        if isinstance(w_other, W_Date):
+            return cmp_ints(self.ymd, w_other.ymd)
+        if space.findattr(w_other, space.wrap('timetuple')) is not None:
+            return CMP_NOTIMPLEMENTED
+        return CMP_UNORDERED
+
+    descr_eq, descr_ne, descr_lt, descr_le, descr_gt, descr_ge = (
+        _richcompare_methods())
+
+    def descr_hash(self, space):
+        return space.wrap(hash_ints(self.ymd, 0, 0))
+
+    def descr_add(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return space.wrap(self._add_days(space, w_other.days))
+
+    def descr_sub(self, space, w_other):
+        if isinstance(w_other, W_TimeDelta):
+            return space.wrap(self._add_days(space, -w_other.days))
+        if isinstance(w_other, W_Date):
+            days = ymd_ordinal(self.ymd) - ymd_ordinal(w_other.ymd)
+            return space.wrap(W_TimeDelta(days, 0, 0))
+        return space.w_NotImplemented
+
+    def _add_days(self, space, days):
+        ordinal = ymd_ordinal(self.ymd) + days
+        if not 1 <= ordinal <= MAXORDINAL:
+            raise OperationError(space.w_OverflowError,
+                                 space.wrap("date value out of range"))
+        return W_Date(ord_to_ymd(ordinal))
+
+    def descr_reduce(self, space):
+        builder = StringBuilder(4)
+        _append_state_date(builder, self.ymd)
+        return space.newtuple([space.type(self), space.newtuple([
+            space.wrap(builder.build())])])
+
+    # the fields used by strftime()
+
+    def strftime_ymd(self):
+        return self.ymd
+
+    def strftime_hms(self):
+        return 0
+
+    def strftime_microsecond(self):
+        return 0
+
+    def strftime_offset(self, space):
+        return NO_OFFSET
+
+    def strftime_tzname(self, space):
+        return space.w_None
+
+    def strftime_timetuple(self, space):
+        return _timetuple_w(space, ymd_year(self.ymd), ymd_month(self.ymd),
+                            ymd_day(self.ymd), 0, 0, 0, -1)
+
+
+def new_date(space, w_subtype, ymd):
+    if space.is_w(w_subtype, space.gettypeobject(W_Date.typedef)):
+        return space.wrap(W_Date(ymd))
+    self = space.allocate_instance(W_Date, w_subtype)
+    W_Date.__init__(self, ymd)
+    return space.wrap(self)
+
+def make_date(space, w_type, ymd):
+    # the alternate constructors call the constructor of subclasses
+    if space.is_w(w_type, space.gettypeobject(W_Date.typedef)):
+        return space.wrap(W_Date(ymd))
+    return space.call_function(w_type, space.wrap(ymd_year(ymd)),
+                               space.wrap(ymd_month(ymd)),
+                               space.wrap(ymd_day(ymd)))
+
+W_Date.typedef = TypeDef("date",
+    __module__ = "datetime",
+    __doc__ = W_Date.__doc__,
+    __new__ = interp2app(W_Date.descr__new__.im_func),
+    fromtimestamp = interp2app(W_Date.descr_fromtimestamp.im_func,
+                               as_classmethod=True),
+    today = interp2app(W_Date.descr_today.im_func, as_classmethod=True),
+    fromordinal = interp2app(W_Date.descr_fromordinal.im_func,
+                             as_classmethod=True),
+    year = GetSetProperty(W_Date.descr_get_year),
+    month = GetSetProperty(W_Date.descr_get_month),
+    day = GetSetProperty(W_Date.descr_get_day),
+    __repr__ = interp2app(W_Date.descr_repr),
+    __str__ = interp2app(W_Date.descr_str),
+    __format__ = interp2app(descr_format),
+    isoformat = interp2app(W_Date.descr_isoformat),
+    ctime = interp2app(W_Date.descr_ctime),
+    strftime = interp2app(W_Date.descr_strftime),
+    timetuple = interp2app(W_Date.descr_timetuple),
+    toordinal = interp2app(W_Date.descr_toordinal),
+    weekday = interp2app(W_Date.descr_weekday),
+    isoweekday = interp2app(W_Date.descr_isoweekday),
+    isocalendar = interp2app(W_Date.descr_isocalendar),
+    replace = interp2app(W_Date.descr_replace),
+    __eq__ = interp2app(W_Date.descr_eq),
+    __ne__ = interp2app(W_Date.descr_ne),
+    __lt__ = interp2app(W_Date.descr_lt),
+    __le__ = interp2app(W_Date.descr_le),
+    __gt__ = interp2app(W_Date.descr_gt),
+    __ge__ = interp2app(W_Date.descr_ge),
+    __hash__ = interp2app(W_Date.descr_hash),
+    __add__ = interp2app(W_Date.descr_add),
+    __radd__ = interp2app(W_Date.descr_add),
+    __sub__ = interp2app(W_Date.descr_sub),
+    __reduce__ = interp2app(W_Date.descr_reduce),
+    min = W_Date(pack_date(MINYEAR, 1, 1)),
+    max = W_Date(pack_date(MAXYEAR, 12, 31)),
+    resolution = W_TimeDelta(1, 0, 0),
+)
+
+# ____________________________________________________________
+
+class W_DateTime(W_Date):
+    """datetime(year, month, day[, hour[, minute[, second[, microsecond[,tzinfo]]]]])
+
+The year, month and day arguments are required. tzinfo may be None, or an
+instance of a tzinfo subclass. The remaining arguments may be ints or longs.
+"""
+
+    _immutable_fields_ = ['hms', 'microsecond', 'w_tzinfo']
+
+    def __init__(self, ymd, hms, microsecond, w_tzinfo):
+        W_Date.__init__(self, ymd)
+        self.hms = hms
+        self.microsecond = microsecond
+        self.w_tzinfo = w_tzinfo
+
+    def descr__new__(space, w_subtype, w_year, w_month=NoneNotWrapped,
+                     w_day=NoneNotWrapped, w_hour=NoneNotWrapped,
+                     w_minute=NoneNotWrapped, w_second=NoneNotWrapped,
+                     w_microsecond=NoneNotWrapped, w_tzinfo=NoneNotWrapped):
+        if (w_day is None and space.isinstance_w(w_year, space.w_str) and
+                space.len_w(w_year) == 10):
+            state = space.str_w(w_year)
+            if 1 <= ord(state[2]) <= 12:
+                # unpickling
+                w_tzinfo = _state_tzinfo(space, w_month)
+                ymd = pack_date(ord(state[0]) * 256 + ord(state[1]),
+                                ord(state[2]), ord(state[3]))
+                hms = pack_time(ord(state[4]), ord(state[5]), ord(state[6]))
+                microsecond = ((ord(state[7]) << 16) | (ord(state[8]) << 8) |
+                               ord(state[9]))
+                return new_datetime(space, w_subtype, ymd, hms, microsecond,
+                                    w_tzinfo)
+        ymd = check_date(space, _int_arg(space, w_year, 0),
+                         _required_arg(space, w_month, 'month', 2),
+                         _required_arg(space, w_day, 'day', 3))
+        microsecond = _int_arg(space, w_microsecond, 0)
+        hms = check_time(space, _int_arg(space, w_hour, 0),
+                         _int_arg(space, w_minute, 0),
+                         _int_arg(space, w_second, 0), microsecond)
+        return new_datetime(space, w_subtype, ymd, hms, microsecond,
+                            check_tzinfo(space, w_tzinfo))
+
+    def descr_fromtimestamp(space, w_type, w_timestamp, w_tz=None):
+        """timestamp[, tz] -> tz's local time from POSIX timestamp."""
+        w_tzinfo = check_tzinfo(space, w_tz)
+        t = space.float_w(w_timestamp)
+        if t < 0.0:
+            microsecond = int(round_away(math.fmod(-t, 1.0) * US_PER_SECOND))
+            if microsecond > 0:
+                microsecond = US_PER_SECOND - microsecond
+                t -= 1.0
+        else:
+            microsecond = int(round_away(math.fmod(t, 1.0) * US_PER_SECOND))
+            if microsecond == US_PER_SECOND:
+                microsecond = 0
+                t += 1.0
+        if w_tzinfo is None:
+            converter = 'localtime'
+        else:
+            converter = 'gmtime'
+        w_result = _datetime_from_time(space, w_type, converter, t,
+                                       microsecond, w_tzinfo)
+        if w_tzinfo is not None:
+            w_result = space.call_method(w_tzinfo, 'fromutc', w_result)
+        return w_result
+
+    def descr_utcfromtimestamp(space, w_type, w_timestamp):
+        """timestamp -> UTC datetime from a POSIX timestamp (like
+time.time())."""
+        t = space.float_w(w_timestamp)
+        seconds = math.floor(t)
+        microsecond = int(round_away((t - seconds) * US_PER_SECOND))
+        if microsecond == US_PER_SECOND:
+            microsecond = 0
+            seconds += 1.0
+        return _datetime_from_time(space, w_type, 'gmtime', seconds,
+                                   microsecond, None)
+
+    def descr_now(space, w_type, w_tz=None):
+        """[tz] -> new datetime with tz's local day and time."""
+        return space.call_method(w_type, 'fromtimestamp',
+                                 _current_time_w(space), w_tz)
+
+    def descr_utcnow(space, w_type):
+        """Return a new datetime representing UTC day and time."""
+        return space.call_method(w_type, 'utcfromtimestamp',
+                                 _current_time_w(space))
+
+    def descr_combine(space, w_type, w_date, w_time):
+        """date, time -> datetime with same date and time fields"""
+        if not isinstance(w_date, W_Date):
+            raise operationerrfmt(space.w_TypeError,
+                                  "combine() argument 1 must be "
+                                  "datetime.date, not %s",
+                                  space.type(w_date).getname(space))
+        if not isinstance(w_time, W_Time):
+            raise operationerrfmt(space.w_TypeError,
+                                  "combine() argument 2 must be "
+                                  "datetime.time, not %s",
+                                  space.type(w_time).getname(space))
+        return make_datetime(space, w_type, w_date.ymd, w_time.hms,
+                             w_time.microsecond, w_time.w_tzinfo)
+
+    def descr_strptime(space, w_type, w_string, w_format):
+        """string, format -> new datetime parsed from a string (like
+time.strptime())."""
+        if (space.isinstance_w(w_string, space.w_str) and
+                space.isinstance_w(w_format, space.w_str)):
+            data = space.str_w(w_string)
+            fields = support.parse(data, space.str_w(w_format))
+            if fields is not None:
+                end = fields[7]
+                if end < 0:
+                    raise operationerrfmt(space.w_ValueError,
+                        "time data %s does not match format %s",
+                        space.str_w(space.repr(w_string)),
+                        space.str_w(space.repr(w_format)))
+                if end < len(data):
+                    raise operationerrfmt(space.w_ValueError,
+                                          "unconverted data remains: %s",
+                                          data[end:])
+                ymd = check_date(space, fields[0], fields[1], fields[2])
+                hms = check_time(space, fields[3], fields[4], fields[5],
+                                 fields[6])
+                return make_datetime(space, w_type, ymd, hms, fields[6],
+                                     None)
+        # the general case, as in lib_pypy/datetime.py
+        w_strptime = space.call_function(space.builtin.get('__import__'),
+                                         space.wrap('_strptime'))
+        w_result = space.call_method(w_strptime, '_strptime', w_string,
+                                     w_format)
+        w_struct, w_micros = space.fixedview(w_result, 2)
+        args_w = [space.getitem(w_struct, space.wrap(i)) for i in range(6)]
+        args_w.append(w_micros)
+        return space.call(w_type, space.newtuple(args_w))
+
+    def descr_get_hour(self, space):
+        return space.wrap(hms_hour(self.hms))
+
+    def descr_get_minute(self, space):
+        return space.wrap(hms_minute(self.hms))
+
+    def descr_get_second(self, space):
+        return space.wrap(hms_second(self.hms))
+
+    def descr_get_microsecond(self, space):
+        return space.wrap(self.microsecond)
+
+    def descr_get_tzinfo(self, space):
+        if self.w_tzinfo is None:
+            return space.w_None
+        return self.w_tzinfo
+
+    def utcoffset_minutes(self, space):
+        return call_offset(space, self.w_tzinfo, 'utcoffset', self)
+
+    def descr_utcoffset(self, space):
+        """Return self.tzinfo.utcoffset(self)."""
+        return wrap_offset(space, self.utcoffset_minutes(space))
+
+    def descr_dst(self, space):
+        """Return self.tzinfo.dst(self)."""
+        return wrap_offset(space, call_offset(space, self.w_tzinfo, 'dst',
+                                              self))
+
+    def descr_tzname(self, space):
+        """Return self.tzinfo.tzname(self)."""
+        return call_tzname(space, self.w_tzinfo, self)
+
+    def descr_repr(self, space):
+        builder = StringBuilder()
+        builder.append('datetime.')
+        builder.append(space.type(self).getname(space))
+        builder.append('(')
+        builder.append(str(ymd_year(self.ymd)))
+        builder.append(', ')
+        builder.append(str(ymd_month(self.ymd)))
+        builder.append(', ')
+        builder.append(str(ymd_day(self.ymd)))
+        builder.append(', ')
+        builder.append(str(hms_hour(self.hms)))
+        builder.append(', ')
+        builder.append(str(hms_minute(self.hms)))
+        if hms_second(self.hms) or self.microsecond:
+            builder.append(', ')
+            builder.append(str(hms_second(self.hms)))
+        if self.microsecond:
+            builder.append(', ')
+            builder.append(str(self.microsecond))
+        _append_tzinfo_repr(space, builder, self.w_tzinfo)
+        return space.wrap(builder.build())
+
+    def _isoformat(self, space, sep):
+        builder = StringBuilder(32)
+        support.append_date(builder, self.ymd, '-')
+        builder.append(sep)
+        support.append_time(builder, self.hms, self.microsecond)
+        offset = self.utcoffset_minutes(space)
+        if offset != NO_OFFSET:
+            support.append_offset(builder, offset, ':')
+        return space.wrap(builder.build())
+
+    @unwrap_spec(sep=str)
+    def descr_isoformat(self, space, sep='T'):
+        """[sep] -> string in ISO 8601 format, YYYY-MM-DDTHH:MM:SS[.mmmmmm][+HH:MM].
+
+sep is used to separate the year from the time, and defaults to 'T'."""
+        if len(sep) != 1:
+            raise OperationError(space.w_TypeError, space.wrap(
+                "isoformat() argument 1 must be char, not str"))
+        return self._isoformat(space, sep)
+
+    def descr_str(self, space):
+        return self._isoformat(space, ' ')
+
+    def descr_ctime(self, space):
+        """Return ctime() style string."""
+        builder = StringBuilder(24)
+        support.append_ctime(builder, self.ymd, self.hms)
+        return space.wrap(builder.build())
+
+    def descr_timetuple(self, space):
+        """Return time tuple, compatible with time.localtime()."""
+        return _struct_time(space, self.strftime_timetuple(space))
+
+    def descr_utctimetuple(self, space):
+        """Return UTC time tuple, compatible with time.localtime()."""
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            offset = 0
+        minutes = _utc_minutes(self.hms, offset)
+        ordinal = ymd_ordinal(self.ymd) + minutes // (24 * 60)
+        minutes = minutes % (24 * 60)
+        # at the edges, the year may be 0 or MAXYEAR + 1
+        if ordinal < 1:
+            year, month, day = MINYEAR - 1, 12, 31
+        elif ordinal > MAXORDINAL:
+            year, month, day = MAXYEAR + 1, 1, 1
+        else:
+            ymd = ord_to_ymd(ordinal)
+            year, month, day = ymd_year(ymd), ymd_month(ymd), ymd_day(ymd)
+        return _struct_time(space, _timetuple_w(space, year, month, day,
+                                                minutes // 60, minutes % 60,
+                                                hms_second(self.hms), 0))
+
+    def descr_date(self, space):
+        """Return date object with same year, month and day."""
+        return space.wrap(W_Date(self.ymd))
+
+    def descr_time(self, space):
+        """Return time object with same time but with tzinfo=None."""
+        return space.wrap(W_Time(self.hms, self.microsecond, None))
+
+    def descr_timetz(self, space):
+        """Return time object with same time and tzinfo."""
+        return space.wrap(W_Time(self.hms, self.microsecond, self.w_tzinfo))
+
+    def descr_replace(self, space, w_year=NoneNotWrapped,
+                      w_month=NoneNotWrapped, w_day=NoneNotWrapped,
+                      w_hour=NoneNotWrapped, w_minute=NoneNotWrapped,
+                      w_second=NoneNotWrapped, w_microsecond=NoneNotWrapped,
+                      w_tzinfo=NoneNotWrapped):
+        """Return datetime with new specified fields."""
+        ymd = check_date(space, _int_arg(space, w_year, ymd_year(self.ymd)),
+                         _int_arg(space, w_month, ymd_month(self.ymd)),
+                         _int_arg(space, w_day, ymd_day(self.ymd)))
+        microsecond = _int_arg(space, w_microsecond, self.microsecond)
+        hms = check_time(space, _int_arg(space, w_hour, hms_hour(self.hms)),
+                         _int_arg(space, w_minute, hms_minute(self.hms)),
+                         _int_arg(space, w_second, hms_second(self.hms)),
+                         microsecond)
+        if w_tzinfo is None:
+            w_newtzinfo = self.w_tzinfo
+        else:
+            w_newtzinfo = check_tzinfo(space, w_tzinfo)
+        return new_datetime(space, space.type(self), ymd, hms, microsecond,
+                            w_newtzinfo)
+
+    def descr_astimezone(self, space, w_tz):
+        """tz -> convert to local time in new timezone tz"""
+        if not isinstance(w_tz, W_TZInfo):
+            raise operationerrfmt(space.w_TypeError,
+                                  "astimezone() argument 1 must be "
+                                  "datetime.tzinfo, not %s",
+                                  space.type(w_tz).getname(space))
+        if self.w_tzinfo is None:
+            raise OperationError(space.w_ValueError, space.wrap(
+                "astimezone() cannot be applied to a naive datetime"))
+        if self.w_tzinfo is w_tz:
+            return space.wrap(self)
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            raise OperationError(space.w_ValueError, space.wrap(
+                "astimezone() cannot be applied to a naive datetime"))
+        w_utc = self.add_delta(space, 0, -offset * 60, 0, w_tz)
+        return space.call_method(w_tz, 'fromutc', w_utc)
+
+    def _cmp(self, space, w_other):
+        if isinstance(w_other, W_DateTime):
+            if self.w_tzinfo is not w_other.w_tzinfo:
+                offset1 = self.utcoffset_minutes(space)
+                offset2 = w_other.utcoffset_minutes(space)
+                if offset1 != offset2:
+                    if offset1 == NO_OFFSET or offset2 == NO_OFFSET:
+                        raise OperationError(space.w_TypeError, space.wrap(
+                            "can't compare offset-naive and offset-aware "
+                            "datetimes"))
+                    return self._cmp_utc(offset1, w_other, offset2)
+            return _cmp_fields(self.ymd, self.hms, self.microsecond,
+                               w_other.ymd, w_other.hms, w_other.microsecond)
+        if (not isinstance(w_other, W_Date) and
+                space.findattr(w_other, space.wrap('timetuple')) is not None):
+            return CMP_NOTIMPLEMENTED
+        return CMP_UNORDERED
+
+    def _cmp_utc(self, offset1, other, offset2):
+        minutes1 = _utc_minutes(self.hms, offset1)
+        minutes2 = _utc_minutes(other.hms, offset2)
+        days1 = ymd_ordinal(self.ymd) + minutes1 // (24 * 60)
+        days2 = ymd_ordinal(other.ymd) + minutes2 // (24 * 60)
+        if days1 != days2:
+            return cmp_ints(days1, days2)
+        minutes1 = minutes1 % (24 * 60)
+        minutes2 = minutes2 % (24 * 60)
+        if minutes1 != minutes2:
+            return cmp_ints(minutes1, minutes2)
+        if hms_second(self.hms) != hms_second(other.hms):
+            return cmp_ints(hms_second(self.hms), hms_second(other.hms))
+        return cmp_ints(self.microsecond, other.microsecond)
+
+    descr_eq, descr_ne, descr_lt, descr_le, descr_gt, descr_ge = (
+        _richcompare_methods())
+
+    def descr_hash(self, space):
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            offset = 0
+        minutes = _utc_minutes(self.hms, offset)
+        days = ymd_ordinal(self.ymd) + minutes // (24 * 60)
+        minutes = minutes % (24 * 60)
+        return space.wrap(hash_ints(days, minutes * 60 + hms_second(self.hms),
+                                    self.microsecond))
+
+    def add_delta(self, space, days, seconds, microseconds, w_tzinfo):
+        """ Returns a W_DateTime moved by the given amount of time. """
+        microsecond = self.microsecond + microseconds
+        seconds += hms_seconds(self.hms)
+        if not 0 <= microsecond < US_PER_SECOND:
+            seconds += microsecond // US_PER_SECOND
+            microsecond = microsecond % US_PER_SECOND
+        if not 0 <= seconds < SECONDS_PER_DAY:
+            days += seconds // SECONDS_PER_DAY
+            seconds = seconds % SECONDS_PER_DAY
+        ymd = self.ymd
+        if days:
+            ordinal = ymd_ordinal(ymd) + days
+            if not 1 <= ordinal <= MAXORDINAL:
+                raise OperationError(space.w_OverflowError,
+                                     space.wrap("date value out of range"))
+            ymd = ord_to_ymd(ordinal)
+        hms = pack_time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+        return W_DateTime(ymd, hms, microsecond, w_tzinfo)
+
+    def descr_add(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return space.wrap(self.add_delta(space, w_other.days, w_other.seconds,
+                                         w_other.microseconds,
+                                         self.w_tzinfo))
+
+    def descr_sub(self, space, w_other):
+        if isinstance(w_other, W_TimeDelta):
+            return space.wrap(self.add_delta(space, -w_other.days,
+                                             -w_other.seconds,
+                                             -w_other.microseconds,
+                                             self.w_tzinfo))
+        if not isinstance(w_other, W_DateTime):
+            return space.w_NotImplemented
+        days = ymd_ordinal(self.ymd) - ymd_ordinal(w_other.ymd)
+        seconds = hms_seconds(self.hms) - hms_seconds(w_other.hms)
+        if self.w_tzinfo is not w_other.w_tzinfo:
+            offset1 = self.utcoffset_minutes(space)
+            offset2 = w_other.utcoffset_minutes(space)
+            if offset1 != offset2:
+                if offset1 == NO_OFFSET or offset2 == NO_OFFSET:
+                    raise OperationError(space.w_TypeError, space.wrap(
+                        "can't subtract offset-naive and offset-aware "
+                        "datetimes"))
+                seconds += (offset2 - offset1) * 60
+        return space.wrap(new_delta(space, days, seconds,
+                                    self.microsecond - w_other.microsecond))
+
+    def descr_reduce(self, space):
+        builder = StringBuilder(10)
+        _append_state_date(builder, self.ymd)
+        _append_state_time(builder, self.hms, self.microsecond)
+        args_w = [space.wrap(builder.build())]
+        if self.w_tzinfo is not None:
+            args_w.append(self.w_tzinfo)
+        return space.newtuple([space.type(self), space.newtuple(args_w)])
+
+    # the fields used by strftime()
+
+    def strftime_hms(self):
+        return self.hms
+
+    def strftime_microsecond(self):
+        return self.microsecond
+
+    def strftime_offset(self, space):
+        return self.utcoffset_minutes(space)
+
+    def strftime_tzname(self, space):
+        return call_tzname(space, self.w_tzinfo, self)
+
+    def strftime_timetuple(self, space):
+        dst = call_offset(space, self.w_tzinfo, 'dst', self)
+        return _timetuple_w(space, ymd_year(self.ymd), ymd_month(self.ymd),
+                            ymd_day(self.ymd), hms_hour(self.hms),
+                            hms_minute(self.hms), hms_second(self.hms),
+                            _dst_flag(dst))
+
+
+def new_datetime(space, w_subtype, ymd, hms, microsecond, w_tzinfo):
+    if space.is_w(w_subtype, space.gettypeobject(W_DateTime.typedef)):
+        return space.wrap(W_DateTime(ymd, hms, microsecond, w_tzinfo))
+    self = space.allocate_instance(W_DateTime, w_subtype)
+    W_DateTime.__init__(self, ymd, hms, microsecond, w_tzinfo)
+    return space.wrap(self)
+
+def make_datetime(space, w_type, ymd, hms, microsecond, w_tzinfo):
+    # the alternate constructors call the constructor of subclasses
+    if space.is_w(w_type, space.gettypeobject(W_DateTime.typedef)):
+        return space.wrap(W_DateTime(ymd, hms, microsecond, w_tzinfo))
+    if w_tzinfo is None:
+        w_tzinfo = space.w_None
+    return space.call_function(w_type, space.wrap(ymd_year(ymd)),
+                               space.wrap(ymd_month(ymd)),
+                               space.wrap(ymd_day(ymd)),
+                               space.wrap(hms_hour(hms)),
+                               space.wrap(hms_minute(hms)),
+                               space.wrap(hms_second(hms)),
+                               space.wrap(microsecond), w_tzinfo)
+
+def _check_time_t(space, t):
+    # like CPython, refuse the timestamps that don't fit in a time_t before
+    # they reach the time module
+    try:
+        seconds = ovfcheck_float_to_int(t)
+        if rffi.cast(lltype.Signed, rffi.r_time_t(seconds)) != seconds:
+            raise OverflowError
+    except OverflowError:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "timestamp out of range for platform time_t"))
+
+def _datetime_from_time(space, w_type, converter, t, microsecond, w_tzinfo):
+    # 'converter' is the name of the function of the time module
+    _check_time_t(space, t)
+    w_tm = space.call_method(_time_module(space), converter, space.wrap(t))
+    fields = _time_fields(space, w_tm)
+    # clamp out leap seconds, if the platform has them
+    second = min(fields[5], 59)
+    ymd = check_date(space, fields[0], fields[1], fields[2])
+    hms = check_time(space, fields[3], fields[4], second, microsecond)
+    return make_datetime(space, w_type, ymd, hms, microsecond, w_tzinfo)
+
+W_DateTime.typedef = TypeDef("datetime", W_Date.typedef,
+    __module__ = "datetime",
+    __doc__ = W_DateTime.__doc__,
+    __new__ = interp2app(W_DateTime.descr__new__.im_func),
+    fromtimestamp = interp2app(W_DateTime.descr_fromtimestamp.im_func,
+                               as_classmethod=True),
+    utcfromtimestamp = interp2app(W_DateTime.descr_utcfromtimestamp.im_func,
+                                  as_classmethod=True),
+    now = interp2app(W_DateTime.descr_now.im_func, as_classmethod=True),
+    utcnow = interp2app(W_DateTime.descr_utcnow.im_func,
+                        as_classmethod=True),
+    combine = interp2app(W_DateTime.descr_combine.im_func,
+                         as_classmethod=True),
+    strptime = interp2app(W_DateTime.descr_strptime.im_func,
+                          as_classmethod=True),
+    hour = GetSetProperty(W_DateTime.descr_get_hour),
+    minute = GetSetProperty(W_DateTime.descr_get_minute),
+    second = GetSetProperty(W_DateTime.descr_get_second),
+    microsecond = GetSetProperty(W_DateTime.descr_get_microsecond),
+    tzinfo = GetSetProperty(W_DateTime.descr_get_tzinfo),
+    utcoffset = interp2app(W_DateTime.descr_utcoffset),
+    dst = interp2app(W_DateTime.descr_dst),
+    tzname = interp2app(W_DateTime.descr_tzname),
+    __repr__ = interp2app(W_DateTime.descr_repr),
+    __str__ = interp2app(W_DateTime.descr_str),
+    isoformat = interp2app(W_DateTime.descr_isoformat),
+    ctime = interp2app(W_DateTime.descr_ctime),
+    timetuple = interp2app(W_DateTime.descr_timetuple),
+    utctimetuple = interp2app(W_DateTime.descr_utctimetuple),
+    date = interp2app(W_DateTime.descr_date),
+    time = interp2app(W_DateTime.descr_time),
+    timetz = interp2app(W_DateTime.descr_timetz),
+    replace = interp2app(W_DateTime.descr_replace),
+    astimezone = interp2app(W_DateTime.descr_astimezone),
+    __eq__ = interp2app(W_DateTime.descr_eq),
+    __ne__ = interp2app(W_DateTime.descr_ne),
+    __lt__ = interp2app(W_DateTime.descr_lt),
+    __le__ = interp2app(W_DateTime.descr_le),
+    __gt__ = interp2app(W_DateTime.descr_gt),
+    __ge__ = interp2app(W_DateTime.descr_ge),
+    __hash__ = interp2app(W_DateTime.descr_hash),
+    __add__ = interp2app(W_DateTime.descr_add),
+    __radd__ = interp2app(W_DateTime.descr_add),
+    __sub__ = interp2app(W_DateTime.descr_sub),
+    __reduce__ = interp2app(W_DateTime.descr_reduce),
+    min = W_DateTime(pack_date(MINYEAR, 1, 1), 0, 0, None),
+    max = W_DateTime(pack_date(MAXYEAR, 12, 31), pack_time(23, 59, 59),
+                     US_PER_SECOND - 1, None),
+    resolution = W_TimeDelta(0, 0, 1),
+)
+
+# ____________________________________________________________
+
+class W_Time(Wrappable):
+    """time([hour[, minute[, second[, microsecond[, tzinfo]]]]]) --> a time object
+
+All arguments are optional. tzinfo may be None, or an instance of
+a tzinfo subclass. The remaining arguments may be ints or longs.
+"""
+
+    _immutable_fields_ = ['hms', 'microsecond', 'w_tzinfo']
+
+    def __init__(self, hms, microsecond, w_tzinfo):
+        self.hms = hms
+        self.microsecond = microsecond
+        self.w_tzinfo = w_tzinfo
+
+    def descr__new__(space, w_subtype, w_hour=NoneNotWrapped,
+                     w_minute=NoneNotWrapped, w_second=NoneNotWrapped,
+                     w_microsecond=NoneNotWrapped, w_tzinfo=NoneNotWrapped):
+        if (w_hour is not None and w_second is None and
+                space.isinstance_w(w_hour, space.w_str) and
+                space.len_w(w_hour) == 6):
+            state = space.str_w(w_hour)
+            if ord(state[0]) < 24:
+                # unpickling
+                w_tzinfo = _state_tzinfo(space, w_minute)
+                hms = pack_time(ord(state[0]), ord(state[1]), ord(state[2]))
+                microsecond = ((ord(state[3]) << 16) | (ord(state[4]) << 8) |
+                               ord(state[5]))
+                return new_time(space, w_subtype, hms, microsecond,
+                                w_tzinfo)
+        microsecond = _int_arg(space, w_microsecond, 0)
+        hms = check_time(space, _int_arg(space, w_hour, 0),
+                         _int_arg(space, w_minute, 0),
+                         _int_arg(space, w_second, 0), microsecond)
+        return new_time(space, w_subtype, hms, microsecond,
+                        check_tzinfo(space, w_tzinfo))
+
+    def descr_get_hour(self, space):
+        return space.wrap(hms_hour(self.hms))
+
+    def descr_get_minute(self, space):
+        return space.wrap(hms_minute(self.hms))
+
+    def descr_get_second(self, space):
+        return space.wrap(hms_second(self.hms))
+
+    def descr_get_microsecond(self, space):
+        return space.wrap(self.microsecond)
+
+    def descr_get_tzinfo(self, space):
+        if self.w_tzinfo is None:
+            return space.w_None
+        return self.w_tzinfo
+
+    def utcoffset_minutes(self, space):
+        return call_offset(space, self.w_tzinfo, 'utcoffset', space.w_None)
+
+    def descr_utcoffset(self, space):
+        """Return self.tzinfo.utcoffset(self)."""
+        return wrap_offset(space, self.utcoffset_minutes(space))
+
+    def descr_dst(self, space):
+        """Return self.tzinfo.dst(self)."""
+        return wrap_offset(space, call_offset(space, self.w_tzinfo, 'dst',
+                                              space.w_None))
+
+    def descr_tzname(self, space):
+        """Return self.tzinfo.tzname(self)."""
+        return call_tzname(space, self.w_tzinfo, space.w_None)
+
+    def descr_repr(self, space):
+        builder = StringBuilder()
+        builder.append('datetime.')
+        builder.append(space.type(self).getname(space))
+        builder.append('(')
+        builder.append(str(hms_hour(self.hms)))
+        builder.append(', ')
+        builder.append(str(hms_minute(self.hms)))
+        if hms_second(self.hms) or self.microsecond:
+            builder.append(', ')
+            builder.append(str(hms_second(self.hms)))
+        if self.microsecond:
+            builder.append(', ')
+            builder.append(str(self.microsecond))
+        _append_tzinfo_repr(space, builder, self.w_tzinfo)
+        return space.wrap(builder.build())
+
+    def descr_isoformat(self, space):
+        """Return string in ISO 8601 format, HH:MM:SS[.mmmmmm][+HH:MM]."""
+        builder = StringBuilder(21)
+        support.append_time(builder, self.hms, self.microsecond)
+        offset = self.utcoffset_minutes(space)
+        if offset != NO_OFFSET:
+            support.append_offset(builder, offset, ':')
+        return space.wrap(builder.build())
+
+    def descr_strftime(self, space, w_format):
+        """format -> strftime() style string."""
+        return strftime(space, self, _format_str(space, w_format))
+
+    def descr_replace(self, space, w_hour=NoneNotWrapped,
+                      w_minute=NoneNotWrapped, w_second=NoneNotWrapped,
+                      w_microsecond=NoneNotWrapped, w_tzinfo=NoneNotWrapped):
+        """Return time with new specified fields."""
+        microsecond = _int_arg(space, w_microsecond, self.microsecond)
+        hms = check_time(space, _int_arg(space, w_hour, hms_hour(self.hms)),
+                         _int_arg(space, w_minute, hms_minute(self.hms)),
+                         _int_arg(space, w_second, hms_second(self.hms)),
+                         microsecond)
+        if w_tzinfo is None:
+            w_newtzinfo = self.w_tzinfo
+        else:
+            w_newtzinfo = check_tzinfo(space, w_tzinfo)
+        return new_time(space, space.type(self), hms, microsecond,
+                        w_newtzinfo)
+
+    def descr_nonzero(self, space):
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            offset = 0
+        return space.newbool(_utc_minutes(self.hms, offset) != 0 or
+                             hms_second(self.hms) != 0 or
+                             self.microsecond != 0)
+
+    def _cmp(self, space, w_other):
+        if not isinstance(w_other, W_Time):
+            return CMP_UNORDERED
+        if self.w_tzinfo is not w_other.w_tzinfo:
+            offset1 = self.utcoffset_minutes(space)
+            offset2 = w_other.utcoffset_minutes(space)
+            if offset1 != offset2:
+                if offset1 == NO_OFFSET or offset2 == NO_OFFSET:
+                    raise OperationError(space.w_TypeError, space.wrap(
+                        "can't compare offset-naive and offset-aware times"))
+                minutes1 = _utc_minutes(self.hms, offset1)
+                minutes2 = _utc_minutes(w_other.hms, offset2)
+                if minutes1 != minutes2:
+                    return cmp_ints(minutes1, minutes2)
+                return _cmp_fields(0, hms_second(self.hms), self.microsecond,
+                                   0, hms_second(w_other.hms),
+                                   w_other.microsecond)
+        return _cmp_fields(0, self.hms, self.microsecond,
+                           0, w_other.hms, w_other.microsecond)
+
+    descr_eq, descr_ne, descr_lt, descr_le, descr_gt, descr_ge = (
+        _richcompare_methods())
+
+    def descr_hash(self, space):
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            offset = 0
+        return space.wrap(hash_ints(_utc_minutes(self.hms, offset),
+                                    hms_second(self.hms), self.microsecond))
+
+    def descr_reduce(self, space):
+        builder = StringBuilder(6)
+        _append_state_time(builder, self.hms, self.microsecond)
+        args_w = [space.wrap(builder.build())]
+        if self.w_tzinfo is not None:
+            args_w.append(self.w_tzinfo)
+        return space.newtuple([space.type(self), space.newtuple(args_w)])
+
+    # the fields used by strftime()
+
+    def strftime_ymd(self):
+        return pack_date(1900, 1, 1)
+
+    def strftime_hms(self):
+        return self.hms
+
+    def strftime_microsecond(self):
+        return self.microsecond
+
+    def strftime_offset(self, space):
+        return self.utcoffset_minutes(space)
+
+    def strftime_tzname(self, space):
+        return call_tzname(space, self.w_tzinfo, space.w_None)
+
+    def strftime_timetuple(self, space):
+        return _timetuple_w(space, 1900, 1, 1, hms_hour(self.hms),
+                            hms_minute(self.hms), hms_second(self.hms), -1)
+
+
+def new_time(space, w_subtype, hms, microsecond, w_tzinfo):
+    if space.is_w(w_subtype, space.gettypeobject(W_Time.typedef)):
+        return space.wrap(W_Time(hms, microsecond, w_tzinfo))
+    self = space.allocate_instance(W_Time, w_subtype)
+    W_Time.__init__(self, hms, microsecond, w_tzinfo)
+    return space.wrap(self)
+
+W_Time.typedef = TypeDef("time",
+    __module__ = "datetime",
+    __doc__ = W_Time.__doc__,
+    __new__ = interp2app(W_Time.descr__new__.im_func),
+    hour = GetSetProperty(W_Time.descr_get_hour),
+    minute = GetSetProperty(W_Time.descr_get_minute),
+    second = GetSetProperty(W_Time.descr_get_second),
+    microsecond = GetSetProperty(W_Time.descr_get_microsecond),
+    tzinfo = GetSetProperty(W_Time.descr_get_tzinfo),
+    utcoffset = interp2app(W_Time.descr_utcoffset),
+    dst = interp2app(W_Time.descr_dst),
+    tzname = interp2app(W_Time.descr_tzname),
+    __repr__ = interp2app(W_Time.descr_repr),
+    __str__ = interp2app(W_Time.descr_isoformat),
+    __format__ = interp2app(descr_format),
+    isoformat = interp2app(W_Time.descr_isoformat),
+    strftime = interp2app(W_Time.descr_strftime),
+    replace = interp2app(W_Time.descr_replace),
+    __nonzero__ = interp2app(W_Time.descr_nonzero),
+    __eq__ = interp2app(W_Time.descr_eq),
+    __ne__ = interp2app(W_Time.descr_ne),
+    __lt__ = interp2app(W_Time.descr_lt),
+    __le__ = interp2app(W_Time.descr_le),
+    __gt__ = interp2app(W_Time.descr_gt),
+    __ge__ = interp2app(W_Time.descr_ge),
+    __hash__ = interp2app(W_Time.descr_hash),
+    __reduce__ = interp2app(W_Time.descr_reduce),
+    min = W_Time(0, 0, None),
+    max = W_Time(pack_time(23, 59, 59), US_PER_SECOND - 1, None),
+    resolution = W_TimeDelta(0, 0, 1),
+)
+
+# ____________________________________________________________
+
+class W_TZInfo(Wrappable):
+    """Abstract base class for time zone info objects."""
+
+    def __init__(self, space):
+        pass
+
+    def descr_tzname(self, space, w_dt):
+        """datetime -> string name of time zone."""
+        raise OperationError(space.w_NotImplementedError, space.wrap(
+            "tzinfo subclass must override tzname()"))
+
+    def descr_utcoffset(self, space, w_dt):
+        """datetime -> minutes east of UTC (negative for west of UTC)."""
+        raise OperationError(space.w_NotImplementedError, space.wrap(
+            "tzinfo subclass must override utcoffset()"))
+
+    def descr_dst(self, space, w_dt):
+        """datetime -> DST offset in minutes east of UTC."""
+        raise OperationError(space.w_NotImplementedError, space.wrap(
+            "tzinfo subclass must override dst()"))
+
+    def descr_fromutc(self, space, w_dt):
+        """datetime in UTC -> datetime in local time."""
+        if not isinstance(w_dt, W_DateTime):
+            raise OperationError(space.w_TypeError, space.wrap(
+                "fromutc: argument must be a datetime"))
+        if w_dt.w_tzinfo is not self:
+            raise OperationError(space.w_ValueError, space.wrap(
+                "fromutc: dt.tzinfo is not self"))
+        offset = w_dt.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            raise OperationError(space.w_ValueError, space.wrap(
+                "fromutc: non-None utcoffset() result required"))
+        dst = call_offset(space, self, 'dst', w_dt)
+        if dst == NO_OFFSET:
+            raise OperationError(space.w_ValueError, space.wrap(
+                "fromutc: non-None dst() result required"))
+        delta = offset - dst
+        if delta:
+            w_dt = w_dt.add_delta(space, 0, delta * 60, 0, self)
+            dst = call_offset(space, self, 'dst', w_dt)
+            if dst == NO_OFFSET:
+                raise OperationError(space.w_ValueError, space.wrap(
+                    "fromutc: tz.dst() gave inconsistent results; "
+                    "cannot convert"))
+        if dst:
+            w_dt = w_dt.add_delta(space, 0, dst * 60, 0, self)
+        return space.wrap(w_dt)
+
+    def descr_reduce(self, space):
+        w_getinitargs = space.findattr(self, space.wrap('__getinitargs__'))
+        if w_getinitargs is not None:
+            w_args = space.call_function(w_getinitargs)
+        else:
+            w_args = space.newtuple([])
+        w_getstate = space.findattr(self, space.wrap('__getstate__'))
+        if w_getstate is not None:
+            w_state = space.call_function(w_getstate)
+        else:
+            w_state = space.findattr(self, space.wrap('__dict__'))
+            if w_state is not None and not space.is_true(w_state):
+                w_state = None
+        if w_state is None or space.is_w(w_state, space.w_None):
+            return space.newtuple([space.type(self), w_args])
+        return space.newtuple([space.type(self), w_args, w_state])
+
+W_TZInfo.typedef = TypeDef("tzinfo",
+    __module__ = "datetime",
+    __doc__ = W_TZInfo.__doc__,
+    __new__ = generic_new_descr(W_TZInfo),
+    tzname = interp2app(W_TZInfo.descr_tzname),
+    utcoffset = interp2app(W_TZInfo.descr_utcoffset),
+    dst = interp2app(W_TZInfo.descr_dst),
+    fromutc = interp2app(W_TZInfo.descr_fromutc),
+    __reduce__ = interp2app(W_TZInfo.descr_reduce),
+)
@@ -0,0 +1,363 @@
+import math
+
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, NoneNotWrapped
+from pypy.interpreter.typedef import TypeDef, interp_attrproperty
+from pypy.module.datetime.support import MAX_DELTA_DAYS, append_int
+from pypy.rlib.rarithmetic import ovfcheck, intmask
+from pypy.rlib.rfloat import round_away
+from pypy.rlib.rstring import StringBuilder
+
+US_PER_SECOND = 1000000
+SECONDS_PER_DAY = 24 * 3600
+
+
+def hash_ints(a, b, c):
+    # combines three ints like the hash of a tuple does
+    x = intmask((0x345678 ^ a) * 1000003)
+    x = intmask((x ^ b) * 1082527)
+    x = intmask((x ^ c) * 1000003)
+    if x == -1:
+        x = -2
+    return x
+
+def cmp_ints(a, b):
+    if a < b:
+        return -1
+    if a > b:
+        return 1
+    return 0
+
+
+class W_TimeDelta(Wrappable):
+    """Difference between two datetime values."""
+
+    _immutable_fields_ = ['days', 'seconds', 'microseconds']
+
+    def __init__(self, days, seconds, microseconds):
+        # normalized: 0 <= seconds < 24*3600, 0 <= microseconds < 1000000
+        self.days = days
+        self.seconds = seconds
+        self.microseconds = microseconds
+
+    def descr__new__(space, w_subtype, w_days=NoneNotWrapped,
+                     w_seconds=NoneNotWrapped, w_microseconds=NoneNotWrapped,
+                     w_milliseconds=NoneNotWrapped, w_minutes=NoneNotWrapped,
+                     w_hours=NoneNotWrapped, w_weeks=NoneNotWrapped):
+        args_w = [w_microseconds, w_milliseconds, w_seconds, w_minutes,
+                  w_hours, w_days, w_weeks]
+        delta = _delta_from_ints(space, args_w)
+        if delta is None:
+            delta = _delta_from_numbers(space, args_w)
+        if space.is_w(w_subtype, space.gettypeobject(W_TimeDelta.typedef)):
+            return space.wrap(delta)
+        self = space.allocate_instance(W_TimeDelta, w_subtype)
+        W_TimeDelta.__init__(self, delta.days, delta.seconds,
+                             delta.microseconds)
+        return space.wrap(self)
+
+    def total_microseconds_w(self, space):
+        w_seconds = space.add(space.mul(space.wrap(self.days),
+                                        space.wrap(SECONDS_PER_DAY)),
+                              space.wrap(self.seconds))
+        return space.add(space.mul(w_seconds, space.wrap(US_PER_SECOND)),
+                         space.wrap(self.microseconds))
+
+    def descr_repr(self, space):
+        builder = StringBuilder()
+        builder.append('datetime.')
+        builder.append(space.type(self).getname(space))
+        builder.append('(')
+        builder.append(str(self.days))
+        if self.seconds or self.microseconds:
+            builder.append(', ')
+            builder.append(str(self.seconds))
+        if self.microseconds:
+            builder.append(', ')
+            builder.append(str(self.microseconds))
+        builder.append(')')
+        return space.wrap(builder.build())
+
+    def descr_str(self, space):
+        builder = StringBuilder()
+        if self.days:
+            builder.append(str(self.days))
+            if self.days == 1 or self.days == -1:
+                builder.append(' day, ')
+            else:
+                builder.append(' days, ')
+        builder.append(str(self.seconds // 3600))
+        builder.append(':')
+        append_int(builder, self.seconds // 60 % 60, 2)
+        builder.append(':')
+        append_int(builder, self.seconds % 60, 2)
+        if self.microseconds:
+            builder.append('.')
+            append_int(builder, self.microseconds, 6)
+        return space.wrap(builder.build())
+
+    def descr_total_seconds(self, space):
+        """Total seconds in the duration."""
+        if -100000 < self.days < 100000:
+            # the number of microseconds is exact as a float
+            us = ((self.days * float(SECONDS_PER_DAY) + self.seconds) *
+                  US_PER_SECOND + self.microseconds)
+            return space.wrap(us / US_PER_SECOND)
+        return space.truediv(self.total_microseconds_w(space),
+                             space.wrap(US_PER_SECOND))
+
+    def descr_add(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return space.wrap(new_delta(space, self.days + w_other.days,
+                                    self.seconds + w_other.seconds,
+                                    self.microseconds + w_other.microseconds))
+
+    def descr_sub(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return space.wrap(new_delta(space, self.days - w_other.days,
+                                    self.seconds - w_other.seconds,
+                                    self.microseconds - w_other.microseconds))
+
+    def descr_rsub(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return w_other.descr_sub(space, self)
+
+    def descr_neg(self, space):
+        return space.wrap(new_delta(space, -self.days, -self.seconds,
+                                    -self.microseconds))
+
+    def descr_pos(self, space):
+        return space.wrap(self)
+
+    def descr_abs(self, space):
+        if self.days < 0:
+            return self.descr_neg(space)
+        return space.wrap(self)
+
+    def descr_mul(self, space, w_other):
+        if not (space.isinstance_w(w_other, space.w_int) or
+                space.isinstance_w(w_other, space.w_long)):
+            return space.w_NotImplemented
+        w_us = space.mul(self.total_microseconds_w(space), w_other)
+        return space.wrap(delta_from_microseconds(space, w_us))
+
+    def descr_div(self, space, w_other):
+        if not (space.isinstance_w(w_other, space.w_int) or
+                space.isinstance_w(w_other, space.w_long)):
+            return space.w_NotImplemented
+        w_us = space.floordiv(self.total_microseconds_w(space), w_other)
+        return space.wrap(delta_from_microseconds(space, w_us))
+
+    def _cmp(self, other):
+        if self.days != other.days:
+            return cmp_ints(self.days, other.days)
+        if self.seconds != other.seconds:
+            return cmp_ints(self.seconds, other.seconds)
+        return cmp_ints(self.microseconds, other.microseconds)
+
+    def descr_eq(self, space, w_other):
+        if isinstance(w_other, W_TimeDelta):
+            return space.newbool(self._cmp(w_other) == 0)
+        return space.w_False
+
+    def descr_ne(self, space, w_other):
+        if isinstance(w_other, W_TimeDelta):
+            return space.newbool(self._cmp(w_other) != 0)
+        return space.w_True
+
+    def _compare(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            raise cmperror(space, self, w_other)
+        return self._cmp(w_other)
+
+    def descr_lt(self, space, w_other):
+        return space.newbool(self._compare(space, w_other) < 0)
+
+    def descr_le(self, space, w_other):
+        return space.newbool(self._compare(space, w_other) <= 0)
+
+    def descr_gt(self, space, w_other):
+        return space.newbool(self._compare(space, w_other) > 0)
+
+    def descr_ge(self, space, w_other):
+        return space.newbool(self._compare(space, w_other) >= 0)
+
+    def descr_hash(self, space):
+        return space.wrap(hash_ints(self.days, self.seconds,
+                                    self.microseconds))
+
+    def descr_nonzero(self, space):
+        return space.newbool(self.days != 0 or self.seconds != 0 or
+                             self.microseconds != 0)
+
+    def descr_reduce(self, space):
+        return space.newtuple([space.type(self), space.newtuple([
+            space.wrap(self.days), space.wrap(self.seconds),
+            space.wrap(self.microseconds)])])
+
+
+def cmperror(space, w_self, w_other):
+    return operationerrfmt(space.w_TypeError, "can't compare %s to %s",
+                           space.type(w_self).getname(space),
+                           space.type(w_other).getname(space))
+
+def new_delta(space, days, seconds, microseconds):
+    """ Returns a normalized W_TimeDelta.  The arguments are not too far
+    out of range, as when adding or subtracting two timedeltas. """
+    if not 0 <= microseconds < US_PER_SECOND:
+        carry = microseconds // US_PER_SECOND
+        microseconds -= carry * US_PER_SECOND
+        seconds += carry
+    if not 0 <= seconds < SECONDS_PER_DAY:
+        carry = seconds // SECONDS_PER_DAY
+        seconds -= carry * SECONDS_PER_DAY
+        days += carry
+    if not -MAX_DELTA_DAYS <= days <= MAX_DELTA_DAYS:
+        raise operationerrfmt(space.w_OverflowError,
+                              "days=%d; must have magnitude <= %d",
+                              days, MAX_DELTA_DAYS)
+    return W_TimeDelta(days, seconds, microseconds)
+
+def delta_from_microseconds(space, w_us):
+    w_seconds, w_us = space.fixedview(
+        space.divmod(w_us, space.wrap(US_PER_SECOND)), 2)
+    w_days, w_seconds = space.fixedview(space.divmod(
+        w_seconds, space.wrap(SECONDS_PER_DAY)), 2)
+    try:
+        days = space.int_w(w_days)
+    except OperationError, e:
+        if not e.match(space, space.w_OverflowError):
+            raise
+        raise OperationError(space.w_OverflowError, space.wrap(
+            "normalized days too large to fit in a C int"))
+    return new_delta(space, days, space.int_w(w_seconds), space.int_w(w_us))
+
+# the arguments of timedelta() in the order of args_w, and their units:
+# microseconds for the first two, seconds for the others
+_NAMES = ['microseconds', 'milliseconds', 'seconds', 'minutes', 'hours',
+          'days', 'weeks']
+_UNITS = [1, 1000, 1, 60, 3600, SECONDS_PER_DAY, 7 * SECONDS_PER_DAY]
+
+def _factor_w(space, i):
+    w_factor = space.wrap(_UNITS[i])
+    if i >= 2:
+        w_factor = space.mul(w_factor, space.wrap(US_PER_SECOND))
+    return w_factor
+
+def _float_factor(i):
+    factor = float(_UNITS[i])
+    if i >= 2:
+        factor *= US_PER_SECOND
+    return factor
+
+def _delta_from_ints(space, args_w):
+    """ The fast path of timedelta(): all the arguments are ints and the
+    computation does not overflow.  Returns None otherwise. """
+    for w_arg in args_w:
+        if (w_arg is not None and
+                not space.is_w(space.type(w_arg), space.w_int)):
+            return None
+    w_us, w_ms, w_s, w_min, w_h, w_d, w_w = args_w
+    try:
+        us = _int_or_zero(space, w_us)
+        us = ovfcheck(us + ovfcheck(_int_or_zero(space, w_ms) * 1000))
+        s = _int_or_zero(space, w_s)
+        s = ovfcheck(s + ovfcheck(_int_or_zero(space, w_min) * 60))
+        s = ovfcheck(s + ovfcheck(_int_or_zero(space, w_h) * 3600))
+        d = _int_or_zero(space, w_d)
+        d = ovfcheck(d + ovfcheck(_int_or_zero(space, w_w) * 7))
+        s = ovfcheck(s + us // US_PER_SECOND)
+        us = us % US_PER_SECOND
+        d = ovfcheck(d + s // SECONDS_PER_DAY)
+        s = s % SECONDS_PER_DAY
+    except OverflowError:
+        return None
+    return new_delta(space, d, s, us)
+
+def _int_or_zero(space, w_value):
+    if w_value is None:
+        return 0
+    return space.int_w(w_value)
+
+def _delta_from_numbers(space, args_w):
+    # like CPython: sum up the exact number of microseconds as an int or
+    # a long, and the fractional microseconds left over by floats
+    w_sum = space.wrap(0)
+    leftover = 0.0
+    for i in range(len(args_w)):
+        w_num = args_w[i]
+        if w_num is None:
+            continue
+        if (space.isinstance_w(w_num, space.w_int) or
+                space.isinstance_w(w_num, space.w_long)):
+            w_sum = space.add(w_sum, space.mul(w_num, _factor_w(space, i)))
+        elif space.isinstance_w(w_num, space.w_float):
+            num = space.float_w(w_num)
+            intpart = int_part(num)
+            fracpart = num - intpart
+            w_intpart = space.call_function(space.w_long, space.wrap(intpart))
+            w_sum = space.add(w_sum, space.mul(w_intpart, _factor_w(space, i)))
+            if fracpart != 0.0:
+                num = fracpart * _float_factor(i)
+                intpart = int_part(num)
+                w_intpart = space.call_function(space.w_long,
+                                                space.wrap(intpart))
+                w_sum = space.add(w_sum, w_intpart)
+                leftover += num - intpart
+        else:
+            raise operationerrfmt(space.w_TypeError,
+                                  "unsupported type for timedelta %s "
+                                  "component: %s", _NAMES[i],
+                                  space.type(w_num).getname(space))
+    if leftover != 0.0:
+        w_sum = space.add(w_sum, space.wrap(int(round_away(leftover))))
+    return delta_from_microseconds(space, w_sum)
+
+def int_part(x):
+    # the integral part of a float, rounded towards zero
+    if x < 0.0:
+        return -math.floor(-x)
+    return math.floor(x)
+
+W_TimeDelta.typedef = TypeDef("timedelta",
+    __module__ = "datetime",
+    __doc__ = W_TimeDelta.__doc__,
+    __new__ = interp2app(W_TimeDelta.descr__new__.im_func),
+    __repr__ = interp2app(W_TimeDelta.descr_repr),
+    __str__ = interp2app(W_TimeDelta.descr_str),
+    __add__ = interp2app(W_TimeDelta.descr_add),
+    __radd__ = interp2app(W_TimeDelta.descr_add),
+    __sub__ = interp2app(W_TimeDelta.descr_sub),
+    __rsub__ = interp2app(W_TimeDelta.descr_rsub),
+    __neg__ = interp2app(W_TimeDelta.descr_neg),
+    __pos__ = interp2app(W_TimeDelta.descr_pos),
+    __abs__ = interp2app(W_TimeDelta.descr_abs),
+    __mul__ = interp2app(W_TimeDelta.descr_mul),
+    __rmul__ = interp2app(W_TimeDelta.descr_mul),
+    __div__ = interp2app(W_TimeDelta.descr_div),
+    __floordiv__ = interp2app(W_TimeDelta.descr_div),
+    __eq__ = interp2app(W_TimeDelta.descr_eq),
+    __ne__ = interp2app(W_TimeDelta.descr_ne),
+    __lt__ = interp2app(W_TimeDelta.descr_lt),
+    __le__ = interp2app(W_TimeDelta.descr_le),
+    __gt__ = interp2app(W_TimeDelta.descr_gt),
+    __ge__ = interp2app(W_TimeDelta.descr_ge),
+    __hash__ = interp2app(W_TimeDelta.descr_hash),
+    __nonzero__ = interp2app(W_TimeDelta.descr_nonzero),
+    __reduce__ = interp2app(W_TimeDelta.descr_reduce),
+    total_seconds = interp2app(W_TimeDelta.descr_total_seconds),
+    days = interp_attrproperty("days", W_TimeDelta,
+                               doc="Number of days."),
+    seconds = interp_attrproperty("seconds", W_TimeDelta,
+        doc="Number of seconds (>= 0 and less than 1 day)."),
+    microseconds = interp_attrproperty("microseconds", W_TimeDelta,
+        doc="Number of microseconds (>= 0 and less than 1 second)."),
+    min = W_TimeDelta(-MAX_DELTA_DAYS, 0, 0),
+    max = W_TimeDelta(MAX_DELTA_DAYS, SECONDS_PER_DAY - 1,
+                      US_PER_SECOND - 1),
+    resolution = W_TimeDelta(0, 0, 1),
+)
@@ -0,0 +1,304 @@
+""" Calendar arithmetic and formatting helpers of the datetime module.
+They work on plain ints, in the proleptic Gregorian calendar where
+January 1 of year 1 is day number 1, like lib_pypy/datetime.py.
+
+The date part of a value is packed into a single int, 'ymd', and the
+time part without the microseconds into another one, 'hms'.  Both
+packings preserve the ordering of the fields, so that comparing two
+packed values compares the fields in order.  Like in CPython, the day,
+hour, minute and second get a byte each: the pickled state given to the
+constructors is not checked beyond the month or the hour.
+"""
+
+MINYEAR = 1
+MAXYEAR = 9999
+MAX_DELTA_DAYS = 999999999
+
+_DAYS_IN_MONTH = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+_DAYS_BEFORE_MONTH = [0, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304,
+                      334]
+
+MONTHNAMES = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+              "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+DAYNAMES = ["", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# ____________________________________________________________
+# packed fields
+
+def pack_date(year, month, day):
+    return (year << 12) | (month << 8) | day
+
+def ymd_year(ymd):
+    return ymd >> 12
+
+def ymd_month(ymd):
+    return (ymd >> 8) & 0xf
+
+def ymd_day(ymd):
+    return ymd & 0xff
+
+def pack_time(hour, minute, second):
+    return (hour << 16) | (minute << 8) | second
+
+def hms_hour(hms):
+    return hms >> 16
+
+def hms_minute(hms):
+    return (hms >> 8) & 0xff
+
+def hms_second(hms):
+    return hms & 0xff
+
+def hms_seconds(hms):
+    """ The number of seconds since midnight. """
+    return hms_hour(hms) * 3600 + hms_minute(hms) * 60 + hms_second(hms)
+
+# ____________________________________________________________
+# calendar
+
+def is_leap(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+def days_in_month(year, month):
+    if month == 2 and is_leap(year):
+        return 29
+    return _DAYS_IN_MONTH[month]
+
+def days_before_year(year):
+    y = year - 1
+    return y * 365 + y // 4 - y // 100 + y // 400
+
+def days_before_month(year, month):
+    if month > 2 and is_leap(year):
+        return _DAYS_BEFORE_MONTH[month] + 1
+    return _DAYS_BEFORE_MONTH[month]
+
+def ymd_to_ord(year, month, day):
+    return days_before_year(year) + days_before_month(year, month) + day
+
+_DI400Y = days_before_year(401)    # number of days in 400 years
+_DI100Y = days_before_year(101)    #    "    "   "   " 100   "
+_DI4Y = days_before_year(5)        #    "    "   "   "   4   "
+
+MAXORDINAL = ymd_to_ord(MAXYEAR, 12, 31)
+
+def ord_to_ymd(n):
+    """ ordinal -> packed date.  See lib_pypy/datetime.py for how it
+    works. """
+    n -= 1
+    n400 = n // _DI400Y
+    n -= n400 * _DI400Y
+    year = n400 * 400 + 1
+    n100 = n // _DI100Y
+    n -= n100 * _DI100Y
+    n4 = n // _DI4Y
+    n -= n4 * _DI4Y
+    n1 = n // 365
+    n -= n1 * 365
+    year += n100 * 100 + n4 * 4 + n1
+    if n1 == 4 or n100 == 4:
+        return pack_date(year - 1, 12, 31)
+    leapyear = n1 == 3 and (n4 != 24 or n100 == 3)
+    # the estimate of the month is either exact or one too large
+    month = (n + 50) >> 5
+    preceding = _DAYS_BEFORE_MONTH[month]
+    if month > 2 and leapyear:
+        preceding += 1
+    if preceding > n:
+        month -= 1
+        preceding -= _DAYS_IN_MONTH[month]
+        if month == 2 and leapyear:
+            preceding -= 1
+    return pack_date(year, month, n - preceding + 1)
+
+def ymd_ordinal(ymd):
+    return ymd_to_ord(ymd_year(ymd), ymd_month(ymd), ymd_day(ymd))
+
+def weekday(ymd):
+    """ Monday == 0 ... Sunday == 6 """
+    return (ymd_ordinal(ymd) + 6) % 7
+
+def iso_week1_monday(year):
+    # the day number of the Monday starting week 1 of the ISO year
+    firstday = ymd_to_ord(year, 1, 1)
+    firstweekday = (firstday + 6) % 7
+    week1monday = firstday - firstweekday
+    if firstweekday > 3:    # Thursday
+        week1monday += 7
+    return week1monday
+
+# ____________________________________________________________
+# formatting
+
+def append_int(builder, value, width):
+    """ Appends the non-negative 'value', padded with zeroes to 'width'
+    digits. """
+    s = str(value)
+    for i in range(width - len(s)):
+        builder.append('0')
+    builder.append(s)
+
+def append_date(builder, ymd, sep):
+    append_int(builder, ymd_year(ymd), 4)
+    builder.append(sep)
+    append_int(builder, ymd_month(ymd), 2)
+    builder.append(sep)
+    append_int(builder, ymd_day(ymd), 2)
+
+def append_time(builder, hms, microsecond):
+    # the microseconds are omitted when they are zero
+    append_int(builder, hms_hour(hms), 2)
+    builder.append(':')
+    append_int(builder, hms_minute(hms), 2)
+    builder.append(':')
+    append_int(builder, hms_second(hms), 2)
+    if microsecond:
+        builder.append('.')
+        append_int(builder, microsecond, 6)
+
+def append_offset(builder, offset, sep):
+    """ Appends the utc offset, in minutes, as '+HH:MM'. """
+    if offset < 0:
+        builder.append('-')
+        offset = -offset
+    else:
+        builder.append('+')
+    append_int(builder, offset // 60, 2)
+    builder.append(sep)
+    append_int(builder, offset % 60, 2)
+
+def append_ctime(builder, ymd, hms):
+    # like time.asctime(), without the locale
+    builder.append(DAYNAMES[weekday(ymd) + 1])
+    builder.append(' ')
+    builder.append(MONTHNAMES[ymd_month(ymd)])
+    builder.append(' ')
+    day = ymd_day(ymd)
+    if day < 10:
+        builder.append(' ')
+    builder.append(str(day))
+    builder.append(' ')
+    append_time(builder, hms, 0)
+    builder.append(' ')
+    append_int(builder, ymd_year(ymd), 4)
+
+# ____________________________________________________________
+# parsing
+
+# The numeric directives of lib-python/2.7/_strptime.py.  Each regular
+# expression there is a list of alternatives, tried in order; every
+# alternative is written here as a string giving the lowest and the
+# highest character allowed at each position.
+_DIRECTIVES = "dfHmMSyY"
+_ALTERNATIVES = [
+    ["3301", "1209", "0019", "19", "  19"],
+    ["090909090909", "0909090909", "09090909", "090909", "0909", "09"],
+    ["2203", "0109", "09"],
+    ["1102", "0019", "19"],
+    ["0509", "09"],
+    ["6601", "0509", "09"],
+    ["0909"],
+    ["09090909"],
+]
+_FIELDS = "YmdHMSf"
+
+def _isspace(c):
+    return c == ' ' or ord('\t') <= ord(c) <= ord('\r')
+
+def _lower(c):
+    if ord('A') <= ord(c) <= ord('Z'):
+        return chr(ord(c) + 32)
+    return c
+
+def _match_alternative(data, pos, alternative):
+    end = pos + len(alternative) // 2
+    if end > len(data):
+        return -1
+    for i in range(pos, end):
+        j = (i - pos) * 2
+        c = ord(data[i])
+        if not ord(alternative[j]) <= c <= ord(alternative[j + 1]):
+            return -1
+    return end
+
+def _match(data, format, i, pos, fields):
+    # matches data[pos:] against format[i:] like re.match() does with the
+    # regular expression built by _strptime, and stores the value of the
+    # directives into 'fields'.  Returns the end of the match, or -1.
+    if i == len(format):
+        return pos
+    c = format[i]
+    if c == '%' and format[i + 1] != '%':
+        directive = format[i + 1]
+        for alternative in _ALTERNATIVES[_DIRECTIVES.find(directive)]:
+            end = _match_alternative(data, pos, alternative)
+            if end >= 0:
+                result = _match(data, format, i + 2, end, fields)
+                if result >= 0:
+                    _store(fields, directive, data[pos:end])
+                    return result
+        return -1
+    if _isspace(c):
+        # a run of whitespace matches one or more whitespace characters
+        j = i + 1
+        while j < len(format) and _isspace(format[j]):
+            j += 1
+        end = pos
+        while end < len(data) and _isspace(data[end]):
+            end += 1
+        while end > pos:
+            result = _match(data, format, j, end, fields)
+            if result >= 0:
+                return result
+            end -= 1
+        return -1
+    if c == '%':
+        i += 1
+    if pos < len(data) and _lower(data[pos]) == _lower(c):
+        return _match(data, format, i + 1, pos + 1, fields)
+    return -1
+
+def _store(fields, directive, digits):
+    value = 0
+    for c in digits:
+        if c != ' ':
+            value = value * 10 + ord(c) - ord('0')
+    if directive == 'y':
+        # like _strptime: the POSIX choice of century
+        if value <= 68:
+            value += 2000
+        else:
+            value += 1900
+        directive = 'Y'
+    elif directive == 'f':
+        for i in range(6 - len(digits)):
+            value *= 10
+    fields[_FIELDS.find(directive)] = value
+
+def parse(data, format):
+    """ The fast path of datetime.strptime(), for formats made of the
+    numeric directives only.  Returns None for the other formats.
+    Otherwise returns the list [year, month, day, hour, minute, second,
+    microsecond, end], where 'end' is the length of the matched prefix of
+    'data', or -1 if 'data' does not match 'format'. """
+    seen = ""
+    i = 0
+    while i < len(format):
+        if format[i] == '%':
+            if i + 1 == len(format):
+                return None
+            directive = format[i + 1]
+            if directive != '%':
+                if _DIRECTIVES.find(directive) < 0:
+                    return None
+                if directive == 'y':
+                    directive = 'Y'
+                if directive in seen:
+                    return None     # the regular expression is invalid
+                seen += directive
+            i += 2
+        else:
+            i += 1
+    fields = [1900, 1, 1, 0, 0, 0, 0, 0]
+    fields[7] = _match(data, format, 0, 0, fields)
+    return fields
@@ -0,0 +1,285 @@
+from pypy.conftest import gettestobjspace
+
+
+class AppTestDatetime:
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=('datetime', 'rctime', 'struct'))
+
+    def test_module(self):
+        import datetime
+        assert datetime.MINYEAR == 1
+        assert datetime.MAXYEAR == 9999
+        for cls in [datetime.date, datetime.datetime, datetime.time,
+                    datetime.timedelta, datetime.tzinfo]:
+            assert cls.__module__ == 'datetime'
+        assert issubclass(datetime.datetime, datetime.date)
+
+    def test_timedelta(self):
+        from datetime import timedelta
+        td = timedelta(1, 2, 3)
+        assert (td.days, td.seconds, td.microseconds) == (1, 2, 3)
+        td = timedelta(days=-1, hours=25, minutes=1, milliseconds=1500)
+        assert (td.days, td.seconds, td.microseconds) == (0, 3661, 500000)
+        td = timedelta(seconds=1.5, microseconds=0.6)
+        assert (td.days, td.seconds, td.microseconds) == (0, 1, 500001)
+        td = timedelta(weeks=1L, days=0.5)
+        assert (td.days, td.seconds, td.microseconds) == (7, 43200, 0)
+        assert timedelta(microseconds=-1) == timedelta(-1, 86399, 999999)
+        assert repr(timedelta(1, 2)) == 'datetime.timedelta(1, 2)'
+        assert str(timedelta(-1, 3600, 5)) == '-1 day, 1:00:00.000005'
+        assert str(timedelta(2)) == '2 days, 0:00:00'
+        assert timedelta(1, 1, 1).total_seconds() == 86401.000001
+        assert timedelta.max.days == 999999999
+        assert timedelta.resolution == timedelta(microseconds=1)
+        raises(OverflowError, timedelta, 1000000000)
+        raises(TypeError, timedelta, '1')
+
+    def test_timedelta_arithmetic(self):
+        from datetime import timedelta
+        a = timedelta(1, 2, 3)
+        assert a + a == timedelta(2, 4, 6)
+        assert a - a == timedelta(0)
+        assert -a == timedelta(-2, 86397, 999997)
+        assert abs(-a) == a
+        assert a * 2 == 2 * a == timedelta(2, 4, 6)
+        assert a // 2 == timedelta(0, 43201, 1)
+        assert a / 1000 == timedelta(0, 86, 402000)
+        assert a < timedelta(1, 2, 4)
+        assert a != 1 and not (a == 1)
+        raises(TypeError, "a < 1")
+        assert hash(a) == hash(timedelta(0, 86402, 3))
+        assert not timedelta(0) and timedelta(0, 0, 1)
+        raises(OverflowError, "timedelta.max + a")
+        raises(TypeError, "a * 1.5")
+
+    def test_date(self):
+        from datetime import date, timedelta
+        d = date(2012, 2, 29)
+        assert (d.year, d.month, d.day) == (2012, 2, 29)
+        assert repr(d) == 'datetime.date(2012, 2, 29)'
+        assert str(d) == d.isoformat() == '2012-02-29'
+        assert d.ctime() == 'Wed Feb 29 00:00:00 2012'
+        assert d.toordinal() == 734562
+        assert date.fromordinal(734562) == d
+        assert d.weekday() == 2 and d.isoweekday() == 3
+        assert d.isocalendar() == (2012, 9, 3)
+        assert date(2010, 1, 3).isocalendar() == (2009, 53, 7)
+        assert date(2008, 12, 29).isocalendar() == (2009, 1, 1)
+        assert d.replace(day=1) == date(2012, 2, 1)
+        assert d + timedelta(1) == date(2012, 3, 1)
+        assert d - timedelta(366) == date(2011, 2, 28)
+        assert d - date(2012, 1, 1) == timedelta(59)
+        assert d.timetuple()[:] == (2012, 2, 29, 0, 0, 0, 2, 60, -1)
+        assert date.min == date(1, 1, 1)
+        assert date.max == date(9999, 12, 31)
+        assert date.min < d < date.max
+        assert hash(d) == hash(date(2012, 2, 29))
+        raises(ValueError, date, 2011, 2, 29)
+        raises(ValueError, date, 0, 1, 1)
+        raises(ValueError, date, 2000, 13, 1)
+        raises(TypeError, date, 2000, 1.0, 1)
+        raises(TypeError, date, 2000)
+        raises(OverflowError, "date.max + timedelta(1)")
+        raises(ValueError, date.fromordinal, 0)
+        assert date.today() == date.fromtimestamp(__import__('time').time())
+
+    def test_datetime(self):
+        from datetime import datetime, date, time, timedelta
+        dt = datetime(2012, 2, 29, 23, 59, 58, 999999)
+        assert dt.hour == 23 and dt.microsecond == 999999
+        assert dt.tzinfo is None
+        assert repr(dt) == (
+            'datetime.datetime(2012, 2, 29, 23, 59, 58, 999999)')
+        assert repr(datetime(2012, 1, 1)) == (
+            'datetime.datetime(2012, 1, 1, 0, 0)')
+        assert str(dt) == '2012-02-29 23:59:58.999999'
+        assert dt.isoformat() == '2012-02-29T23:59:58.999999'
+        assert datetime(2012, 1, 1).isoformat('_') == '2012-01-01_00:00:00'
+        raises(TypeError, dt.isoformat, 'ab')
+        assert dt.ctime() == 'Wed Feb 29 23:59:58 2012'
+        assert dt.date() == date(2012, 2, 29)
+        assert dt.time() == time(23, 59, 58, 999999)
+        assert datetime.combine(dt.date(), dt.time()) == dt
+        assert dt.replace(hour=0, microsecond=0) == datetime(2012, 2, 29, 0,
+                                                             59, 58)
+        assert dt + timedelta(0, 1, 1) == datetime(2012, 3, 1)
+        assert timedelta(0, 1, 1) + dt == datetime(2012, 3, 1)
+        assert dt - timedelta(60) == datetime(2011, 12, 31, 23, 59, 58,
+                                              999999)
+        assert datetime(2012, 3, 1) - dt == timedelta(0, 1, 1)
+        assert dt.timetuple()[:] == (2012, 2, 29, 23, 59, 58, 2, 60, -1)
+        assert dt != dt.date() and not (dt == dt.date())
+        raises(TypeError, "dt < dt.date()")
+        assert datetime.min < dt < datetime.max
+        assert hash(dt) == hash(dt.replace())
+        raises(ValueError, datetime, 2012, 1, 1, 24)
+        raises(ValueError, datetime, 2012, 1, 1, 0, 0, 60)
+        raises(ValueError, datetime, 2012, 1, 1, 0, 0, 0, 1000000)
+        raises(OverflowError, "datetime.max + timedelta(0, 0, 1)")
+
+    def test_timestamps(self):
+        import time
+        from datetime import datetime, date
+        assert datetime.utcfromtimestamp(0) == datetime(1970, 1, 1)
+        assert datetime.utcfromtimestamp(1.5) == datetime(1970, 1, 1, 0, 0,
+                                                          1, 500000)
+        assert datetime.utcfromtimestamp(-1.25) == datetime(1969, 12, 31,
+                                                            23, 59, 58,
+                                                            750000)
+        t = 1330000000.25
+        local = time.localtime(t)
+        assert datetime.fromtimestamp(t) == datetime(*local[:6] + (250000,))
+        assert datetime.now() >= datetime.fromtimestamp(t)
+        assert datetime.utcnow().year >= 2012
+        for f in [datetime.utcfromtimestamp, datetime.fromtimestamp,
+                  date.fromtimestamp]:
+            exc = raises(ValueError, f, 1e20)
+            assert str(exc.value) == \
+                   "timestamp out of range for platform time_t"
+            raises(ValueError, f, -1e20)
+
+    def test_time(self):
+        from datetime import time
+        t = time(12, 30, 1, 5)
+        assert (t.hour, t.minute, t.second, t.microsecond) == (12, 30, 1, 5)
+        assert repr(t) == 'datetime.time(12, 30, 1, 5)'
+        assert repr(time(1, 2)) == 'datetime.time(1, 2)'
+        assert str(t) == t.isoformat() == '12:30:01.000005'
+        assert time() == time.min
+        assert not time() and t
+        assert time(12) < t < time.max
+        assert t.replace(minute=0) == time(12, 0, 1, 5)
+        assert t != 5
+        raises(TypeError, "t < 5")
+        assert hash(t) == hash(time(12, 30, 1, 5))
+        raises(ValueError, time, 12, 60)
+
+    def test_tzinfo(self):
+        from datetime import datetime, time, timedelta, tzinfo
+        class FixedOffset(tzinfo):
+            def __init__(self, minutes, name):
+                self.offset = timedelta(minutes=minutes)
+                self.name = name
+            def utcoffset(self, dt):
+                return self.offset
+            def tzname(self, dt):
+                return self.name
+            def dst(self, dt):
+                return timedelta(0)
+        utc = FixedOffset(0, 'UTC')
+        paris = FixedOffset(60, 'CET')
+        dt = datetime(2012, 1, 1, 12, 0, tzinfo=paris)
+        assert dt.tzinfo is paris
+        assert dt.utcoffset() == timedelta(hours=1)
+        assert dt.dst() == timedelta(0)
+        assert dt.tzname() == 'CET'
+        assert dt.isoformat() == '2012-01-01T12:00:00+01:00'
+        assert repr(dt).endswith(', tzinfo=%r)' % (paris,))
+        dt_utc = dt.astimezone(utc)
+        assert dt_utc.hour == 11 and dt_utc.tzinfo is utc
+        assert dt_utc == dt
+        assert hash(dt_utc) == hash(dt)
+        assert dt_utc - dt == timedelta(0)
+        assert dt.utctimetuple()[:6] == (2012, 1, 1, 11, 0, 0)
+        naive = datetime(2012, 1, 1, 11)
+        raises(TypeError, "naive < dt")
+        raises(TypeError, "naive - dt")
+        raises(ValueError, naive.astimezone, utc)
+        assert datetime.fromtimestamp(0, paris) == datetime(1970, 1, 1, 1,
+                                                            tzinfo=paris)
+        assert datetime(2012, 1, 1, tzinfo=paris).replace(tzinfo=None) == \
+               datetime(2012, 1, 1)
+        t = time(12, 0, tzinfo=paris)
+        assert t.utcoffset() == timedelta(hours=1)
+        assert t == time(11, 0, tzinfo=utc)
+        assert t.isoformat() == '12:00:00+01:00'
+        raises(TypeError, datetime, 2012, 1, 1, tzinfo=1)
+        raises(NotImplementedError, tzinfo().utcoffset, None)
+        class BadOffset(tzinfo):
+            def utcoffset(self, dt):
+                return timedelta(seconds=30)
+        raises(ValueError, datetime(2012, 1, 1, tzinfo=BadOffset()).utcoffset)
+
+    def test_strftime(self):
+        from datetime import datetime, date, time, timedelta, tzinfo
+        class Zone(tzinfo):
+            def utcoffset(self, dt):
+                return timedelta(minutes=-90)
+            def tzname(self, dt):
+                return 'X%Y'
+            def dst(self, dt):
+                return None
+        dt = datetime(2012, 2, 9, 8, 5, 3, 45)
+        assert dt.strftime('%Y-%m-%d %H:%M:%S.%f') == \
+               '2012-02-09 08:05:03.000045'
+        assert dt.strftime('%y %j %% %z%Z') == '12 040 % '
+        assert dt.strftime('%A %B') == 'Thursday February'
+        assert dt.strftime(u'%d') == '09'
+        dt = dt.replace(tzinfo=Zone())
+        assert dt.strftime('%z %Z') == '-0130 X%Y'
+        assert dt.strftime('%a %Z') == 'Thu X%Y'
+        assert date(2012, 2, 9).strftime('%H:%M %f') == '00:00 000000'
+        assert time(1, 2, 3).strftime('%Y %H:%M:%S') == '1900 01:02:03'
+        assert format(dt, '%d') == '09'
+        assert format(dt, '') == str(dt)
+        raises(ValueError, date(1899, 1, 1).strftime, '%Y')
+        for fmt in ['%Y%', '%', '%%%', 'abc%']:
+            exc = raises(ValueError, dt.strftime, fmt)
+            assert str(exc.value) == "strftime format ends with raw %"
+        assert dt.strftime('%Y%%') == '2012%'
+
+    def test_strptime(self):
+        from datetime import datetime
+        p = datetime.strptime
+        assert p('2012-02-09 08:05:03.000045', '%Y-%m-%d %H:%M:%S.%f') == \
+               datetime(2012, 2, 9, 8, 5, 3, 45)
+        assert p('12/2/9', '%y/%m/%d') == datetime(2012, 2, 9)
+        assert p('69', '%y') == datetime(1969, 1, 1)
+        assert p('2012 T 3  .5', '%Y t %H .%f') == datetime(2012, 1, 1, 3, 0,
+                                                           0, 500000)
+        assert p('1212', '%H%M') == datetime(1900, 1, 1, 12, 12)
+        assert p(' 9%', '%d%%') == datetime(1900, 1, 9)
+        assert p('Thursday 9', '%A %d') == datetime(1900, 1, 9)
+        raises(ValueError, p, '2012-02-30', '%Y-%m-%d')
+        raises(ValueError, p, '2012-02', '%Y-%m-%d')
+        raises(ValueError, p, '2012-02-09x', '%Y-%m-%d')
+        raises(ValueError, p, '25', '%H')
+        class MyDatetime(datetime):
+            pass
+        dt = MyDatetime.strptime('2012', '%Y')
+        assert type(dt) is MyDatetime
+
+    def test_subclass(self):
+        from datetime import date, datetime, time
+        class MyDate(date):
+            def __new__(cls, year, month, day, extra=None):
+                self = date.__new__(cls, year, month, day)
+                self.extra = extra
+                return self
+        d = MyDate(2012, 1, 1, 'x')
+        assert d.extra == 'x'
+        assert type(d.replace(day=2)) is MyDate
+        assert type(MyDate.fromordinal(1)) is MyDate
+        assert repr(MyDate(2012, 1, 1)) == 'datetime.MyDate(2012, 1, 1)'
+        class MyDatetime(datetime):
+            pass
+        assert type(MyDatetime.now()) is MyDatetime
+        assert type(MyDatetime.combine(date(2012, 1, 1), time())) is \
+               MyDatetime
+        assert type(datetime.today()) is datetime
+
+    def test_pickle(self):
+        import pickle
+        from datetime import date, datetime, time, timedelta, tzinfo
+        values = [date(2012, 2, 29), datetime(9999, 12, 31, 23, 59, 59,
+                                               999999),
+                  time(23, 5, 1, 123456), timedelta(-5, 3, 1)]
+        for value in values:
+            for proto in range(3):
+                s = pickle.dumps(value, proto)
+                assert pickle.loads(s) == value
+        assert datetime.__reduce__(datetime(2012, 1, 2, 3, 4, 5, 6)) == (
+            datetime, ('\x07\xdc\x01\x02\x03\x04\x05\x00\x00\x06',))
+        raises(TypeError, datetime, '\x07\xdc\x01\x02\x03\x04\x05\x00\x00\x06',
+               5)
+        assert tzinfo().__reduce__() == (tzinfo, ())
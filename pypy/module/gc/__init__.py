@@ -8,6 +8,8 @@ class Module(MixedModule):
         'isenabled': 'interp_gc.isenabled',
         'enable_finalizers': 'interp_gc.enable_finalizers',
         'disable_finalizers': 'interp_gc.disable_finalizers',
+        'get_stats': 'interp_gc.get_stats',
+        'set_stats_hook': 'interp_gc.set_stats_hook',
         'garbage' : 'space.newlist([])',
         #'dump_heap_stats': 'interp_gc.dump_heap_stats',
     }
@@ -15,6 +17,8 @@ class Module(MixedModule):
     }
 
     def __init__(self, space, w_name):
+        "NOT_RPYTHON"
+        from pypy.module.gc.interp_gc import GcStatsHookAction
         if (not space.config.translating or
             space.config.translation.gctransformer == "framework"):
             self.appleveldefs.update({
@@ -33,3 +37,6 @@ class Module(MixedModule):
                 'GcRef': 'referents.W_GcRef',
                 })
         MixedModule.__init__(self, space, w_name)
+        # check for the stats hook as often as the GIL is released
+        space.actionflag.register_periodic_action(
+            space.fromcache(GcStatsHookAction), use_bytecode_counter=True)
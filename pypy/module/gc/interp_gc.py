@@ -1,6 +1,8 @@
 from pypy.interpreter.gateway import unwrap_spec
-from pypy.interpreter.error import OperationError
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.executioncontext import PeriodicAsyncAction
 from pypy.rlib import rgc
+from pypy.rlib.unroll import unrolling_iterable
 from pypy.rlib.streamio import open_file_as_stream
 
 def collect(space):
@@ -49,6 +51,73 @@ def disable_finalizers(space):
 
 # ____________________________________________________________
 
+_gc_stats = unrolling_iterable([(i, name, name.endswith('_time'))
+                                for i, name in enumerate(rgc.GC_STATS)])
+
+def get_stats(space):
+    """Return a dict with the statistics recorded by the GC: number of
+    minor collections and of major collection pauses, the total and the
+    maximal time spent in them (in seconds), and so on.  A value is -1 if
+    the GC does not record it."""
+    w_stats = space.newdict()
+    for index, name, is_time in _gc_stats:
+        value = rgc.get_gc_stat(index)
+        if is_time:
+            w_value = space.wrap(value)
+        else:
+            w_value = space.wrap(int(value))
+        space.setitem_str(w_stats, name, w_value)
+    return w_stats
+
+def set_stats_hook(space, w_callback):
+    """Set a callable that is called with the dict returned by
+    get_stats() soon after the GC did a minor collection or a step
+    of a major collection.  Use None to remove it."""
+    action = space.fromcache(GcStatsHookAction)
+    if space.is_w(w_callback, space.w_None):
+        action.w_callback = None
+    elif not space.is_true(space.callable(w_callback)):
+        raise operationerrfmt(space.w_TypeError,
+                              "expected a callable or None, got '%s'",
+                              space.type(w_callback).getname(space))
+    else:
+        action.w_callback = w_callback
+        action.reset_counters()
+
+class GcStatsHookAction(PeriodicAsyncAction):
+    """Checks periodically if the GC did some work since the last
+    check, and if so, calls the app-level hook.  The hook cannot be
+    called from the GC itself, which must not run app-level code."""
+
+    def __init__(self, space):
+        PeriodicAsyncAction.__init__(self, space)
+        self.w_callback = None
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.seen_minor = rgc.get_gc_stat(rgc.GC_STAT_MINOR_COLLECTIONS)
+        self.seen_major = rgc.get_gc_stat(
+            rgc.GC_STAT_MAJOR_COLLECTION_PAUSES)
+
+    def perform(self, executioncontext, frame):
+        w_callback = self.w_callback
+        if w_callback is None:
+            return
+        minor = rgc.get_gc_stat(rgc.GC_STAT_MINOR_COLLECTIONS)
+        major = rgc.get_gc_stat(rgc.GC_STAT_MAJOR_COLLECTION_PAUSES)
+        if minor == self.seen_minor and major == self.seen_major:
+            return
+        self.seen_minor = minor
+        self.seen_major = major
+        space = self.space
+        try:
+            space.call_function(w_callback, get_stats(space))
+        except OperationError, e:
+            e.write_unraisable(space, "GC stats hook ", w_callback)
+            e.clear(space)
+
+# ____________________________________________________________
+
 @unwrap_spec(filename='str0')
 def dump_heap_stats(space, filename):
     tb = rgc._heap_stats()
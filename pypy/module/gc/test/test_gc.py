@@ -69,6 +69,25 @@ class AppTestGC(object):
         gc.enable()
         assert gc.isenabled()
 
+    def test_get_stats(self):
+        import gc
+        stats = gc.get_stats()
+        for key in ['minor_collections', 'major_collections',
+                    'major_collection_pauses', 'minor_collection_time',
+                    'major_collection_max_time', 'finalizer_time',
+                    'bytes_promoted', 'card_marking_scans',
+                    'nursery_size']:
+            assert key in stats
+        assert isinstance(stats['minor_collections'], int)
+        assert isinstance(stats['minor_collection_time'], float)
+
+    def test_set_stats_hook(self):
+        import gc
+        raises(TypeError, gc.set_stats_hook, 42)
+        gc.set_stats_hook(lambda stats: None)
+        gc.collect()
+        gc.set_stats_hook(None)
+
 class AppTestGcDumpHeap(object):
     pytestmark = py.test.mark.xfail(run=False)
 
@@ -1,7 +1,10 @@
 from pypy.module.micronumpy.strides import calculate_dot_strides
 from pypy.interpreter.error import OperationError
 from pypy.module.micronumpy.interp_iter import ViewIterator
+from pypy.module.micronumpy import types
 from pypy.rlib import jit
+from pypy.rlib.unroll import unrolling_iterable
+from pypy.rpython.lltypesystem import rffi
 
 def dot_printable_location(shapelen):
     return 'numpy dot [%d]' % shapelen
@@ -34,6 +37,114 @@ def match_dot_shapes(space, left, right):
                                         "objects are not aligned"))
     return out_shape, right_critical_dim
 
+# the matrices are multiplied by square blocks of this size, which are
+# small enough for a block of each of them to stay in the cache together
+BLOCK_SIZE = 64
+
+def make_matmul(itemtype_cls):
+    def read_matrix(itemtype, arr, start, rows, cols, row_stride, col_stride):
+        # the values of the matrix, unboxed and packed row after row
+        assert isinstance(itemtype, itemtype_cls)
+        zero = itemtype.for_computation(rffi.cast(itemtype.T, 0))
+        values = [zero] * (rows * cols)
+        storage = arr.storage
+        for i in range(rows):
+            offset = start + i * row_stride
+            for j in range(cols):
+                values[i * cols + j] = itemtype.for_computation(
+                    itemtype._read(storage, 1, offset, 0))
+                offset += col_stride
+        return values
+
+    @jit.dont_look_inside
+    def matmul(itemtype, left, lstrides, right, rstrides, result, ostrides,
+               m, n, k):
+        assert isinstance(itemtype, itemtype_cls)
+        a = read_matrix(itemtype, left, left.start, m, k,
+                        lstrides[0], lstrides[1])
+        b = read_matrix(itemtype, right, right.start, k, n,
+                        rstrides[0], rstrides[1])
+        c = [itemtype.for_computation(rffi.cast(itemtype.T, 0))] * (m * n)
+        for i0 in range(0, m, BLOCK_SIZE):
+            i1 = min(i0 + BLOCK_SIZE, m)
+            for p0 in range(0, k, BLOCK_SIZE):
+                p1 = min(p0 + BLOCK_SIZE, k)
+                for j0 in range(0, n, BLOCK_SIZE):
+                    j1 = min(j0 + BLOCK_SIZE, n)
+                    for i in range(i0, i1):
+                        crow = i * n
+                        arow = i * k
+                        for p in range(p0, p1):
+                            aval = a[arow + p]
+                            brow = p * n
+                            for j in range(j0, j1):
+                                c[crow + j] += aval * b[brow + j]
+        storage = result.storage
+        for i in range(m):
+            offset = result.start + i * ostrides[0]
+            for j in range(n):
+                itemtype._write(storage, 1, offset, 0,
+                                rffi.cast(itemtype.T, c[i * n + j]))
+                offset += ostrides[1]
+
+    return matmul
+
+def _get_matmul_types():
+    result = {}
+    for tp in types.__dict__.values():
+        if (isinstance(tp, type) and issubclass(tp, types.BaseType) and
+                (issubclass(tp, types.Integer) or
+                 issubclass(tp, types.Float)) and
+                not issubclass(tp, types.NonNativePrimitive)):
+            result[tp] = None
+    result = result.keys()
+    result.sort(key=lambda tp: tp.__name__)
+    return result
+
+all_matmul_functions = unrolling_iterable([
+    (tp, make_matmul(tp)) for tp in _get_matmul_types()])
+
+def _matrix_strides(arr, is_left):
+    # (row stride, column stride) of 'arr' seen as a matrix; a vector is
+    # a single row on the left side and a single column on the right side
+    if len(arr.shape) == 2:
+        return arr.shape[0], arr.shape[1], (arr.strides[0], arr.strides[1])
+    if is_left:
+        return 1, arr.shape[0], (0, arr.strides[0])
+    return arr.shape[0], 1, (arr.strides[0], 0)
+
+def _convert(space, arr, dtype):
+    from pypy.module.micronumpy.interp_numarray import W_NDimArray
+    if arr.find_dtype() is dtype:
+        return arr
+    res = W_NDimArray(arr.shape[:], dtype)
+    res.setslice(space, arr)
+    return res
+
+def matrix_dot(space, left, right, result, dtype):
+    ''' Computes into 'result' the product of 'left' and 'right', concrete
+    arrays of at most two dimensions, with a blocked loop over their
+    unboxed values.  Returns False if 'dtype' is not supported, which
+    leaves the work to multidim_dot().
+    '''
+    itemtype = dtype.itemtype
+    for tp, matmul in all_matmul_functions:
+        if isinstance(itemtype, tp):
+            left = _convert(space, left, dtype)
+            right = _convert(space, right, dtype)
+            m, k, lstrides = _matrix_strides(left, True)
+            k, n, rstrides = _matrix_strides(right, False)
+            if len(result.shape) == 2:
+                ostrides = (result.strides[0], result.strides[1])
+            elif len(left.shape) == 2:
+                ostrides = (result.strides[0], 0)
+            else:
+                ostrides = (0, result.strides[0])
+            matmul(itemtype, left, lstrides, right, rstrides, result,
+                   ostrides, m, n, k)
+            return True
+    return False
+
 def multidim_dot(space, left, right, result, dtype, right_critical_dim):
     ''' assumes left, right are concrete arrays
     given left.shape == [3, 5, 7],
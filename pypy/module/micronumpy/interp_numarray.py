@@ -3,9 +3,10 @@ from pypy.interpreter.error import OperationError, operationerrfmt
 from pypy.interpreter.gateway import interp2app, unwrap_spec
 from pypy.interpreter.typedef import TypeDef, GetSetProperty
 from pypy.module.micronumpy import (interp_ufuncs, interp_dtype, interp_boxes,
-    signature, support, loop)
+    signature, support, loop, sort)
 from pypy.module.micronumpy.appbridge import get_appbridge_cache
-from pypy.module.micronumpy.dot import multidim_dot, match_dot_shapes
+from pypy.module.micronumpy.dot import (multidim_dot, match_dot_shapes,
+    matrix_dot)
 from pypy.module.micronumpy.interp_iter import (ArrayIterator,
     SkipLastAxisIterator, Chunk, ViewIterator, Chunks, RecordChunk,
     NewAxisChunk)
@@ -238,9 +239,12 @@ class BaseArray(Wrappable):
         # Do the dims match?
         out_shape, other_critical_dim = match_dot_shapes(space, self, other)
         result = W_NDimArray(out_shape, dtype)
-        # This is the place to add fpypy and blas
-        return multidim_dot(space, self.get_concrete(),
-                            other.get_concrete(), result, dtype,
+        left = self.get_concrete()
+        right = other.get_concrete()
+        if (len(self.shape) <= 2 and len(other.shape) <= 2 and
+                matrix_dot(space, left, right, result, dtype)):
+            return result
+        return multidim_dot(space, left, right, result, dtype,
                             other_critical_dim)
 
     def get_concrete(self):
@@ -720,6 +724,58 @@ class BaseArray(Wrappable):
     def descr_repeat(self, space, repeats, w_axis=None):
         return repeat(space, self, repeats, w_axis)
 
+    @unwrap_spec(axis=int, kind=str)
+    def descr_sort(self, space, axis=-1, kind='quicksort', w_order=None):
+        if not space.is_w(w_order, space.w_None):
+            raise OperationError(space.w_NotImplementedError,
+                                 space.wrap("order not implemented"))
+        kind = sort.get_kind(space, kind)
+        axis = sort.normalize_axis(space, self, axis)
+        concr = self.get_concrete()
+        concr.invalidated()
+        sort.sort_array(space, concr, axis, kind)
+
+    @unwrap_spec(kind=str)
+    def descr_argsort(self, space, w_axis=-1, kind='quicksort', w_order=None):
+        if not space.is_w(w_order, space.w_None):
+            raise OperationError(space.w_NotImplementedError,
+                                 space.wrap("order not implemented"))
+        kind = sort.get_kind(space, kind)
+        if space.is_w(w_axis, space.w_None):
+            concr = self.descr_flatten(space).get_concrete()
+            axis = 0
+        else:
+            axis = sort.normalize_axis(space, self, space.int_w(w_axis))
+            concr = self.get_concrete()
+        longdtype = interp_dtype.get_dtype_cache(space).w_longdtype
+        res = W_NDimArray(concr.shape[:], longdtype)
+        sort.argsort_array(space, concr, axis, kind, res)
+        return res
+
+    @unwrap_spec(side=str)
+    def descr_searchsorted(self, space, w_v, side='left'):
+        if len(self.shape) != 1:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("searchsorted needs a 1-d array"))
+        if side == 'left':
+            right = False
+        elif side == 'right':
+            right = True
+        else:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("side must be 'left' or 'right'"))
+        values = convert_to_array(space, w_v)
+        longdtype = interp_dtype.get_dtype_cache(space).w_longdtype
+        if isinstance(values, Scalar):
+            res = W_NDimArray([1], longdtype)
+            sort.searchsorted(space, self.get_concrete(),
+                              values.reshape(space, [1]), right, res)
+            return res.getitem(0)
+        values = values.get_concrete()
+        res = W_NDimArray(values.shape[:], longdtype)
+        sort.searchsorted(space, self.get_concrete(), values, right, res)
+        return res
+
 def convert_to_array(space, w_obj):
     if isinstance(w_obj, BaseArray):
         return w_obj
@@ -1473,6 +1529,9 @@ BaseArray.typedef = TypeDef(
     take = interp2app(BaseArray.descr_take),
     compress = interp2app(BaseArray.descr_compress),
     repeat = interp2app(BaseArray.descr_repeat),
+    sort = interp2app(BaseArray.descr_sort),
+    argsort = interp2app(BaseArray.descr_argsort),
+    searchsorted = interp2app(BaseArray.descr_searchsorted),
 )
 
 
@@ -0,0 +1,332 @@
+""" Sorting of arrays along an axis: sort(), argsort() and searchsorted().
+
+The lines of the array along the axis are sorted one after the other.  The
+items of a line are read from the storage into a list of unboxed values,
+sorted there by code specialized for the item type, and written back
+(or, for argsort, the sorted indices are written to the result).
+"""
+
+from pypy.interpreter.error import OperationError
+from pypy.module.micronumpy import types, interp_dtype
+from pypy.rlib import jit
+from pypy.rlib.listsort import make_timsort_class
+from pypy.rlib.objectmodel import specialize
+from pypy.rlib.unroll import unrolling_iterable
+from pypy.rpython.lltypesystem import rffi
+
+QUICKSORT = 0
+MERGESORT = 1
+HEAPSORT = 2
+
+# ranges shorter than this are sorted by insertion by the quicksort
+SMALL_QUICKSORT = 16
+
+def get_kind(space, kind):
+    # like numpy, only the first letter is checked
+    if kind:
+        if kind[0] == 'q':
+            return QUICKSORT
+        if kind[0] == 'm':
+            return MERGESORT
+        if kind[0] == 'h':
+            return HEAPSORT
+    raise OperationError(space.w_ValueError, space.wrap(
+        "sort kind must be one of 'quicksort', 'mergesort' or 'heapsort'"))
+
+def normalize_axis(space, arr, axis):
+    ndim = len(arr.shape)
+    if axis < 0:
+        axis += ndim
+    if axis < 0 or axis >= ndim:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("axis out of bounds"))
+    return axis
+
+def line_starts(arr, axis):
+    """ Returns the offsets of the first items of all the lines of 'arr'
+    along 'axis'.  Arrays of the same shape get their lines in the same
+    order.
+    """
+    starts = [arr.start]
+    for i in range(len(arr.shape)):
+        if i == axis:
+            continue
+        stride = arr.strides[i]
+        new_starts = []
+        for start in starts:
+            for j in range(arr.shape[i]):
+                new_starts.append(start + j * stride)
+        starts = new_starts
+    return starts
+
+# ____________________________________________________________
+# in-place quicksort and heapsort of sorter.list using sorter.lt(), for
+# the sorters made below, which get their mergesort from TimSort
+
+@specialize.argtype(0)
+def _insertion_sort(sorter, lo, hi):
+    lst = sorter.list
+    for i in range(lo + 1, hi):
+        pivot = lst[i]
+        j = i
+        while j > lo and sorter.lt(pivot, lst[j - 1]):
+            lst[j] = lst[j - 1]
+            j -= 1
+        lst[j] = pivot
+
+@specialize.argtype(0)
+def _sift_down(sorter, lo, root, end):
+    lst = sorter.list
+    while True:
+        child = 2 * root + 1
+        if child >= end:
+            break
+        if (child + 1 < end and
+                sorter.lt(lst[lo + child], lst[lo + child + 1])):
+            child += 1
+        if not sorter.lt(lst[lo + root], lst[lo + child]):
+            break
+        lst[lo + root], lst[lo + child] = lst[lo + child], lst[lo + root]
+        root = child
+
+@specialize.argtype(0)
+def heapsort(sorter, lo, hi):
+    lst = sorter.list
+    n = hi - lo
+    start = n // 2 - 1
+    while start >= 0:
+        _sift_down(sorter, lo, start, n)
+        start -= 1
+    end = n - 1
+    while end > 0:
+        lst[lo], lst[lo + end] = lst[lo + end], lst[lo]
+        _sift_down(sorter, lo, 0, end)
+        end -= 1
+
+@specialize.argtype(0)
+def quicksort(sorter):
+    """ An introsort: quicksort with a median-of-three pivot, switching
+    to heapsort for ranges that recurse too deeply and to insertion sort
+    for short ones.  The larger partition is pushed on a stack, so the
+    stack stays small.
+    """
+    lst = sorter.list
+    maxdepth = 0
+    n = len(lst)
+    while n > 1:
+        maxdepth += 2
+        n >>= 1
+    stack_lo = [0]
+    stack_hi = [len(lst)]
+    stack_depth = [maxdepth]
+    while stack_lo:
+        lo = stack_lo.pop()
+        hi = stack_hi.pop()
+        depth = stack_depth.pop()
+        while hi - lo > SMALL_QUICKSORT:
+            if depth == 0:
+                heapsort(sorter, lo, hi)
+                lo = hi
+                break
+            depth -= 1
+            # sort lst[lo], lst[mid], lst[hi - 1] and use the middle one
+            mid = lo + ((hi - lo) >> 1)
+            if sorter.lt(lst[mid], lst[lo]):
+                lst[mid], lst[lo] = lst[lo], lst[mid]
+            if sorter.lt(lst[hi - 1], lst[mid]):
+                lst[hi - 1], lst[mid] = lst[mid], lst[hi - 1]
+                if sorter.lt(lst[mid], lst[lo]):
+                    lst[mid], lst[lo] = lst[lo], lst[mid]
+            pivot = lst[mid]
+            i = lo
+            j = hi - 1
+            while True:
+                i += 1
+                while sorter.lt(lst[i], pivot):
+                    i += 1
+                j -= 1
+                while sorter.lt(pivot, lst[j]):
+                    j -= 1
+                if i >= j:
+                    break
+                lst[i], lst[j] = lst[j], lst[i]
+            # now lst[lo:j + 1] <= pivot <= lst[j + 1:hi]
+            if j + 1 - lo > hi - j - 1:
+                stack_lo.append(lo)
+                stack_hi.append(j + 1)
+                stack_depth.append(depth)
+                lo = j + 1
+            else:
+                stack_lo.append(j + 1)
+                stack_hi.append(hi)
+                stack_depth.append(depth)
+                hi = j + 1
+        _insertion_sort(sorter, lo, hi)
+
+@specialize.argtype(0)
+def sort_list(sorter, kind):
+    if kind == QUICKSORT:
+        quicksort(sorter)
+    elif kind == MERGESORT:
+        sorter.sort()
+    else:
+        heapsort(sorter, 0, len(sorter.list))
+
+# ____________________________________________________________
+
+def make_sort_functions(itemtype_cls):
+    ValueBaseTimSort = make_timsort_class()
+    ArgBaseTimSort = make_timsort_class()
+
+    if issubclass(itemtype_cls, types.Float):
+        def lt(a, b):
+            # NaNs are sorted to the end, as in numpy
+            return a < b or (b != b and a == a)
+    else:
+        def lt(a, b):
+            return a < b
+
+    class ValueSort(ValueBaseTimSort):
+        def lt(self, a, b):
+            return lt(a, b)
+
+    class ArgSort(ArgBaseTimSort):
+        def lt(self, a, b):
+            values = self.values
+            return lt(values[a], values[b])
+
+    def read_line(itemtype, storage, start, stride, length):
+        assert isinstance(itemtype, itemtype_cls)
+        values = [itemtype.for_computation(itemtype._read(storage, 1, start, 0))
+                  ] * length
+        for i in range(1, length):
+            values[i] = itemtype.for_computation(
+                itemtype._read(storage, 1, start + i * stride, 0))
+        return values
+
+    @jit.dont_look_inside
+    def sort_line(itemtype, storage, start, stride, length, kind):
+        assert isinstance(itemtype, itemtype_cls)
+        sorter = ValueSort(read_line(itemtype, storage, start, stride, length))
+        sort_list(sorter, kind)
+        values = sorter.list
+        for i in range(length):
+            itemtype._write(storage, 1, start + i * stride, 0,
+                            rffi.cast(itemtype.T, values[i]))
+
+    @jit.dont_look_inside
+    def argsort_line(itemtype, storage, start, stride, length, kind):
+        sorter = ArgSort(range(length))
+        sorter.values = read_line(itemtype, storage, start, stride, length)
+        sort_list(sorter, kind)
+        return sorter.list
+
+    return sort_line, argsort_line
+
+def _get_sortable_types():
+    result = {}
+    for tp in types.__dict__.values():
+        if (isinstance(tp, type) and issubclass(tp, types.BaseType) and
+                issubclass(tp, types.Primitive)):
+            result[tp] = None
+    result = result.keys()
+    result.sort(key=lambda tp: tp.__name__)
+    return result
+
+all_sort_functions = unrolling_iterable([
+    (tp, make_sort_functions(tp)) for tp in _get_sortable_types()])
+
+def _not_sortable(space, dtype):
+    return OperationError(space.w_NotImplementedError, space.wrap(
+        "sorting of arrays of dtype %s is not supported" % (dtype.name,)))
+
+def sort_array(space, arr, axis, kind):
+    """ Sorts the concrete array 'arr' in-place along 'axis'.
+    """
+    dtype = arr.find_dtype()
+    itemtype = dtype.itemtype
+    if arr.size == 0:
+        return
+    length = arr.shape[axis]
+    stride = arr.strides[axis]
+    for tp, funcs in all_sort_functions:
+        if isinstance(itemtype, tp):
+            sort_line = funcs[0]
+            for start in line_starts(arr, axis):
+                sort_line(itemtype, arr.storage, start, stride, length, kind)
+            return
+    raise _not_sortable(space, dtype)
+
+def argsort_array(space, arr, axis, kind, res):
+    """ Writes to 'res', an array of longs of the same shape as the
+    concrete array 'arr', the indices that sort 'arr' along 'axis'.
+    """
+    dtype = arr.find_dtype()
+    itemtype = dtype.itemtype
+    if arr.size == 0:
+        return
+    length = arr.shape[axis]
+    stride = arr.strides[axis]
+    res_stride = res.strides[axis]
+    res_starts = line_starts(res, axis)
+    res_itemtype = res.find_dtype().itemtype
+    for tp, funcs in all_sort_functions:
+        if isinstance(itemtype, tp):
+            argsort_line = funcs[1]
+            starts = line_starts(arr, axis)
+            for i in range(len(starts)):
+                indices = argsort_line(itemtype, arr.storage, starts[i],
+                                       stride, length, kind)
+                res_start = res_starts[i]
+                for j in range(length):
+                    res.setitem(res_start + j * res_stride,
+                                res_itemtype.box(indices[j]))
+            return
+    raise _not_sortable(space, dtype)
+
+# ____________________________________________________________
+# searchsorted
+
+def _box_lt(itemtype, v1, v2):
+    # the same order as used for sorting, with NaNs at the end
+    return (itemtype.lt(v1, v2) or
+            (itemtype.isnan(v2) and not itemtype.isnan(v1)))
+
+def _bisect(arr, dtype, value, right):
+    itemtype = dtype.itemtype
+    stride = arr.strides[0]
+    lo = 0
+    hi = arr.shape[0]
+    while lo < hi:
+        mid = (lo + hi) >> 1
+        item = arr.getitem(arr.start + mid * stride).convert_to(dtype)
+        if right:
+            go_right = not _box_lt(itemtype, value, item)
+        else:
+            go_right = _box_lt(itemtype, item, value)
+        if go_right:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def searchsorted(space, arr, values, right, res):
+    """ Writes to 'res', an array of longs of the same shape as
+    'values', the indices where the items of 'values' should be inserted
+    into 'arr', a sorted concrete array of one dimension.
+    """
+    from pypy.module.micronumpy.interp_ufuncs import find_binop_result_dtype
+    dtype = find_binop_result_dtype(space, arr.find_dtype(),
+                                    values.find_dtype())
+    if not dtype.is_int_type() and dtype.kind != interp_dtype.FLOATINGLTR:
+        raise _not_sortable(space, dtype)
+    res_itemtype = res.find_dtype().itemtype
+    values_i = values.create_iter()
+    res_i = res.create_iter()
+    shapelen = len(values.shape)
+    while not res_i.done():
+        value = values.getitem(values_i.offset).convert_to(dtype)
+        index = _bisect(arr, dtype, value, right)
+        res.setitem(res_i.offset, res_itemtype.box(index))
+        values_i = values_i.next(shapelen)
+        res_i = res_i.next(shapelen)
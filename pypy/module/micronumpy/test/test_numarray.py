@@ -1247,6 +1247,47 @@ class AppTestNumArray(BaseNumpyAppTest):
         b = arange(3*2*6)[::-1].reshape((2,6,3))
         assert dot(a, b)[2,0,1,2] == 1140
 
+    def test_dot_matrices(self):
+        from _numpypy import array, dot, arange, int8, float32
+        def check(a, b):
+            c = dot(a, b)
+            if len(a.shape) == 1:
+                a = a.reshape(1, a.shape[0])
+            if len(b.shape) == 1:
+                b = b.reshape(b.shape[0], 1)
+            c = c.reshape(a.shape[0], b.shape[1])
+            for i in range(a.shape[0]):
+                for j in range(b.shape[1]):
+                    assert c[i, j] == (a[i] * b[:, j]).sum()
+        # larger than the blocks of the multiplication
+        a = arange(66 * 2).reshape(66, 2)
+        check(a, a[:3].T)
+        a = arange(3 * 130).reshape(3, 130) % 7
+        check(a, a[:2].T)
+        # strided and transposed operands, vectors
+        a = arange(24.0).reshape(4, 6)
+        check(a[::2, ::-2], a[1:, 1:4])
+        check(a.T, a)
+        check(a, a[1])
+        check(a[:, 2], a)
+        # mixed types are converted to the type of the result
+        b = arange(6).reshape(3, 2)
+        c = dot(a[:2, :3], b)
+        assert c.dtype.name == 'float64'
+        assert (c == [[10, 13], [46, 67]]).all()
+        a = array([[100, 100]], dtype=int8)
+        c = dot(a, a.T)
+        assert c.dtype is a.dtype
+        assert c[0, 0] == 32
+        a = array([[1.5, 2.5], [0.5, -1]], dtype=float32)
+        c = dot(a, a)
+        assert c.dtype is a.dtype
+        assert (c == [[3.5, 1.25], [0.25, 2.25]]).all()
+        c = dot(arange(6).reshape(2, 3), arange(0).reshape(3, 0))
+        assert c.shape == (2, 0)
+        c = dot(arange(0).reshape(2, 0), arange(0).reshape(0, 3))
+        assert (c == [[0, 0, 0], [0, 0, 0]]).all()
+
     def test_dot_constant(self):
         from _numpypy import array, dot
         a = array(range(5))
@@ -1501,6 +1542,84 @@ class AppTestNumArray(BaseNumpyAppTest):
                                                         4, 4]]).all()
         assert (array([1, 2]).repeat(2) == array([1, 1, 2, 2])).all()
 
+    def test_sort(self):
+        from _numpypy import array, arange
+        for kind in ['quicksort', 'mergesort', 'heapsort']:
+            a = array([3, 1, 2, 5, 4])
+            assert a.sort(kind=kind) is None
+            assert (a == [1, 2, 3, 4, 5]).all()
+            for dtype in ['int8', 'uint16', 'int32', 'int64', 'float32',
+                          'float64', 'bool']:
+                # long enough for the quicksort to partition
+                l = [(i * 37) % 101 for i in range(200)]
+                a = array(l, dtype=dtype)
+                a.sort(kind=kind)
+                assert (a == array(sorted(l), dtype=dtype)).all()
+        a = array([3.5, float('nan'), -1.0, float('inf'), 0.0])
+        a.sort()
+        assert list(a[:4]) == [-1.0, 0.0, 3.5, float('inf')]
+        assert a[4] != a[4]
+        a = array([1, 0, 1, 0])
+        raises(ValueError, a.sort, kind='x')
+        raises(ValueError, a.sort, 1)
+        a = array([])
+        a.sort()
+        assert a.shape == (0,)
+
+    def test_sort_axis(self):
+        from _numpypy import array, arange
+        a = array([[3, 1, 2], [0, 5, 4]])
+        a.sort()
+        assert (a == [[1, 2, 3], [0, 4, 5]]).all()
+        a = array([[3, 1, 2], [0, 5, 4]])
+        a.sort(axis=0)
+        assert (a == [[0, 1, 2], [3, 5, 4]]).all()
+        # sorting a view sorts the underlying array
+        a = arange(10)[::-1]
+        b = a[::2]
+        b.sort()
+        assert (a == [1, 8, 3, 6, 5, 4, 7, 2, 9, 0]).all()
+        # and the virtual arrays that depend on it see the old values
+        a = array([3, 2, 1])
+        c = a + 10
+        a.sort()
+        assert (c == [13, 12, 11]).all()
+
+    def test_argsort(self):
+        from _numpypy import array
+        for kind in ['quicksort', 'mergesort', 'heapsort']:
+            a = array([3, 1, 2])
+            assert (a.argsort(kind=kind) == [1, 2, 0]).all()
+            l = [(i * 37) % 101 for i in range(200)]
+            res = array(l, dtype='float64').argsort(kind=kind)
+            assert [l[i] for i in res] == sorted(l)
+        # mergesort is stable
+        a = array([1, 0, 1, 0, 1, 0] * 10)
+        res = a.argsort(kind='mergesort')
+        assert list(res) == range(1, 60, 2) + range(0, 60, 2)
+        a = array([[0, 3], [2, 2]])
+        assert (a.argsort(axis=0) == [[0, 1], [1, 0]]).all()
+        assert (a.argsort(axis=1) == [[0, 1], [0, 1]]).all()
+        assert (a.argsort(axis=None) == [0, 2, 3, 1]).all()
+        assert a.argsort().dtype.name == 'int64' or \
+               a.argsort().dtype.name == 'int32'
+        assert (a[:, ::-1].argsort() == [[1, 0], [0, 1]]).all()
+
+    def test_searchsorted(self):
+        from _numpypy import array, arange
+        a = arange(1, 6)
+        assert a.searchsorted(3) == 2
+        assert a.searchsorted(3, side='right') == 3
+        assert (a.searchsorted([-10, 10, 2, 3]) == [0, 5, 1, 2]).all()
+        assert (a.searchsorted(array([[2.5], [0.5]])) == [[2], [0]]).all()
+        a = array([1.0, 2.0, 2.0, float('nan')])
+        assert a.searchsorted(2.0) == 1
+        assert a.searchsorted(2.0, side='right') == 3
+        assert a.searchsorted(float('nan')) == 3
+        assert a.searchsorted(float('inf')) == 3
+        raises(ValueError, a.searchsorted, 1, side='middle')
+        raises(ValueError, array([[1]]).searchsorted, 1)
+
 
     def test_swapaxes(self):
         from _numpypy import array
@@ -458,11 +458,13 @@ class TestNumpyJIt(LLJitMixin):
                                 })
 
     def define_dot():
+        # 'a' has three dimensions, so that this is not one of the products
+        # of matrices, which are not looked into by the JIT
         return """
-        a = [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]]
+        a = [[[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]]]
         b=[[0, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10, 11]]
         c = dot(a, b)
-        c -> 1 -> 2
+        c -> 0 -> 1 -> 2
         """
 
     def test_dot(self):
@@ -1,9 +1,11 @@
 from pypy.interpreter.error import OperationError, wrap_oserror
 from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.buffer import RWBuffer
 from pypy.interpreter.typedef import TypeDef
 from pypy.interpreter.gateway import interp2app, unwrap_spec, NoneNotWrapped
 from pypy.rlib import rmmap, rarithmetic
 from pypy.rlib.rmmap import RValueError, RTypeError
+from pypy.rpython.lltypesystem import rffi
 
 if rmmap.HAVE_LARGEFILE_SUPPORT:
     OFF_T = rarithmetic.r_longlong
@@ -194,10 +196,42 @@ class W_MMap(Wrappable):
                 start += step
 
     def descr_buffer(self):
-        # XXX improve to work directly on the low-level address
-        from pypy.interpreter.buffer import StringLikeBuffer
-        space = self.space
-        return space.wrap(StringLikeBuffer(space, space.wrap(self)))
+        return self.space.wrap(MMapBuffer(self))
+
+class MMapBuffer(RWBuffer):
+    """A buffer working directly on the memory of the map."""
+
+    def __init__(self, w_mmap):
+        self.w_mmap = w_mmap
+
+    def getlength(self):
+        self.w_mmap.check_valid()
+        return self.w_mmap.mmap.size
+
+    def getitem(self, index):
+        self.w_mmap.check_valid()
+        return self.w_mmap.mmap.data[index]
+
+    def getslice(self, start, stop, step, size):
+        if step != 1:
+            return RWBuffer.getslice(self, start, stop, step, size)
+        self.w_mmap.check_valid()
+        if size == 0:
+            return ""
+        return rffi.charpsize2str(rffi.ptradd(self.w_mmap.mmap.data, start),
+                                  size)
+
+    def setitem(self, index, char):
+        self.w_mmap.check_valid()
+        self.w_mmap.check_writeable()
+        self.w_mmap.mmap.data[index] = char
+
+    def setslice(self, start, string):
+        self.w_mmap.check_valid()
+        self.w_mmap.check_writeable()
+        data = self.w_mmap.mmap.data
+        for i in range(len(string)):
+            data[start + i] = string[i]
 
 if rmmap._POSIX:
 
@@ -548,7 +548,10 @@ class AppTestMMap:
         assert len(b) == 6
         assert b[3] == "b"
         assert b[:] == "foobar"
+        assert b[1:4] == "oob"
+        assert b[::2] == "foa"
         m.close()
+        raises(ValueError, len, b)
         f.close()
 
     def test_offset(self):
@@ -7,6 +7,9 @@ class Module(MixedModule):
     interpleveldefs = {
         'set_param':    'interp_jit.set_param',
         'residual_call': 'interp_jit.residual_call',
+        'compile_pending_loops': 'interp_jit.compile_pending_loops',
+        'save_hot_loops': 'interp_jit.save_hot_loops',
+        'load_hot_loops': 'interp_jit.load_hot_loops',
         'set_compile_hook': 'interp_resop.set_compile_hook',
         'set_optimize_hook': 'interp_resop.set_optimize_hook',
         'set_abort_hook': 'interp_resop.set_abort_hook',
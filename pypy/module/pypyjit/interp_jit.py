@@ -3,6 +3,7 @@
 This is transformed to become a JIT by code elsewhere: pypy/jit/*
 """
 
+import os
 from pypy.tool.pairtype import extendabletype
 from pypy.rlib.rarithmetic import r_uint, intmask
 from pypy.rlib.jit import JitDriver, hint, we_are_jitted, dont_look_inside
@@ -10,6 +11,8 @@ from pypy.rlib import jit
 from pypy.rlib.jit import current_trace_length, unroll_parameters
 import pypy.interpreter.pyopcode   # for side-effects
 from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.error import wrap_oserror2
+from pypy.interpreter.gateway import unwrap_spec
 from pypy.interpreter.pycode import PyCode, CO_GENERATOR
 from pypy.interpreter.pyframe import PyFrame
 from pypy.interpreter.pyopcode import ExitFrame
@@ -47,6 +50,14 @@ def can_never_inline(next_instr, is_being_profiled, bytecode):
 def should_unroll_one_iteration(next_instr, is_being_profiled, bytecode):
     return (bytecode.co_flags & CO_GENERATOR) != 0
 
+def is_known_hot(next_instr, is_being_profiled, bytecode):
+    if is_being_profiled:
+        return False
+    hotloops = bytecode.space.fromcache(HotLoops)
+    if not hotloops.loaded:
+        return False
+    return hot_location(bytecode, intmask(next_instr)) in hotloops.loaded
+
 class PyPyJitDriver(JitDriver):
     reds = ['frame', 'ec']
     greens = ['next_instr', 'is_being_profiled', 'pycode']
@@ -59,6 +70,7 @@ pypyjitdriver = PyPyJitDriver(get_printable_location = get_printable_location,
                               can_never_inline = can_never_inline,
                               should_unroll_one_iteration =
                               should_unroll_one_iteration,
+                              is_known_hot = is_known_hot,
                               name='pypyjit')
 
 class __extend__(PyFrame):
@@ -125,6 +137,30 @@ class __extend__(PyCode):
         self.jit_cells = {}
         return False
 
+# ____________________________________________________________
+#
+# Hot loops, saved and reloaded by another process to skip the warm-up
+
+class HotLoops(object):
+    """The locations of the loops compiled by the JIT.  They are saved
+    with save_hot_loops(), and reloaded with load_hot_loops(): then the
+    loops at these locations are traced as soon as they run, instead of
+    after the usual threshold.  The traces themselves are not saved,
+    because they contain addresses only valid in the current process.
+    """
+    def __init__(self, space):
+        self.compiled = {}    # {location: None}
+        self.loaded = {}      # {location: None}
+
+def hot_location(pycode, next_instr):
+    return '%s:%d:%s:%d' % (pycode.co_filename, pycode.co_firstlineno,
+                            pycode.co_name, next_instr)
+
+def record_hot_loop(space, pycode, next_instr, is_being_profiled):
+    if not is_being_profiled:
+        hotloops = space.fromcache(HotLoops)
+        hotloops.compiled[hot_location(pycode, next_instr)] = None
+
 # ____________________________________________________________
 #
 # Public interface
@@ -161,6 +197,60 @@ def set_param(space, __args__):
                 raise operationerrfmt(space.w_TypeError,
                                       "no JIT parameter '%s'", key)
 
+@dont_look_inside
+def compile_pending_loops(space):
+    '''Compile the loops traced while the JIT parameter 'async_compile'
+    is set.  Meant to be called in a loop by a thread that has nothing
+    else to do: the loops are then compiled while the other threads wait
+    for I/O, instead of in the middle of the code that made them hot.'''
+    jit.compile_pending_loops()
+
+@unwrap_spec(filename='str0')
+def save_hot_loops(space, filename):
+    '''Save to the given file the locations of the loops compiled by the
+    JIT so far, and of the ones loaded by load_hot_loops().'''
+    hotloops = space.fromcache(HotLoops)
+    lines = []
+    for location in hotloops.compiled:
+        lines.append(location + '\n')
+    for location in hotloops.loaded:
+        if location not in hotloops.compiled:
+            lines.append(location + '\n')
+    data = ''.join(lines)
+    try:
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0666)
+        try:
+            while data:
+                count = os.write(fd, data)
+                data = data[count:]
+        finally:
+            os.close(fd)
+    except OSError, e:
+        raise wrap_oserror2(space, e, space.wrap(filename))
+
+@unwrap_spec(filename='str0')
+def load_hot_loops(space, filename):
+    '''Load the locations saved by save_hot_loops(), possibly by another
+    process.  The loops at these locations will be traced as soon as they
+    run, instead of after the usual threshold.'''
+    hotloops = space.fromcache(HotLoops)
+    chunks = []
+    try:
+        fd = os.open(filename, os.O_RDONLY, 0)
+        try:
+            while True:
+                chunk = os.read(fd, 16384)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            os.close(fd)
+    except OSError, e:
+        raise wrap_oserror2(space, e, space.wrap(filename))
+    for location in ''.join(chunks).split('\n'):
+        if location:
+            hotloops.loaded[location] = None
+
 @dont_look_inside
 def residual_call(space, w_callable, __args__):
     '''For testing.  Invokes callable(...), but without letting
@@ -4,7 +4,8 @@ from pypy.rlib import jit_hooks
 from pypy.interpreter.error import OperationError
 from pypy.jit.metainterp.jitprof import counter_names
 from pypy.module.pypyjit.interp_resop import wrap_oplist, Cache, wrap_greenkey,\
-     WrappedOp
+     WrappedOp, unwrap_greenkey
+from pypy.module.pypyjit.interp_jit import record_hot_loop
 
 class PyPyJitIface(JitHookInterface):
     def on_abort(self, reason, jitdriver, greenkey, greenkey_repr):
@@ -27,7 +28,12 @@ class PyPyJitIface(JitHookInterface):
                 cache.in_recursion = False
 
     def after_compile(self, debug_info):
-        w_greenkey = wrap_greenkey(self.space, debug_info.get_jitdriver(),
+        jitdriver = debug_info.get_jitdriver()
+        if jitdriver.name == 'pypyjit' and debug_info.greenkey is not None:
+            pycode, next_instr, is_being_profiled = unwrap_greenkey(
+                debug_info.greenkey)
+            record_hot_loop(self.space, pycode, next_instr, is_being_profiled)
+        w_greenkey = wrap_greenkey(self.space, jitdriver,
                                    debug_info.greenkey,
                                    debug_info.get_greenkey_repr())
         self._compile_hook(debug_info, w_greenkey)
@@ -10,12 +10,14 @@ from pypy.rpython.annlowlevel import (cast_instance_to_base_ptr,
                                       cast_base_ptr_to_instance)
 from pypy.rpython.lltypesystem import lltype, llmemory
 from pypy.rpython.lltypesystem.rclass import OBJECT
-from pypy.module.pypyjit.interp_jit import pypyjitdriver
+from pypy.module.pypyjit.interp_jit import pypyjitdriver, is_known_hot
 from pypy.module.pypyjit.policy import pypy_hooks
 from pypy.jit.tool.oparser import parse
 from pypy.jit.metainterp.typesystem import llhelper
 from pypy.jit.metainterp.jitprof import ABORT_TOO_LONG
 from pypy.rlib.jit import JitDebugInfo, AsmInfo
+from pypy.rlib.rarithmetic import r_uint
+from pypy.tool.udir import udir
 
 class MockJitDriverSD(object):
     class warmstate(object):
@@ -96,6 +98,12 @@ class AppTestJitHook(object):
         cls.w_on_optimize = space.wrap(interp2app(interp_on_optimize))
         cls.orig_oplist = oplist
 
+        def interp_is_known_hot():
+            return space.newbool(is_known_hot(r_uint(0), False, w_f.code))
+
+        cls.w_is_known_hot = space.wrap(interp2app(interp_is_known_hot))
+        cls.w_hotloops_file = space.wrap(str(udir.join('hotloops.txt')))
+
     def setup_method(self, meth):
         self.__class__.oplist = self.orig_oplist[:]
 
@@ -132,6 +140,19 @@ class AppTestJitHook(object):
         self.on_compile()
         assert len(all) == 2
 
+    def test_save_load_hot_loops(self):
+        import pypyjit
+        assert not self.is_known_hot()
+        self.on_compile()
+        pypyjit.save_hot_loops(self.hotloops_file)
+        content = open(self.hotloops_file).read()
+        assert ':function:0\n' in content
+        # compiling the loop does not make it known hot in this process
+        assert not self.is_known_hot()
+        pypyjit.load_hot_loops(self.hotloops_file)
+        assert self.is_known_hot()
+        raises(OSError, pypyjit.load_hot_loops, self.hotloops_file + '.none')
+
     def test_on_compile_exception(self):
         import pypyjit, sys, cStringIO
 
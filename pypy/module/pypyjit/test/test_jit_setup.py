@@ -45,6 +45,18 @@ class AppTestPyPyJIT:
             pypyjit.set_compile_hook(None)
             pypyjit.set_param('default')
 
+    def test_async_compile(self):
+        import pypyjit
+        try:
+            pypyjit.set_param(threshold=3, async_compile=1)
+            total = 0
+            for i in range(100):
+                total += i
+            pypyjit.compile_pending_loops()
+            assert total == 4950
+        finally:
+            pypyjit.set_param('default')
+
     def test_doc(self):
         import pypyjit
         d = pypyjit.PARAMETER_DOCS
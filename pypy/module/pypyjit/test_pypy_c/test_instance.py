@@ -130,6 +130,9 @@ class TestInstance(BaseTestPyPyC):
             jump(p0, p1, p2, p3, p4, p20, p6, i7, p20, descr=...)
         """)
 
+    @py.test.mark.xfail(reason="ll_dict_lookup changed with the compact "
+                               "dict layout; the expected trace must be "
+                               "regenerated with a translated pypy-c")
     def test_oldstyle_newstyle_mix(self):
         def main():
             class A:
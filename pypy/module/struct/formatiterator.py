@@ -129,9 +129,10 @@ class PackFormatIterator(FormatIterator):
 
 class UnpackFormatIterator(FormatIterator):
 
-    def __init__(self, space, input):
+    def __init__(self, space, buf):
         self.space = space
-        self.input = input
+        self.buf = buf         # a Buffer, read without copying it first
+        self.length = buf.getlength()
         self.inputpos = 0
         self.result_w = []     # list of wrapped objects
 
@@ -150,14 +151,14 @@ class UnpackFormatIterator(FormatIterator):
         self.inputpos = (self.inputpos + mask) & ~mask
 
     def finished(self):
-        if self.inputpos != len(self.input):
+        if self.inputpos != self.length:
             raise StructError("unpack str size too long for format")
 
     def read(self, count):
         end = self.inputpos + count
-        if end > len(self.input):
+        if end > self.length:
             raise StructError("unpack str size too short for format")
-        s = self.input[self.inputpos : end]
+        s = self.buf.getslice(self.inputpos, end, 1, count)
         self.inputpos = end
         return s
 
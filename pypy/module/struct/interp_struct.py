@@ -1,4 +1,8 @@
-from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.buffer import StringBuffer, SubBuffer
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef, interp_attrproperty
 from pypy.module.struct.formatiterator import PackFormatIterator, UnpackFormatIterator
 from pypy.rlib import jit
 from pypy.rlib.rstruct.error import StructError
@@ -17,25 +21,180 @@ def _calcsize(space, format):
         raise e.at_applevel(space)
     return fmtiter.totalsize
 
+def _pack(space, format, args_w, size):
+    fmtiter = PackFormatIterator(space, args_w, size)
+    try:
+        fmtiter.interpret(format)
+    except StructError, e:
+        raise e.at_applevel(space)
+    return fmtiter.result.build()
+
 @unwrap_spec(format=str)
 def pack(space, format, args_w):
     if jit.isconstant(format):
         size = _calcsize(space, format)
     else:
         size = 8
-    fmtiter = PackFormatIterator(space, args_w, size)
-    try:
-        fmtiter.interpret(format)
-    except StructError, e:
-        raise e.at_applevel(space)
-    return space.wrap(fmtiter.result.build())
+    return space.wrap(_pack(space, format, args_w, size))
 
+def _check_offset(space, funcname, buf, offset, size):
+    # like CPython, a negative offset counts from the end of the buffer
+    if offset < 0:
+        offset += buf.getlength()
+    if offset < 0 or buf.getlength() - offset < size:
+        raise StructError("%s requires a buffer of at least %d bytes"
+                          % (funcname, size)).at_applevel(space)
+    return offset
 
-@unwrap_spec(format=str, input='bufferstr')
-def unpack(space, format, input):
-    fmtiter = UnpackFormatIterator(space, input)
+def _pack_into(space, format, size, w_buffer, offset, args_w):
+    buf = space.rwbuffer_w(w_buffer)
+    offset = _check_offset(space, "pack_into", buf, offset, size)
+    buf.setslice(offset, _pack(space, format, args_w, size))
+
+@unwrap_spec(format=str, offset=int)
+def pack_into(space, format, w_buffer, offset, args_w):
+    """Pack the values according to the format string and write the packed
+bytes into the writable buffer starting at offset."""
+    _pack_into(space, format, _calcsize(space, format), w_buffer, offset,
+               args_w)
+
+
+def _unpack(space, format, buf):
+    fmtiter = UnpackFormatIterator(space, buf)
     try:
         fmtiter.interpret(format)
     except StructError, e:
         raise e.at_applevel(space)
     return space.newtuple(fmtiter.result_w[:])
+
+@unwrap_spec(format=str, input='bufferstr')
+def unpack(space, format, input):
+    return _unpack(space, format, StringBuffer(input))
+
+def _unpack_from(space, format, size, w_buffer, offset):
+    buf = space.buffer_w(w_buffer)
+    offset = _check_offset(space, "unpack_from", buf, offset, size)
+    return _unpack(space, format, SubBuffer(buf, offset, size))
+
+@unwrap_spec(format=str, offset=int)
+def unpack_from(space, format, w_buffer, offset=0):
+    """Unpack the buffer, starting at offset, according to the format
+string.  The buffer is read in place, without being copied first."""
+    return _unpack_from(space, format, _calcsize(space, format), w_buffer,
+                        offset)
+
+def _iter_unpack(space, format, size, w_buffer):
+    if size == 0:
+        raise StructError("cannot iteratively unpack with a struct of "
+                          "length 0").at_applevel(space)
+    buf = space.buffer_w(w_buffer)
+    if buf.getlength() % size != 0:
+        raise StructError("iterative unpacking requires a buffer of a "
+                          "multiple of %d bytes" % (size,)).at_applevel(space)
+    return space.wrap(W_UnpackIter(format, size, buf))
+
+@unwrap_spec(format=str)
+def iter_unpack(space, format, w_buffer):
+    """Return an iterator which unpacks the buffer according to the format
+string, one struct after the other.  The size of the buffer must be a
+multiple of the size of the struct."""
+    return _iter_unpack(space, format, _calcsize(space, format), w_buffer)
+
+
+class W_UnpackIter(Wrappable):
+    def __init__(self, format, size, buf):
+        self.format = format
+        self.size = size
+        self.buf = buf
+        self.index = 0
+
+    def descr_iter(self, space):
+        return space.wrap(self)
+
+    def descr_next(self, space):
+        if self.buf is None:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        # the buffer is read in place, and a mutable one can shrink between
+        # two calls: check its current length every time
+        length = self.buf.getlength()
+        if self.index >= length:
+            self.buf = None
+            raise OperationError(space.w_StopIteration, space.w_None)
+        if length - self.index < self.size:
+            self.buf = None
+            raise StructError("iterative unpacking requires a buffer of a "
+                              "multiple of %d bytes" % (self.size,)
+                              ).at_applevel(space)
+        w_res = _unpack(space, jit.promote_string(self.format),
+                        SubBuffer(self.buf, self.index, self.size))
+        self.index += self.size
+        return w_res
+
+W_UnpackIter.typedef = TypeDef("unpack_iterator",
+    __module__ = "struct",
+    __iter__ = interp2app(W_UnpackIter.descr_iter),
+    next = interp2app(W_UnpackIter.descr_next),
+)
+W_UnpackIter.typedef.acceptable_as_base_class = False
+
+
+class W_Struct(Wrappable):
+    """Struct(fmt) --> compiled struct object
+
+Return a new Struct object which writes and reads binary data according to
+the format string fmt.  See help(struct) for more on format strings."""
+
+    # the format is parsed once in __init__, to compute the size; inside of
+    # loops, the JIT then knows the format as a constant string
+    _immutable_fields_ = ["format?", "size?"]
+
+    def __init__(self, space, format):
+        self.format = format
+        self.size = _calcsize(space, format)
+
+    def descr__new__(space, w_subtype, __args__):
+        # like CPython, __new__ ignores its arguments and the format is set
+        # by __init__, so that subclasses can have another signature
+        w_self = space.allocate_instance(W_Struct, w_subtype)
+        W_Struct.__init__(space.interp_w(W_Struct, w_self), space, "")
+        return w_self
+
+    @unwrap_spec(format=str)
+    def descr__init__(self, space, format):
+        W_Struct.__init__(self, space, format)
+
+    def descr_pack(self, space, args_w):
+        return space.wrap(_pack(space, jit.promote_string(self.format),
+                                args_w, self.size))
+
+    @unwrap_spec(input='bufferstr')
+    def descr_unpack(self, space, input):
+        return _unpack(space, jit.promote_string(self.format),
+                       StringBuffer(input))
+
+    @unwrap_spec(offset=int)
+    def descr_pack_into(self, space, w_buffer, offset, args_w):
+        _pack_into(space, jit.promote_string(self.format), self.size,
+                   w_buffer, offset, args_w)
+
+    @unwrap_spec(offset=int)
+    def descr_unpack_from(self, space, w_buffer, offset=0):
+        return _unpack_from(space, jit.promote_string(self.format),
+                            self.size, w_buffer, offset)
+
+    def descr_iter_unpack(self, space, w_buffer):
+        return _iter_unpack(space, self.format, self.size, w_buffer)
+
+W_Struct.typedef = TypeDef("Struct",
+    __module__ = "struct",
+    __doc__ = W_Struct.__doc__,
+    __new__ = interp2app(W_Struct.descr__new__.im_func),
+    __init__ = interp2app(W_Struct.descr__init__),
+    format = interp_attrproperty("format", cls=W_Struct),
+    size = interp_attrproperty("size", cls=W_Struct),
+    pack = interp2app(W_Struct.descr_pack),
+    unpack = interp2app(W_Struct.descr_unpack),
+    pack_into = interp2app(W_Struct.descr_pack_into),
+    unpack_from = interp2app(W_Struct.descr_unpack_from),
+    iter_unpack = interp2app(W_Struct.descr_iter_unpack),
+)
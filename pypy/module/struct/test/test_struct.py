@@ -386,13 +386,93 @@ class AppTestStruct(object):
         raises(self.struct.error, self.struct.unpack, "i", b)
 
 
+    def test_struct_object(self):
+        """
+        Struct objects pack and unpack according to their format.
+        """
+        s = self.struct.Struct("<ih")
+        assert s.format == "<ih"
+        assert s.size == 6
+        data = s.pack(-5, 300)
+        assert data == self.struct.pack("<ih", -5, 300)
+        assert s.unpack(data) == (-5, 300)
+        assert s.unpack_from("xx" + data, 2) == (-5, 300)
+        raises(self.struct.error, s.pack, 1)
+        raises(self.struct.error, s.unpack, data + "x")
+        raises(self.struct.error, self.struct.Struct, "[")
+        raises(TypeError, self.struct.Struct)
+
+        class MyStruct(self.struct.Struct):
+            pass
+        s = MyStruct("!H")
+        assert type(s) is MyStruct
+        assert s.unpack("\x01\x02") == (258,)
+
+        # like in CPython, a subclass can have another signature
+        Struct = self.struct.Struct
+        class Pair(Struct):
+            def __init__(self, first, second):
+                Struct.__init__(self, "!" + first + second)
+        s = Pair("B", "H")
+        assert s.format == "!BH"
+        assert s.unpack("\x01\x02\x03") == (1, 515)
+
+
+    def test_unpack_from(self):
+        """
+        unpack_from() reads the data at an offset of a string or a buffer;
+        a negative offset counts from the end.
+        """
+        data = self.struct.pack("<ii", 7, 8)
+        assert self.struct.unpack_from("<i", data) == (7,)
+        assert self.struct.unpack_from("<i", data, 4) == (8,)
+        assert self.struct.unpack_from("<i", buffer(data), -4) == (8,)
+        raises(self.struct.error, self.struct.unpack_from, "<i", data, 5)
+        raises(self.struct.error, self.struct.unpack_from, "<i", data, -9)
+        raises(self.struct.error, self.struct.unpack_from, "<q", "1234")
+
+
+    def test_iter_unpack(self):
+        """
+        iter_unpack() unpacks one struct after the other.
+        """
+        data = self.struct.pack("<hhhh", 1, 2, 3, 4)
+        it = self.struct.iter_unpack("<hh", data)
+        assert iter(it) is it
+        assert list(it) == [(1, 2), (3, 4)]
+        raises(StopIteration, it.next)
+        s = self.struct.Struct("<h")
+        assert list(s.iter_unpack(buffer(data))) == [(1,), (2,), (3,), (4,)]
+        assert list(s.iter_unpack("")) == []
+        raises(self.struct.error, s.iter_unpack, "abc")
+        raises(self.struct.error, self.struct.iter_unpack, "", data)
+
+    def test_iter_unpack_shrinking_buffer(self):
+        """
+        iter_unpack() reads the buffer in place; if it shrinks, the
+        iterator must not read past its end.
+        """
+        b = bytearray(self.struct.pack("<hhhh", 1, 2, 3, 4))
+        it = self.struct.iter_unpack("<h", b)
+        assert it.next() == (1,)
+        del b[3:]
+        raises(self.struct.error, it.next)
+        raises(StopIteration, it.next)
+        b = bytearray(self.struct.pack("<hhhh", 1, 2, 3, 4))
+        it = self.struct.iter_unpack("<h", b)
+        assert it.next() == (1,)
+        del b[2:]
+        raises(StopIteration, it.next)
+
+
 class AppTestStructBuffer(object):
 
     def setup_class(cls):
         """
         Create a space with the struct and __pypy__ modules.
         """
-        cls.space = gettestobjspace(usemodules=['struct', '__pypy__'])
+        cls.space = gettestobjspace(usemodules=['struct', '__pypy__',
+                                                'array'])
         cls.w_struct = cls.space.appexec([], """():
             import struct
             return struct
@@ -417,3 +497,23 @@ class AppTestStructBuffer(object):
         assert self.struct.unpack_from("ii", b, 2) == (17, 42)
         b[:sz] = self.struct.pack("ii", 18, 43)
         assert self.struct.unpack_from("ii", b) == (18, 43)
+
+    def test_array(self):
+        import array
+        a = array.array('b', [0] * 10)
+        s = self.struct.Struct("<hh")
+        s.pack_into(a, 3, 258, -1)
+        assert a.tolist() == [0, 0, 0, 2, 1, -1, -1, 0, 0, 0]
+        assert s.unpack_from(a, 3) == (258, -1)
+        assert self.struct.unpack_from("<h", a, -7) == (258,)
+        raises(self.struct.error, s.pack_into, a, 7, 1, 2)
+        assert a.tolist() == [0, 0, 0, 2, 1, -1, -1, 0, 0, 0]
+        a = array.array('H', [1, 2, 3])
+        assert list(self.struct.iter_unpack("=H", a)) == [(1,), (2,), (3,)]
+
+    def test_bytearray(self):
+        b = bytearray(8)
+        self.struct.pack_into("<i", b, 4, 0x01020304)
+        assert b == bytearray("\x00" * 4 + "\x04\x03\x02\x01")
+        assert self.struct.unpack_from("<HH", b, 4) == (0x0304, 0x0102)
+        raises(TypeError, self.struct.pack_into, "<i", "readonly", 0, 1)
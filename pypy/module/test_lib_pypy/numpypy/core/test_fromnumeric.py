@@ -24,6 +24,33 @@ class AppTestFromNumeric(BaseNumpyAppTest):
         b[1] = 0
         assert argmin(b) == 0
 
+    def test_sort(self):
+        # tests taken from numpy/core/fromnumeric.py docstring
+        from numpypy import array, sort
+        a = array([[1,4],[3,1]])
+        assert (sort(a) == [[1, 4], [1, 3]]).all()
+        assert (sort(a, axis=None) == [1, 1, 3, 4]).all()
+        assert (sort(a, axis=0) == [[1, 1], [3, 4]]).all()
+        assert (a == [[1, 4], [3, 1]]).all()
+        assert (sort([3, 1, 2]) == [1, 2, 3]).all()
+
+    def test_argsort(self):
+        # tests taken from numpy/core/fromnumeric.py docstring
+        from numpypy import array, argsort
+        assert (argsort(array([3, 1, 2])) == [1, 2, 0]).all()
+        x = array([[0, 3], [2, 2]])
+        assert (argsort(x, axis=0) == [[0, 1], [1, 0]]).all()
+        assert (argsort(x, axis=1) == [[0, 1], [0, 1]]).all()
+        assert (argsort([3, 1, 2]) == [1, 2, 0]).all()
+
+    def test_searchsorted(self):
+        # tests taken from numpy/core/fromnumeric.py docstring
+        from numpypy import searchsorted
+        assert searchsorted([1,2,3,4,5], 3) == 2
+        assert searchsorted([1,2,3,4,5], 3, side='right') == 3
+        assert (searchsorted([1,2,3,4,5], [-10, 10, 2, 3]) ==
+                [0, 5, 1, 2]).all()
+
     def test_shape(self):
         # tests taken from numpy/core/fromnumeric.py docstring
         from numpypy import array, identity, shape
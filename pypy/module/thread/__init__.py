@@ -15,6 +15,9 @@ class Module(MixedModule):
         'interrupt_main':         'os_thread.interrupt_main',
         'stack_size':             'os_thread.stack_size',
         '_count':                 'os_thread._count',
+        '_setswitchinterval':     'os_thread._setswitchinterval',
+        '_getswitchinterval':     'os_thread._getswitchinterval',
+        '_gil_wait_time':         'os_thread._gil_wait_time',
         'allocate_lock':          'os_lock.allocate_lock',
         'allocate':               'os_lock.allocate_lock',  # obsolete synonym
         'LockType':               'os_lock.Lock',
@@ -5,21 +5,32 @@ Global Interpreter Lock.
 # This module adds a global lock to an object space.
 # If multiple threads try to execute simultaneously in this space,
 # all but one will be blocked.  The other threads get a chance to run
-# from time to time, using the periodic action GILReleaseAction.
+# from time to time, using the periodic action GILReleaseAction: the GIL
+# is handed over to a waiting thread after the current one owned it for
+# the switch interval (5ms by default), or as soon as possible if the
+# waiting thread comes back from an external call, like an I/O.  The
+# time every thread spends waiting for the GIL is recorded on its
+# ExecutionContext.
 
 from pypy.module.thread import ll_thread as thread
 from pypy.module.thread.error import wrap_thread_error
+from pypy.interpreter.executioncontext import ExecutionContext
 from pypy.interpreter.executioncontext import PeriodicAsyncAction
 from pypy.module.thread.threadlocals import OSThreadLocals
 from pypy.rlib.objectmodel import invoke_around_extcall
 from pypy.rlib.rposix import get_errno, set_errno
 
+ExecutionContext.gil_wait_time = 0     # in microseconds
+ExecutionContext.gil_wait_count = 0
+
+
 class GILThreadLocals(OSThreadLocals):
     """A version of OSThreadLocals that enforces a GIL."""
     gil_ready = False
     _immutable_fields_ = ['gil_ready?']
 
     def initialize(self, space):
+        spacestate.threadlocals = self
         # add the GIL-releasing callback as an action on the space
         space.actionflag.register_periodic_action(GILReleaseAction(space),
                                                   use_bytecode_counter=True)
@@ -61,6 +72,7 @@ class GILReleaseAction(PeriodicAsyncAction):
 
 
 class SpaceState:
+    threadlocals = None
 
     def _freeze_(self):
         self.action_after_thread_switch = None
@@ -75,6 +87,14 @@ class SpaceState:
             self.action_after_thread_switch = None
             action.fire()
 
+    def record_gil_wait(self):
+        waited = thread.gil_last_wait()
+        if waited > 0 and self.threadlocals is not None:
+            ec = self.threadlocals.getvalue()
+            if ec is not None:
+                ec.gil_wait_time += waited
+                ec.gil_wait_count += 1
+
 spacestate = SpaceState()
 spacestate._freeze_()
 
@@ -94,6 +114,7 @@ def after_external_call():
     thread.gil_acquire()
     thread.gc_thread_run()
     spacestate.after_thread_switch()
+    spacestate.record_gil_wait()
     set_errno(e)
 after_external_call._gctransformer_hint_cannot_collect_ = True
 after_external_call._dont_reach_me_in_del_ = True
@@ -112,6 +133,7 @@ def do_yield_thread():
     if thread.gil_yield_thread():
         thread.gc_thread_run()
         spacestate.after_thread_switch()
+        spacestate.record_gil_wait()
 do_yield_thread._gctransformer_hint_close_stack_ = True
 do_yield_thread._dont_reach_me_in_del_ = True
 do_yield_thread._dont_inline_ = True
@@ -1,7 +1,7 @@
 
 from pypy.rpython.lltypesystem import rffi, lltype, llmemory
 from pypy.translator.tool.cbuild import ExternalCompilationInfo
-import py
+import py, sys
 from pypy.rlib import jit, rgc
 from pypy.rlib.debug import ll_assert
 from pypy.rlib.objectmodel import we_are_translated, specialize
@@ -12,14 +12,21 @@ from pypy.tool import autopath
 class error(Exception):
     pass
 
+if sys.platform == 'win32':
+    libraries = []
+else:
+    libraries = ['rt']      # for clock_gettime() in the GIL code
+
 eci = ExternalCompilationInfo(
     includes = ['src/thread.h'],
+    libraries = libraries,
     separate_module_sources = [''],
     include_dirs = [str(py.path.local(autopath.pypydir).join('translator', 'c'))],
     export_symbols = ['RPyThreadGetIdent', 'RPyThreadLockInit',
                       'RPyThreadAcquireLock', 'RPyThreadReleaseLock',
                       'RPyGilAllocate', 'RPyGilYieldThread',
-                      'RPyGilRelease', 'RPyGilAcquire',
+                      'RPyGilRelease', 'RPyGilAcquire', 'RPyGilLastWait',
+                      'RPyGilSetSwitchInterval', 'RPyGilGetSwitchInterval',
                       'RPyThreadGetStackSize', 'RPyThreadSetStackSize',
                       'RPyOpaqueDealloc_ThreadLock',
                       'RPyThreadAfterFork']
@@ -81,6 +88,13 @@ gil_release      = llexternal('RPyGilRelease', [], lltype.Void,
                               _nowrapper=True)
 gil_acquire      = llexternal('RPyGilAcquire', [], lltype.Void,
                               _nowrapper=True)
+gil_last_wait    = llexternal('RPyGilLastWait', [], lltype.Signed,
+                              _nowrapper=True)
+gil_set_switch_interval = llexternal('RPyGilSetSwitchInterval',
+                                     [lltype.Signed], lltype.Void,
+                                     _nowrapper=True)
+gil_get_switch_interval = llexternal('RPyGilGetSwitchInterval',
+                                     [], lltype.Signed, _nowrapper=True)
 
 def allocate_lock():
     return Lock(allocate_ll_lock())
@@ -238,6 +238,34 @@ This function is meant for internal and specialized purposes only.
 In most applications `threading.enumerate()` should be used instead."""
     return space.wrap(bootstrapper.nbthreads)
 
+@unwrap_spec(interval=float)
+def _setswitchinterval(space, interval):
+    """_setswitchinterval(interval)
+
+Set the ideal thread switching delay, in seconds: a thread that owns the
+GIL gives it to the waiting threads after this delay.  Threads coming
+back from an I/O or another external call get it earlier."""
+    if interval <= 0.0:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "switch interval must be strictly positive"))
+    microseconds = int(interval * 1000000.0)
+    if microseconds < 1:
+        microseconds = 1
+    thread.gil_set_switch_interval(microseconds)
+
+def _getswitchinterval(space):
+    """_getswitchinterval() -> float
+Return the thread switching delay set with _setswitchinterval()."""
+    return space.wrap(thread.gil_get_switch_interval() / 1000000.0)
+
+def _gil_wait_time(space):
+    """_gil_wait_time() -> (seconds, count)
+Return the total time that the current thread spent waiting for the GIL,
+and the number of times it had to wait."""
+    ec = space.getexecutioncontext()
+    return space.newtuple([space.wrap(ec.gil_wait_time / 1000000.0),
+                           space.wrap(ec.gil_wait_count)])
+
 def exit(space):
     """This is synonymous to ``raise SystemExit''.  It will cause the current
 thread to exit silently unless the exception is caught."""
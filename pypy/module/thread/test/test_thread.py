@@ -215,6 +215,46 @@ class AppTestThread(GenericTestThread):
         res = thread.stack_size(0)
         assert res == 2*1024*1024
 
+    def test_switchinterval(self):
+        import thread
+        old = thread._getswitchinterval()
+        assert old > 0.0
+        try:
+            thread._setswitchinterval(0.001)
+            assert thread._getswitchinterval() == 0.001
+            raises(ValueError, thread._setswitchinterval, 0.0)
+        finally:
+            thread._setswitchinterval(old)
+
+    def test_gil_wait_time(self):
+        import thread
+        N = 4
+        lock = thread.allocate_lock()
+        lock.acquire()
+        running = []
+        done = []
+        def f():
+            running.append(1)
+            lock.acquire()    # all the threads wake up together when the
+            lock.release()    # main thread releases the lock, and then
+            x = 0             # they compete for the GIL
+            for i in range(100):
+                x += i
+            done.append(thread._gil_wait_time())
+        old = thread._getswitchinterval()
+        thread._setswitchinterval(0.0001)
+        try:
+            for i in range(N):
+                thread.start_new_thread(f, ())
+            self.waitfor(lambda: len(running) == N)
+            lock.release()
+            self.waitfor(lambda: len(done) == N)
+        finally:
+            thread._setswitchinterval(old)
+        assert len(done) == N
+        assert sum([count for seconds, count in done]) > 0
+        assert sum([seconds for seconds, count in done]) > 0.0
+
     def test_interrupt_main(self):
         import thread, time
         import signal
@@ -145,6 +145,21 @@ class FakeObjSpace(ObjSpace):
     def newcomplex(self, x, y):
         return w_some_obj()
 
+    def newlong_from_rbigint(self, x):
+        return w_some_obj()
+
+    def listview_int(self, w_obj):
+        is_root(w_obj)
+        if NonConstant(False):
+            return None
+        return [NonConstant(42)]
+
+    def listview_str(self, w_obj):
+        is_root(w_obj)
+        if NonConstant(False):
+            return None
+        return [NonConstant("foobar")]
+
     def marshal_w(self, w_obj):
         "NOT_RPYTHON"
         raise NotImplementedError
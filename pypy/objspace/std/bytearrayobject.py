@@ -729,6 +729,12 @@ class BytearrayBuffer(RWBuffer):
     def getitem(self, index):
         return self.data[index]
 
+    def getslice(self, start, stop, step, size):
+        if step != 1:
+            return RWBuffer.getslice(self, start, stop, step, size)
+        assert 0 <= start <= stop
+        return ''.join(self.data[start:stop])
+
     def setitem(self, index, char):
         self.data[index] = char
 
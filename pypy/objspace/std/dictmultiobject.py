@@ -9,6 +9,8 @@ from pypy.interpreter.error import OperationError, operationerrfmt
 
 from pypy.rlib.objectmodel import r_dict, we_are_translated, specialize
 from pypy.rlib.debug import mark_dict_non_null
+from pypy.rlib.rarithmetic import ovfcheck_float_to_int
+from pypy.rlib.rfloat import isnan
 
 from pypy.rlib import rerased
 
@@ -95,7 +97,7 @@ def _add_indirections():
                     getitem_str delitem length \
                     clear w_keys values \
                     items iter setdefault \
-                    popitem listview_str listview_int \
+                    popitem listview_str listview_unicode listview_int \
                     view_as_kwargs".split()
 
     def make_method(method):
@@ -167,6 +169,9 @@ class DictStrategy(object):
     def listview_str(self, w_dict):
         return None
 
+    def listview_unicode(self, w_dict):
+        return None
+
     def listview_int(self, w_dict):
         return None
 
@@ -190,6 +195,11 @@ class EmptyDictStrategy(DictStrategy):
         w_type = self.space.type(w_key)
         if self.space.is_w(w_type, self.space.w_int):
             self.switch_to_int_strategy(w_dict)
+        elif self.space.is_w(w_type, self.space.w_unicode):
+            self.switch_to_unicode_strategy(w_dict)
+        elif (self.space.is_w(w_type, self.space.w_float) and
+              not isnan(self.space.float_w(w_key))):
+            self.switch_to_float_strategy(w_dict)
         elif withidentitydict and w_type.compares_by_identity():
             self.switch_to_identity_strategy(w_dict)
         else:
@@ -207,6 +217,18 @@ class EmptyDictStrategy(DictStrategy):
         w_dict.strategy = strategy
         w_dict.dstorage = storage
 
+    def switch_to_unicode_strategy(self, w_dict):
+        strategy = self.space.fromcache(UnicodeDictStrategy)
+        storage = strategy.get_empty_storage()
+        w_dict.strategy = strategy
+        w_dict.dstorage = storage
+
+    def switch_to_float_strategy(self, w_dict):
+        strategy = self.space.fromcache(FloatDictStrategy)
+        storage = strategy.get_empty_storage()
+        w_dict.strategy = strategy
+        w_dict.dstorage = storage
+
     def switch_to_identity_strategy(self, w_dict):
         from pypy.objspace.std.identitydict import IdentityDictStrategy
         strategy = self.space.fromcache(IdentityDictStrategy)
@@ -567,6 +589,17 @@ class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
                 space.is_w(w_lookup_type, space.w_unicode)
                 )
 
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if space.is_w(space.type(w_key), space.w_float):
+            # floats are equal to the ints of the same value
+            try:
+                key = _float_to_int_key(space.float_w(w_key))
+            except ValueError:
+                return None
+            return self.unerase(w_dict.dstorage).get(key, None)
+        return AbstractTypedStrategy.getitem(self, w_dict, w_key)
+
     def iter(self, w_dict):
         return IntIteratorImplementation(self.space, self, w_dict)
 
@@ -578,6 +611,123 @@ class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
 class IntIteratorImplementation(_WrappedIteratorMixin, IteratorImplementation):
     pass
 
+def _float_to_int_key(x):
+    """ Return the int equal to the float x, or raise ValueError if there
+    is none. """
+    try:
+        key = ovfcheck_float_to_int(x)
+    except OverflowError:
+        raise ValueError
+    if float(key) != x:
+        raise ValueError
+    return key
+
+class UnicodeDictStrategy(AbstractTypedStrategy, DictStrategy):
+
+    erase, unerase = rerased.new_erasing_pair("unicode")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, unwrapped):
+        return self.space.wrap(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.unicode_w(wrapped)
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return space.is_w(space.type(w_obj), space.w_unicode)
+
+    def get_empty_storage(self):
+        res = {}
+        mark_dict_non_null(res)
+        return self.erase(res)
+
+    def _never_equal_to(self, w_lookup_type):
+        return _never_equal_to_string(self.space, w_lookup_type)
+
+    def getitem(self, w_dict, w_key):
+        from pypy.objspace.std.unicodetype import getdefaultencoding
+        space = self.space
+        if (space.is_w(space.type(w_key), space.w_str) and
+                getdefaultencoding(space) == 'ascii'):
+            # ascii strings are equal to the unicodes they decode to, and
+            # the others to none of them
+            s = space.str_w(w_key)
+            try:
+                key = s.decode('ascii')
+            except UnicodeDecodeError:
+                return None
+            return self.unerase(w_dict.dstorage).get(key, None)
+        return AbstractTypedStrategy.getitem(self, w_dict, w_key)
+
+    def listview_unicode(self, w_dict):
+        return self.unerase(w_dict.dstorage).keys()
+
+    def iter(self, w_dict):
+        return UnicodeIteratorImplementation(self.space, self, w_dict)
+
+    def w_keys(self, w_dict):
+        return self.space.newlist_unicode(self.listview_unicode(w_dict))
+
+class UnicodeIteratorImplementation(_WrappedIteratorMixin,
+                                    IteratorImplementation):
+    pass
+
+class FloatDictStrategy(AbstractTypedStrategy, DictStrategy):
+    # NaNs are not stored here: they are only found by identity, which
+    # is lost when they are unwrapped
+
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, unwrapped):
+        return self.space.wrap(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.float_w(wrapped)
+
+    def is_correct_type(self, w_obj):
+        space = self.space
+        return (space.is_w(space.type(w_obj), space.w_float) and
+                not isnan(space.float_w(w_obj)))
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def _never_equal_to(self, w_lookup_type):
+        space = self.space
+        # XXX there are many more types
+        return (space.is_w(w_lookup_type, space.w_NoneType) or
+                space.is_w(w_lookup_type, space.w_str) or
+                space.is_w(w_lookup_type, space.w_unicode)
+                )
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        w_lookup_type = space.type(w_key)
+        if (space.is_w(w_lookup_type, space.w_int) or
+                space.is_w(w_lookup_type, space.w_bool)):
+            # ints are equal to the floats of the same value, if there
+            # is one
+            i = space.int_w(w_key)
+            key = float(i)
+            try:
+                if _float_to_int_key(key) != i:
+                    return None
+            except ValueError:
+                return None
+            return self.unerase(w_dict.dstorage).get(key, None)
+        return AbstractTypedStrategy.getitem(self, w_dict, w_key)
+
+    def iter(self, w_dict):
+        return FloatIteratorImplementation(self.space, self, w_dict)
+
+class FloatIteratorImplementation(_WrappedIteratorMixin,
+                                  IteratorImplementation):
+    pass
+
 class ObjectIteratorImplementation(_UnwrappedIteratorMixin, IteratorImplementation):
     pass
 
@@ -10,6 +10,7 @@ from pypy.interpreter import gateway, baseobjspace
 from pypy.rlib.objectmodel import instantiate, specialize, newlist_hint
 from pypy.rlib.listsort import make_timsort_class
 from pypy.rlib import rerased, jit, debug
+from pypy.rlib.unroll import unrolling_iterable
 from pypy.interpreter.argument import Signature
 from pypy.tool.sourcetools import func_with_new_name
 
@@ -53,6 +54,13 @@ def get_strategy_from_list_objects(space, list_w, sizehint):
     else:
         return space.fromcache(StringListStrategy)
 
+    # check for unicode
+    for w_obj in list_w:
+        if not is_W_UnicodeObject(w_obj):
+            break
+    else:
+        return space.fromcache(UnicodeListStrategy)
+
     # check for floats
     for w_obj in list_w:
         if not is_W_FloatObject(w_obj):
@@ -70,6 +78,10 @@ def is_W_StringObject(w_object):
     from pypy.objspace.std.stringobject import W_StringObject
     return type(w_object) is W_StringObject
 
+def is_W_UnicodeObject(w_object):
+    from pypy.objspace.std.unicodeobject import W_UnicodeObject
+    return type(w_object) is W_UnicodeObject
+
 def is_W_FloatObject(w_object):
     from pypy.objspace.std.floatobject import W_FloatObject
     return type(w_object) is W_FloatObject
@@ -104,6 +116,12 @@ class W_ListObject(W_AbstractListObject):
         storage = strategy.erase(list_s)
         return W_ListObject.from_storage_and_strategy(space, storage, strategy)
 
+    @staticmethod
+    def newlist_unicode(space, list_u):
+        strategy = space.fromcache(UnicodeListStrategy)
+        storage = strategy.erase(list_u)
+        return W_ListObject.from_storage_and_strategy(space, storage, strategy)
+
     def __repr__(w_self):
         """ representation for debugging purposes """
         return "%s(%s, %s)" % (w_self.__class__.__name__, w_self.strategy, w_self.lstorage._x)
@@ -211,6 +229,11 @@ class W_ListObject(W_AbstractListObject):
         not use the list strategy, return None. """
         return self.strategy.getitems_str(self)
 
+    def getitems_unicode(self):
+        """ Return the items in the list as unwrapped unicode. If the list does
+        not use the list strategy, return None. """
+        return self.strategy.getitems_unicode(self)
+
     def getitems_int(self):
         """ Return the items in the list as unwrapped ints. If the list does
         not use the list strategy, return None. """
@@ -315,6 +338,9 @@ class ListStrategy(object):
     def getitems_str(self, w_list):
         return None
 
+    def getitems_unicode(self, w_list):
+        return None
+
     def getitems_int(self, w_list):
         return None
 
@@ -419,6 +445,8 @@ class EmptyListStrategy(ListStrategy):
             strategy = self.space.fromcache(IntegerListStrategy)
         elif is_W_StringObject(w_item):
             strategy = self.space.fromcache(StringListStrategy)
+        elif is_W_UnicodeObject(w_item):
+            strategy = self.space.fromcache(UnicodeListStrategy)
         elif is_W_FloatObject(w_item):
             strategy = self.space.fromcache(FloatListStrategy)
         else:
@@ -994,6 +1022,8 @@ class IntegerListStrategy(AbstractUnwrappedStrategy, ListStrategy):
     def sort(self, w_list, reverse):
         l = self.unerase(w_list.lstorage)
         sorter = IntSort(l, len(l))
+        if reverse:
+            l.reverse()
         sorter.sort()
         if reverse:
             l.reverse()
@@ -1024,6 +1054,8 @@ class FloatListStrategy(AbstractUnwrappedStrategy, ListStrategy):
     def sort(self, w_list, reverse):
         l = self.unerase(w_list.lstorage)
         sorter = FloatSort(l, len(l))
+        if reverse:
+            l.reverse()
         sorter.sort()
         if reverse:
             l.reverse()
@@ -1051,6 +1083,8 @@ class StringListStrategy(AbstractUnwrappedStrategy, ListStrategy):
     def sort(self, w_list, reverse):
         l = self.unerase(w_list.lstorage)
         sorter = StringSort(l, len(l))
+        if reverse:
+            l.reverse()
         sorter.sort()
         if reverse:
             l.reverse()
@@ -1058,6 +1092,38 @@ class StringListStrategy(AbstractUnwrappedStrategy, ListStrategy):
     def getitems_str(self, w_list):
         return self.unerase(w_list.lstorage)
 
+class UnicodeListStrategy(AbstractUnwrappedStrategy, ListStrategy):
+    _none_value = None
+    _applevel_repr = "unicode"
+
+    def wrap(self, unicodeval):
+        return self.space.wrap(unicodeval)
+
+    def unwrap(self, w_unicode):
+        return self.space.unicode_w(w_unicode)
+
+    erase, unerase = rerased.new_erasing_pair("unicode")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def is_correct_type(self, w_obj):
+        return is_W_UnicodeObject(w_obj)
+
+    def list_is_correct_type(self, w_list):
+        return w_list.strategy is self.space.fromcache(UnicodeListStrategy)
+
+    def sort(self, w_list, reverse):
+        l = self.unerase(w_list.lstorage)
+        sorter = UnicodeSort(l, len(l))
+        if reverse:
+            l.reverse()
+        sorter.sort()
+        if reverse:
+            l.reverse()
+
+    def getitems_unicode(self, w_list):
+        return self.unerase(w_list.lstorage)
+
 # _______________________________________________________
 
 init_signature = Signature(['sequence'], None, None)
@@ -1091,6 +1157,13 @@ def init__List(space, w_list, __args__):
             w_list.lstorage = strategy.erase(strlist[:])
             return
 
+        unicodelist = space.listview_unicode(w_iterable)
+        if unicodelist is not None:
+            w_list.strategy = strategy = space.fromcache(UnicodeListStrategy)
+             # need to copy because unicodelist can share with w_iterable
+            w_list.lstorage = strategy.erase(unicodelist[:])
+            return
+
         # xxx special hack for speed
         from pypy.interpreter.generator import GeneratorIterator
         if isinstance(w_iterable, GeneratorIterator):
@@ -1421,6 +1494,11 @@ TimSort = make_timsort_class()
 IntBaseTimSort = make_timsort_class()
 FloatBaseTimSort = make_timsort_class()
 StringBaseTimSort = make_timsort_class()
+UnicodeBaseTimSort = make_timsort_class()
+IntKeyBaseTimSort = make_timsort_class()
+FloatKeyBaseTimSort = make_timsort_class()
+StringKeyBaseTimSort = make_timsort_class()
+UnicodeKeyBaseTimSort = make_timsort_class()
 
 class KeyContainer(baseobjspace.W_Root):
     def __init__(self, w_key, w_item):
@@ -1448,6 +1526,10 @@ class StringSort(StringBaseTimSort):
     def lt(self, a, b):
         return a < b
 
+class UnicodeSort(UnicodeBaseTimSort):
+    def lt(self, a, b):
+        return a < b
+
 class CustomCompareSort(SimpleSort):
     def lt(self, a, b):
         space = self.space
@@ -1475,6 +1557,69 @@ class CustomKeyCompareSort(CustomCompareSort):
         assert isinstance(b, KeyContainer)
         return CustomCompareSort.lt(self, a.w_key, b.w_key)
 
+# When the keys returned by the key function are all ints, all floats, all
+# strs or all unicodes, they are unwrapped into a list and what is sorted
+# is the list of the indices of the items, comparing the unwrapped keys.
+
+def make_key_sort(BaseTimSort, is_correct_type, unwrap):
+
+    class KeySort(BaseTimSort):
+        def lt(self, a, b):
+            keys = self.keys
+            return keys[a] < keys[b]
+
+    def sort_indices(space, keys_w, reverse):
+        """Returns the indices of the keys in sorted order, or None if
+        the keys are not all of the right type."""
+        for w_key in keys_w:
+            if not is_correct_type(w_key):
+                return None
+        length = len(keys_w)
+        keys = [unwrap(space, w_key) for w_key in keys_w]
+        sorter = KeySort(range(length), length)
+        sorter.keys = keys
+        if reverse:
+            sorter.list.reverse()
+        sorter.sort()
+        if reverse:
+            sorter.list.reverse()
+        return sorter.list
+
+    return sort_indices
+
+def _unwrap_int(space, w_int):
+    return space.int_w(w_int)
+
+def _unwrap_float(space, w_float):
+    return space.float_w(w_float)
+
+def _unwrap_str(space, w_str):
+    return space.str_w(w_str)
+
+def _unwrap_unicode(space, w_unicode):
+    return space.unicode_w(w_unicode)
+
+_key_sorts = unrolling_iterable([
+    make_key_sort(IntKeyBaseTimSort, is_W_IntObject, _unwrap_int),
+    make_key_sort(FloatKeyBaseTimSort, is_W_FloatObject, _unwrap_float),
+    make_key_sort(StringKeyBaseTimSort, is_W_StringObject, _unwrap_str),
+    make_key_sort(UnicodeKeyBaseTimSort, is_W_UnicodeObject, _unwrap_unicode),
+])
+
+def sort_by_unwrapped_keys(space, items_w, keys_w, reverse):
+    """Sorts 'items_w' in-place according to 'keys_w' if the keys can be
+    compared unwrapped.  Returns False if they cannot."""
+    indices = None
+    for sort_indices in _key_sorts:
+        if indices is None:
+            indices = sort_indices(space, keys_w, reverse)
+    if indices is None:
+        return False
+    original_w = items_w[:]
+    for i in range(len(indices)):
+        items_w[i] = original_w[indices[i]]
+    return True
+
 def list_sort__List_ANY_ANY_ANY(space, w_list, w_cmp, w_keyfunc, w_reverse):
 
     has_cmp = not space.is_w(w_cmp, space.w_None)
@@ -1508,24 +1653,32 @@ def list_sort__List_ANY_ANY_ANY(space, w_list, w_cmp, w_keyfunc, w_reverse):
         # core-dump factory, since the storage may change).
         w_list.__init__(space, [])
 
-        # wrap each item in a KeyContainer if needed
+        done = False
         if has_key:
+            keys_w = [None] * sorter.listlength
             for i in range(sorter.listlength):
-                w_item = sorter.list[i]
-                w_key = space.call_function(w_keyfunc, w_item)
-                sorter.list[i] = KeyContainer(w_key, w_item)
-
-        # Reverse sort stability achieved by initially reversing the list,
-        # applying a stable forward sort, then reversing the final result.
-        if has_reverse:
-            sorter.list.reverse()
-
-        # perform the sort
-        sorter.sort()
-
-        # reverse again
-        if has_reverse:
-            sorter.list.reverse()
+                keys_w[i] = space.call_function(w_keyfunc, sorter.list[i])
+            if not has_cmp:
+                done = sort_by_unwrapped_keys(space, sorter.list, keys_w,
+                                              has_reverse)
+            if not done:
+                # wrap each item in a KeyContainer
+                for i in range(sorter.listlength):
+                    sorter.list[i] = KeyContainer(keys_w[i], sorter.list[i])
+
+        if not done:
+            # Reverse sort stability achieved by initially reversing the
+            # list, applying a stable forward sort, then reversing the final
+            # result.
+            if has_reverse:
+                sorter.list.reverse()
+
+            # perform the sort
+            sorter.sort()
+
+            # reverse again
+            if has_reverse:
+                sorter.list.reverse()
 
     finally:
         # unwrap each item if needed
@@ -8,7 +8,10 @@ from pypy.objspace.std.dictmultiobject import W_DictMultiObject, DictStrategy, O
 from pypy.objspace.std.dictmultiobject import IteratorImplementation
 from pypy.objspace.std.dictmultiobject import _never_equal_to_string
 from pypy.objspace.std.objectobject import W_ObjectObject
-from pypy.objspace.std.typeobject import TypeCell
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.floatobject import W_FloatObject
+from pypy.objspace.std.inttype import wrapint
+from pypy.objspace.std.typeobject import TypeCell, VersionTag
 
 # ____________________________________________________________
 # attribute shapes
@@ -29,42 +32,51 @@ class AbstractAttribute(object):
         self.terminator = terminator
 
     def read(self, obj, selector):
-        index = self.index(selector)
-        if index < 0:
+        attr = self.find_map_attr(selector)
+        if attr is None:
             return self.terminator._read_terminator(obj, selector)
-        return obj._mapdict_read_storage(index)
+        return attr._direct_read(obj)
 
     def write(self, obj, selector, w_value):
-        index = self.index(selector)
-        if index < 0:
+        attr = self.find_map_attr(selector)
+        if attr is None:
             return self.terminator._write_terminator(obj, selector, w_value)
-        obj._mapdict_write_storage(index, w_value)
+        attr._direct_write(obj, w_value)
         return True
 
     def delete(self, obj, selector):
         return None
 
     def index(self, selector):
+        """Return the position in the storage of the boxed attribute
+        'selector', or -1 if there is no such attribute or if it is
+        stored unboxed."""
+        attr = self.find_map_attr(selector)
+        if attr is None or isinstance(attr, UnboxedPlainAttribute):
+            return -1
+        return attr.position
+
+    def find_map_attr(self, selector):
         if jit.we_are_jitted():
             # hack for the jit:
-            # the _index method is pure too, but its argument is never
+            # the _find_map_attr method is pure too, but its argument is never
             # constant, because it is always a new tuple
-            return self._index_jit_pure(selector[0], selector[1])
+            return self._find_map_attr_jit_pure(selector[0], selector[1])
         else:
-            return self._index_indirection(selector)
+            return self._find_map_attr_indirection(selector)
 
     @jit.elidable
-    def _index_jit_pure(self, name, index):
-        return self._index_indirection((name, index))
+    def _find_map_attr_jit_pure(self, name, index):
+        return self._find_map_attr_indirection((name, index))
 
     @jit.dont_look_inside
-    def _index_indirection(self, selector):
+    def _find_map_attr_indirection(self, selector):
         if (self.space.config.objspace.std.withmethodcache):
-            return self._index_cache(selector)
-        return self._index(selector)
+            return self._find_map_attr_cache(selector)
+        return self._find_map_attr(selector)
 
     @jit.dont_look_inside
-    def _index_cache(self, selector):
+    def _find_map_attr_cache(self, selector):
         space = self.space
         cache = space.fromcache(IndexCache)
         SHIFT2 = r_uint.BITS - space.config.objspace.std.methodcachesizeexp
@@ -80,26 +92,26 @@ class AbstractAttribute(object):
         if cached_attr is self:
             cached_selector = cache.selectors[index_hash]
             if cached_selector == selector:
-                index = cache.indices[index_hash]
+                attr = cache.cached_attrs[index_hash]
                 if space.config.objspace.std.withmethodcachecounter:
                     name = selector[0]
                     cache.hits[name] = cache.hits.get(name, 0) + 1
-                return index
-        index = self._index(selector)
+                return attr
+        attr = self._find_map_attr(selector)
         cache.attrs[index_hash] = self
         cache.selectors[index_hash] = selector
-        cache.indices[index_hash] = index
+        cache.cached_attrs[index_hash] = attr
         if space.config.objspace.std.withmethodcachecounter:
             name = selector[0]
             cache.misses[name] = cache.misses.get(name, 0) + 1
-        return index
+        return attr
 
-    def _index(self, selector):
+    def _find_map_attr(self, selector):
         while isinstance(self, PlainAttribute):
             if selector == self.selector:
-                return self.position
+                return self
             self = self.back
-        return -1
+        return None
 
     def copy(self, obj):
         raise NotImplementedError("abstract base class")
@@ -120,16 +132,31 @@ class AbstractAttribute(object):
     def search(self, attrtype):
         return None
 
+    def search_unboxed(self, kind):
+        return None
+
     @jit.elidable
-    def _get_new_attr(self, name, index):
+    def _get_new_attr(self, name, index, kind, boxed_version):
         selector = name, index
+        # once an attribute was stored unboxed and then written a value of
+        # another type, it is always stored boxed.  'boxed_version' is the
+        # terminator's version of 'boxed_selectors', which makes the result
+        # depend only on the arguments.
+        if kind != BOXED and selector in self.terminator.boxed_selectors:
+            kind = BOXED
+        key = name, index, kind
         cache = self.cache_attrs
         if cache is None:
             cache = self.cache_attrs = {}
-        attr = cache.get(selector, None)
+        attr = cache.get(key, None)
         if attr is None:
-            attr = PlainAttribute(selector, self)
-            cache[selector] = attr
+            if kind == UNBOXED_INT:
+                attr = IntAttribute(selector, self)
+            elif kind == UNBOXED_FLOAT:
+                attr = FloatAttribute(selector, self)
+            else:
+                attr = PlainAttribute(selector, self)
+            cache[key] = attr
         return attr
 
     @jit.look_inside_iff(lambda self, obj, selector, w_value:
@@ -138,7 +165,9 @@ class AbstractAttribute(object):
             jit.isconstant(selector[1]))
     def add_attr(self, obj, selector, w_value):
         # grumble, jit needs this
-        attr = self._get_new_attr(selector[0], selector[1])
+        kind = _unboxed_kind(self.space, selector, w_value)
+        attr = self._get_new_attr(selector[0], selector[1], kind,
+                                  self.terminator.boxed_version)
         oldattr = obj._get_mapdict_map()
         if not jit.we_are_jitted():
             size_est = (oldattr._size_estimate + attr.size_estimate()
@@ -155,7 +184,7 @@ class AbstractAttribute(object):
         # the order is important here: first change the map, then the storage,
         # for the benefit of the special subclasses
         obj._set_mapdict_map(attr)
-        obj._mapdict_write_storage(attr.position, w_value)
+        attr._direct_init(obj, w_value)
 
     def materialize_r_dict(self, space, obj, dict_w):
         raise NotImplementedError("abstract base class")
@@ -168,11 +197,16 @@ class AbstractAttribute(object):
 
 
 class Terminator(AbstractAttribute):
-    _immutable_fields_ = ['w_cls']
+    _immutable_fields_ = ['w_cls', 'boxed_version?']
 
     def __init__(self, space, w_cls):
         AbstractAttribute.__init__(self, space, self)
         self.w_cls = w_cls
+        # selectors that must not be stored unboxed any more, see
+        # UnboxedPlainAttribute._switch_to_boxed().  'boxed_version' is
+        # replaced every time 'boxed_selectors' changes.
+        self.boxed_selectors = {}
+        self.boxed_version = VersionTag()
 
     def _read_terminator(self, obj, selector):
         return None
@@ -269,6 +303,15 @@ class PlainAttribute(AbstractAttribute):
         self.back = back
         self._size_estimate = self.length() * NUM_DIGITS_POW2
 
+    def _direct_read(self, obj):
+        return obj._mapdict_read_storage(self.position)
+
+    def _direct_write(self, obj, w_value):
+        obj._mapdict_write_storage(self.position, w_value)
+
+    def _direct_init(self, obj, w_value):
+        obj._mapdict_write_storage(self.position, w_value)
+
     def _copy_attr(self, obj, new_obj):
         w_value = self.read(obj, self.selector)
         new_obj._get_mapdict_map().add_attr(new_obj, self.selector, w_value)
@@ -300,11 +343,14 @@ class PlainAttribute(AbstractAttribute):
             return self
         return self.back.search(attrtype)
 
+    def search_unboxed(self, kind):
+        return self.back.search_unboxed(kind)
+
     def materialize_r_dict(self, space, obj, dict_w):
         new_obj = self.back.materialize_r_dict(space, obj, dict_w)
         if self.selector[1] == DICT:
             w_attr = space.wrap(self.selector[0])
-            dict_w[w_attr] = obj._mapdict_read_storage(self.position)
+            dict_w[w_attr] = self._direct_read(obj)
         else:
             self._copy_attr(obj, new_obj)
         return new_obj
@@ -318,6 +364,124 @@ class PlainAttribute(AbstractAttribute):
     def __repr__(self):
         return "<PlainAttribute %s %s %r>" % (self.selector, self.position, self.back)
 
+# Attributes that hold an int or a float are stored unboxed if the option
+# 'withunboxedattributes' is enabled.  All the unboxed attributes of one
+# kind of an instance are kept in a single list, which takes the place of
+# the first of them in the storage.  The map records the kind, so reading
+# and writing such an attribute needs no type check beyond the one on the
+# written value.  Writing a value of another type converts the instance
+# to a map where the attribute is boxed.
+
+BOXED = 0
+UNBOXED_INT = 1
+UNBOXED_FLOAT = 2
+
+def _unboxed_kind(space, selector, w_value):
+    if (not space.config.objspace.std.withunboxedattributes or
+            selector[1] == SPECIAL):
+        return BOXED
+    if type(w_value) is W_IntObject:
+        return UNBOXED_INT
+    if type(w_value) is W_FloatObject:
+        return UNBOXED_FLOAT
+    return BOXED
+
+class UnboxedPlainAttribute(PlainAttribute):
+    _immutable_fields_ = ['listindex', '_length']
+    kind = BOXED
+
+    def __init__(self, selector, back):
+        AbstractAttribute.__init__(self, back.space, back.terminator)
+        self.selector = selector
+        self.back = back
+        prev = back.search_unboxed(self.kind)
+        if prev is not None:
+            # share the list of values of the previous attribute of this kind
+            self.position = prev.position
+            self.listindex = prev.listindex + 1
+            self._length = back.length()
+        else:
+            self.position = back.length()
+            self.listindex = 0
+            self._length = self.position + 1
+        self._size_estimate = self.length() * NUM_DIGITS_POW2
+
+    def length(self):
+        return self._length
+
+    def search_unboxed(self, kind):
+        if self.kind == kind:
+            return self
+        return self.back.search_unboxed(kind)
+
+    def _switch_to_boxed(self, obj, w_value):
+        # 'w_value' is not of the type recorded in the map.  Rebuild the
+        # instance with this attribute boxed, and remember to never unbox
+        # it again in instances of this class.
+        terminator = self.terminator
+        terminator.boxed_selectors[self.selector] = None
+        terminator.boxed_version = VersionTag()
+        new_obj = obj._get_mapdict_map().copy(obj)
+        _become(obj, new_obj)
+        flag = obj._get_mapdict_map().write(obj, self.selector, w_value)
+        assert flag
+
+    def __repr__(self):
+        return "<%s %s %s[%s] %r>" % (self.__class__.__name__, self.selector,
+                                      self.position, self.listindex,
+                                      self.back)
+
+def _make_unboxed_attribute(name, kind, W_Class, unwrap, wrap):
+    class UnboxedStorage(W_Root):
+        # the list of the unboxed values of one kind of an instance
+        def __init__(self, values):
+            self.values = values
+
+    class attrcls(UnboxedPlainAttribute):
+        def _get_values(self, obj):
+            storage = obj._mapdict_read_storage(self.position)
+            assert isinstance(storage, UnboxedStorage)
+            return storage.values
+
+        def _direct_read(self, obj):
+            return wrap(self.space, self._get_values(obj)[self.listindex])
+
+        def _direct_write(self, obj, w_value):
+            if type(w_value) is W_Class:
+                value = unwrap(self.space, w_value)
+                self._get_values(obj)[self.listindex] = value
+            else:
+                self._switch_to_boxed(obj, w_value)
+
+        def _direct_init(self, obj, w_value):
+            value = unwrap(self.space, w_value)
+            if self.listindex == 0:
+                obj._mapdict_write_storage(self.position,
+                                           UnboxedStorage([value]))
+            else:
+                values = self._get_values(obj)
+                assert len(values) == self.listindex
+                values.append(value)
+
+    attrcls.kind = kind
+    UnboxedStorage.__name__ = name + 'AttributeStorage'
+    attrcls.__name__ = name + 'Attribute'
+    return attrcls
+
+def _unwrap_int(space, w_int):
+    return space.int_w(w_int)
+
+def _unwrap_float(space, w_float):
+    return space.float_w(w_float)
+
+def _wrap_float(space, value):
+    return space.newfloat(value)
+
+IntAttribute = _make_unboxed_attribute(
+    'Int', UNBOXED_INT, W_IntObject, _unwrap_int, wrapint)
+FloatAttribute = _make_unboxed_attribute(
+    'Float', UNBOXED_FLOAT, W_FloatObject, _unwrap_float, _wrap_float)
+
 def _become(w_obj, new_obj):
     # this is like the _become method, really, but we cannot use that due to
     # RPython reasons
@@ -330,7 +494,7 @@ class IndexCache(object):
         self.attrs = [None] * SIZE
         self._empty_selector = (None, INVALID)
         self.selectors = [self._empty_selector] * SIZE
-        self.indices = [0] * SIZE
+        self.cached_attrs = [None] * SIZE
         if space.config.objspace.std.withmethodcachecounter:
             self.hits = {}
             self.misses = {}
@@ -340,6 +504,8 @@ class IndexCache(object):
             self.attrs[i] = None
         for i in range(len(self.selectors)):
             self.selectors[i] = self._empty_selector
+        for i in range(len(self.cached_attrs)):
+            self.cached_attrs[i] = None
 
 # ____________________________________________________________
 # object implementation
@@ -729,6 +895,7 @@ class MapDictIteratorImplementation(IteratorImplementation):
 class CacheEntry(object):
     version_tag = None
     index = 0
+    unboxed_attr = None # for unboxed attributes, which 'index' cannot locate
     w_method = None # for callmethod
     success_counter = 0
     failure_counter = 0
@@ -761,7 +928,8 @@ def init_mapdict_cache(pycode):
     pycode._mapdict_caches = [INVALID_CACHE_ENTRY] * num_entries
 
 @jit.dont_look_inside
-def _fill_cache(pycode, nameindex, map, version_tag, index, w_method=None):
+def _fill_cache(pycode, nameindex, map, version_tag, index, w_method=None,
+                unboxed_attr=None):
     entry = pycode._mapdict_caches[nameindex]
     if entry is INVALID_CACHE_ENTRY:
         entry = CacheEntry()
@@ -770,6 +938,7 @@ def _fill_cache(pycode, nameindex, map, version_tag, index, w_method=None):
     entry.version_tag = version_tag
     entry.index = index
     entry.w_method = w_method
+    entry.unboxed_attr = unboxed_attr
     if pycode.space.config.objspace.std.withmethodcachecounter:
         entry.failure_counter += 1
 
@@ -780,7 +949,10 @@ def LOAD_ATTR_caching(pycode, w_obj, nameindex):
     map = w_obj._get_mapdict_map()
     if entry.is_valid_for_map(map) and entry.w_method is None:
         # everything matches, it's incredibly fast
-        return w_obj._mapdict_read_storage(entry.index)
+        unboxed_attr = entry.unboxed_attr
+        if unboxed_attr is None:
+            return w_obj._mapdict_read_storage(entry.index)
+        return unboxed_attr._direct_read(w_obj)
     return LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map)
 LOAD_ATTR_caching._always_inline_ = True
 
@@ -822,10 +994,16 @@ def LOAD_ATTR_slowpath(pycode, w_obj, nameindex, map):
                 selector = (name, DICT)
             #
             if selector[1] != INVALID:
-                index = map.index(selector)
-                if index >= 0:
+                attr = map.find_map_attr(selector)
+                if attr is not None:
                     # Note that if map.terminator is a DevolvedDictTerminator,
-                    # map.index() will always return -1 if selector[1]==DICT.
+                    # map.find_map_attr() will always return None if
+                    # selector[1]==DICT.
+                    if isinstance(attr, UnboxedPlainAttribute):
+                        _fill_cache(pycode, nameindex, map, version_tag, -1,
+                                    unboxed_attr=attr)
+                        return attr._direct_read(w_obj)
+                    index = attr.position
                     _fill_cache(pycode, nameindex, map, version_tag, index)
                     return w_obj._mapdict_read_storage(index)
     if space.config.objspace.std.withmethodcachecounter:
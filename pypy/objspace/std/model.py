@@ -16,6 +16,7 @@ def registerimplementation(implcls):
 
 option_to_typename = {
     "withspecialisedtuple" : ["specialisedtupleobject.W_SpecialisedTupleObject"],
+    "withunwrappedtuple" : ["unwrappedtupleobject.W_UnwrappedTupleObject"],
     "withsmalltuple" : ["smalltupleobject.W_SmallTupleObject"],
     "withsmallint"   : ["smallintobject.W_SmallIntObject"],
     "withsmalllong"  : ["smalllongobject.W_SmallLongObject"],
@@ -267,6 +268,11 @@ class StdTypeModel:
             self.typeorder[specialisedtupleobject.W_SpecialisedTupleObject] += [
                 (tupleobject.W_TupleObject, specialisedtupleobject.delegate_SpecialisedTuple2Tuple)]
 
+        if config.objspace.std.withunwrappedtuple:
+            from pypy.objspace.std import unwrappedtupleobject
+            self.typeorder[unwrappedtupleobject.W_UnwrappedTupleObject] += [
+                (tupleobject.W_TupleObject, unwrappedtupleobject.delegate_UnwrappedTuple2Tuple)]
+
         # put W_Root everywhere
         self.typeorder[W_Root] = []
         for type in self.typeorder:
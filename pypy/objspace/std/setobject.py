@@ -13,6 +13,9 @@ from pypy.interpreter.generator import GeneratorIterator
 from pypy.objspace.std.listobject import W_ListObject
 from pypy.objspace.std.intobject import W_IntObject
 from pypy.objspace.std.stringobject import W_StringObject
+from pypy.objspace.std.unicodeobject import W_UnicodeObject
+from pypy.objspace.std.floatobject import W_FloatObject
+from pypy.rlib.rfloat import isnan
 
 class W_BaseSetObject(W_Object):
     typedef = None
@@ -92,6 +95,10 @@ class W_BaseSetObject(W_Object):
         """ If this is a string set return its contents as a list of uwnrapped strings. Otherwise return None. """
         return self.strategy.listview_str(self)
 
+    def listview_unicode(self):
+        """ If this is a unicode set return its contents as a list of uwnrapped unicodes. Otherwise return None. """
+        return self.strategy.listview_unicode(self)
+
     def listview_int(self):
         """ If this is an int set return its contents as a list of uwnrapped ints. Otherwise return None. """
         return self.strategy.listview_int(self)
@@ -201,6 +208,9 @@ class SetStrategy(object):
     def listview_str(self, w_set):
         return None
 
+    def listview_unicode(self, w_set):
+        return None
+
     def listview_int(self, w_set):
         return None
 
@@ -303,6 +313,11 @@ class EmptySetStrategy(SetStrategy):
             strategy = self.space.fromcache(IntegerSetStrategy)
         elif type(w_key) is W_StringObject:
             strategy = self.space.fromcache(StringSetStrategy)
+        elif type(w_key) is W_UnicodeObject:
+            strategy = self.space.fromcache(UnicodeSetStrategy)
+        elif (type(w_key) is W_FloatObject and
+              not isnan(self.space.float_w(w_key))):
+            strategy = self.space.fromcache(FloatSetStrategy)
         else:
             strategy = self.space.fromcache(ObjectSetStrategy)
         w_set.strategy = strategy
@@ -699,6 +714,8 @@ class StringSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def may_contain_equal_elements(self, strategy):
         if strategy is self.space.fromcache(IntegerSetStrategy):
             return False
+        if strategy is self.space.fromcache(FloatSetStrategy):
+            return False
         if strategy is self.space.fromcache(EmptySetStrategy):
             return False
         return True
@@ -733,6 +750,8 @@ class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def may_contain_equal_elements(self, strategy):
         if strategy is self.space.fromcache(StringSetStrategy):
             return False
+        if strategy is self.space.fromcache(UnicodeSetStrategy):
+            return False
         if strategy is self.space.fromcache(EmptySetStrategy):
             return False
         return True
@@ -746,6 +765,76 @@ class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     def iter(self, w_set):
         return IntegerIteratorImplementation(self.space, self, w_set)
 
+class UnicodeSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+    erase, unerase = rerased.new_erasing_pair("unicode")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def get_empty_dict(self):
+        return {}
+
+    def listview_unicode(self, w_set):
+        return self.unerase(w_set.sstorage).keys()
+
+    def is_correct_type(self, w_key):
+        return type(w_key) is W_UnicodeObject
+
+    def may_contain_equal_elements(self, strategy):
+        if strategy is self.space.fromcache(IntegerSetStrategy):
+            return False
+        if strategy is self.space.fromcache(FloatSetStrategy):
+            return False
+        if strategy is self.space.fromcache(EmptySetStrategy):
+            return False
+        return True
+
+    def unwrap(self, w_item):
+        return self.space.unicode_w(w_item)
+
+    def wrap(self, item):
+        return self.space.wrap(item)
+
+    def iter(self, w_set):
+        return UnicodeIteratorImplementation(self.space, self, w_set)
+
+class FloatSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+    # NaNs are not stored here: they are only found by identity, which
+    # is lost when they are unwrapped
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def get_empty_storage(self):
+        return self.erase({})
+
+    def get_empty_dict(self):
+        return {}
+
+    def is_correct_type(self, w_key):
+        return (type(w_key) is W_FloatObject and
+                not isnan(self.space.float_w(w_key)))
+
+    def may_contain_equal_elements(self, strategy):
+        if strategy is self.space.fromcache(StringSetStrategy):
+            return False
+        if strategy is self.space.fromcache(UnicodeSetStrategy):
+            return False
+        if strategy is self.space.fromcache(EmptySetStrategy):
+            return False
+        return True
+
+    def unwrap(self, w_item):
+        return self.space.float_w(w_item)
+
+    def wrap(self, item):
+        return self.space.wrap(item)
+
+    def iter(self, w_set):
+        return FloatIteratorImplementation(self.space, self, w_set)
+
 class ObjectSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
     erase, unerase = rerased.new_erasing_pair("object")
     erase = staticmethod(erase)
@@ -832,44 +921,48 @@ class EmptyIteratorImplementation(IteratorImplementation):
         return None
 
 
-class StringIteratorImplementation(IteratorImplementation):
-    def __init__(self, space, strategy, w_set):
-        IteratorImplementation.__init__(self, space, strategy, w_set)
-        d = strategy.unerase(w_set.sstorage)
-        self.iterator = d.iterkeys()
-
-    def next_entry(self):
-        for key in self.iterator:
-            return self.space.wrap(key)
-        else:
-            return None
+class _UnwrappedIteratorMixin(object):
+    """Iterates over the keys of a strategy's storage, wrapping each one
+    with wrap_key().  Being a mixin, every iterator class gets its own copy
+    of these methods, so that they are annotated for its own type of keys.
+    """
+    _mixin_ = True
 
-class IntegerIteratorImplementation(IteratorImplementation):
-    #XXX same implementation in dictmultiobject on dictstrategy-branch
     def __init__(self, space, strategy, w_set):
         IteratorImplementation.__init__(self, space, strategy, w_set)
         d = strategy.unerase(w_set.sstorage)
         self.iterator = d.iterkeys()
 
+    def wrap_key(self, key):
+        return self.space.wrap(key)
+
     def next_entry(self):
         # note that this 'for' loop only runs once, at most
         for key in self.iterator:
-            return self.space.wrap(key)
+            return self.wrap_key(key)
         else:
             return None
 
-class RDictIteratorImplementation(IteratorImplementation):
-    def __init__(self, space, strategy, w_set):
-        IteratorImplementation.__init__(self, space, strategy, w_set)
-        d = strategy.unerase(w_set.sstorage)
-        self.iterator = d.iterkeys()
+class StringIteratorImplementation(_UnwrappedIteratorMixin,
+                                   IteratorImplementation):
+    pass
 
-    def next_entry(self):
-        # note that this 'for' loop only runs once, at most
-        for w_key in self.iterator:
-            return w_key
-        else:
-            return None
+class IntegerIteratorImplementation(_UnwrappedIteratorMixin,
+                                    IteratorImplementation):
+    pass
+
+class UnicodeIteratorImplementation(_UnwrappedIteratorMixin,
+                                    IteratorImplementation):
+    pass
+
+class FloatIteratorImplementation(_UnwrappedIteratorMixin,
+                                  IteratorImplementation):
+    pass
+
+class RDictIteratorImplementation(_UnwrappedIteratorMixin,
+                                  IteratorImplementation):
+    def wrap_key(self, w_key):
+        return w_key
 
 class W_SetIterObject(W_Object):
     from pypy.objspace.std.settype import setiter_typedef as typedef
@@ -923,6 +1016,13 @@ def set_strategy_and_setdata(space, w_set, w_iterable):
         w_set.sstorage = strategy.get_storage_from_unwrapped_list(stringlist)
         return
 
+    unicodelist = space.listview_unicode(w_iterable)
+    if unicodelist is not None:
+        strategy = space.fromcache(UnicodeSetStrategy)
+        w_set.strategy = strategy
+        w_set.sstorage = strategy.get_storage_from_unwrapped_list(unicodelist)
+        return
+
     intlist = space.listview_int(w_iterable)
     if intlist is not None:
         strategy = space.fromcache(IntegerSetStrategy)
@@ -958,6 +1058,24 @@ def _pick_correct_strategy(space, w_set, iterable_w):
         w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
         return
 
+    # check for unicode
+    for w_item in iterable_w:
+        if type(w_item) is not W_UnicodeObject:
+            break
+    else:
+        w_set.strategy = space.fromcache(UnicodeSetStrategy)
+        w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
+        return
+
+    # check for floats
+    for w_item in iterable_w:
+        if type(w_item) is not W_FloatObject or isnan(space.float_w(w_item)):
+            break
+    else:
+        w_set.strategy = space.fromcache(FloatSetStrategy)
+        w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
+        return
+
     w_set.strategy = space.fromcache(ObjectSetStrategy)
     w_set.sstorage = w_set.strategy.get_storage_from_list(iterable_w)
 
@@ -804,6 +804,63 @@ class AppTestStrategies(object):
         assert "IntDictStrategy" in self.get_strategy(d)
         assert d[1L] == "hi"
 
+    def test_int_float_lookup(self):
+        d = {1: "one", -3: "minus three"}
+        assert d[1.0] == "one"
+        assert d.get(-3.0) == "minus three"
+        assert d.get(-0.0) is None
+        assert d.get(1.5) is None
+        assert d.get(float("nan")) is None
+        assert d.get(1e300) is None
+        assert "IntDictStrategy" in self.get_strategy(d)
+
+    def test_empty_to_unicode(self):
+        d = {}
+        d[u"a"] = 1
+        assert "UnicodeDictStrategy" in self.get_strategy(d)
+        d[u"\u1234"] = 2
+        assert d[u"a"] == 1
+        assert d["a"] == 1
+        assert d.get("\xe9") is None
+        assert d.get(1) is None
+        assert "UnicodeDictStrategy" in self.get_strategy(d)
+        assert sorted(d.keys()) == [u"a", u"\u1234"]
+        assert type(d.keys()[0]) is unicode
+        d["b"] = 3
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d == {u"a": 1, u"\u1234": 2, "b": 3}
+
+    def test_empty_to_float(self):
+        d = {}
+        d[1.5] = "x"
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        d[2.0] = "y"
+        d[-0.0] = "z"
+        assert d[2] == "y"
+        assert d.get(True) is None
+        assert d.get(0) == "z"
+        assert d.get(0.0) == "z"
+        assert d.get(1) is None
+        assert d.get("2.0") is None
+        assert d.get(2 ** 53 + 1) is None
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        assert sorted(d.items()) == [(-0.0, "z"), (1.5, "x"), (2.0, "y")]
+        del d[2]
+        assert d == {1.5: "x", 0.0: "z"}
+        d[3] = "w"
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert type(d.keys()[d.values().index("w")]) is int
+
+    def test_float_nan(self):
+        nan = float("nan")
+        d = {nan: 1}
+        assert "FloatDictStrategy" not in self.get_strategy(d)
+        d = {1.0: 1}
+        d[nan] = 2
+        assert "FloatDictStrategy" not in self.get_strategy(d)
+        assert d[1] == 1
+        assert len(d) == 2
+
     def test_iter_dict_length_change(self):
         d = {1: 2, 3: 4, 5: 6}
         it = d.iteritems()
@@ -910,6 +967,7 @@ class FakeSpace:
     w_int = int
     w_bool = bool
     w_float = float
+    w_unicode = unicode
     StringObjectCls = FakeString
     w_dict = W_DictMultiObject
     iter = iter
@@ -923,6 +981,7 @@ class Config:
             withcelldict = False
             withmethodcache = False
             withidentitydict = False
+            withunboxedattributes = False
 
 FakeSpace.config = Config()
 
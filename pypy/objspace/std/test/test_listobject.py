@@ -605,11 +605,70 @@ class AppTestW_ListObject(object):
         l.sort(reverse = True, key = lower)
         assert l == ['C', 'b', 'a']
 
+    def test_sort_unwrapped_keys(self):
+        l = ['aaa', 'b', 'cc', 'd', '', 'ee']
+        assert sorted(l, key=len) == ['', 'b', 'd', 'cc', 'ee', 'aaa']
+        assert sorted(l, key=len, reverse=True) == [
+            'aaa', 'cc', 'ee', 'b', 'd', '']
+        l = [3, 1, 2, 1.5]
+        assert sorted(l, key=float) == [1, 1.5, 2, 3]
+        assert sorted(l, key=str, reverse=True) == [3, 2, 1.5, 1]
+        assert sorted(l, key=unicode) == [1, 1.5, 2, 3]
+        l = [(1, 'x'), (0, 'y'), (1, 'z'), (0, 'w')]
+        assert sorted(l, key=lambda t: t[0]) == [
+            (0, 'y'), (0, 'w'), (1, 'x'), (1, 'z')]
+        # mixed keys go through the generic path
+        assert sorted(l, key=lambda t: t[0] or t[1]) == [
+            (1, 'x'), (1, 'z'), (0, 'w'), (0, 'y')]
+        assert sorted([1, 2, 3], key=lambda x: -x, cmp=cmp) == [3, 2, 1]
+
+    def test_sort_key_raises(self):
+        def key(x):
+            if x == 3:
+                raise ValueError
+            return x
+        l = [5, 3, 4]
+        raises(ValueError, l.sort, key=key)
+        assert l == [5, 3, 4]
+        def key(x):
+            l.append(x)
+            return x
+        l = [2, 1]
+        raises(ValueError, l.sort, key=key)
+
+    def test_sort_reverse_stable(self):
+        l = [0.0, -0.0, 1.0]
+        l.sort(reverse=True)
+        assert l == [1.0, 0.0, -0.0]
+        assert str(l[1]) == '0.0'
+        assert str(l[2]) == '-0.0'
+
     def test_sort_simple_string(self):
         l = ["a", "d", "c", "b"]
         l.sort()
         assert l == ["a", "b", "c", "d"]
 
+    def test_sort_simple_unicode(self):
+        l = [u"a", u"d", u"\u1234", u"b"]
+        l.sort()
+        assert l == [u"a", u"b", u"d", u"\u1234"]
+        assert sorted(set([u"y", u"x"])) == [u"x", u"y"]
+        l.sort(reverse=True)
+        assert l == [u"\u1234", u"d", u"b", u"a"]
+
+    def test_unicode_list(self):
+        l = u"a b c".split()
+        assert l == [u"a", u"b", u"c"]
+        assert u"b" in l
+        assert "b" in l
+        assert u"d" not in l
+        assert 1 not in l
+        assert u"-".join(l) == u"a-b-c"
+        assert "-".join(l) == u"a-b-c"
+        l.append("d")
+        assert u"-".join(l) == u"a-b-c-d"
+        assert list(u"xy") == [u"x", u"y"]
+
     def test_getitem(self):
         l = [1, 2, 3, 4, 5, 6, 9]
         assert l[0] == 1
@@ -1,4 +1,4 @@
-from pypy.objspace.std.listobject import W_ListObject, EmptyListStrategy, ObjectListStrategy, IntegerListStrategy, FloatListStrategy, StringListStrategy, RangeListStrategy, make_range_list
+from pypy.objspace.std.listobject import W_ListObject, EmptyListStrategy, ObjectListStrategy, IntegerListStrategy, FloatListStrategy, StringListStrategy, UnicodeListStrategy, RangeListStrategy, make_range_list
 from pypy.objspace.std import listobject
 from pypy.objspace.std.test.test_listobject import TestW_ListObject
 
@@ -11,6 +11,8 @@ class TestW_ListStrategies(TestW_ListObject):
         assert isinstance(W_ListObject(self.space, [self.space.wrap(1),self.space.wrap('a')]).strategy, ObjectListStrategy)
         assert isinstance(W_ListObject(self.space, [self.space.wrap(1),self.space.wrap(2),self.space.wrap(3)]).strategy, IntegerListStrategy)
         assert isinstance(W_ListObject(self.space, [self.space.wrap('a'), self.space.wrap('b')]).strategy, StringListStrategy)
+        assert isinstance(W_ListObject(self.space, [self.space.wrap(u'a'), self.space.wrap(u'b')]).strategy, UnicodeListStrategy)
+        assert isinstance(W_ListObject(self.space, [self.space.wrap(u'a'), self.space.wrap('b')]).strategy, ObjectListStrategy)
 
     def test_empty_to_any(self):
         l = W_ListObject(self.space, [])
@@ -28,6 +30,11 @@ class TestW_ListStrategies(TestW_ListObject):
         l.append(self.space.wrap('a'))
         assert isinstance(l.strategy, StringListStrategy)
 
+        l = W_ListObject(self.space, [])
+        assert isinstance(l.strategy, EmptyListStrategy)
+        l.append(self.space.wrap(u'a'))
+        assert isinstance(l.strategy, UnicodeListStrategy)
+
         l = W_ListObject(self.space, [])
         assert isinstance(l.strategy, EmptyListStrategy)
         l.append(self.space.wrap(1.2))
@@ -414,10 +421,86 @@ class TestW_ListStrategies(TestW_ListObject):
         l1 = W_ListObject(self.space, [self.space.wrap("eins"), self.space.wrap("zwei")])
         assert isinstance(l1.strategy, StringListStrategy)
         l2 = W_ListObject(self.space, [self.space.wrap(u"eins"), self.space.wrap(u"zwei")])
-        assert isinstance(l2.strategy, ObjectListStrategy)
+        assert isinstance(l2.strategy, UnicodeListStrategy)
         l3 = W_ListObject(self.space, [self.space.wrap("eins"), self.space.wrap(u"zwei")])
         assert isinstance(l3.strategy, ObjectListStrategy)
 
+    def test_unicode_to_any(self):
+        space = self.space
+        l = W_ListObject(space, [space.wrap(u'a'), space.wrap(u'b')])
+        l.append(space.wrap(u'c'))
+        assert isinstance(l.strategy, UnicodeListStrategy)
+        l.append(space.wrap('d'))
+        assert isinstance(l.strategy, ObjectListStrategy)
+        assert space.unwrap(l) == [u'a', u'b', u'c', 'd']
+
+    def test_listview_unicode(self):
+        space = self.space
+        assert space.listview_unicode(space.wrap(1)) == None
+        assert space.listview_unicode(space.wrap('ab')) == None
+        w_l = self.space.newlist([self.space.wrap(u'a'), self.space.wrap(u'b')])
+        assert space.listview_unicode(w_l) == [u"a", u"b"]
+        assert space.listview_unicode(space.wrap(u'ab')) == [u"a", u"b"]
+
+    def test_unicode_join_uses_listview_unicode(self):
+        space = self.space
+        w_l = self.space.newlist([self.space.wrap(u'a'), self.space.wrap(u'b')])
+        w_l.getitems = None
+        assert space.unicode_w(space.call_method(space.wrap(u"c"), "join", w_l)) == u"acb"
+
+    def test_unicode_join_returns_same_instance(self):
+        space = self.space
+        w_text = space.wrap(u"text")
+        w_l = self.space.newlist([w_text])
+        assert space.is_w(space.call_method(space.wrap(u" -- "), "join", w_l), w_text)
+
+    def test_newlist_unicode(self):
+        space = self.space
+        l = [u'a', u'b']
+        w_l = self.space.newlist_unicode(l)
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        assert space.listview_unicode(w_l) is l
+
+    def test_unicode_uses_newlist_unicode(self):
+        space = self.space
+        w_s = space.wrap(u"a b c")
+        space.newlist = None
+        try:
+            w_l = space.call_method(w_s, "split")
+            w_l2 = space.call_method(w_s, "split", space.wrap(u" "))
+            w_l3 = space.call_method(w_s, "rsplit")
+        finally:
+            del space.newlist
+        assert space.listview_unicode(w_l) == [u"a", u"b", u"c"]
+        assert space.listview_unicode(w_l2) == [u"a", u"b", u"c"]
+        assert space.listview_unicode(w_l3) == [u"a", u"b", u"c"]
+
+    def test_unicode_sort(self):
+        space = self.space
+        w_l = W_ListObject(space, [space.wrap(u"b"), space.wrap(u"\u1234"),
+                                   space.wrap(u"a")])
+        w_l.sort(False)
+        assert isinstance(w_l.strategy, UnicodeListStrategy)
+        assert space.listview_unicode(w_l) == [u"a", u"b", u"\u1234"]
+        w_l.sort(True)
+        assert space.listview_unicode(w_l) == [u"\u1234", u"b", u"a"]
+
+    def test_sort_unwrapped_keys(self):
+        space = self.space
+        w_l = space.newlist([space.wrap(x) for x in ["bb", "a", "cc", ""]])
+        space.lt = None    # must not be used
+        try:
+            space.call_method(w_l, "sort", space.w_None,
+                              space.builtin.get("len"))
+            w_key = space.builtin.get("float")
+            w_l2 = space.newlist([space.wrap(x) for x in [3, 1.5, -2]])
+            space.call_method(w_l2, "sort", space.w_None, w_key,
+                              space.w_True)
+        finally:
+            del space.lt
+        assert space.listview_str(w_l) == ["", "a", "bb", "cc"]
+        assert space.unwrap(w_l2) == [3, 1.5, -2]
+
     def test_listview_str(self):
         space = self.space
         assert space.listview_str(space.wrap(1)) == None
@@ -501,6 +584,27 @@ class TestW_ListStrategies(TestW_ListObject):
         w_l = W_ListObject(space, [space.wrap(1), space.wrap(2), space.wrap(3)])
         assert self.space.listview_int(w_l) == [1, 2, 3]
 
+    def test_listview_unicode_list(self):
+        space = self.space
+        w_l = W_ListObject(space, [space.wrap(u"a"), space.wrap(u"b")])
+        assert self.space.listview_unicode(w_l) == [u"a", u"b"]
+
+    def test_create_list_from_unicode_set_and_dict(self):
+        space = self.space
+        w_l = W_ListObject(space, [space.wrap(u"a"), space.wrap(u"b")])
+        w_set = space.call_function(space.w_set, w_l)
+        w_set.iter = None # make sure fast path is used
+        w_l2 = W_ListObject(space, [])
+        space.call_method(w_l2, "__init__", w_set)
+        assert isinstance(w_l2.strategy, UnicodeListStrategy)
+        assert sorted(space.listview_unicode(w_l2)) == [u"a", u"b"]
+
+        w_d = space.newdict()
+        space.setitem(w_d, space.wrap(u"x"), space.w_None)
+        w_l3 = space.call_method(w_d, "keys")
+        assert isinstance(w_l3.strategy, UnicodeListStrategy)
+        assert space.listview_unicode(w_l3) == [u"x"]
+
 
 class TestW_ListStrategiesDisabled:
     def setup_class(cls):
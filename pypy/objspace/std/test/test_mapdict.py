@@ -647,12 +647,15 @@ class AppTestWithMapDict(object):
         raises(AttributeError, "a.x")
 
 class AppTestWithMapDictAndCounters(object):
+    options = {}
+
     def setup_class(cls):
         from pypy.interpreter import gateway
-        cls.space = gettestobjspace(
-            **{"objspace.std.withmapdict": True,
-               "objspace.std.withmethodcachecounter": True,
-               "objspace.opcodes.CALL_METHOD": True})
+        options = {"objspace.std.withmapdict": True,
+                   "objspace.std.withmethodcachecounter": True,
+                   "objspace.opcodes.CALL_METHOD": True}
+        options.update(cls.options)
+        cls.space = gettestobjspace(**options)
         #
         def check(space, w_func, name):
             w_code = space.getattr(w_func, space.wrap('func_code'))
@@ -1067,3 +1070,175 @@ class TestDictSubclassShortcutBug(object):
                 return A()
                 """)
         assert w_dict.user_overridden_class
+
+class TestUnboxedAttributes(object):
+    def setup_class(cls):
+        cls.space = gettestobjspace(
+            **{"objspace.std.withmapdict": True,
+               "objspace.std.withunboxedattributes": True})
+
+    def test_storage(self):
+        space = self.space
+        w_obj = space.appexec([], """():
+            class A(object):
+                pass
+            a = A()
+            a.x = 1
+            a.y = 'y'
+            a.z = 2.5
+            a.t = 3
+            return a
+        """)
+        map = w_obj._get_mapdict_map()
+        assert isinstance(map, IntAttribute)
+        assert map.selector == ("t", DICT)
+        assert map.listindex == 1
+        # 'x' and 't' share one storage slot, and so do their values
+        assert map.length() == 3
+        assert isinstance(map.back, FloatAttribute)
+        assert map.back.listindex == 0
+        assert map.back.position == 2
+        assert type(map.back.back) is PlainAttribute
+        assert map.position == map.back.back.back.position == 0
+        assert w_obj._mapdict_read_storage(0).values == [1, 3]
+        assert w_obj._mapdict_read_storage(2).values == [2.5]
+        assert space.int_w(w_obj.getdictvalue(space, "t")) == 3
+        assert map.index(("t", DICT)) == -1
+        assert map.index(("y", DICT)) == 1
+
+    def test_switch_to_boxed(self):
+        space = self.space
+        w_a, w_b, w_c = space.fixedview(space.appexec([], """():
+            class A(object):
+                pass
+            a = A()
+            a.x = 1
+            a.y = 2
+            b = A()
+            b.x = 3
+            b.y = 4
+            a.x = 'x'
+            c = A()
+            c.x = 5
+            c.y = 6
+            return a, b, c
+        """))
+        map = w_a._get_mapdict_map()
+        assert type(map.back) is PlainAttribute
+        assert isinstance(map, IntAttribute)
+        assert map.listindex == 0
+        assert space.str_w(w_a.getdictvalue(space, "x")) == 'x'
+        assert space.int_w(w_a.getdictvalue(space, "y")) == 2
+        # 'b' keeps its map until 'x' is assigned something else
+        map = w_b._get_mapdict_map()
+        assert isinstance(map.back, IntAttribute)
+        assert w_c._get_mapdict_map() is w_a._get_mapdict_map()
+
+
+class AppTestWithUnboxedAttributes(AppTestWithMapDict):
+    def setup_class(cls):
+        cls.space = gettestobjspace(
+            **{"objspace.std.withmapdict": True,
+               "objspace.std.withunboxedattributes": True})
+
+    def test_int_and_float_attributes(self):
+        class A(object):
+            pass
+        a = A()
+        a.x = 1
+        a.y = 2.5
+        a.z = -3
+        for i in range(100):
+            a.x += 1
+            a.y *= 2.0
+        assert a.x == 101
+        assert a.y == 2.5 * 2.0 ** 100
+        assert a.z == -3
+        assert a.__dict__ == {"x": 101, "y": a.y, "z": -3}
+        assert type(a.x) is int and type(a.y) is float
+        assert a.x is a.x
+
+    def test_change_type(self):
+        class A(object):
+            pass
+        a = A()
+        a.x = 1
+        a.y = 2
+        a.z = 3
+        a.y = 2.5
+        assert (a.x, a.y, a.z) == (1, 2.5, 3)
+        a.y = None
+        assert (a.x, a.y, a.z) == (1, None, 3)
+        a.x = 10L
+        assert (a.x, a.y, a.z) == (10L, None, 3)
+        assert type(a.x) is long
+        a.z = True
+        assert a.z is True
+        b = A()
+        b.y = 7
+        b.x = 8
+        assert (b.x, b.y) == (8, 7)
+        del a.y
+        assert not hasattr(a, "y")
+        assert (a.x, a.z) == (10L, True)
+
+    def test_int_subclass(self):
+        class myint(int):
+            pass
+        class A(object):
+            pass
+        a = A()
+        a.x = 1
+        a.x = myint(5)
+        assert type(a.x) is myint
+        a.x = 2
+        assert a.x == 2
+
+    def test_slots(self):
+        class A(object):
+            __slots__ = ['x', 'y']
+        a = A()
+        a.x = 1
+        a.y = 1.5
+        assert (a.x, a.y) == (1, 1.5)
+        a.x = "x"
+        assert (a.x, a.y) == ("x", 1.5)
+        del a.y
+        raises(AttributeError, "a.y")
+
+    def test_change_class(self):
+        class A(object):
+            pass
+        class B(object):
+            pass
+        a = A()
+        a.x = 1
+        a.y = 2.0
+        a.__class__ = B
+        assert (a.x, a.y) == (1, 2.0)
+        a.x = "a"
+        assert (a.x, a.y) == ("a", 2.0)
+
+class AppTestWithUnboxedAttributesAndCounters(AppTestWithMapDictAndCounters):
+    # the LOAD_ATTR cache must work for unboxed attributes too
+    options = {"objspace.std.withunboxedattributes": True}
+
+    def test_unboxed_float(self):
+        class A(object):
+            pass
+        a = A()
+        a.x = 41.5
+        a.y = 0.5
+        def f():
+            return int(a.x + a.y)
+        #
+        res = self.check(f, 'y')
+        assert res == (1, 0, 0)
+        res = self.check(f, 'y')
+        assert res == (0, 1, 0)
+        a.y = 'not a float any more'
+        a.y = 0.5
+        res = self.check(f, 'y')
+        assert res == (1, 0, 0)
+        res = self.check(f, 'y')
+        assert res == (0, 1, 0)
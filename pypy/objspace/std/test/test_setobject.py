@@ -86,7 +86,7 @@ class TestW_SetObject:
 
     def test_create_set_from_list(self):
         from pypy.objspace.std.setobject import ObjectSetStrategy, StringSetStrategy
-        from pypy.objspace.std.floatobject import W_FloatObject
+        from pypy.objspace.std.setobject import FloatSetStrategy
         from pypy.objspace.std.model import W_Object
 
         w = self.space.wrap
@@ -117,9 +117,15 @@ class TestW_SetObject:
         w_list = W_ListObject(self.space, [w(1.0), w(2.0), w(3.0)])
         w_set = W_SetObject(self.space)
         _initialize_set(self.space, w_set, w_list)
+        assert w_set.strategy is self.space.fromcache(FloatSetStrategy)
+        assert w_set.strategy.unerase(w_set.sstorage) == {1.0:None, 2.0:None, 3.0:None}
+
+        w_list = W_ListObject(self.space, [w(1.0), w(2), w(3.0)])
+        w_set = W_SetObject(self.space)
+        _initialize_set(self.space, w_set, w_list)
         assert w_set.strategy is self.space.fromcache(ObjectSetStrategy)
         for item in w_set.strategy.unerase(w_set.sstorage):
-            assert isinstance(item, W_FloatObject)
+            assert isinstance(item, W_Object)
 
         # changed cached object, need to change it back for other tests to pass
         intstr.get_storage_from_list = tmp_func
@@ -388,6 +394,25 @@ class AppTestAppSetTest:
             assert s != frozenset(otherword)
             assert s != word
 
+    def test_unicode_and_float_sets(self):
+        s = set([u'a', u'b', u'\u1234'])
+        assert 'a' in s
+        assert u'\u1234' in s
+        assert s == set(['a', u'b', u'\u1234'])
+        assert s & set([1, 2]) == set()
+        s.add(u'c')
+        assert len(s) == 4
+        f = set([1.0, 2.5, -0.0])
+        assert 1 in f
+        assert 0 in f
+        assert f == set([1, 2.5, 0])
+        assert f & set([1, 2]) == set([1.0])
+        assert f - set([u'a', 'a']) == f
+        assert sorted(f | set([2.5, 3.0])) == [-0.0, 1.0, 2.5, 3.0]
+        f = set([float('nan'), 1.5])
+        assert 1.5 in f
+        assert len(f) == 2
+
     def test_copy(self):
         s1 = set('abc')
         s2 = s1.copy()
@@ -1,5 +1,6 @@
 from pypy.objspace.std.setobject import W_SetObject
 from pypy.objspace.std.setobject import IntegerSetStrategy, ObjectSetStrategy, EmptySetStrategy
+from pypy.objspace.std.setobject import UnicodeSetStrategy, FloatSetStrategy
 from pypy.objspace.std.listobject import W_ListObject
 
 class TestW_SetStrategies:
@@ -20,6 +21,35 @@ class TestW_SetStrategies:
         s = W_SetObject(self.space, self.wrapped([]))
         assert s.strategy is self.space.fromcache(EmptySetStrategy)
 
+        s = W_SetObject(self.space, self.wrapped([u"a", u"b"]))
+        assert s.strategy is self.space.fromcache(UnicodeSetStrategy)
+
+        s = W_SetObject(self.space, self.wrapped([1.5, 2.0]))
+        assert s.strategy is self.space.fromcache(FloatSetStrategy)
+
+        s = W_SetObject(self.space, self.wrapped([1.5, float("nan")]))
+        assert s.strategy is self.space.fromcache(ObjectSetStrategy)
+
+    def test_add_to_empty(self):
+        s = W_SetObject(self.space)
+        s.add(self.space.wrap(u"a"))
+        assert s.strategy is self.space.fromcache(UnicodeSetStrategy)
+
+        s = W_SetObject(self.space)
+        s.add(self.space.wrap(1.5))
+        assert s.strategy is self.space.fromcache(FloatSetStrategy)
+        s.add(self.space.wrap(u"a"))
+        assert s.strategy is self.space.fromcache(ObjectSetStrategy)
+
+    def test_listview_unicode(self):
+        space = self.space
+        w_l = self.wrapped([u"a", u"b"])
+        w_l.getitems = None    # the set is built from the unwrapped items
+        s = W_SetObject(space, w_l)
+        assert s.strategy is space.fromcache(UnicodeSetStrategy)
+        assert sorted(space.listview_unicode(s)) == [u"a", u"b"]
+        assert space.listview_unicode(W_SetObject(space, self.wrapped([1]))) is None
+
     def test_switch_to_object(self):
         s = W_SetObject(self.space, self.wrapped([1,2,3,4,5]))
         s.add(self.space.wrap("six"))
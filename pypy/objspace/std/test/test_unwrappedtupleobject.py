@@ -0,0 +1,176 @@
+from pypy.objspace.std.tupleobject import W_TupleObject
+from pypy.objspace.std.unwrappedtupleobject import W_UnwrappedTupleObject
+from pypy.objspace.std.unwrappedtupleobject import W_IntTupleObject
+from pypy.objspace.std.unwrappedtupleobject import W_FloatTupleObject
+from pypy.objspace.std.unwrappedtupleobject import W_StrTupleObject
+from pypy.conftest import gettestobjspace
+from pypy.objspace.std.test import test_tupleobject
+
+
+class TestW_UnwrappedTupleObject:
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withunwrappedtuple": True})
+
+    def test_kinds(self):
+        space = self.space
+        w = space.wrap
+        w_tuple = space.newtuple([w(1), w(2), w(3)])
+        assert isinstance(w_tuple, W_IntTupleObject)
+        assert w_tuple.items == [1, 2, 3]
+        w_tuple = space.newtuple([w(1.5), w(-0.0)])
+        assert isinstance(w_tuple, W_FloatTupleObject)
+        w_tuple = space.newtuple([w("a"), w("b")])
+        assert isinstance(w_tuple, W_StrTupleObject)
+        assert w_tuple.items == ["a", "b"]
+
+    def test_not_unwrapped(self):
+        space = self.space
+        w = space.wrap
+        for values_w in [[], [w(1), w("a")], [w(1), w(1.5)],
+                         [w(True), w(False)], [w(1.5), w(float("nan"))],
+                         [w(1), w(2L ** 100)], [w(u"a")]]:
+            w_tuple = space.newtuple(values_w)
+            assert not isinstance(w_tuple, W_UnwrappedTupleObject)
+
+    def test_hash_against_normal_tuple(self):
+        N_space = gettestobjspace(**{"objspace.std.withunwrappedtuple": False})
+        U_space = self.space
+
+        def hash_test(values):
+            N_values_w = [N_space.wrap(value) for value in values]
+            U_values_w = [U_space.wrap(value) for value in values]
+            N_w_tuple = N_space.newtuple(N_values_w)
+            U_w_tuple = U_space.newtuple(U_values_w)
+            assert isinstance(U_w_tuple, W_UnwrappedTupleObject)
+            assert isinstance(N_w_tuple, W_TupleObject)
+            assert U_space.is_true(U_space.eq(N_w_tuple, U_w_tuple))
+            assert N_space.int_w(N_space.hash(N_w_tuple)) == (
+                U_space.int_w(U_space.hash(U_w_tuple)))
+
+        hash_test([1, 2])
+        hash_test([-1, -2, 0, 5])
+        hash_test([1.5, 2.8])
+        hash_test([1.0, 2.0, -0.0, 1e300])
+        hash_test([float("inf")])
+        hash_test(['arbitrary', 'strings', ''])
+
+
+class AppTestW_UnwrappedTupleObject:
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withunwrappedtuple": True})
+
+    def w_kind(self, obj):
+        import __pypy__
+        r = __pypy__.internal_repr(obj)
+        for kind in ['Int', 'Float', 'Str']:
+            if 'W_%sTupleObject' % kind in r:
+                return kind
+        return None
+
+    def test_createunwrappedtuple(self):
+        assert self.kind((1, 2, 3)) == 'Int'
+        assert self.kind((1.5,)) == 'Float'
+        assert self.kind(("a", "b")) == 'Str'
+        assert self.kind(tuple([1, 2])) == 'Int'
+        assert self.kind((1, "a")) is None
+        assert self.kind((True, 1)) is None
+        assert self.kind((float("nan"), 1.5)) is None
+        assert self.kind(()) is None
+
+    def test_slicing_add_mul_stay_unwrapped(self):
+        t = (1, 2, 3, 4)
+        assert self.kind(t[1:3]) == 'Int'
+        assert self.kind(t[::2]) == 'Int'
+        assert t[::-2] == (4, 2)
+        assert t[2:1] == ()
+        assert self.kind(t + (5,)) == 'Int'
+        assert self.kind(t * 3) == 'Int'
+        assert t * 0 == ()
+        assert t + (1.5,) == (1, 2, 3, 4, 1.5)
+        assert self.kind(t + (1.5,)) is None
+
+    def test_getitem(self):
+        t = (5, 3)
+        assert t[0] == 5
+        assert t[-1] == 3
+        assert t[-2] == 5
+        raises(IndexError, "t[2]")
+        raises(IndexError, "t[-3]")
+        t = (0.5, -0.0)
+        assert type(t[0]) is float
+        assert str(t[1]) == '-0.0'
+
+    def test_eq_and_ordering(self):
+        a = (1, 2)
+        assert a == (1,) + (2,)
+        assert not a != (1,) + (2,)
+        assert a != (1, 3)
+        assert a == (1.0, 2L)
+        assert a != (1, 2, 3)
+        assert not a == "foo"
+        assert a < (1, 3) and a < (2,) and a < (1, 2, 0)
+        assert not a < (1, 2)
+        assert a > (1, 1) and a >= (1, 2) and a <= (1, 2)
+        assert ("a", "b") < ("a", "c")
+        assert (1.5, 2.5) > (1.5,)
+        assert (0.0,) == (-0.0,)
+
+    def test_hash(self):
+        a = (1, 2)
+        b = (1,)
+        b += (2,)
+        assert hash(a) == hash(b)
+        assert hash(a) == hash((1L, 2L)) == hash((1.0, 2.0)) == hash((1.0, 2L))
+        assert hash(("x", "y")) == hash(("x",) + ("y",))
+
+    def test_contains_count_index(self):
+        t = (1, 2, 1, 3)
+        assert 1 in t
+        assert 1.0 in t
+        assert 4 not in t
+        assert "1" not in t
+        assert t.count(1) == 2
+        assert t.count(1L) == 2
+        assert t.count(5) == 0
+        assert t.index(3) == 3
+        assert t.index(1, 1) == 2
+        assert t.index(3.0) == 3
+        raises(ValueError, t.index, 3, 0, 3)
+        raises(ValueError, t.index, "a")
+        assert ("a", "b").index("b") == 1
+
+    def test_dict_keys(self):
+        d = {}
+        for i in range(100):
+            d[(i, i + 1)] = i
+            d[(i + 0.5,)] = i
+            d[(str(i), "x")] = i
+        assert len(d) == 300
+        for i in range(100):
+            assert d[(i, i + 1)] == i
+            assert d[(i + 0.5,)] == i
+            assert d[(str(i), "x")] == i
+        assert d[(1.0, 2.0)] == 1
+
+    def test_iter_and_unpack(self):
+        t = (1.5, 2.5, 3.5)
+        assert list(t) == [1.5, 2.5, 3.5]
+        x, y, z = t
+        assert (x, y, z) == t
+        assert [s for s in ("a", "b")] == ["a", "b"]
+
+    def test_subclass(self):
+        class T(tuple):
+            pass
+        t = T((1, 2))
+        assert type(t) is T
+        assert t == (1, 2)
+        assert self.kind(t) is None
+
+
+class AppTestAll(test_tupleobject.AppTestW_TupleObject):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withunwrappedtuple": True})
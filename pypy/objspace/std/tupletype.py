@@ -6,6 +6,12 @@ from pypy.objspace.std.stdtypedef import StdTypeDef, SMM
 def wraptuple(space, list_w):
     from pypy.objspace.std.tupleobject import W_TupleObject
 
+    if space.config.objspace.std.withunwrappedtuple:
+        from unwrappedtupleobject import makeunwrappedtuple
+        w_tuple = makeunwrappedtuple(space, list_w)
+        if w_tuple is not None:
+            return w_tuple
+
     if space.config.objspace.std.withspecialisedtuple:
         from specialisedtupleobject import makespecialisedtuple, NotSpecialised
         try:
@@ -54,6 +60,9 @@ def descr__new__(space, w_tupletype, w_sequence=gateway.NoneNotWrapped):
         return w_sequence
     else:
         tuple_w = space.fixedview(w_sequence)
+        if (space.config.objspace.std.withunwrappedtuple and
+                space.is_w(w_tupletype, space.w_tuple)):
+            return space.newtuple(tuple_w)
     w_obj = space.allocate_instance(W_TupleObject, w_tupletype)
     W_TupleObject.__init__(w_obj, tuple_w)
     return w_obj
@@ -0,0 +1,358 @@
+from pypy.interpreter.error import OperationError
+from pypy.objspace.std.model import registerimplementation
+from pypy.objspace.std.register_all import register_all
+from pypy.objspace.std.multimethod import FailedToImplement
+from pypy.objspace.std.inttype import wrapint
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.floatobject import W_FloatObject, _hash_float
+from pypy.objspace.std.stringobject import W_StringObject
+from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+from pypy.objspace.std.tupleobject import W_TupleObject, UNROLL_TUPLE_LIMIT
+from pypy.objspace.std.sliceobject import W_SliceObject, normalize_simple_slice
+from pypy.objspace.std import slicetype
+from pypy.rlib.rarithmetic import intmask
+from pypy.rlib.rfloat import isnan
+from pypy.rlib.objectmodel import compute_hash
+from pypy.rlib.debug import make_sure_not_resized
+from pypy.rlib import jit
+
+# Tuples whose items are all ints, all floats or all strs store them
+# unwrapped, in an RPython list of the corresponding type.  Hashing and
+# comparing two such tuples of the same kind never goes through the
+# object space, which makes them cheap keys for dictionaries.  Floats
+# are only stored unwrapped if none of them is a NaN, so that comparing
+# the unwrapped values gives the same result as comparing the objects.
+
+
+class W_UnwrappedTupleObject(W_AbstractTupleObject):
+    from pypy.objspace.std.tupletype import tuple_typedef as typedef
+    __slots__ = []
+
+    def __repr__(self):
+        """ representation for debugging purposes """
+        reprlist = [repr(item) for item in self.items]
+        return "%s(%s)" % (self.__class__.__name__, ', '.join(reprlist))
+
+    def unwrap(self, space):
+        return tuple(self.items)
+
+    def length(self):
+        raise NotImplementedError
+
+    def getitem(self, index):
+        "Returns the wrapped item at 'index', or raises IndexError."
+        raise NotImplementedError
+
+    def getslice(self, start, step, slicelength):
+        raise NotImplementedError
+
+    def hash(self, space):
+        raise NotImplementedError
+
+    def contains(self, space, w_obj):
+        raise NotImplementedError
+
+    def count(self, space, w_obj):
+        raise NotImplementedError
+
+    def find(self, space, w_obj, start, stop):
+        "Returns the first index of 'w_obj' between start and stop, or -1."
+        raise NotImplementedError
+
+    def mul(self, times):
+        raise NotImplementedError
+
+    def add(self, w_other):
+        raise NotImplementedError
+
+    def eq(self, w_other):
+        raise NotImplementedError
+
+    def lt(self, w_other):
+        raise NotImplementedError
+
+
+def make_unwrapped_class(name, W_ItemObject, unwrap_item, wrap_item,
+                         hash_item):
+
+    def unroll_condition(self):
+        return (jit.isconstant(len(self.items)) and
+                len(self.items) < UNROLL_TUPLE_LIMIT)
+
+    class cls(W_UnwrappedTupleObject):
+        _immutable_fields_ = ['items[*]']
+
+        def __init__(self, items):
+            make_sure_not_resized(items)
+            self.items = items    # a list of unwrapped values
+
+        @staticmethod
+        def from_list(space, list_w):
+            items = [unwrap_item(space, w_item) for w_item in list_w]
+            return cls(items)
+
+        def length(self):
+            return len(self.items)
+
+        @jit.look_inside_iff(lambda self: unroll_condition(self))
+        def tolist(self):
+            items = self.items
+            list_w = [None] * len(items)
+            for i in range(len(items)):
+                list_w[i] = wrap_item(items[i])
+            return list_w
+
+        def getitems_copy(self):
+            return self.tolist()[:]   # returns a resizable list
+
+        def getitem(self, index):
+            return wrap_item(self.items[index])
+
+        def getslice(self, start, step, slicelength):
+            items = self.items
+            subitems = [items[0]] * slicelength
+            for i in range(slicelength):
+                subitems[i] = items[start]
+                start += step
+            return cls(subitems)
+
+        @jit.look_inside_iff(lambda self, space: unroll_condition(self))
+        def hash(self, space):
+            # the same algorithm as hash_tuple() in tupleobject.py
+            items = self.items
+            mult = 1000003
+            x = 0x345678
+            z = len(items)
+            for item in items:
+                y = hash_item(space, item)
+                x = (x ^ y) * mult
+                z -= 1
+                mult += 82520 + z + z
+            x += 97531
+            return intmask(x)
+
+        def contains(self, space, w_obj):
+            return self.find(space, w_obj, 0, len(self.items)) >= 0
+
+        def count(self, space, w_obj):
+            items = self.items
+            count = 0
+            if type(w_obj) is W_ItemObject:
+                item = unwrap_item(space, w_obj)
+                for i in range(len(items)):
+                    if items[i] == item:
+                        count += 1
+            else:
+                for i in range(len(items)):
+                    if space.eq_w(wrap_item(items[i]), w_obj):
+                        count += 1
+            return count
+
+        def find(self, space, w_obj, start, stop):
+            items = self.items
+            if type(w_obj) is W_ItemObject:
+                item = unwrap_item(space, w_obj)
+                for i in range(start, stop):
+                    if items[i] == item:
+                        return i
+            else:
+                for i in range(start, stop):
+                    if space.eq_w(wrap_item(items[i]), w_obj):
+                        return i
+            return -1
+
+        def mul(self, times):
+            return cls(self.items * times)
+
+        def add(self, w_other):
+            if not isinstance(w_other, cls):
+                raise FailedToImplement
+            return cls(self.items + w_other.items)
+
+        @jit.look_inside_iff(lambda self, w_other: unroll_condition(self))
+        def eq(self, w_other):
+            if not isinstance(w_other, cls):
+                # comparing with another kind of tuple: give up
+                raise FailedToImplement
+            items1 = self.items
+            items2 = w_other.items
+            if len(items1) != len(items2):
+                return False
+            for i in range(len(items1)):
+                if items1[i] != items2[i]:
+                    return False
+            return True
+
+        @jit.look_inside_iff(lambda self, w_other: unroll_condition(self))
+        def lt(self, w_other):
+            if not isinstance(w_other, cls):
+                raise FailedToImplement
+            items1 = self.items
+            items2 = w_other.items
+            ncmp = min(len(items1), len(items2))
+            # Search for the first index where items are different
+            for p in range(ncmp):
+                if items1[p] != items2[p]:
+                    return items1[p] < items2[p]
+            # No more items to compare -- compare sizes
+            return len(items1) < len(items2)
+
+    cls.__name__ = 'W_%sTupleObject' % name
+    _unwrapped_classes.append(cls)
+    return cls
+
+def _unwrap_int(space, w_int):
+    return space.int_w(w_int)
+
+def _wrap_int(value):
+    return W_IntObject(value)
+
+def _hash_int(space, value):
+    return value
+
+def _unwrap_float(space, w_float):
+    return space.float_w(w_float)
+
+def _wrap_float(value):
+    return W_FloatObject(value)
+
+def _unwrap_str(space, w_str):
+    return space.str_w(w_str)
+
+def _wrap_str(value):
+    return W_StringObject(value)
+
+def _hash_str(space, value):
+    return compute_hash(value)
+
+_unwrapped_classes = []
+W_IntTupleObject = make_unwrapped_class(
+    'Int', W_IntObject, _unwrap_int, _wrap_int, _hash_int)
+W_FloatTupleObject = make_unwrapped_class(
+    'Float', W_FloatObject, _unwrap_float, _wrap_float, _hash_float)
+W_StrTupleObject = make_unwrapped_class(
+    'Str', W_StringObject, _unwrap_str, _wrap_str, _hash_str)
+
+@jit.look_inside_iff(lambda space, list_w:
+                     jit.isconstant(len(list_w)) and
+                     len(list_w) < UNROLL_TUPLE_LIMIT)
+def makeunwrappedtuple(space, list_w):
+    """Returns an unwrapped tuple for the items in 'list_w', or None
+    if they are not all ints, all floats or all strs."""
+    if not list_w:
+        return None
+    w_first = list_w[0]
+    if type(w_first) is W_IntObject:
+        for w_item in list_w:
+            if type(w_item) is not W_IntObject:
+                return None
+        return W_IntTupleObject.from_list(space, list_w)
+    if type(w_first) is W_StringObject:
+        for w_item in list_w:
+            if type(w_item) is not W_StringObject:
+                return None
+        return W_StrTupleObject.from_list(space, list_w)
+    if type(w_first) is W_FloatObject:
+        for w_item in list_w:
+            if (type(w_item) is not W_FloatObject or
+                    isnan(space.float_w(w_item))):
+                return None
+        return W_FloatTupleObject.from_list(space, list_w)
+    return None
+
+# ____________________________________________________________
+
+registerimplementation(W_UnwrappedTupleObject)
+
+def delegate_UnwrappedTuple2Tuple(space, w_tuple):
+    return W_TupleObject(w_tuple.tolist())
+
+def len__UnwrappedTuple(space, w_tuple):
+    return wrapint(space, w_tuple.length())
+
+def getitem__UnwrappedTuple_ANY(space, w_tuple, w_index):
+    index = space.getindex_w(w_index, space.w_IndexError, "tuple index")
+    if index < 0:
+        index += w_tuple.length()
+    if not 0 <= index < w_tuple.length():
+        raise OperationError(space.w_IndexError,
+                             space.wrap("tuple index out of range"))
+    return w_tuple.getitem(index)
+
+def getitem__UnwrappedTuple_Slice(space, w_tuple, w_slice):
+    length = w_tuple.length()
+    start, stop, step, slicelength = w_slice.indices4(space, length)
+    assert slicelength >= 0
+    if slicelength == 0:
+        return space.newtuple([])
+    return w_tuple.getslice(start, step, slicelength)
+
+def getslice__UnwrappedTuple_ANY_ANY(space, w_tuple, w_start, w_stop):
+    length = w_tuple.length()
+    start, stop = normalize_simple_slice(space, length, w_start, w_stop)
+    if start >= stop:
+        return space.newtuple([])
+    return w_tuple.getslice(start, 1, stop - start)
+
+def contains__UnwrappedTuple_ANY(space, w_tuple, w_obj):
+    return space.newbool(w_tuple.contains(space, w_obj))
+
+def iter__UnwrappedTuple(space, w_tuple):
+    from pypy.objspace.std import iterobject
+    return iterobject.W_FastTupleIterObject(w_tuple, w_tuple.tolist())
+
+def add__UnwrappedTuple_UnwrappedTuple(space, w_tuple1, w_tuple2):
+    return w_tuple1.add(w_tuple2)
+
+def mul_unwrappedtuple_times(space, w_tuple, w_times):
+    try:
+        times = space.getindex_w(w_times, space.w_OverflowError)
+    except OperationError, e:
+        if e.match(space, space.w_TypeError):
+            raise FailedToImplement
+        raise
+    if times == 1 and space.type(w_tuple) == space.w_tuple:
+        return w_tuple
+    if times <= 0:
+        return space.newtuple([])
+    return w_tuple.mul(times)
+
+def mul__UnwrappedTuple_ANY(space, w_tuple, w_times):
+    return mul_unwrappedtuple_times(space, w_tuple, w_times)
+
+def mul__ANY_UnwrappedTuple(space, w_times, w_tuple):
+    return mul_unwrappedtuple_times(space, w_tuple, w_times)
+
+def eq__UnwrappedTuple_UnwrappedTuple(space, w_tuple1, w_tuple2):
+    return space.newbool(w_tuple1.eq(w_tuple2))
+
+def ne__UnwrappedTuple_UnwrappedTuple(space, w_tuple1, w_tuple2):
+    return space.newbool(not w_tuple1.eq(w_tuple2))
+
+def lt__UnwrappedTuple_UnwrappedTuple(space, w_tuple1, w_tuple2):
+    return space.newbool(w_tuple1.lt(w_tuple2))
+
+def gt__UnwrappedTuple_UnwrappedTuple(space, w_tuple1, w_tuple2):
+    return space.newbool(w_tuple2.lt(w_tuple1))
+
+def hash__UnwrappedTuple(space, w_tuple):
+    return wrapint(space, w_tuple.hash(space))
+
+def getnewargs__UnwrappedTuple(space, w_tuple):
+    return space.newtuple([space.newtuple(w_tuple.tolist())])
+
+def tuple_count__UnwrappedTuple_ANY(space, w_tuple, w_obj):
+    return wrapint(space, w_tuple.count(space, w_obj))
+
+def tuple_index__UnwrappedTuple_ANY_ANY_ANY(space, w_tuple, w_obj, w_start,
+                                            w_stop):
+    length = w_tuple.length()
+    start, stop = slicetype.unwrap_start_stop(space, length, w_start, w_stop)
+    i = w_tuple.find(space, w_obj, start, min(stop, length))
+    if i < 0:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("tuple.index(x): x not in tuple"))
+    return wrapint(space, i)
+
+from pypy.objspace.std import tupletype
+register_all(vars(), tupletype)
@@ -96,14 +96,10 @@ def ll_valid(entries, i):
         entries[i].value = NULLVALUE
         return False
 
-def ll_everused(entries, i):
-    return bool(entries[i].key)
-
 entrymeths = {
     'allocate': lltype.typeMethod(rdict._ll_malloc_entries),
     'delete': rdict._ll_free_entries,
     'valid': ll_valid,
-    'everused': ll_everused,
     'hash': rdict.ll_hash_from_cache,
     'no_direct_compare': True,
     }
@@ -115,21 +111,18 @@ WEAKDICTENTRYARRAY = lltype.GcArray(WEAKDICTENTRY,
 @jit.dont_look_inside
 def ll_new_weakdict():
     d = lltype.malloc(WEAKDICT)
-    d.entries = WEAKDICT.entries.TO.allocate(rdict.DICT_INITSIZE)
-    d.num_items = 0
-    d.resize_counter = rdict.DICT_INITSIZE * 2
+    rdict._ll_dict_init(d, rdict.DICT_INITSIZE)
     return d
 
 @jit.dont_look_inside
 def ll_get(d, llkey):
     hash = compute_identity_hash(llkey)
-    i = rdict.ll_dict_lookup(d, llkey, hash) & rdict.MASK
-    #llop.debug_print(lltype.Void, i, 'get', hex(hash),
-    #                 ll_debugrepr(d.entries[i].key),
-    #                 ll_debugrepr(d.entries[i].value))
-    # NB. ll_valid() above was just called at least on entry i, so if
-    # it is an invalid entry with a dead weakref, the value was reset
-    # to NULLVALUE.
+    i = rdict.ll_dict_lookup(d, llkey, hash, rdict.FLAG_LOOKUP)
+    #llop.debug_print(lltype.Void, i, 'get', hex(hash))
+    # NB. an entry is only found if ll_keyeq() could dereference its
+    # weakref, so it cannot be an entry with a dead key.
+    if i < 0:
+        return NULLVALUE
     return d.entries[i].value
 
 @jit.dont_look_inside
@@ -143,28 +136,27 @@ def ll_set(d, llkey, llvalue):
 def ll_set_nonnull(d, llkey, llvalue):
     hash = compute_identity_hash(llkey)
     keyref = weakref_create(llkey)    # GC effects here, before the rest
-    i = rdict.ll_dict_lookup(d, llkey, hash) & rdict.MASK
-    everused = d.entries.everused(i)
-    d.entries[i].key = keyref
-    d.entries[i].value = llvalue
-    d.entries[i].f_hash = hash
-    #llop.debug_print(lltype.Void, i, 'stored', hex(hash),
-    #                 ll_debugrepr(llkey),
-    #                 ll_debugrepr(llvalue))
-    if not everused:
-        d.resize_counter -= 3
-        if d.resize_counter <= 0:
-            #llop.debug_print(lltype.Void, 'RESIZE')
-            ll_weakdict_resize(d)
+    i = rdict.ll_dict_lookup(d, llkey, hash, rdict.FLAG_STORE)
+    if i >= 0:
+        d.entries[i].key = keyref
+        d.entries[i].value = llvalue
+        #llop.debug_print(lltype.Void, i, 'stored', hex(hash),
+        #                 ll_debugrepr(llkey),
+        #                 ll_debugrepr(llvalue))
+        return
+    if d.num_used_items == len(d.entries) or d.resize_counter <= 0:
+        #llop.debug_print(lltype.Void, 'RESIZE')
+        ll_weakdict_resize(d)
+        rdict._ll_dict_insert_clean_index(d, hash, d.num_used_items)
+    rdict._ll_dict_append_entry(d, keyref, llvalue, hash)
 
 @jit.dont_look_inside
 def ll_set_null(d, llkey):
     hash = compute_identity_hash(llkey)
-    i = rdict.ll_dict_lookup(d, llkey, hash) & rdict.MASK
-    if d.entries.everused(i):
-        # If the entry was ever used, clean up its key and value.
-        # We don't store a NULL value, but a dead weakref, because
-        # the entry must still be marked as everused().
+    i = rdict.ll_dict_lookup(d, llkey, hash, rdict.FLAG_DELETE)
+    if i >= 0:
+        # The index slot is now marked as deleted; clean up the key
+        # and value of the entry, which is dropped at the next resize.
         d.entries[i].key = llmemory.dead_wref
         d.entries[i].value = NULLVALUE
         #llop.debug_print(lltype.Void, i, 'zero')
@@ -172,7 +164,7 @@ def ll_set_null(d, llkey):
 def ll_update_num_items(d):
     entries = d.entries
     num_items = 0
-    for i in range(len(entries)):
+    for i in range(d.num_used_items):
         if entries.valid(i):
             num_items += 1
     d.num_items = num_items
@@ -204,8 +196,10 @@ dictmeths = {
     'paranoia': False,
     }
 
-WEAKDICT = lltype.GcStruct("weakkeydict",
-                           ("num_items", lltype.Signed),
-                           ("resize_counter", lltype.Signed),
-                           ("entries", lltype.Ptr(WEAKDICTENTRYARRAY)),
-                           adtmeths=dictmeths)
+fields = [("num_items", lltype.Signed),
+          ("num_used_items", lltype.Signed),
+          ("resize_counter", lltype.Signed)]
+fields.extend(rdict.DICTINDEX_FIELDS)
+fields.append(("entries", lltype.Ptr(WEAKDICTENTRYARRAY)))
+WEAKDICT = lltype.GcStruct("weakkeydict", adtmeths=dictmeths, *fields)
+del fields
@@ -22,9 +22,6 @@ class WeakValueDictRepr(Repr):
             value = entries[i].value
             return bool(value) and bool(weakref_deref(rclass.OBJECTPTR, value))
 
-        def ll_everused(entries, i):
-            return bool(entries[i].value)
-
         def ll_hash(entries, i):
             return fasthashfn(entries[i].key)
 
@@ -32,7 +29,6 @@ class WeakValueDictRepr(Repr):
             'allocate': lltype.typeMethod(rdict._ll_malloc_entries),
             'delete': rdict._ll_free_entries,
             'valid': ll_valid,
-            'everused': ll_everused,
             'hash': ll_hash,
             }
         WEAKDICTENTRY = lltype.Struct("weakdictentry",
@@ -50,12 +46,13 @@ class WeakValueDictRepr(Repr):
             'paranoia': False,
             }
 
-        self.WEAKDICT = lltype.GcStruct(
-            "weakvaldict",
-            ("num_items", lltype.Signed),
-            ("resize_counter", lltype.Signed),
-            ("entries", lltype.Ptr(WEAKDICTENTRYARRAY)),
-            adtmeths=dictmeths)
+        fields = [("num_items", lltype.Signed),
+                  ("num_used_items", lltype.Signed),
+                  ("resize_counter", lltype.Signed)]
+        fields.extend(rdict.DICTINDEX_FIELDS)
+        fields.append(("entries", lltype.Ptr(WEAKDICTENTRYARRAY)))
+        self.WEAKDICT = lltype.GcStruct("weakvaldict", adtmeths=dictmeths,
+                                        *fields)
 
         self.lowleveltype = lltype.Ptr(self.WEAKDICT)
         self.dict_cache = {}
@@ -105,16 +102,16 @@ class WeakValueDictRepr(Repr):
     @jit.dont_look_inside
     def ll_new_weakdict(self):
         d = lltype.malloc(self.WEAKDICT)
-        d.entries = self.WEAKDICT.entries.TO.allocate(rdict.DICT_INITSIZE)
-        d.num_items = 0
-        d.resize_counter = rdict.DICT_INITSIZE * 2
+        rdict._ll_dict_init(d, rdict.DICT_INITSIZE)
         return d
 
     @jit.dont_look_inside
     def ll_get(self, d, llkey):
         hash = self.ll_keyhash(llkey)
-        i = rdict.ll_dict_lookup(d, llkey, hash) & rdict.MASK
+        i = rdict.ll_dict_lookup(d, llkey, hash, rdict.FLAG_LOOKUP)
         #llop.debug_print(lltype.Void, i, 'get')
+        if i < 0:
+            return lltype.nullptr(rclass.OBJECTPTR.TO)
         valueref = d.entries[i].value
         if valueref:
             return weakref_deref(rclass.OBJECTPTR, valueref)
@@ -132,25 +129,24 @@ class WeakValueDictRepr(Repr):
     def ll_set_nonnull(self, d, llkey, llvalue):
         hash = self.ll_keyhash(llkey)
         valueref = weakref_create(llvalue)    # GC effects here, before the rest
-        i = rdict.ll_dict_lookup(d, llkey, hash) & rdict.MASK
-        everused = d.entries.everused(i)
-        d.entries[i].key = llkey
-        d.entries[i].value = valueref
-        #llop.debug_print(lltype.Void, i, 'stored')
-        if not everused:
-            d.resize_counter -= 3
-            if d.resize_counter <= 0:
-                #llop.debug_print(lltype.Void, 'RESIZE')
-                self.ll_weakdict_resize(d)
+        i = rdict.ll_dict_lookup(d, llkey, hash, rdict.FLAG_STORE)
+        if i >= 0:
+            d.entries[i].value = valueref
+            #llop.debug_print(lltype.Void, i, 'stored')
+            return
+        if d.num_used_items == len(d.entries) or d.resize_counter <= 0:
+            #llop.debug_print(lltype.Void, 'RESIZE')
+            self.ll_weakdict_resize(d)
+            rdict._ll_dict_insert_clean_index(d, hash, d.num_used_items)
+        rdict._ll_dict_append_entry(d, llkey, valueref, hash)
 
     @jit.dont_look_inside
     def ll_set_null(self, d, llkey):
         hash = self.ll_keyhash(llkey)
-        i = rdict.ll_dict_lookup(d, llkey, hash) & rdict.MASK
-        if d.entries.everused(i):
-            # If the entry was ever used, clean up its key and value.
-            # We don't store a NULL value, but a dead weakref, because
-            # the entry must still be marked as everused().
+        i = rdict.ll_dict_lookup(d, llkey, hash, rdict.FLAG_DELETE)
+        if i >= 0:
+            # The index slot is now marked as deleted; clean up the key
+            # and value of the entry, which is dropped at the next resize.
             d.entries[i].value = llmemory.dead_wref
             if isinstance(self.r_key.lowleveltype, lltype.Ptr):
                 d.entries[i].key = self.r_key.convert_const(None)
@@ -162,7 +158,7 @@ class WeakValueDictRepr(Repr):
         # first set num_items to its correct, up-to-date value
         entries = d.entries
         num_items = 0
-        for i in range(len(entries)):
+        for i in range(d.num_used_items):
             if entries.valid(i):
                 num_items += 1
         d.num_items = num_items
@@ -409,7 +409,10 @@ PARAMETER_DOCS = {
     'trace_eagerness': 'number of times a guard has to fail before we start compiling a bridge',
     'trace_limit': 'number of recorded operations before we abort tracing with ABORT_TOO_LONG',
     'inlining': 'inline python functions or not (1/0)',
+    'async_compile': 'queue the traced loops until compile_pending_loops() '
+                     'is called, instead of compiling them at once (1/0)',
     'loop_longevity': 'a parameter controlling how long loops will be kept before being freed, an estimate',
+    'memory_budget': 'estimated memory, in KB, of the loops and their resume data above which the least recently entered loops are freed (0 = no limit)',
     'retrace_limit': 'how many times we can try retracing before giving up',
     'max_retrace_guards': 'number of extra guards a retrace can cause',
     'max_unroll_loops': 'number of extra unrollings a loop can cause',
@@ -422,7 +425,9 @@ PARAMETERS = {'threshold': 1039, # just above 1024, prime
               'trace_eagerness': 200,
               'trace_limit': 6000,
               'inlining': 1,
+              'async_compile': 0,
               'loop_longevity': 1000,
+              'memory_budget': 0,
               'retrace_limit': 5,
               'max_retrace_guards': 15,
               'max_unroll_loops': 4,
@@ -448,7 +453,7 @@ class JitDriver(object):
                  get_jitcell_at=None, set_jitcell_at=None,
                  get_printable_location=None, confirm_enter_jit=None,
                  can_never_inline=None, should_unroll_one_iteration=None,
-                 name='jitdriver'):
+                 is_known_hot=None, name='jitdriver'):
         if greens is not None:
             self.greens = greens
         self.name = name
@@ -470,6 +475,7 @@ class JitDriver(object):
         self.confirm_enter_jit = confirm_enter_jit
         self.can_never_inline = can_never_inline
         self.should_unroll_one_iteration = should_unroll_one_iteration
+        self.is_known_hot = is_known_hot
 
     def _freeze_(self):
         return True
@@ -600,6 +606,14 @@ def set_user_param(driver, text):
                 raise ValueError
 set_user_param._annspecialcase_ = 'specialize:arg(0)'
 
+def compile_pending_loops():
+    """Compile the loops that were traced while the 'async_compile'
+    parameter was set.  Must not be
+    called from code seen by the JIT: do it e.g. from a thread that
+    would otherwise be idle.
+    """
+    # special-cased by ExtRegistryEntry
+
 
 # ____________________________________________________________
 #
@@ -807,6 +821,21 @@ class ExtSetParam(ExtRegistryEntry):
         return hop.genop('jit_marker', vlist,
                          resulttype=lltype.Void)
 
+class ExtCompilePendingLoops(ExtRegistryEntry):
+    _about_ = compile_pending_loops
+
+    def compute_result_annotation(self):
+        from pypy.annotation import model as annmodel
+        return annmodel.s_None
+
+    def specialize_call(self, hop):
+        from pypy.rpython.lltypesystem import lltype
+
+        hop.exception_cannot_occur()
+        vlist = [hop.inputconst(lltype.Void, "compile_pending_loops"),
+                 hop.inputconst(lltype.Void, None)]
+        return hop.genop('jit_marker', vlist, resulttype=lltype.Void)
+
 class AsmInfo(object):
     """ An addition to JitDebugInfo concerning assembler. Attributes:
     
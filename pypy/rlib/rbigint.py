@@ -2,6 +2,7 @@ from pypy.rlib.rarithmetic import LONG_BIT, intmask, r_uint, r_ulonglong
 from pypy.rlib.rarithmetic import ovfcheck, r_longlong, widen, is_valid_int
 from pypy.rlib.rarithmetic import most_neg_value_of_same_type
 from pypy.rlib.rfloat import isfinite
+from pypy.rlib.rstring import StringBuilder
 from pypy.rlib.debug import make_sure_not_resized, check_regular_int
 from pypy.rlib.objectmodel import we_are_translated, specialize
 from pypy.rlib import jit
@@ -35,12 +36,39 @@ USE_KARATSUBA = True # set to False for comparison
 KARATSUBA_CUTOFF = 70
 KARATSUBA_SQUARE_CUTOFF = 2 * KARATSUBA_CUTOFF
 
+# For even bigger and balanced operands, use the Toom-Cook 3-way
+# algorithm, which does 5 multiplications of a third of the size
+# instead of Karatsuba's 3 of half the size, at the price of more
+# additions.  These cutoffs can be tuned with
+# pypy/translator/goal/targetbigintbench.py.
+
+USE_TOOMCOOK = True # set to False for comparison
+TOOM_CUTOFF = 500
+
 # For exponentiation, use the binary left-to-right algorithm
-# unless the exponent contains more than FIVEARY_CUTOFF digits.
-# In that case, do 5 bits at a time.  The potential drawback is that
-# a table of 2**5 intermediate results is computed.
+# unless the exponent contains more than WINDOW_CUTOFF digits.
+# In that case, use a sliding window of several bits, whose size
+# depends on the size of the exponent.  The potential drawback is that
+# a table of 2**(size-1) intermediate results is computed.
+
+WINDOW_CUTOFF = 8
+MAX_WINDOW_SIZE = 7
+
+# For division, use the schoolbook algorithm unless both the divisor
+# and the quotient contain more than DIV_CUTOFF digits.  In that case,
+# use the recursive Burnikel-Ziegler algorithm, which relies on the fast
+# multiplication above.
+
+DIV_CUTOFF = 2 * KARATSUBA_CUTOFF
 
-FIVEARY_CUTOFF = 8
+# For conversions to and from a base that is not a power of 2, use the
+# quadratic digit-by-digit algorithms unless the number contains more
+# than FORMAT_CUTOFF digits (or the string more than PARSE_CUTOFF chunks
+# of digits).  In that case, split the number by precomputed powers of
+# the base.
+
+FORMAT_CUTOFF = 4 * KARATSUBA_CUTOFF
+PARSE_CUTOFF = 4 * KARATSUBA_CUTOFF
 
 
 def _mask_digit(x):
@@ -366,7 +394,9 @@ class rbigint(object):
         return result
 
     def mul(self, other):
-        if USE_KARATSUBA:
+        if USE_TOOMCOOK:
+            result = _tc_mul(self, other)
+        elif USE_KARATSUBA:
             result = _k_mul(self, other)
         else:
             result = _x_mul(self, other)
@@ -414,8 +444,9 @@ class rbigint(object):
     def pow(a, b, c=None):
         negativeOutput = False  # if x<0 return negative output
 
-        # 5-ary values.  If the exponent is large enough, table is
-        # precomputed so that table[i] == a**i % c for i in range(32).
+        # sliding window values.  If the exponent is large enough, table
+        # is precomputed so that table[i] == a**(2*i+1) % c for i in
+        # range(2**(size-1)).
         # python translation: the table is computed when needed.
 
         if b.sign < 0:  # if exponent is negative
@@ -456,7 +487,7 @@ class rbigint(object):
 
         # python adaptation: moved macros REDUCE(X) and MULT(X, Y, result)
         # into helper function result = _help_mult(x, y, c)
-        if b.numdigits() <= FIVEARY_CUTOFF:
+        if b.numdigits() <= WINDOW_CUTOFF:
             # Left-to-right binary exponentiation (HAC Algorithm 14.79)
             # http://www.cacr.math.uwaterloo.ca/hac/about/chap14.pdf
             i = b.numdigits() - 1
@@ -470,50 +501,43 @@ class rbigint(object):
                     j >>= 1
                 i -= 1
         else:
-            # Left-to-right 5-ary exponentiation (HAC Algorithm 14.82)
-            # This is only useful in the case where c != None.
-            # z still holds 1L
-            table = [z] * 32
-            table[0] = z
-            for i in range(1, 32):
-                table[i] = _help_mult(table[i-1], a, c)
-            i = b.numdigits()
-            # Note that here SHIFT is not a multiple of 5.  The difficulty
-            # is to extract 5 bits at a time from 'b', starting from the
-            # most significant digits, so that at the end of the algorithm
-            # it falls exactly to zero.
-            # m  = max number of bits = i * SHIFT
-            # m+ = m rounded up to the next multiple of 5
-            # j  = (m+) % SHIFT = (m+) - (i * SHIFT)
-            # (computed without doing "i * SHIFT", which might overflow)
-            j = i % 5
-            if j != 0:
-                j = 5 - j
-            if not we_are_translated():
-                assert j == (i*SHIFT+4)//5*5 - i*SHIFT
-            #
-            accum = r_uint(0)
-            while True:
-                j -= 5
-                if j >= 0:
-                    index = (accum >> j) & 0x1f
-                else:
-                    # 'accum' does not have enough digit.
-                    # must get the next digit from 'b' in order to complete
+            # Left-to-right sliding window exponentiation (HAC Algorithm
+            # 14.85).  Pick the window size that minimizes the number of
+            # multiplications, counting the table and one multiplication
+            # per window.
+            nbits = b.bit_length()
+            size = 1
+            while (size < MAX_WINDOW_SIZE and
+                   (1 << size) + nbits // (size + 2) <
+                   (1 << (size - 1)) + nbits // (size + 1)):
+                size += 1
+            # table[i] == a**(2*i+1)
+            table = [a] * (1 << (size - 1))
+            if c is not None:
+                table[0] = _help_mult(a, z, c)
+            a2 = _help_mult(table[0], table[0], c)
+            for i in range(1, len(table)):
+                table[i] = _help_mult(table[i-1], a2, c)
+            i = nbits - 1
+            while i >= 0:
+                if not _bit(b, i):
+                    z = _help_mult(z, z, c)
                     i -= 1
-                    if i < 0:
-                        break    # done
-                    bi = b.udigit(i)
-                    index = ((accum << (-j)) | (bi >> (j+SHIFT))) & 0x1f
-                    accum = bi
-                    j += SHIFT
-                #
-                for k in range(5):
+                    continue
+                # find the longest window b[i:l] ending with a 1 bit
+                l = i - size + 1
+                if l < 0:
+                    l = 0
+                while not _bit(b, l):
+                    l += 1
+                index = 0
+                j = i
+                while j >= l:
                     z = _help_mult(z, z, c)
-                if index:
-                    z = _help_mult(z, table[index], c)
-            #
-            assert j == -5
+                    index = (index << 1) | _bit(b, j)
+                    j -= 1
+                z = _help_mult(z, table[index >> 1], c)
+                i = l - 1
 
         if negativeOutput and z.sign != 0:
             z = z.sub(c)
@@ -669,6 +693,10 @@ class rbigint(object):
 # Helper Functions
 
 
+def _bit(a, i):
+    """ Return the i'th bit of the absolute value of a. """
+    return (a.digit(i // SHIFT) >> (i % SHIFT)) & 1
+
 def _help_mult(x, y, c):
     """
     Multiply two values, then reduce the result:
@@ -1058,6 +1086,99 @@ clearly >= each of ah*bh and al*bl, there's always enough room to subtract
 ah*bh and al*bl too.
 """
 
+def _tcmul_split(n, size):
+    """
+    A helper for Toom-Cook multiplication (_tc_mul).
+    Takes a bigint "n" and an integer "size" representing the place to
+    split, and sets high, middle and low such that
+    abs(n) == (high << 2*size) + (middle << size) + low,
+    viewing the shift as being by digits.  The sign bit is ignored, and
+    the return values are >= 0.
+    """
+    size_n = n.numdigits()
+    size_lo = min(size_n, size)
+    size_mid = min(size_n, 2 * size)
+
+    lo = rbigint(n._digits[:size_lo], 1)
+    mid = rbigint(n._digits[size_lo:size_mid], 1)
+    hi = rbigint(n._digits[size_mid:], 1)
+    lo._normalize()
+    mid._normalize()
+    hi._normalize()
+    return hi, mid, lo
+
+def _tc_divexact3(n):
+    """ Divide n by 3, knowing that the division is exact. """
+    z, rem = _divrem1(n, 3)
+    assert rem == 0
+    z.sign *= n.sign
+    return z
+
+def _tc_mul(a, b):
+    """
+    Toom-Cook 3-way multiplication.  Ignores the input signs, and returns
+    the absolute value of the product.  The operands are split in three
+    pieces, seen as polynomials in X == BASE**shift, and evaluated at
+    0, 1, -1, -2 and infinity; the five products are then interpolated
+    back to the coefficients of the product, using Bodrato's sequence.
+    """
+    asize = a.numdigits()
+    bsize = b.numdigits()
+    if asize > bsize:
+        a, b, asize, bsize = b, a, bsize, asize
+
+    # Use Karatsuba when either number is too small, or when they are too
+    # unbalanced (_k_mul then works on slices of b).
+    if asize <= TOOM_CUTOFF or 2 * asize <= bsize:
+        return _k_mul(a, b)
+
+    shift = (bsize + 2) // 3
+    a2, a1, a0 = _tcmul_split(a, shift)
+    p0 = a0.add(a2)
+    p1 = p0.add(a1)
+    pm1 = p0.sub(a1)
+    pm2 = pm1.add(a2).lshift(1).sub(a0)
+
+    # the recursive calls see identical operands when squaring
+    if a is b:
+        r0 = a0.mul(a0)
+        r1 = p1.mul(p1)
+        rm1 = pm1.mul(pm1)
+        rm2 = pm2.mul(pm2)
+        rinf = a2.mul(a2)
+    else:
+        b2, b1, b0 = _tcmul_split(b, shift)
+        q0 = b0.add(b2)
+        q1 = q0.add(b1)
+        qm1 = q0.sub(b1)
+        qm2 = qm1.add(b2).lshift(1).sub(b0)
+        r0 = a0.mul(b0)
+        r1 = p1.mul(q1)
+        rm1 = pm1.mul(qm1)
+        rm2 = pm2.mul(qm2)
+        rinf = a2.mul(b2)
+
+    # interpolation
+    r3 = _tc_divexact3(rm2.sub(r1))
+    r1 = r1.sub(rm1).rshift(1)
+    r2 = rm1.sub(r0)
+    r3 = r2.sub(r3).rshift(1).add(rinf.lshift(1))
+    r2 = r2.add(r1).sub(rinf)
+    r1 = r1.sub(r3)
+
+    # recomposition.  All the coefficients are >= 0, and each of them
+    # shifted into place is at most the product.
+    ret = rbigint([NULLDIGIT] * (asize + bsize), 1)
+    size = ret.numdigits()
+    for k, r in [(0, r0), (1, r1), (2, r2), (3, r3), (4, rinf)]:
+        assert r.sign >= 0
+        if r.sign:
+            ofs = k * shift
+            carry = _v_iadd(ret, ofs, size - ofs, r, r.numdigits())
+            assert carry == 0
+    ret._normalize()
+    return ret
+
 def _k_lopsided_mul(a, b):
     """
     b has at least twice the digits of a, and a is big enough that Karatsuba
@@ -1304,6 +1425,8 @@ def _divrem(a, b):
     if size_b == 1:
         z, urem = _divrem1(a, b.digit(0))
         rem = rbigint([_store_digit(urem)], int(urem != 0))
+    elif size_b > DIV_CUTOFF and size_a - size_b > DIV_CUTOFF:
+        z, rem = _divrem_recursive(a, b)
     else:
         z, rem = _x_divrem(a, b)
     # Set the signs.
@@ -1316,6 +1439,98 @@ def _divrem(a, b):
         rem.sign = - rem.sign
     return z, rem
 
+def _digits_slice(a, lo, hi):
+    """ Return the positive bigint made of the digits lo to hi of a """
+    assert lo >= 0
+    size_a = a.numdigits()
+    if hi > size_a:
+        hi = size_a
+    if lo >= hi:
+        return rbigint()
+    z = rbigint(a._digits[lo:hi], 1)
+    z._normalize()
+    return z
+
+def _digits_join(hi, lo, n):
+    """ Return hi * BASE**n + lo, for 0 <= lo < BASE**n and hi >= 0 """
+    if hi.sign == 0:
+        return lo
+    size_hi = hi.numdigits()
+    size_lo = lo.numdigits()
+    assert size_lo <= n
+    z = rbigint([NULLDIGIT] * (n + size_hi), 1)
+    i = 0
+    while i < size_lo:
+        z.setdigit(i, lo.digit(i))
+        i += 1
+    i = 0
+    while i < size_hi:
+        z.setdigit(n + i, hi.digit(i))
+        i += 1
+    z._normalize()
+    return z
+
+def _div2n1n(a, b, n):
+    """ Divide a by b, where b has n digits and its top bit set, and
+    a < b * BASE**n.  Return the quotient and the remainder. """
+    if n <= DIV_CUTOFF:
+        return _divrem(a, b)
+    pad = n & 1
+    if pad:
+        a = a.lshift(SHIFT)
+        b = b.lshift(SHIFT)
+        n += 1
+    half_n = n >> 1
+    b1 = _digits_slice(b, half_n, n)
+    b2 = _digits_slice(b, 0, half_n)
+    q1, r = _div3n2n(_digits_slice(a, n, 2 * n), _digits_slice(a, half_n, n),
+                     b, b1, b2, half_n)
+    q2, r = _div3n2n(r, _digits_slice(a, 0, half_n), b, b1, b2, half_n)
+    if pad:
+        r = r.rshift(SHIFT)
+    return _digits_join(q1, q2, half_n), r
+
+def _div3n2n(a12, a3, b, b1, b2, n):
+    """ Divide a12 * BASE**n + a3 by b == b1 * BASE**n + b2, where
+    b1 and b2 have n digits and the result is known to fit in n digits. """
+    if _digits_slice(a12, n, a12.numdigits()).eq(b1):
+        # the quotient of the top digits would be BASE**n, which is
+        # one too much: use BASE**n - 1 instead
+        q = rbigint([_store_digit(MASK)] * n, 1)
+        r = a12.sub(b1.lshift(n * SHIFT)).add(b1)
+    else:
+        q, r = _div2n1n(a12, b1, n)
+    r = _digits_join(r, a3, n).sub(q.mul(b2))
+    while r.sign < 0:
+        q = q.sub(rbigint.fromint(1))
+        r = r.add(b)
+    return q, r
+
+def _divrem_recursive(a, b):
+    """ Burnikel-Ziegler division, ignoring the signs.  Only worth it
+    for big divisors and quotients. """
+    n = b.numdigits()
+    # normalize so that the top bit of b is set
+    shift = SHIFT - bits_in_digit(b.digit(n - 1))
+    a = a.abs().lshift(shift)
+    b = b.abs().lshift(shift)
+    # divide a, one chunk of n digits at a time, starting from the top;
+    # the remainder r is always smaller than b
+    nchunks = (a.numdigits() + n - 1) // n
+    z = rbigint([NULLDIGIT] * (nchunks * n), 1)
+    r = rbigint()
+    i = nchunks - 1
+    while i >= 0:
+        chunk = _digits_slice(a, i * n, (i + 1) * n)
+        q, r = _div2n1n(_digits_join(r, chunk, n), b, n)
+        j = 0
+        while j < q.numdigits():
+            z.setdigit(i * n + j, q.digit(j))
+            j += 1
+        i -= 1
+    z._normalize()
+    return z, r.rshift(shift)
+
 # ______________ conversions to double _______________
 
 def _AsScaledDouble(v):
@@ -1592,6 +1807,56 @@ def _format(a, digits, prefix='', suffix=''):
     Convert a bigint object to a string, using a given conversion base.
     Return a string object.
     """
+    base = len(digits)
+    if a.numdigits() > FORMAT_CUTOFF and (base & (base - 1)) != 0:
+        return _format_recursive(a, digits, prefix, suffix)
+    return _format_simple(a, digits, prefix, suffix)
+
+def _format_recursive(a, digits, prefix, suffix):
+    """
+    Divide-and-conquer version of _format(), for big numbers in a base
+    that is not a power of 2.  The number is split by the powers
+    base ** (mindigits * 2**i), computed by repeated squaring.
+    """
+    base = len(digits)
+    size_a = a.numdigits()
+    leafmax = BASE_MAX[base]
+    mindigits = 0
+    i = 1
+    while i < leafmax:
+        i *= base
+        mindigits += 1
+    mindigits *= FORMAT_CUTOFF // 2
+    pts = [rbigint.fromint(leafmax).pow(rbigint.fromint(FORMAT_CUTOFF // 2))]
+    while 2 * pts[-1].numdigits() - 1 <= size_a:
+        pts.append(pts[-1].mul(pts[-1]))
+
+    output = StringBuilder()
+    if a.sign < 0:
+        output.append('-')
+    output.append(prefix)
+    _format_split(a.abs(), len(pts) - 1, output, output.getlength(),
+                  pts, digits, mindigits)
+    output.append(suffix)
+    return output.build()
+
+def _format_split(x, i, output, size_prefix, pts, digits, mindigits):
+    # writes the positive x < pts[i] ** 2, padded with zeroes to
+    # 2 ** (i + 1) * mindigits digits unless it is the leading part
+    leading = output.getlength() == size_prefix
+    if leading and x.sign == 0:
+        return
+    if i < 0:
+        s = _format_simple(x, digits)
+        if not leading:
+            output.append_multiple_char('0', mindigits - len(s))
+        output.append(s)
+        return
+    top, bot = _divrem(x, pts[i])
+    _format_split(top, i - 1, output, size_prefix, pts, digits, mindigits)
+    _format_split(bot, i - 1, output, size_prefix, pts, digits, mindigits)
+
+def _format_simple(a, digits, prefix='', suffix=''):
     size_a = a.numdigits()
 
     base = len(digits)
@@ -1870,6 +2135,32 @@ BASE_MAX = [0, 0] + [digits_max_for_base(_base) for _base in range(2, 37)]
 DEC_MAX = digits_max_for_base(10)
 assert DEC_MAX == BASE_MAX[10]
 
+def _chunks_to_bigint(chunks, digitmax):
+    # turns a list of chunks, each of them smaller than digitmax and
+    # the most significant first, into a bigint
+    powers = [rbigint.fromint(digitmax)]
+    return _chunks_join(chunks, 0, len(chunks), digitmax, powers)
+
+def _chunks_join(chunks, start, stop, digitmax, powers):
+    # powers[k] == digitmax ** (2 ** k), extended as needed
+    n = stop - start
+    if n <= PARSE_CUTOFF:
+        a = rbigint()
+        while start < stop:
+            a = _muladd1(a, digitmax, chunks[start])
+            start += 1
+        return a
+    # the low part gets the largest power of 2 of chunks below n
+    k = 0
+    while (2 << k) < n:
+        k += 1
+    while len(powers) <= k:
+        powers.append(powers[-1].mul(powers[-1]))
+    mid = stop - (1 << k)
+    hi = _chunks_join(chunks, start, mid, digitmax, powers)
+    lo = _chunks_join(chunks, mid, stop, digitmax, powers)
+    return hi.mul(powers[k]).add(lo)
+
 def _decimalstr_to_bigint(s):
     # a string that has been already parsed to be decimal and valid,
     # is turned into a bigint
@@ -1882,38 +2173,38 @@ def _decimalstr_to_bigint(s):
     elif s[p] == '+':
         p += 1
 
-    a = rbigint()
+    chunks = []
     tens = 1
     dig = 0
     ord0 = ord('0')
     while p < lim:
+        if tens == DEC_MAX:
+            chunks.append(dig)
+            tens = 1
+            dig = 0
         dig = dig * 10 + ord(s[p]) - ord0
         p += 1
         tens *= 10
-        if tens == DEC_MAX or p == lim:
-            a = _muladd1(a, tens, dig)
-            tens = 1
-            dig = 0
+    a = _muladd1(_chunks_to_bigint(chunks, DEC_MAX), tens, dig)
     if sign and a.sign == 1:
         a.sign = -1
     return a
 
 def parse_digit_string(parser):
     # helper for objspace.std.strutil
-    a = rbigint()
     base = parser.base
     digitmax = BASE_MAX[base]
+    chunks = []
     tens, dig = 1, 0
     while True:
         digit = parser.next_digit()
-        if tens == digitmax or digit < 0:
-            a = _muladd1(a, tens, dig)
-            if digit < 0:
-                break
-            dig = digit
-            tens = base
-        else:
-            dig = dig * base + digit
-            tens *= base
+        if digit < 0:
+            break
+        if tens == digitmax:
+            chunks.append(dig)
+            tens, dig = 1, 0
+        dig = dig * base + digit
+        tens *= base
+    a = _muladd1(_chunks_to_bigint(chunks, digitmax), tens, dig)
     a.sign *= parser.sign
     return a
@@ -71,6 +71,58 @@ class CanMoveEntry(ExtRegistryEntry):
         hop.exception_cannot_occur()
         return hop.genop('gc_can_move', hop.args_v, resulttype=hop.r_result)
 
+def pin(p):
+    """Try to prevent the GC object 'p' from moving, typically while
+    its content is filled by a system call.  Returns True if 'p' is now
+    pinned, and then unpin(p) must be called as soon as possible.  Only
+    young objects without GC pointers, like strings, can be pinned, and
+    only a few of them at a time; when running directly, or with a GC
+    that does not support pinning, this always returns False.  Don't
+    take the id() or identityhash() of a pinned object.
+    """
+    return False
+
+def unpin(p):
+    """Cancel a successful pin(p)."""
+    raise AssertionError("pin() always returns False, so unpin() "
+                         "should not be called")
+
+def _is_pinned(p):
+    """Tells if 'p' is currently pinned.  Only for tests."""
+    return False
+
+class PinEntry(ExtRegistryEntry):
+    _about_ = pin
+
+    def compute_result_annotation(self, s_p):
+        from pypy.annotation import model as annmodel
+        return annmodel.SomeBool()
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        return hop.genop('gc_pin', hop.args_v, resulttype=hop.r_result)
+
+class UnpinEntry(ExtRegistryEntry):
+    _about_ = unpin
+
+    def compute_result_annotation(self, s_p):
+        pass
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        hop.genop('gc_unpin', hop.args_v)
+
+class IsPinnedEntry(ExtRegistryEntry):
+    _about_ = _is_pinned
+
+    def compute_result_annotation(self, s_p):
+        from pypy.annotation import model as annmodel
+        return annmodel.SomeBool()
+
+    def specialize_call(self, hop):
+        hop.exception_cannot_occur()
+        return hop.genop('gc__is_pinned', hop.args_v, resulttype=hop.r_result)
+
 def _make_sure_does_not_move(p):
     """'p' is a non-null GC object.  This (tries to) make sure that the
     object does not move any more, by forcing collections if needed.
@@ -475,3 +527,42 @@ class Entry(ExtRegistryEntry):
     def specialize_call(self, hop):
         hop.exception_is_here()
         return hop.genop('gc_typeids_z', [], resulttype = hop.r_result)
+
+# ____________________________________________________________
+# Statistics recorded by the GC, for get_gc_stat().  The times are in
+# seconds.  A major collection "pause" is a whole major collection with
+# minimark, but only one step of it with incminimark.
+
+GC_STAT_MINOR_COLLECTIONS        = 0
+GC_STAT_MINOR_COLLECTION_TIME    = 1
+GC_STAT_MINOR_COLLECTION_MAX_TIME = 2
+GC_STAT_MAJOR_COLLECTIONS        = 3
+GC_STAT_MAJOR_COLLECTION_PAUSES  = 4
+GC_STAT_MAJOR_COLLECTION_TIME    = 5
+GC_STAT_MAJOR_COLLECTION_MAX_TIME = 6
+GC_STAT_FINALIZER_TIME           = 7
+GC_STAT_BYTES_PROMOTED           = 8
+GC_STAT_CARD_MARKING_SCANS       = 9
+GC_STAT_NURSERY_SIZE             = 10
+
+# the names, in the order of the GC_STAT_* numbers above
+GC_STATS = ['minor_collections', 'minor_collection_time',
+            'minor_collection_max_time', 'major_collections',
+            'major_collection_pauses', 'major_collection_time',
+            'major_collection_max_time', 'finalizer_time',
+            'bytes_promoted', 'card_marking_scans', 'nursery_size']
+
+def get_gc_stat(index):
+    """Return the statistic GC_STAT_xxx recorded by the GC, as a float,
+    or -1.0 if the GC does not record it."""
+    return -1.0
+
+class Entry(ExtRegistryEntry):
+    _about_ = get_gc_stat
+    def compute_result_annotation(self, s_index):
+        from pypy.annotation.model import SomeFloat
+        return SomeFloat()
+    def specialize_call(self, hop):
+        vlist = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_get_stat', vlist, resulttype = hop.r_result)
@@ -392,6 +392,22 @@ class Test_rbigint(object):
             v = two.pow(t, rbigint.fromint(n))
             assert v.toint() == pow(2, t.tolong(), n)
 
+    def test_pow_sliding_window(self):
+        # exponents above WINDOW_CUTOFF digits, of various sizes to get
+        # various window sizes
+        for ebits in [260, 1200]:
+            x = (1L << 100) + randint(0, sys.maxint)
+            y = (1L << ebits) - randint(1, sys.maxint)
+            z = (1L << 70) + randint(0, sys.maxint)
+            for sx in [x, -x]:
+                v = rbigint.fromlong(sx).pow(rbigint.fromlong(y),
+                                             rbigint.fromlong(z))
+                assert v.tolong() == pow(sx, y, z)
+        x = 7L
+        y = (1L << 280) + 12345
+        v = rbigint.fromlong(x).pow(rbigint.fromlong(y), rbigint.fromint(1))
+        assert v.tolong() == 0
+
     def test_pow_lln(self):
         x = 10L
         y = 2L
@@ -573,6 +589,22 @@ class TestInternalFunctions(object):
         ret = lobj._k_mul(f1, f2)
         assert ret.tolong() == f1.tolong() * f2.tolong()
 
+    def test__tc_mul(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'TOOM_CUTOFF', 3)
+        for x, y in [(3 ** 2000, 7 ** 700), (-(1L << 3000), (1L << 3000) - 1),
+                     (5 ** 1500, -(5 ** 1400)), (11 ** 900, 0)]:
+            f1 = rbigint.fromlong(x)
+            f2 = rbigint.fromlong(y)
+            assert f1.mul(f2).tolong() == x * y
+            assert f1.mul(f1).tolong() == x * x
+        digs = KARATSUBA_CUTOFF * 5
+        f1 = bigint([lobj.MASK] * digs, 1)
+        f2 = lobj._x_add(f1, bigint([1], 1))
+        ret = lobj._tc_mul(f1, f2)
+        assert ret.tolong() == f1.tolong() * f2.tolong()
+        ret = lobj._tc_mul(f1, f1)
+        assert ret.tolong() == f1.tolong() ** 2
+
     def test__k_lopsided_mul(self):
         digs_a = KARATSUBA_CUTOFF + 3
         digs_b = 3 * digs_a
@@ -638,6 +670,43 @@ class TestInternalFunctions(object):
         x = parse_digit_string(Parser(7, -1, [0, 0, 0]))
         assert x.tobool() is False
 
+    def test__divrem_recursive(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'DIV_CUTOFF', 3)
+        for x, y in [(3 ** 1000, 7 ** 200), (1L << 2000, (1L << 620) - 1),
+                     ((1L << 3100) - 1, (1L << 1550) + 1),
+                     (-(5 ** 900), 11 ** 150), (13 ** 700, -(2 ** 600 + 1))]:
+            for i in range(3):
+                f1 = rbigint.fromlong(x)
+                f2 = rbigint.fromlong(y)
+                div, rem = f1.divmod(f2)
+                assert (div.tolong(), rem.tolong()) == divmod(x, y)
+                x = x * randint(1, 1 << 30) + randint(0, 1 << 30)
+
+    def test__format_recursive(self, monkeypatch):
+        monkeypatch.setattr(lobj, 'FORMAT_CUTOFF', 4)
+        for x in [3 ** 700, -(10 ** 500), 10 ** 500 - 1, 7 ** 300 * 10 ** 200]:
+            f1 = rbigint.fromlong(x)
+            assert f1.str() == str(x)
+            assert f1.repr() == repr(x)
+            assert (lobj._format(f1, '0123456', 'pre', 'suf') ==
+                    lobj._format_simple(f1, '0123456', 'pre', 'suf'))
+
+    def test_parse_recursive(self, monkeypatch):
+        from pypy.rlib.rbigint import parse_digit_string
+        monkeypatch.setattr(lobj, 'PARSE_CUTOFF', 2)
+        class Parser:
+            def __init__(self, base, sign, digits):
+                self.base = base
+                self.sign = sign
+                self.next_digit = iter(digits + [-1]).next
+        for x in [3 ** 700, -(10 ** 500), 10 ** 500 - 1, 7 ** 300 * 10 ** 200]:
+            s = str(x)
+            assert lobj._decimalstr_to_bigint(s).tolong() == x
+            digits = [int(c) for c in s.lstrip('-')]
+            sign = -1 if x < 0 else 1
+            res = parse_digit_string(Parser(10, sign, digits))
+            assert res.tolong() == x
+
 
 BASE = 2 ** SHIFT
 
@@ -652,6 +721,25 @@ class TestTranslatable(object):
         res = interpret(test, [])
         assert "".join(res.chars) == test()
 
+    def test_recursive_algorithms(self):
+        x = rbigint.fromlong(3 ** 600)
+        y = rbigint.fromlong(7 ** 150)
+        q1 = rbigint.fromlong(3 ** 600 // 7 ** 150)
+        r1 = rbigint.fromlong(3 ** 600 % 7 ** 150)
+        def test():
+            q, r = x.divmod(y)
+            s = x.str()
+            return (q.eq(q1) and r.eq(r1) and
+                    rbigint.fromdecimalstr(s).eq(x))
+        old_cutoffs = lobj.DIV_CUTOFF, lobj.FORMAT_CUTOFF, lobj.PARSE_CUTOFF
+        lobj.DIV_CUTOFF, lobj.FORMAT_CUTOFF, lobj.PARSE_CUTOFF = 3, 4, 2
+        try:
+            assert test()
+            res = interpret(test, [])
+        finally:
+            lobj.DIV_CUTOFF, lobj.FORMAT_CUTOFF, lobj.PARSE_CUTOFF = old_cutoffs
+        assert res
+
     def test_add(self):
         x = rbigint.fromint(-2147483647)
         y = rbigint.fromint(-1)
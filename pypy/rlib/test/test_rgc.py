@@ -171,3 +171,15 @@ def test_get_memory_usage():
     x1 = X()
     n = rgc.get_rpy_memory_usage(rgc.cast_instance_to_gcref(x1))
     assert n >= 8 and n <= 64
+
+def test_get_gc_stat():
+    def f(n):
+        return rgc.get_gc_stat(n)
+
+    t, typer, graph = gengraph(f, [int])
+    ops = list(graph.iterblockops())
+    assert len(ops) == 1
+    assert ops[0][1].opname == 'gc_get_stat'
+
+    res = interpret(f, [rgc.GC_STAT_MINOR_COLLECTIONS])
+    assert res == -1.0
@@ -723,6 +723,9 @@ class LLFrame(object):
     def op_gc_add_memory_pressure(self, size):
         self.heap.add_memory_pressure(size)
 
+    def op_gc_get_stat(self, index):
+        return self.heap.get_gc_stat(index)
+
     def op_shrink_array(self, obj, smallersize):
         return self.heap.shrink_array(obj, smallersize)
 
@@ -805,6 +808,18 @@ class LLFrame(object):
         addr = llmemory.cast_ptr_to_adr(ptr)
         return self.heap.can_move(addr)
 
+    def op_gc_pin(self, ptr):
+        addr = llmemory.cast_ptr_to_adr(ptr)
+        return self.heap.pin(addr)
+
+    def op_gc_unpin(self, ptr):
+        addr = llmemory.cast_ptr_to_adr(ptr)
+        self.heap.unpin(addr)
+
+    def op_gc__is_pinned(self, ptr):
+        addr = llmemory.cast_ptr_to_adr(ptr)
+        return self.heap._is_pinned(addr)
+
     def op_gc_thread_prepare(self):
         self.heap.thread_prepare()
 
@@ -6,6 +6,7 @@ from pypy.rpython.lltypesystem.llmemory import weakref_create, weakref_deref
 setfield = setattr
 from operator import setitem as setarrayitem
 from pypy.rlib.rgc import can_move, collect, add_memory_pressure
+from pypy.rlib.rgc import get_gc_stat, pin, unpin, _is_pinned
 
 def setinterior(toplevelcontainer, inneraddr, INNERTYPE, newvalue,
                 offsets=None):
@@ -460,6 +460,9 @@ LL_OPERATIONS = {
     'gc_obtain_free_space': LLOp(),
     'gc_set_max_heap_size': LLOp(),
     'gc_can_move'         : LLOp(sideeffects=False),
+    'gc_pin'              : LLOp(),
+    'gc_unpin'            : LLOp(),
+    'gc__is_pinned'       : LLOp(sideeffects=False),
     'gc_thread_prepare'   : LLOp(canmallocgc=True),
     'gc_thread_run'       : LLOp(),
     'gc_thread_start'     : LLOp(),
@@ -478,6 +481,7 @@ LL_OPERATIONS = {
     'gc_dump_rpy_heap'    : LLOp(),
     'gc_typeids_z'        : LLOp(),
     'gc_add_memory_pressure': LLOp(),
+    'gc_get_stat'         : LLOp(),
 
     # ------- JIT & GC interaction, only for some GCs ----------
 
@@ -2,40 +2,45 @@ from pypy.tool.pairtype import pairtype
 from pypy.objspace.flow.model import Constant
 from pypy.rpython.rdict import (AbstractDictRepr, AbstractDictIteratorRepr,
      rtype_newdict)
-from pypy.rpython.lltypesystem import lltype
+from pypy.rpython.lltypesystem import lltype, rffi
 from pypy.rlib import objectmodel, jit
 from pypy.rlib.rarithmetic import r_uint, intmask, LONG_BIT
 from pypy.rpython import rmodel
 from pypy.rpython.error import TyperError
 
 
-HIGHEST_BIT = intmask(1 << (LONG_BIT - 1))
-MASK = intmask(HIGHEST_BIT - 1)
-
 # ____________________________________________________________
 #
 #  generic implementation of RPython dictionary, with parametric DICTKEY and
-#  DICTVALUE types.
-#
-#  XXX for immutable dicts, the array should be inlined and
-#      resize_counter and everused are not needed.
+#  DICTVALUE types.  The layout is the compact one: the entries are stored
+#  densely, in insertion order, and the hash table itself is a separate
+#  array of small integers that are indexes into the entries.
 #
 #    struct dictentry {
 #        DICTKEY key;
-#        bool f_valid;      # (optional) the entry is filled
-#        bool f_everused;   # (optional) the entry is or has ever been filled
+#        bool f_valid;      # (optional) the entry was not deleted
 #        DICTVALUE value;
 #        int f_hash;        # (optional) key hash, if hard to recompute
 #    }
 #
 #    struct dicttable {
-#        int num_items;
-#        int resize_counter;
+#        int num_items;          # number of valid entries
+#        int num_used_items;     # entries[0:num_used_items] are in use
+#        int resize_counter;     # 3 * number of FREE slots still usable
+#        Array *indexes_byte;    # only one of these four arrays is
+#        Array *indexes_short;   # allocated, the others are NULL;
+#        Array *indexes_int;     # (only on 64-bit machines)
+#        Array *indexes_long;
 #        Array *entries;
 #        (Function DICTKEY, DICTKEY -> bool) *fnkeyeq;
 #        (Function DICTKEY -> int) *fnkeyhash;
 #    }
 #
+#  Each item of the indexes is FREE, DELETED, or the index of an entry
+#  plus VALID_OFFSET.  The array used is the one with the smallest items
+#  that can hold all the possible values, given the length of the
+#  indexes.  There are len(indexes) * 2 / 3 entries, and resize_counter
+#  ensures that at least one third of the indexes are FREE.
 #
 
 class DictRepr(AbstractDictRepr):
@@ -90,69 +95,32 @@ class DictRepr(AbstractDictRepr):
             # * the key
             entryfields.append(("key", self.DICTKEY))
 
-            # * if NULL is not a valid ll value for the key or the value
-            #   field of the entry, it can be used as a marker for
-            #   never-used entries.  Otherwise, we need an explicit flag.
+            # * the entries that are not in use are never looked at, so
+            #   the only state to encode is whether an entry was deleted.
+            #   Try to do it with a dummy key or value object, and
+            #   otherwise use an explicit flag.
             s_key   = self.dictkey.s_value
             s_value = self.dictvalue.s_value
-            nullkeymarker = not self.key_repr.can_ll_be_null(s_key)
-            nullvaluemarker = not self.value_repr.can_ll_be_null(s_value)
-            if self.force_non_null:
-                if not nullkeymarker:
-                    rmodel.warning("%s can be null, but forcing non-null in dict key" % s_key)
-                    nullkeymarker = True
-                if not nullvaluemarker:
-                    rmodel.warning("%s can be null, but forcing non-null in dict value" % s_value)
-                    nullvaluemarker = True
             dummykeyobj = self.key_repr.get_ll_dummyval_obj(self.rtyper,
                                                             s_key)
             dummyvalueobj = self.value_repr.get_ll_dummyval_obj(self.rtyper,
                                                                 s_value)
-
-            # * the state of the entry - trying to encode it as dummy objects
-            if nullkeymarker and dummykeyobj:
-                # all the state can be encoded in the key
-                entrymeths['everused'] = ll_everused_from_key
+            if dummykeyobj:
                 entrymeths['dummy_obj'] = dummykeyobj
                 entrymeths['valid'] = ll_valid_from_key
                 entrymeths['mark_deleted'] = ll_mark_deleted_in_key
                 # the key is overwritten by 'dummy' when the entry is deleted
                 entrymeths['must_clear_key'] = False
-
-            elif nullvaluemarker and dummyvalueobj:
-                # all the state can be encoded in the value
-                entrymeths['everused'] = ll_everused_from_value
+            elif dummyvalueobj:
                 entrymeths['dummy_obj'] = dummyvalueobj
                 entrymeths['valid'] = ll_valid_from_value
                 entrymeths['mark_deleted'] = ll_mark_deleted_in_value
                 # value is overwritten by 'dummy' when entry is deleted
                 entrymeths['must_clear_value'] = False
-
             else:
-                # we need a flag to know if the entry was ever used
-                # (we cannot use a NULL as a marker for this, because
-                # the key and value will be reset to NULL to clear their
-                # reference)
-                entryfields.append(("f_everused", lltype.Bool))
-                entrymeths['everused'] = ll_everused_from_flag
-
-                # can we still rely on a dummy obj to mark deleted entries?
-                if dummykeyobj:
-                    entrymeths['dummy_obj'] = dummykeyobj
-                    entrymeths['valid'] = ll_valid_from_key
-                    entrymeths['mark_deleted'] = ll_mark_deleted_in_key
-                    # key is overwritten by 'dummy' when entry is deleted
-                    entrymeths['must_clear_key'] = False
-                elif dummyvalueobj:
-                    entrymeths['dummy_obj'] = dummyvalueobj
-                    entrymeths['valid'] = ll_valid_from_value
-                    entrymeths['mark_deleted'] = ll_mark_deleted_in_value
-                    # value is overwritten by 'dummy' when entry is deleted
-                    entrymeths['must_clear_value'] = False
-                else:
-                    entryfields.append(("f_valid", lltype.Bool))
-                    entrymeths['valid'] = ll_valid_from_flag
-                    entrymeths['mark_deleted'] = ll_mark_deleted_in_flag
+                entryfields.append(("f_valid", lltype.Bool))
+                entrymeths['valid'] = ll_valid_from_flag
+                entrymeths['mark_deleted'] = ll_mark_deleted_in_flag
 
             # * the value
             entryfields.append(("value", self.DICTVALUE))
@@ -174,8 +142,10 @@ class DictRepr(AbstractDictRepr):
             self.DICTENTRYARRAY = lltype.GcArray(self.DICTENTRY,
                                                  adtmeths=entrymeths)
             fields =          [ ("num_items", lltype.Signed),
-                                ("resize_counter", lltype.Signed),
-                                ("entries", lltype.Ptr(self.DICTENTRYARRAY)) ]
+                                ("num_used_items", lltype.Signed),
+                                ("resize_counter", lltype.Signed) ]
+            fields.extend(DICTINDEX_FIELDS)
+            fields.append(("entries", lltype.Ptr(self.DICTENTRYARRAY)))
             if self.custom_eq_hash:
                 self.r_rdict_eqfn, self.r_rdict_hashfn = self._custom_eq_hash_repr()
                 fields.extend([ ("fnkeyeq", self.r_rdict_eqfn.lowleveltype),
@@ -384,15 +354,6 @@ class __extend__(pairtype(DictRepr, DictRepr)):
 #  be direct_call'ed from rtyped flow graphs, which means that they will
 #  get flowed and annotated, mostly with SomePtr.
 
-def ll_everused_from_flag(entries, i):
-    return entries[i].f_everused
-
-def ll_everused_from_key(entries, i):
-    return bool(entries[i].key)
-
-def ll_everused_from_value(entries, i):
-    return bool(entries[i].value)
-
 def ll_valid_from_flag(entries, i):
     return entries[i].f_valid
 
@@ -402,7 +363,7 @@ def ll_mark_deleted_in_flag(entries, i):
 def ll_valid_from_key(entries, i):
     ENTRIES = lltype.typeOf(entries).TO
     dummy = ENTRIES.dummy_obj.ll_dummy_value
-    return entries.everused(i) and entries[i].key != dummy
+    return entries[i].key != dummy
 
 def ll_mark_deleted_in_key(entries, i):
     ENTRIES = lltype.typeOf(entries).TO
@@ -412,7 +373,7 @@ def ll_mark_deleted_in_key(entries, i):
 def ll_valid_from_value(entries, i):
     ENTRIES = lltype.typeOf(entries).TO
     dummy = ENTRIES.dummy_obj.ll_dummy_value
-    return entries.everused(i) and entries[i].value != dummy
+    return entries[i].value != dummy
 
 def ll_mark_deleted_in_value(entries, i):
     ENTRIES = lltype.typeOf(entries).TO
@@ -445,65 +406,65 @@ def ll_dict_is_true(d):
     return bool(d) and d.num_items != 0
 
 def ll_dict_getitem(d, key):
-    i = ll_dict_lookup(d, key, d.keyhash(key))
-    if not i & HIGHEST_BIT:
+    i = ll_dict_lookup(d, key, d.keyhash(key), FLAG_LOOKUP)
+    if i >= 0:
         return ll_get_value(d, i)
     else:
         raise KeyError
 
 def ll_dict_setitem(d, key, value):
     hash = d.keyhash(key)
-    i = ll_dict_lookup(d, key, hash)
+    i = ll_dict_lookup(d, key, hash, FLAG_STORE)
     return _ll_dict_setitem_lookup_done(d, key, value, hash, i)
 
 # It may be safe to look inside always, it has a few branches though, and their
 # frequencies needs to be investigated.
 @jit.look_inside_iff(lambda d, key, value, hash, i: jit.isvirtual(d) and jit.isconstant(key))
 def _ll_dict_setitem_lookup_done(d, key, value, hash, i):
-    valid = (i & HIGHEST_BIT) == 0
-    i = i & MASK
-    everused = d.entries.everused(i)
-    # set up the new entry
-    ENTRY = lltype.typeOf(d.entries).TO.OF
-    entry = d.entries[i]
-    entry.value = value
-    if valid:
+    # 'i' is the result of ll_dict_lookup(..., FLAG_STORE): either the
+    # index of the existing entry, or -1 if the lookup already stored
+    # 'num_used_items' in a free slot of the indexes.
+    if i >= 0:
+        d.entries[i].value = value
         return
+    if d.num_used_items == len(d.entries) or d.resize_counter <= 0:
+        # no room left for a new entry, or too few free slots in the
+        # indexes: compact and/or grow the dict, which rebuilds the
+        # indexes from scratch, and store the index of the new entry again
+        ll_dict_resize(d)
+        _ll_dict_insert_clean_index(d, hash, d.num_used_items)
+    _ll_dict_append_entry(d, key, value, hash)
+
+def _ll_dict_append_entry(d, key, value, hash):
+    ENTRY = lltype.typeOf(d.entries).TO.OF
+    entry = d.entries[d.num_used_items]
     entry.key = key
+    entry.value = value
     if hasattr(ENTRY, 'f_hash'):  entry.f_hash = hash
     if hasattr(ENTRY, 'f_valid'): entry.f_valid = True
+    d.num_used_items += 1
     d.num_items += 1
-    if not everused:
-        if hasattr(ENTRY, 'f_everused'): entry.f_everused = True
-        d.resize_counter -= 3
-        if d.resize_counter <= 0:
-            ll_dict_resize(d)
 
 def ll_dict_insertclean(d, key, value, hash):
-    # Internal routine used by ll_dict_resize() to insert an item which is
-    # known to be absent from the dict.  This routine also assumes that
-    # the dict contains no deleted entries.  This routine has the advantage
-    # of never calling d.keyhash() and d.keyeq(), so it cannot call back
-    # to user code.  ll_dict_insertclean() doesn't resize the dict, either.
-    i = ll_dict_lookup_clean(d, hash)
-    ENTRY = lltype.typeOf(d.entries).TO.OF
-    entry = d.entries[i]
-    entry.value = value
-    entry.key = key
-    if hasattr(ENTRY, 'f_hash'):     entry.f_hash = hash
-    if hasattr(ENTRY, 'f_valid'):    entry.f_valid = True
-    if hasattr(ENTRY, 'f_everused'): entry.f_everused = True
-    d.num_items += 1
-    d.resize_counter -= 3
+    # Internal routine used to insert an item which is known to be
+    # absent from the dict.  This routine also assumes that the indexes
+    # contain no DELETED marker.  This routine has the advantage of
+    # never calling d.keyhash() and d.keyeq(), so it cannot call back
+    # to user code.
+    if d.num_used_items == len(d.entries) or d.resize_counter <= 0:
+        ll_dict_resize(d)
+    _ll_dict_insert_clean_index(d, hash, d.num_used_items)
+    _ll_dict_append_entry(d, key, value, hash)
 
 def ll_dict_delitem(d, key):
-    i = ll_dict_lookup(d, key, d.keyhash(key))
-    if i & HIGHEST_BIT:
+    i = ll_dict_lookup(d, key, d.keyhash(key), FLAG_DELETE)
+    if i < 0:
         raise KeyError
     _ll_dict_del(d, i)
 
 @jit.look_inside_iff(lambda d, i: jit.isvirtual(d) and jit.isconstant(i))
 def _ll_dict_del(d, i):
+    # the index pointing to the entry 'i' must already be DELETED
     d.entries.mark_deleted(i)
     d.num_items -= 1
     # clear the key and the value if they are GC pointers
@@ -514,37 +475,35 @@ def _ll_dict_del(d, i):
         entry.key = lltype.nullptr(ENTRY.key.TO)
     if ENTRIES.must_clear_value:
         entry.value = lltype.nullptr(ENTRY.value.TO)
+    # if we deleted the last entries, they can be used again.  This keeps
+    # the last used entry valid, which ll_popitem() relies on.  (The
+    # DELETED slots that remain in the indexes are accounted for by
+    # 'resize_counter'.)
+    if i == d.num_used_items - 1:
+        while i >= 0 and not d.entries.valid(i):
+            i -= 1
+        d.num_used_items = i + 1
     #
-    # The rest is commented out: like CPython we no longer shrink the
-    # dictionary here.  It may shrink later if we try to append a number
-    # of new items to it.  Unsure if this behavior was designed in
-    # CPython or is accidental.  A design reason would be that if you
-    # delete all items in a dictionary (e.g. with a series of
-    # popitem()), then CPython avoids shrinking the table several times.
-    #num_entries = len(d.entries)
-    #if num_entries > DICT_INITSIZE and d.num_items <= num_entries / 4:
-    #    ll_dict_resize(d)
-    # A previous xxx: move the size checking and resize into a single
-    # call which is opaque to the JIT when the dict isn't virtual, to
-    # avoid extra branches.
+    # Like CPython we don't shrink the dictionary here.  It may shrink
+    # later if we try to append a number of new items to it.
 
 def ll_dict_resize(d):
+    # Rebuild the dict from its valid entries, which removes the deleted
+    # ones.  Make a 'new_size' estimate for the indexes, and shrink it if
+    # there are many deleted entries.  See CPython for why it is a good
+    # idea to quadruple the dictionary size as long as it's not too big.
     old_entries = d.entries
-    old_size = len(old_entries)
-    # make a 'new_size' estimate and shrink it if there are many
-    # deleted entry markers.  See CPython for why it is a good idea to
-    # quadruple the dictionary size as long as it's not too big.
+    num_used_items = d.num_used_items
     if d.num_items > 50000: new_estimate = d.num_items * 2
     else:                   new_estimate = d.num_items * 4
     new_size = DICT_INITSIZE
     while new_size <= new_estimate:
         new_size *= 2
     #
-    d.entries = lltype.typeOf(old_entries).TO.allocate(new_size)
-    d.num_items = 0
-    d.resize_counter = new_size * 2
+    _ll_free_indexes(d)
+    _ll_dict_init(d, new_size)
     i = 0
-    while i < old_size:
+    while i < num_used_items:
         if old_entries.valid(i):
             hash = old_entries.hash(i)
             entry = old_entries[i]
@@ -553,86 +512,234 @@ def ll_dict_resize(d):
     old_entries.delete()
 ll_dict_resize.oopspec = 'dict.resize(d)'
 
+# ------- the indexes -------
+#
+# The entries are found via the 'indexes' array, with open addressing
+# as in CPython's dictobject.c.  Each operation that needs to read or
+# write the indexes is specialized for each type of array, and dispatched
+# on which array is not NULL.  The non-GC dicts of pypy.rpython.memory.lldict
+# always use a single 'indexes' array, as given by 'raw_indexes'.
+
+FREE = 0
+DELETED = 1
+VALID_OFFSET = 2
+
+FLAG_LOOKUP = 0
+FLAG_STORE = 1
+FLAG_DELETE = 2
+
+IS_64BIT = LONG_BIT == 64
+
+DICTINDEX_BYTE = lltype.Ptr(lltype.GcArray(rffi.UCHAR))
+DICTINDEX_SHORT = lltype.Ptr(lltype.GcArray(rffi.USHORT))
+DICTINDEX_INT = lltype.Ptr(lltype.GcArray(rffi.UINT))
+DICTINDEX_LONG = lltype.Ptr(lltype.GcArray(lltype.Unsigned))
+
+DICTINDEX_FIELDS = [("indexes_byte", DICTINDEX_BYTE),
+                    ("indexes_short", DICTINDEX_SHORT)]
+if IS_64BIT:
+    DICTINDEX_FIELDS.append(("indexes_int", DICTINDEX_INT))
+DICTINDEX_FIELDS.append(("indexes_long", DICTINDEX_LONG))
+
+def _ll_malloc_indexes(d, n):
+    DICT = lltype.typeOf(d).TO
+    if hasattr(DICT, 'raw_indexes'):
+        d.indexes = DICT.indexes.TO.allocate(n)
+        return
+    d.indexes_byte = lltype.nullptr(DICTINDEX_BYTE.TO)
+    d.indexes_short = lltype.nullptr(DICTINDEX_SHORT.TO)
+    if IS_64BIT:
+        d.indexes_int = lltype.nullptr(DICTINDEX_INT.TO)
+    d.indexes_long = lltype.nullptr(DICTINDEX_LONG.TO)
+    # the indexes stored are at most n * 2 / 3 + VALID_OFFSET
+    if n <= 256:
+        d.indexes_byte = lltype.malloc(DICTINDEX_BYTE.TO, n, zero=True)
+    elif n <= 65536:
+        d.indexes_short = lltype.malloc(DICTINDEX_SHORT.TO, n, zero=True)
+    elif IS_64BIT and n <= (1 << 32):
+        d.indexes_int = lltype.malloc(DICTINDEX_INT.TO, n, zero=True)
+    else:
+        d.indexes_long = lltype.malloc(DICTINDEX_LONG.TO, n, zero=True)
+
+def _ll_free_indexes(d):
+    DICT = lltype.typeOf(d).TO
+    if hasattr(DICT, 'raw_indexes'):
+        d.indexes.delete()
+
+def _ll_index_array(d, T):
+    if hasattr(lltype.typeOf(d).TO, 'raw_indexes'):
+        return d.indexes
+    elif T is DICTINDEX_BYTE:
+        return d.indexes_byte
+    elif T is DICTINDEX_SHORT:
+        return d.indexes_short
+    elif T is DICTINDEX_INT:
+        return d.indexes_int
+    else:
+        return d.indexes_long
+
+def _ll_next_slot(i, perturb, mask):
+    # compute the next index using unsigned arithmetic
+    i = r_uint(i)
+    i = (i << 2) + i + perturb + 1
+    # keep 'i' as a signed number, to consistently pass signed
+    # arguments to the small helper methods.
+    return intmask(i) & mask
+
+@jit.look_inside_iff(lambda d, key, hash, flag: jit.isvirtual(d) and jit.isconstant(key))
+def ll_dict_lookup(d, key, hash, flag):
+    # Returns the index of the entry with the given key, or -1.
+    # With FLAG_STORE, a missing key gets a slot in the indexes, which
+    # refers to the entry 'd.num_used_items'.  With FLAG_DELETE, the
+    # slot of an existing key is marked DELETED.
+    DICT = lltype.typeOf(d).TO
+    if hasattr(DICT, 'raw_indexes'):
+        return _ll_dict_lookup(d, key, hash, flag, DICT.indexes)
+    if d.indexes_byte:
+        return _ll_dict_lookup(d, key, hash, flag, DICTINDEX_BYTE)
+    elif d.indexes_short:
+        return _ll_dict_lookup(d, key, hash, flag, DICTINDEX_SHORT)
+    elif IS_64BIT and d.indexes_int:
+        return _ll_dict_lookup(d, key, hash, flag, DICTINDEX_INT)
+    else:
+        return _ll_dict_lookup(d, key, hash, flag, DICTINDEX_LONG)
+
 # ------- a port of CPython's dictobject.c's lookdict implementation -------
 PERTURB_SHIFT = 5
 
-@jit.look_inside_iff(lambda d, key, hash: jit.isvirtual(d) and jit.isconstant(key))
-def ll_dict_lookup(d, key, hash):
+@jit.unroll_safe
+def _ll_dict_lookup(d, key, hash, flag, T):
     entries = d.entries
+    indexes = _ll_index_array(d, T)
     ENTRIES = lltype.typeOf(entries).TO
     direct_compare = not hasattr(ENTRIES, 'no_direct_compare')
-    mask = len(entries) - 1
+    mask = len(indexes) - 1
     i = hash & mask
     # do the first try before any looping
-    if entries.valid(i):
-        checkingkey = entries[i].key
+    index = rffi.cast(lltype.Signed, indexes[i])
+    if index >= VALID_OFFSET:
+        checkingkey = entries[index - VALID_OFFSET].key
         if direct_compare and checkingkey == key:
-            return i   # found the entry
-        if d.keyeq is not None and entries.hash(i) == hash:
+            if flag == FLAG_DELETE:
+                indexes[i] = rffi.cast(T.TO.OF, DELETED)
+            return index - VALID_OFFSET   # found the entry
+        if d.keyeq is not None and entries.hash(index - VALID_OFFSET) == hash:
             # correct hash, maybe the key is e.g. a different pointer to
             # an equal object
             found = d.keyeq(checkingkey, key)
             if d.paranoia:
                 if (entries != d.entries or
-                    not entries.valid(i) or entries[i].key != checkingkey):
+                    indexes != _ll_index_array(d, T) or
+                    rffi.cast(lltype.Signed, indexes[i]) != index or
+                    entries[index - VALID_OFFSET].key != checkingkey):
                     # the compare did major nasty stuff to the dict: start over
-                    return ll_dict_lookup(d, key, hash)
+                    return ll_dict_lookup(d, key, hash, flag)
             if found:
-                return i   # found the entry
-        freeslot = -1
-    elif entries.everused(i):
-        freeslot = i
+                if flag == FLAG_DELETE:
+                    indexes[i] = rffi.cast(T.TO.OF, DELETED)
+                return index - VALID_OFFSET   # found the entry
+        deletedslot = -1
+    elif index == DELETED:
+        deletedslot = i
     else:
-        return i | HIGHEST_BIT # pristine entry -- lookup failed
-
-    # In the loop, a deleted entry (everused and not valid) is by far
-    # (factor of 100s) the least likely outcome, so test for that last.
+        # pristine entry -- lookup failed
+        if flag == FLAG_STORE:
+            indexes[i] = rffi.cast(T.TO.OF, d.num_used_items + VALID_OFFSET)
+            d.resize_counter -= 3
+        return -1
+
+    # In the loop, a deleted entry is by far (factor of 100s) the least
+    # likely outcome, so test for that last.
     perturb = r_uint(hash)
     while 1:
-        # compute the next index using unsigned arithmetic
-        i = r_uint(i)
-        i = (i << 2) + i + perturb + 1
-        i = intmask(i) & mask
-        # keep 'i' as a signed number here, to consistently pass signed
-        # arguments to the small helper methods.
-        if not entries.everused(i):
-            if freeslot == -1:
-                freeslot = i
-            return freeslot | HIGHEST_BIT
-        elif entries.valid(i):
-            checkingkey = entries[i].key
+        i = _ll_next_slot(i, perturb, mask)
+        index = rffi.cast(lltype.Signed, indexes[i])
+        if index == FREE:
+            if flag == FLAG_STORE:
+                if deletedslot == -1:
+                    deletedslot = i
+                    d.resize_counter -= 3
+                indexes[deletedslot] = rffi.cast(T.TO.OF,
+                                         d.num_used_items + VALID_OFFSET)
+            return -1
+        elif index >= VALID_OFFSET:
+            checkingkey = entries[index - VALID_OFFSET].key
             if direct_compare and checkingkey == key:
-                return i
-            if d.keyeq is not None and entries.hash(i) == hash:
+                if flag == FLAG_DELETE:
+                    indexes[i] = rffi.cast(T.TO.OF, DELETED)
+                return index - VALID_OFFSET   # found the entry
+            if (d.keyeq is not None and
+                    entries.hash(index - VALID_OFFSET) == hash):
                 # correct hash, maybe the key is e.g. a different pointer to
                 # an equal object
                 found = d.keyeq(checkingkey, key)
                 if d.paranoia:
                     if (entries != d.entries or
-                        not entries.valid(i) or entries[i].key != checkingkey):
+                        indexes != _ll_index_array(d, T) or
+                        rffi.cast(lltype.Signed, indexes[i]) != index or
+                        entries[index - VALID_OFFSET].key != checkingkey):
                         # the compare did major nasty stuff to the dict:
                         # start over
-                        return ll_dict_lookup(d, key, hash)
+                        return ll_dict_lookup(d, key, hash, flag)
                 if found:
-                    return i   # found the entry
-        elif freeslot == -1:
-            freeslot = i
+                    if flag == FLAG_DELETE:
+                        indexes[i] = rffi.cast(T.TO.OF, DELETED)
+                    return index - VALID_OFFSET   # found the entry
+        elif deletedslot == -1:
+            deletedslot = i
         perturb >>= PERTURB_SHIFT
 
-def ll_dict_lookup_clean(d, hash):
-    # a simplified version of ll_dict_lookup() which assumes that the
-    # key is new, and the dictionary doesn't contain deleted entries.
-    # It only finds the next free slot for the given hash.
-    entries = d.entries
-    mask = len(entries) - 1
+def _ll_dict_insert_clean_index(d, hash, index):
+    # store 'index' in the first free slot for the given hash.  This
+    # assumes that the indexes contain no DELETED marker.
+    DICT = lltype.typeOf(d).TO
+    if hasattr(DICT, 'raw_indexes'):
+        _ll_insert_clean_index(d, hash, index, DICT.indexes)
+        return
+    if d.indexes_byte:
+        _ll_insert_clean_index(d, hash, index, DICTINDEX_BYTE)
+    elif d.indexes_short:
+        _ll_insert_clean_index(d, hash, index, DICTINDEX_SHORT)
+    elif IS_64BIT and d.indexes_int:
+        _ll_insert_clean_index(d, hash, index, DICTINDEX_INT)
+    else:
+        _ll_insert_clean_index(d, hash, index, DICTINDEX_LONG)
+
+def _ll_insert_clean_index(d, hash, index, T):
+    indexes = _ll_index_array(d, T)
+    mask = len(indexes) - 1
+    i = hash & mask
+    perturb = r_uint(hash)
+    while rffi.cast(lltype.Signed, indexes[i]) != FREE:
+        i = _ll_next_slot(i, perturb, mask)
+        perturb >>= PERTURB_SHIFT
+    indexes[i] = rffi.cast(T.TO.OF, index + VALID_OFFSET)
+    d.resize_counter -= 3
+
+def _ll_dict_remove_index(d, hash, index):
+    # mark DELETED the slot that refers to the entry 'index'
+    DICT = lltype.typeOf(d).TO
+    if hasattr(DICT, 'raw_indexes'):
+        _ll_remove_index(d, hash, index, DICT.indexes)
+        return
+    if d.indexes_byte:
+        _ll_remove_index(d, hash, index, DICTINDEX_BYTE)
+    elif d.indexes_short:
+        _ll_remove_index(d, hash, index, DICTINDEX_SHORT)
+    elif IS_64BIT and d.indexes_int:
+        _ll_remove_index(d, hash, index, DICTINDEX_INT)
+    else:
+        _ll_remove_index(d, hash, index, DICTINDEX_LONG)
+
+def _ll_remove_index(d, hash, index, T):
+    indexes = _ll_index_array(d, T)
+    mask = len(indexes) - 1
     i = hash & mask
     perturb = r_uint(hash)
-    while entries.everused(i):
-        i = r_uint(i)
-        i = (i << 2) + i + perturb + 1
-        i = intmask(i) & mask
+    while rffi.cast(lltype.Signed, indexes[i]) != index + VALID_OFFSET:
+        i = _ll_next_slot(i, perturb, mask)
         perturb >>= PERTURB_SHIFT
-    return i
+    indexes[i] = rffi.cast(T.TO.OF, DELETED)
 
 # ____________________________________________________________
 #
@@ -640,22 +747,29 @@ def ll_dict_lookup_clean(d, hash):
 
 DICT_INITSIZE = 8
 
+def _ll_num_entries(indexes_size):
+    # the entries fill at most two thirds of the indexes
+    return (indexes_size * 2) // 3
+
+def _ll_dict_init(d, indexes_size):
+    ENTRIES = lltype.typeOf(d).TO.entries.TO
+    d.entries = ENTRIES.allocate(_ll_num_entries(indexes_size))
+    _ll_malloc_indexes(d, indexes_size)
+    d.num_items = 0
+    d.num_used_items = 0
+    d.resize_counter = _ll_num_entries(indexes_size) * 3
+
 def ll_newdict(DICT):
     d = DICT.allocate()
-    d.entries = DICT.entries.TO.allocate(DICT_INITSIZE)
-    d.num_items = 0
-    d.resize_counter = DICT_INITSIZE * 2
+    _ll_dict_init(d, DICT_INITSIZE)
     return d
 
 def ll_newdict_size(DICT, length_estimate):
-    length_estimate = (length_estimate // 2) * 3
     n = DICT_INITSIZE
-    while n < length_estimate:
+    while _ll_num_entries(n) < length_estimate:
         n *= 2
     d = DICT.allocate()
-    d.entries = DICT.entries.TO.allocate(n)
-    d.num_items = 0
-    d.resize_counter = n * 2
+    _ll_dict_init(d, n)
     return d
 
 # pypy.rpython.memory.lldict uses a dict based on Struct and Array
@@ -719,8 +833,7 @@ def _make_ll_dictnext(kind):
         if dict:
             entries = dict.entries
             index = iter.index
-            entries_len = len(entries)
-            while index < entries_len:
+            while index < dict.num_used_items:
                 entry = entries[index]
                 is_valid = entries.valid(index)
                 index = index + 1
@@ -751,65 +864,56 @@ ll_dictnext_group = {'keys'  : _make_ll_dictnext('keys'),
 # methods
 
 def ll_get(dict, key, default):
-    i = ll_dict_lookup(dict, key, dict.keyhash(key))
-    if not i & HIGHEST_BIT:
+    i = ll_dict_lookup(dict, key, dict.keyhash(key), FLAG_LOOKUP)
+    if i >= 0:
         return ll_get_value(dict, i)
     else:
         return default
 
 def ll_setdefault(dict, key, default):
     hash = dict.keyhash(key)
-    i = ll_dict_lookup(dict, key, hash)
-    if not i & HIGHEST_BIT:
+    i = ll_dict_lookup(dict, key, hash, FLAG_STORE)
+    if i >= 0:
         return ll_get_value(dict, i)
     else:
         _ll_dict_setitem_lookup_done(dict, key, default, hash, i)
         return default
 
 def ll_copy(dict):
+    # the copy is built without the deleted entries of 'dict'
     DICT = lltype.typeOf(dict).TO
-    dictsize = len(dict.entries)
-    d = DICT.allocate()
-    d.entries = DICT.entries.TO.allocate(dictsize)
-    d.num_items = dict.num_items
-    d.resize_counter = dict.resize_counter
+    d = ll_newdict_size(DICT, dict.num_items)
     if hasattr(DICT, 'fnkeyeq'):   d.fnkeyeq   = dict.fnkeyeq
     if hasattr(DICT, 'fnkeyhash'): d.fnkeyhash = dict.fnkeyhash
+    entries = dict.entries
     i = 0
-    while i < dictsize:
-        d_entry = d.entries[i]
-        entry = dict.entries[i]
-        ENTRY = lltype.typeOf(d.entries).TO.OF
-        d_entry.key = entry.key
-        if hasattr(ENTRY, 'f_valid'):    d_entry.f_valid    = entry.f_valid
-        if hasattr(ENTRY, 'f_everused'): d_entry.f_everused = entry.f_everused
-        d_entry.value = entry.value
-        if hasattr(ENTRY, 'f_hash'):     d_entry.f_hash     = entry.f_hash
+    while i < dict.num_used_items:
+        if entries.valid(i):
+            entry = entries[i]
+            ll_dict_insertclean(d, entry.key, entry.value, entries.hash(i))
         i += 1
     return d
 ll_copy.oopspec = 'dict.copy(dict)'
 
 def ll_clear(d):
-    if (len(d.entries) == DICT_INITSIZE and
-        d.resize_counter == DICT_INITSIZE * 2):
+    if (d.num_used_items == 0 and
+        len(d.entries) == _ll_num_entries(DICT_INITSIZE)):
         return
     old_entries = d.entries
-    d.entries = lltype.typeOf(old_entries).TO.allocate(DICT_INITSIZE)
-    d.num_items = 0
-    d.resize_counter = DICT_INITSIZE * 2
+    _ll_free_indexes(d)
+    _ll_dict_init(d, DICT_INITSIZE)
     old_entries.delete()
 ll_clear.oopspec = 'dict.clear(d)'
 
 def ll_update(dic1, dic2):
     entries = dic2.entries
-    d2len = len(entries)
     i = 0
-    while i < d2len:
+    while i < dic2.num_used_items:
         if entries.valid(i):
             entry = entries[i]
             hash = entries.hash(i)
             key = entry.key
-            j = ll_dict_lookup(dic1, key, hash)
+            j = ll_dict_lookup(dic1, key, hash, FLAG_STORE)
             _ll_dict_setitem_lookup_done(dic1, key, entry.value, hash, j)
         i += 1
 ll_update.oopspec = 'dict.update(dic1, dic2)'
@@ -829,7 +933,7 @@ def _make_ll_keys_values_items(kind):
     def ll_kvi(LIST, dic):
         res = LIST.ll_newlist(dic.num_items)
         entries = dic.entries
-        dlen = len(entries)
+        dlen = dic.num_used_items
         items = res.ll_items()
         i = 0
         p = 0
@@ -859,48 +963,29 @@ ll_dict_values = _make_ll_keys_values_items('values')
 ll_dict_items  = _make_ll_keys_values_items('items')
 
 def ll_contains(d, key):
-    i = ll_dict_lookup(d, key, d.keyhash(key))
-    return not i & HIGHEST_BIT
-
-POPITEMINDEX = lltype.Struct('PopItemIndex', ('nextindex', lltype.Signed))
-global_popitem_index = lltype.malloc(POPITEMINDEX, zero=True, immortal=True)
+    i = ll_dict_lookup(d, key, d.keyhash(key), FLAG_LOOKUP)
+    return i >= 0
 
 def _ll_getnextitem(dic):
-    entries = dic.entries
-    ENTRY = lltype.typeOf(entries).TO.OF
-    dmask = len(entries) - 1
-    if hasattr(ENTRY, 'f_hash'):
-        if entries.valid(0):
-            return 0
-        base = entries[0].f_hash
-    else:
-        base = global_popitem_index.nextindex
-    counter = 0
-    while counter <= dmask:
-        i = (base + counter) & dmask
-        counter += 1
-        if entries.valid(i):
-            break
-    else:
+    # the last used entry is always valid, see _ll_dict_del()
+    if dic.num_items == 0:
         raise KeyError
-    if hasattr(ENTRY, 'f_hash'):
-        entries[0].f_hash = base + counter
-    else:
-        global_popitem_index.nextindex = base + counter
-    return i
+    return dic.num_used_items - 1
 
 def ll_popitem(ELEM, dic):
+    # like in CPython 3, the most recently inserted item is removed
     i = _ll_getnextitem(dic)
     entry = dic.entries[i]
     r = lltype.malloc(ELEM.TO)
     r.item0 = recast(ELEM.TO.item0, entry.key)
     r.item1 = recast(ELEM.TO.item1, entry.value)
+    _ll_dict_remove_index(dic, dic.entries.hash(i), i)
     _ll_dict_del(dic, i)
     return r
 
 def ll_pop(dic, key):
-    i = ll_dict_lookup(dic, key, dic.keyhash(key))
-    if not i & HIGHEST_BIT:
+    i = ll_dict_lookup(dic, key, dic.keyhash(key), FLAG_DELETE)
+    if i >= 0:
         value = ll_get_value(dic, i)
         _ll_dict_del(dic, i)
         return value
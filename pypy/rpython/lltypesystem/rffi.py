@@ -749,6 +749,8 @@ def make_string_mappings(strtype):
     free_nonmovingbuffer._annenforceargs_ = [strtype, None]
 
     # int -> (char*, str)
+    # Can't inline this because of the raw address manipulation.
+    @jit.dont_look_inside
     def alloc_buffer(count):
         """
         Returns a (raw_buffer, gc_buffer) pair, allocated with count bytes.
@@ -758,9 +760,14 @@ def make_string_mappings(strtype):
         allows for the process to be performed without an extra copy.
         Make sure to call keep_buffer_alive_until_here on the returned values.
         """
-        raw_buf = lltype.malloc(TYPEP.TO, count, flavor='raw')
-        return raw_buf, lltype.nullptr(STRTYPE)
-    alloc_buffer._always_inline_ = True # to get rid of the returned tuple
+        gc_buf = lltype.malloc(STRTYPE, count)
+        if rgc.can_move(gc_buf) and not rgc.pin(gc_buf):
+            # the GC cannot pin it: fall back to a raw buffer and a copy
+            raw_buf = lltype.malloc(TYPEP.TO, count, flavor='raw')
+            return raw_buf, lltype.nullptr(STRTYPE)
+        data_start = cast_ptr_to_adr(gc_buf) + \
+            offsetof(STRTYPE, 'chars') + itemoffsetof(STRTYPE.chars, 0)
+        return cast(TYPEP, data_start), gc_buf
     alloc_buffer._annenforceargs_ = [int]
 
     # (char*, str, int, int) -> None
@@ -798,6 +805,8 @@ def make_string_mappings(strtype):
         try/finally block.
         """
         if gc_buf:
+            if rgc._is_pinned(gc_buf):
+                rgc.unpin(gc_buf)
             keepalive_until_here(gc_buf)
         elif raw_buf:
             lltype.free(raw_buf, flavor='raw')
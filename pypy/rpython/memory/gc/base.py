@@ -105,6 +105,11 @@ class GCBase(object):
     def statistics(self, index):
         return -1
 
+    def get_stat(self, index):
+        """Return the statistic rgc.GC_STAT_xxx, or -1.0 if this GC
+        does not record it."""
+        return -1.0
+
     def size_gc_header(self, typeid=0):
         return self.gcheaderbuilder.size_gc_header
 
@@ -176,6 +181,15 @@ class GCBase(object):
     def can_move(self, addr):
         return False
 
+    def pin(self, addr):
+        return False
+
+    def unpin(self, addr):
+        pass
+
+    def _is_pinned(self, addr):
+        return False
+
     def set_max_heap_size(self, size):
         raise NotImplementedError
 
@@ -440,6 +454,7 @@ def choose_gc_from_config(config):
                "hybrid": "hybrid.HybridGC",
                "markcompact" : "markcompact.MarkCompactGC",
                "minimark" : "minimark.MiniMarkGC",
+               "incminimark" : "incminimark.IncrementalMiniMarkGC",
                }
     try:
         modulename, classname = classes[config.translation.gc].split('.')
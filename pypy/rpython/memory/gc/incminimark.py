@@ -0,0 +1,495 @@
+""" Incremental MiniMark GC.
+
+This is the MiniMark GC (see minimark.py), but the marking phase of the
+major collections is done incrementally.  Instead of marking the whole
+old generation in one stop-the-world pass, a major collection is split
+into many bounded steps, each of them done just after a minor
+collection.  When the marking is finished, finalizers and weakrefs are
+dealt with, and then the unreachable objects are freed incrementally
+too: every following step sweeps a bounded number of pages of the
+ArenaCollection and of raw-malloced objects.
+
+Environment variables: all the ones described in minimark.py, plus:
+
+ PYPY_GC_INCREMENT_STEP The minimal amount of memory that is marked at
+                        every step of a major collection.  Defaults to
+                        '4MB'.  Steps may mark more if the program
+                        allocates old objects quickly, to ensure that
+                        the major collection eventually finishes.
+                        The sweeping steps walk a similar amount of
+                        memory.
+"""
+import sys, time
+from pypy.rpython.lltypesystem.llmemory import raw_malloc_usage
+from pypy.rpython.memory.gc import env
+from pypy.rpython.memory.gc.minimark import MiniMarkGC, WORD
+from pypy.rpython.memory.gc.minimark import GCFLAG_TRACK_YOUNG_PTRS
+from pypy.rpython.memory.gc.minimark import GCFLAG_NO_HEAP_PTRS
+from pypy.rpython.memory.gc.minimark import GCFLAG_VISITED
+from pypy.rpython.memory.gc.minimark import GCFLAG_PINNED
+from pypy.rlib.debug import ll_assert, debug_print, debug_start, debug_stop
+
+#
+# Tri-color marking.  Between two steps of a major collection, the old
+# objects are:
+#
+#  * black: they have GCFLAG_VISITED, and all the objects they point to
+#    are either black or grey;
+#
+#  * grey: they are listed in 'objects_to_trace', waiting to be visited;
+#
+#  * white: all other objects, not seen so far.
+#
+# The invariant "no black object points to a white object" is broken by
+# the program when it writes a pointer into a black object.  To detect
+# it, the write barrier is extended: while marking, the first write into
+# a black object records it in 'old_objects_pointing_to_young', exactly
+# like a write of a young pointer.  At the next minor collection, all
+# objects recorded in this way (or with cards set) are made grey again.
+# The roots are not protected by any barrier, so every minor collection
+# done while marking also makes grey all objects directly referenced by
+# the roots.  As the marking can only finish in a step that immediately
+# follows a minor collection, this is enough to ensure that all objects
+# reachable at that point are black.
+#
+# Objects allocated while marking are white (a young object surviving a
+# minor collection becomes a white old object).  They survive because
+# they are reachable from some root, or from some grey object, or from
+# an object recorded by the write barrier.
+#
+# Sweeping.  When marking is finished, the pages of the ArenaCollection
+# and the list of old raw-malloced objects are put aside, and walked in
+# the following steps.  The surviving objects still have GCFLAG_VISITED
+# until they are walked; the write barrier ignores this flag outside the
+# marking state.  Objects allocated while sweeping go to other pages or
+# to a new list of raw-malloced objects, so they are never freed by the
+# current major collection.
+#
+
+STATE_SCANNING = 0
+STATE_MARKING = 1
+STATE_SWEEPING = 2
+
+GC_STATES = ['SCANNING', 'MARKING', 'SWEEPING']
+
+
+class IncrementalMiniMarkGC(MiniMarkGC):
+    _alloc_flavor_ = "raw"
+
+    TRANSLATION_PARAMS = MiniMarkGC.TRANSLATION_PARAMS.copy()
+    # The minimal amount of memory, in bytes, to mark at every step of
+    # a major collection.
+    TRANSLATION_PARAMS["gc_increment_step"] = 4*1024*1024
+
+    def __init__(self, config, gc_increment_step=16*WORD, **kwds):
+        self.gc_state = STATE_SCANNING
+        self.gc_increment_step = gc_increment_step
+        MiniMarkGC.__init__(self, config, **kwds)
+        #
+        # The amount of memory used, as measured at the end of the
+        # previous step; see major_collection_step().
+        self.memory_used_at_last_step = 0.0
+        self.size_objects_made_grey_again = 0.0
+        self.memory_used_before_major_collection = 0.0
+
+
+    def setup(self):
+        MiniMarkGC.setup(self)
+        #
+        # The list of grey objects.  It survives across the steps of a
+        # major collection, so it is allocated once and for all.
+        self.objects_to_trace = self.AddressStack()
+        #
+        # While sweeping, the old raw-malloced objects that remain to be
+        # walked.  The new ones are added to 'old_rawmalloced_objects'.
+        self.raw_malloc_might_sweep = self.AddressStack()
+        #
+        if self.read_from_env:
+            increment_step = env.read_uint_from_env('PYPY_GC_INCREMENT_STEP')
+            if increment_step > 0:
+                self.gc_increment_step = increment_step
+
+
+    # ----------
+    # Collection entry points
+
+    def collect(self, gen=1):
+        """Do a minor (gen=0) or a complete major (gen>0) collection."""
+        self.minor_collection()
+        if gen > 0:
+            self.major_collection()
+
+    def collect_and_reserve(self, totalsize):
+        """To call when nursery_free overflows nursery_top.
+        Do a minor collection, possibly followed by the next step of a
+        major collection, and finally reserve 'totalsize' bytes at the
+        start of the now-empty nursery.
+        """
+        self.minor_collection()
+        #
+        if (self.gc_state != STATE_SCANNING or
+                self.get_total_memory_used() >
+                    self.next_major_collection_threshold):
+            self.major_collection_step()
+            #
+            # The nursery might not be empty now, because of
+            # execute_finalizers().  If it is almost full again,
+            # we need to fix it with another call to minor_collection().
+            if self.nursery_free + totalsize > self.nursery_top:
+                self.minor_collection()
+        #
+        result = self.nursery_free
+        self.nursery_free = result + totalsize
+        ll_assert(self.nursery_free <= self.nursery_top, "nursery overflow")
+        #
+        if self.debug_tiny_nursery >= 0:   # for debugging
+            if self.nursery_top - self.nursery_free > self.debug_tiny_nursery:
+                self.nursery_free = self.nursery_top - self.debug_tiny_nursery
+        #
+        return result
+    collect_and_reserve._dont_inline_ = True
+
+    def minor_collection_with_major_progress(self, reserving_size=0):
+        self.minor_collection()
+        self.major_collection_step(reserving_size)
+
+    def major_collection(self, reserving_size=0):
+        """Do a complete major collection, non-incrementally.  If a major
+        collection is already in progress, it is finished first.  Only
+        for when the nursery is empty.
+        """
+        if self.gc_state != STATE_SCANNING:
+            self.major_collection_step(reserving_size, complete=True)
+            # execute_finalizers() may have allocated young objects
+            self.minor_collection()
+        self.major_collection_step(reserving_size, complete=True)
+
+
+    # ----------
+    # Incremental major collection
+
+    def major_collection_step(self, reserving_size=0, complete=False):
+        """Do the next step of the current major collection, starting a
+        new major collection if needed.  If 'complete' is True, continue
+        until the major collection is finished.  Only for when the
+        nursery is empty.
+        """
+        ll_assert(self.nursery_free == self.nursery or
+                  self.pinned_objects_kept > 0,
+                  "nursery not empty in major_collection_step()")
+        debug_start("gc-collect-step")
+        start_time = time.time()
+        debug_print("starting gc state:", GC_STATES[self.gc_state])
+        self.debug_check_consistency()
+        #
+        total_memory_used = float(self.get_total_memory_used())
+        if self.gc_state == STATE_SCANNING:
+            self.start_major_collection()
+            self.memory_used_at_last_step = total_memory_used
+        #
+        if (self.max_heap_size > 0.0 and
+                total_memory_used >= self.max_heap_size):
+            # near the maximum heap size: don't wait, finish now
+            complete = True
+        #
+        # Mark or sweep at least 'gc_increment_step' bytes, but also at
+        # least twice the amount of work that was added since the previous
+        # step: the memory allocated in the old generation, and the
+        # objects that the minor collections made grey again.  This
+        # ensures that marking goes faster than the program can give it
+        # more work.
+        size_to_track = float(self.gc_increment_step)
+        added = (total_memory_used - self.memory_used_at_last_step +
+                 self.size_objects_made_grey_again)
+        if 2.0 * added > size_to_track:
+            size_to_track = 2.0 * added
+        self.memory_used_at_last_step = total_memory_used
+        self.size_objects_made_grey_again = 0.0
+        #
+        finished = False
+        if self.gc_state == STATE_MARKING:
+            if complete:
+                self.visit_all_objects()
+            else:
+                self.visit_all_objects_step(size_to_track)
+            #
+            if self.objects_to_trace.non_empty():
+                debug_print("marking not finished")
+            else:
+                debug_print("marking finished")
+                self.finish_marking()
+                # the sweeping starts at the next step, unless 'complete'
+                if complete:
+                    finished = self.sweeping_step(sys.maxint)
+        #
+        elif self.gc_state == STATE_SWEEPING:
+            if complete:
+                max_pages = sys.maxint
+            else:
+                max_pages = int(size_to_track) // self.ac.page_size + 1
+            finished = self.sweeping_step(max_pages)
+        #
+        if not finished:
+            self.debug_check_consistency()
+        self.record_major_collection_pause(start_time)
+        debug_stop("gc-collect-step")
+        if finished:
+            self.finish_major_collection(reserving_size)
+
+    def start_major_collection(self):
+        debug_start("gc-collect-start")
+        debug_print("used before collection:",
+                    self.get_total_memory_used(), "bytes")
+        ll_assert(self.gc_state == STATE_SCANNING,
+                  "starting a major collection while one is in progress")
+        ll_assert(not self.objects_to_trace.non_empty(),
+                  "objects_to_trace not empty when starting a major coll.")
+        self.memory_used_before_major_collection = float(
+            self.get_total_memory_used())
+        #
+        # Start from all the roots.  As in minimark.py, a major collection
+        # is non-moving and only marks objects with GCFLAG_VISITED.
+        self.collect_roots()
+        self.gc_state = STATE_MARKING
+        debug_stop("gc-collect-start")
+
+    def visit_all_objects_step(self, size_to_track):
+        """Visit grey objects until we marked 'size_to_track' bytes, or
+        until there are no more grey objects.
+        """
+        pending = self.objects_to_trace
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        while pending.non_empty():
+            obj = pending.pop()
+            if self.header(obj).tid & (GCFLAG_VISITED |
+                                       GCFLAG_NO_HEAP_PTRS) == 0:
+                totalsize = size_gc_header + self.get_size(obj)
+                size_to_track -= raw_malloc_usage(totalsize)
+                self.visit(obj)
+                if size_to_track < 0.0:
+                    break
+
+    def finish_marking(self):
+        """All live objects have been marked.  Deal with finalizers and
+        weakrefs, and put aside the objects to sweep in the next steps."""
+        debug_print("used before sweeping:")
+        debug_print("        in ArenaCollection:",
+                    self.ac.total_memory_used, "bytes")
+        debug_print("        raw_malloced:      ",
+                    self.rawmalloced_total_size, "bytes")
+        self.deal_with_finalizers_and_weakrefs()
+        self.forget_dying_objects_pointing_to_pinned()
+        ll_assert(not self.objects_to_trace.non_empty(),
+                  "objects_to_trace not empty after marking")
+        #
+        # The prebuilt objects are not swept: reset their GCFLAG_VISITED
+        # now.
+        self.prebuilt_root_objects.foreach(self._reset_gcflag_visited, None)
+        #
+        ll_assert(not self.raw_malloc_might_sweep.non_empty(),
+                  "raw_malloc_might_sweep not empty when starting to sweep")
+        (self.raw_malloc_might_sweep, self.old_rawmalloced_objects) = (
+            self.old_rawmalloced_objects, self.raw_malloc_might_sweep)
+        self.ac.mass_free_prepare()
+        self.gc_state = STATE_SWEEPING
+
+    def sweeping_step(self, max_pages):
+        """Free the unvisited objects in at most 'max_pages' pages, where
+        a raw-malloced object counts as one page.  Returns True when the
+        sweeping is finished."""
+        while self.raw_malloc_might_sweep.non_empty():
+            if max_pages <= 0:
+                debug_print("sweeping not finished")
+                return False
+            obj = self.raw_malloc_might_sweep.pop()
+            self.free_rawmalloced_object_if_unvisited(obj)
+            max_pages -= 1
+        #
+        if not self.ac.mass_free_incremental(self._free_if_unvisited,
+                                             max_pages):
+            debug_print("sweeping not finished")
+            return False
+        debug_print("sweeping finished")
+        return True
+
+    def finish_major_collection(self, reserving_size):
+        """The last step of a major collection: all the objects that were
+        not marked have been freed."""
+        self.gc_state = STATE_SCANNING
+        self.debug_check_consistency()
+        #
+        self.num_major_collects += 1
+        debug_start("gc-collect")
+        debug_print()
+        debug_print(".----------- Full collection ------------------")
+        debug_print("| used before collection:          ",
+                    self.memory_used_before_major_collection, "bytes")
+        debug_print("| used after collection:")
+        debug_print("|          in ArenaCollection:     ",
+                    self.ac.total_memory_used, "bytes")
+        debug_print("|          raw_malloced:           ",
+                    self.rawmalloced_total_size, "bytes")
+        debug_print("| number of major collects:        ",
+                    self.num_major_collects)
+        debug_print("`----------------------------------------------")
+        debug_stop("gc-collect")
+        #
+        self.update_major_threshold_after_collection(reserving_size)
+        #
+        # At the end, we can execute the finalizers of the objects
+        # listed in 'run_finalizers'.  Note that this will typically do
+        # more allocations.
+        self.execute_finalizers()
+
+
+    # ----------
+    # Nursery collection while marking
+
+    def minor_collection(self):
+        if self.gc_state == STATE_MARKING:
+            # The pinned objects left in the nursery by the previous minor
+            # collection may be listed as grey; they are ignored by the
+            # marking, but might not be in the nursery any more.
+            if self.pinned_objects_kept > 0:
+                self.remove_young_objects_from_objects_to_trace()
+            # The old objects pointing to pinned objects are traced again
+            # by the minor collection, which may move the pinned objects.
+            if self.old_objects_pointing_to_pinned.non_empty():
+                self.move_old_objects_pointing_to_pinned()
+            # The objects recorded by the write barrier may now point to
+            # white objects, so they must become grey again.  The same
+            # for the arrays with cards set, which are traced fully.
+            self.old_objects_pointing_to_young.foreach(
+                self._add_to_objects_to_trace_again, None)
+            self.old_objects_with_cards_set.foreach(
+                self._add_to_objects_to_trace_again, None)
+        #
+        MiniMarkGC.minor_collection(self)
+        #
+        if self.gc_state == STATE_MARKING:
+            # The roots are not protected by the write barrier: make grey
+            # all the objects they point to.  They are all old now.
+            self.root_walker.walk_roots(
+                MiniMarkGC._collect_ref_stk, # stack roots
+                MiniMarkGC._collect_ref_stk, # static in prebuilt non-gc
+                None)                        # static in prebuilt gc
+
+    def remove_young_objects_from_objects_to_trace(self):
+        oldlist = self.objects_to_trace
+        newlist = self.AddressStack()
+        while oldlist.non_empty():
+            obj = oldlist.pop()
+            if not self.is_in_nursery(obj):
+                newlist.append(obj)
+        oldlist.delete()
+        self.objects_to_trace = newlist
+
+    def _add_to_objects_to_trace_again(self, obj, ignored):
+        # young raw-malloced arrays may be listed in
+        # 'old_objects_pointing_to_young'; they are not black
+        if (bool(self.young_rawmalloced_objects) and
+                self.young_rawmalloced_objects.contains(obj)):
+            return
+        self.header(obj).tid &= ~GCFLAG_VISITED
+        self.objects_to_trace.append(obj)
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        totalsize = size_gc_header + self.get_size(obj)
+        self.size_objects_made_grey_again += raw_malloc_usage(totalsize)
+
+
+    # ----------
+    # Write barrier
+
+    def _init_writebarrier_logic(self):
+        MiniMarkGC._init_writebarrier_logic(self)
+        minimark_remember_young_pointer = self.remember_young_pointer
+        #
+        def remember_young_pointer(addr_struct, newvalue):
+            # While marking, a write into a black object must record the
+            # object, even if 'newvalue' is not young.  The same for a
+            # prebuilt object that had GCFLAG_NO_HEAP_PTRS so far, because
+            # it was ignored by the marking.
+            if self.gc_state == STATE_MARKING:
+                objhdr = self.header(addr_struct)
+                if objhdr.tid & (GCFLAG_VISITED | GCFLAG_NO_HEAP_PTRS):
+                    self.old_objects_pointing_to_young.append(addr_struct)
+                    objhdr.tid &= ~GCFLAG_TRACK_YOUNG_PTRS
+                    if objhdr.tid & GCFLAG_NO_HEAP_PTRS:
+                        objhdr.tid &= ~GCFLAG_NO_HEAP_PTRS
+                        self.prebuilt_root_objects.append(addr_struct)
+                    return
+            minimark_remember_young_pointer(addr_struct, newvalue)
+
+        remember_young_pointer._dont_inline_ = True
+        self.remember_young_pointer = remember_young_pointer
+
+    def _init_writebarrier_with_card_marker(self):
+        MiniMarkGC._init_writebarrier_with_card_marker(self)
+        minimark_remember_young_pointer_from_array3 = (
+            self.remember_young_pointer_from_array3)
+        #
+        def remember_young_pointer_from_array3(addr_array, index, newvalue):
+            # The version from minimark.py ignores the writes of old
+            # pointers into arrays with cards.  While marking, use the
+            # 2-arguments version instead, which always records the write.
+            if self.gc_state == STATE_MARKING:
+                self.remember_young_pointer_from_array2(addr_array, index)
+                return
+            minimark_remember_young_pointer_from_array3(addr_array, index,
+                                                        newvalue)
+
+        remember_young_pointer_from_array3._dont_inline_ = True
+        self.remember_young_pointer_from_array3 = (
+            remember_young_pointer_from_array3)
+
+    def writebarrier_before_copy(self, source_addr, dest_addr,
+                                 source_start, dest_start, length):
+        if self.gc_state == STATE_MARKING:
+            dest_hdr = self.header(dest_addr)
+            if (dest_hdr.tid & GCFLAG_TRACK_YOUNG_PTRS != 0 and
+                    dest_hdr.tid & (GCFLAG_VISITED | GCFLAG_NO_HEAP_PTRS)):
+                # copying into a black object: record it as a whole
+                self.assume_young_pointers(dest_addr)
+                return True
+        return MiniMarkGC.writebarrier_before_copy(self, source_addr,
+                                                   dest_addr, source_start,
+                                                   dest_start, length)
+
+
+    # ----------
+    # Debugging checks
+
+    def debug_check_consistency(self):
+        if self.DEBUG and self.gc_state == STATE_MARKING:
+            self._debug_grey_objects = self.objects_to_trace.stack2dict()
+            MiniMarkGC.debug_check_consistency(self)
+            self._debug_grey_objects.delete()
+        else:
+            MiniMarkGC.debug_check_consistency(self)
+
+    def debug_check_object(self, obj):
+        hdr = self.header(obj)
+        if self.gc_state == STATE_SWEEPING and hdr.tid & GCFLAG_VISITED:
+            # a surviving object in a page not swept so far
+            hdr.tid &= ~GCFLAG_VISITED
+            MiniMarkGC.debug_check_object(self, obj)
+            hdr.tid |= GCFLAG_VISITED
+        elif self.gc_state == STATE_MARKING and hdr.tid & GCFLAG_VISITED:
+            # GCFLAG_VISITED is expected on black objects between two
+            # steps.  Check the tri-color invariant: no black object
+            # points to a white object, unless it was recorded by the
+            # write barrier (such objects are made grey again by the
+            # minor collection, before we get here).
+            self.trace(obj, self._debug_check_not_white, None)
+            hdr.tid &= ~GCFLAG_VISITED
+            MiniMarkGC.debug_check_object(self, obj)
+            hdr.tid |= GCFLAG_VISITED
+        else:
+            MiniMarkGC.debug_check_object(self, obj)
+
+    def _debug_check_not_white(self, root, ignored):
+        obj = root.address[0]
+        if self.header(obj).tid & (GCFLAG_VISITED | GCFLAG_NO_HEAP_PTRS |
+                                   GCFLAG_PINNED) == 0:
+            ll_assert(self._debug_grey_objects.contains(obj),
+                      "black object points to a white object")
@@ -5,6 +5,17 @@ Environment variables can be used to fine-tune the following parameters:
  PYPY_GC_NURSERY        The nursery size.  Defaults to '4MB'.  Small values
                         (like 1 or 1KB) are useful for debugging.
 
+ PYPY_GC_NURSERY_MIN    The bounds between which the nursery size can be
+ PYPY_GC_NURSERY_MAX    adapted after minor collections: it grows when
+                        many young objects survive, and shrinks when
+                        almost none do or when minor collections take
+                        longer than PYPY_GC_NURSERY_PAUSE.  Both default
+                        to PYPY_GC_NURSERY, i.e. a fixed nursery size.
+
+ PYPY_GC_NURSERY_PAUSE  The maximal time, in seconds, that a minor
+                        collection should take; used only with an
+                        adaptive nursery size.  Default is no limit.
+
  PYPY_GC_MAJOR_COLLECT  Major collection memory factor.  Default is '1.82',
                         which means trigger a major collection when the
                         memory consumed equals 1.82 times the memory
@@ -42,7 +53,7 @@ Environment variables can be used to fine-tune the following parameters:
 # XXX total addressable size.  Maybe by keeping some minimarkpage arenas
 # XXX pre-reserved, enough for a few nursery collections?  What about
 # XXX raw-malloced memory?
-import sys
+import sys, time
 from pypy.rpython.lltypesystem import lltype, llmemory, llarena, llgroup
 from pypy.rpython.lltypesystem.lloperation import llop
 from pypy.rpython.lltypesystem.llmemory import raw_malloc_usage
@@ -53,6 +64,7 @@ from pypy.rlib.rarithmetic import ovfcheck, LONG_BIT, intmask, r_uint
 from pypy.rlib.rarithmetic import LONG_BIT_SHIFT
 from pypy.rlib.debug import ll_assert, debug_print, debug_start, debug_stop
 from pypy.rlib.objectmodel import we_are_translated
+from pypy.rlib import rgc
 from pypy.tool.sourcetools import func_with_new_name
 
 #
@@ -114,7 +126,14 @@ GCFLAG_FINALIZATION_ORDERING = first_gcflag << 4
 GCFLAG_HAS_CARDS    = first_gcflag << 5
 GCFLAG_CARDS_SET    = first_gcflag << 6     # <- at least one card bit is set
 
-TID_MASK            = (first_gcflag << 7) - 1
+# The following flag is set on nursery objects that must not move for
+# now, see pin().  A minor collection leaves them where they are, and
+# the following allocations in the nursery go around them.  As it is
+# only set on young objects without GC pointers, the major collections
+# ignore these objects.
+GCFLAG_PINNED       = first_gcflag << 7
+
+TID_MASK            = (first_gcflag << 8) - 1
 
 
 FORWARDSTUB = lltype.GcStruct('forwarding_stub',
@@ -205,9 +224,21 @@ class MiniMarkGC(MovingGCBase):
         "large_object": (16384+512)*WORD,
         }
 
+    # Adaptive nursery size: every NURSERY_ADAPT_INTERVAL minor
+    # collections, the nursery size is doubled if more than
+    # NURSERY_GROW_SURVIVAL of the nursery survived on average, and
+    # halved if less than NURSERY_SHRINK_SURVIVAL did.
+    NURSERY_ADAPT_INTERVAL = 8
+    NURSERY_GROW_SURVIVAL = 0.10
+    NURSERY_SHRINK_SURVIVAL = 0.02
+
     def __init__(self, config,
                  read_from_env=False,
                  nursery_size=32*WORD,
+                 nursery_min_size=0,
+                 nursery_max_size=0,
+                 nursery_max_pause=0.0,
+                 max_number_of_pinned_objects=100,
                  page_size=16*WORD,
                  arena_size=64*WORD,
                  small_request_threshold=5*WORD,
@@ -221,11 +252,29 @@ class MiniMarkGC(MovingGCBase):
         assert small_request_threshold % WORD == 0
         self.read_from_env = read_from_env
         self.nursery_size = nursery_size
+        # the bounds of the adaptive nursery size.  We always allocate
+        # a nursery of 'nursery_max_size' bytes, but use only the first
+        # 'nursery_size' bytes of it.
+        self.nursery_min_size = nursery_min_size or nursery_size
+        self.nursery_max_size = nursery_max_size or nursery_size
+        self.nursery_max_pause = nursery_max_pause
+        self.max_number_of_pinned_objects = max_number_of_pinned_objects
         self.small_request_threshold = small_request_threshold
         self.major_collection_threshold = major_collection_threshold
         self.growth_rate_max = growth_rate_max
         self.num_major_collects = 0
         self.min_heap_size = 0.0
+        #
+        # Statistics, returned by get_stat().  Times are in seconds.
+        self.num_minor_collects = 0
+        self.minor_collection_time = 0.0
+        self.minor_collection_max_time = 0.0
+        self.num_major_collection_pauses = 0
+        self.major_collection_time = 0.0
+        self.major_collection_max_time = 0.0
+        self.finalizer_time = 0.0
+        self.bytes_promoted = 0.0
+        self.card_marking_scans = 0
         self.max_heap_size = 0.0
         self.max_heap_size_already_raised = False
         self.max_delta = float(r_uint(-1))
@@ -243,6 +292,14 @@ class MiniMarkGC(MovingGCBase):
         self.nursery      = NULL
         self.nursery_free = NULL
         self.nursery_top  = NULL
+        self.nursery_real_top = NULL
+        #
+        # Support for pinned objects: the number of objects currently
+        # pinned in the nursery, and the number of pinned objects that
+        # the previous minor collection left in the nursery.
+        self.pinned_objects_in_nursery = 0
+        self.pinned_objects_kept = 0
+        self.any_pinned_object_kept = False
         self.debug_tiny_nursery = -1
         self.debug_rotating_nurseries = None
         #
@@ -304,6 +361,18 @@ class MiniMarkGC(MovingGCBase):
         # minor collection.
         self.nursery_objects_shadows = self.AddressDict()
         #
+        # Support for pinned objects.  During a minor collection, the
+        # pinned objects that are found alive (recorded as the address of
+        # their header), and the old objects that
+        # point to them: these must be traced again by the next minor
+        # collection, because the pinned objects might have moved by then.
+        # When there are pinned objects in the nursery, the free segments
+        # of the nursery that follow the current one are listed in
+        # 'nursery_barriers', as pairs (start, stop).
+        self.surviving_pinned_objects = self.AddressStack()
+        self.old_objects_pointing_to_pinned = self.AddressStack()
+        self.nursery_barriers = self.AddressDeque()
+        #
         # Allocate a nursery.  In case of auto_nursery_size, start by
         # allocating a very small nursery, enough to do things like look
         # up the env var, which requires the GC; and then really
@@ -315,6 +384,7 @@ class MiniMarkGC(MovingGCBase):
             defaultsize = self.nursery_size
             minsize = 2 * (self.nonlarge_max + 1)
             self.nursery_size = minsize
+            self.nursery_max_size = minsize
             self.allocate_nursery()
             #
             # From there on, the GC is fully initialized and the code
@@ -336,6 +406,23 @@ class MiniMarkGC(MovingGCBase):
                 self.debug_tiny_nursery = newsize & ~(WORD-1)
                 newsize = minsize
             #
+            # Bounds for the adaptive nursery size, not used together
+            # with a tiny nursery.
+            nursery_min_size = env.read_from_env('PYPY_GC_NURSERY_MIN')
+            nursery_max_size = env.read_from_env('PYPY_GC_NURSERY_MAX')
+            if self.debug_tiny_nursery >= 0 or nursery_min_size <= 0:
+                nursery_min_size = newsize
+            if self.debug_tiny_nursery >= 0 or nursery_max_size <= 0:
+                nursery_max_size = newsize
+            nursery_min_size = max(nursery_min_size, minsize) & ~(WORD-1)
+            nursery_max_size = max(nursery_max_size,
+                                   nursery_min_size) & ~(WORD-1)
+            newsize = min(max(newsize, nursery_min_size), nursery_max_size)
+            #
+            max_pause = env.read_float_from_env('PYPY_GC_NURSERY_PAUSE')
+            if max_pause > 0.0:
+                self.nursery_max_pause = max_pause
+            #
             major_coll = env.read_float_from_env('PYPY_GC_MAJOR_COLLECT')
             if major_coll > 1.0:
                 self.major_collection_threshold = major_coll
@@ -364,12 +451,14 @@ class MiniMarkGC(MovingGCBase):
             self.minor_collection()    # to empty the nursery
             llarena.arena_free(self.nursery)
             self.nursery_size = newsize
+            self.nursery_min_size = nursery_min_size
+            self.nursery_max_size = nursery_max_size
             self.allocate_nursery()
 
 
     def _nursery_memory_size(self):
         extra = self.nonlarge_max + 1
-        return self.nursery_size + extra
+        return self.nursery_max_size + extra
 
     def _alloc_nursery(self):
         # the start of the nursery: we actually allocate a bit more for
@@ -384,11 +473,15 @@ class MiniMarkGC(MovingGCBase):
     def allocate_nursery(self):
         debug_start("gc-set-nursery-size")
         debug_print("nursery size:", self.nursery_size)
+        if self.nursery_max_size > self.nursery_min_size:
+            debug_print("adaptive between:", self.nursery_min_size,
+                        "and", self.nursery_max_size)
         self.nursery = self._alloc_nursery()
         # the current position in the nursery:
         self.nursery_free = self.nursery
-        # the end of the nursery:
-        self.nursery_top = self.nursery + self.nursery_size
+        # the end of the nursery, and of the current free segment of it:
+        self.nursery_real_top = self.nursery + self.nursery_size
+        self.nursery_top = self.nursery_real_top
         # initialize the threshold
         self.min_heap_size = max(self.min_heap_size, self.nursery_size *
                                               self.major_collection_threshold)
@@ -399,8 +492,69 @@ class MiniMarkGC(MovingGCBase):
         self.next_major_collection_initial = self.min_heap_size
         self.next_major_collection_threshold = self.min_heap_size
         self.set_major_threshold_from(0.0)
+        # measurements for the adaptive nursery size
+        self.nursery_adapt_count = 0
+        self.nursery_adapt_used = 0.0
+        self.nursery_adapt_promoted = 0.0
+        self.nursery_adapt_max_time = 0.0
         debug_stop("gc-set-nursery-size")
 
+    def adapt_nursery_size(self, used, promoted, duration):
+        """Called after a minor collection that emptied 'used' bytes of
+        the nursery, of which 'promoted' bytes survived, in 'duration'
+        seconds.  Every NURSERY_ADAPT_INTERVAL calls, change the size of
+        the nursery within its bounds, based on the measurements.
+        """
+        self.nursery_adapt_count += 1
+        self.nursery_adapt_used += used
+        self.nursery_adapt_promoted += promoted
+        if duration > self.nursery_adapt_max_time:
+            self.nursery_adapt_max_time = duration
+        if self.nursery_adapt_count < self.NURSERY_ADAPT_INTERVAL:
+            return
+        #
+        survival = 0.0
+        if self.nursery_adapt_used > 0.0:
+            survival = self.nursery_adapt_promoted / self.nursery_adapt_used
+        max_time = self.nursery_adapt_max_time
+        self.nursery_adapt_count = 0
+        self.nursery_adapt_used = 0.0
+        self.nursery_adapt_promoted = 0.0
+        self.nursery_adapt_max_time = 0.0
+        #
+        # Shrink the nursery if the minor collections are too long, or if
+        # almost nothing survives them: a smaller nursery stays in the CPU
+        # cache.  Grow it if many objects survive: they might die if given
+        # more time.
+        newsize = self.nursery_size
+        if self.nursery_max_pause > 0.0 and max_time > self.nursery_max_pause:
+            newsize = self.nursery_size // 2
+        elif survival < self.NURSERY_SHRINK_SURVIVAL:
+            newsize = self.nursery_size // 2
+        elif survival > self.NURSERY_GROW_SURVIVAL:
+            if max_time * 2.0 <= self.nursery_max_pause or (
+                    self.nursery_max_pause <= 0.0):
+                newsize = self.nursery_size * 2
+        newsize &= ~(WORD-1)
+        if newsize < self.nursery_min_size:
+            newsize = self.nursery_min_size
+        if newsize > self.nursery_max_size:
+            newsize = self.nursery_max_size
+        if newsize == self.nursery_size:
+            return
+        #
+        debug_start("gc-set-nursery-size")
+        debug_print("nursery size:", self.nursery_size, "->", newsize)
+        debug_print("survival rate:", survival,
+                    "max minor collection time:", max_time)
+        debug_stop("gc-set-nursery-size")
+        #
+        # The nursery is empty and all its 'nursery_max_size' bytes are
+        # zero, so we only need to move the top.
+        self.nursery_size = newsize
+        self.nursery_real_top = self.nursery + newsize
+        self.nursery_top = self.nursery_real_top
+
 
     def set_major_threshold_from(self, threshold, reserving_size=0):
         # Set the next_major_collection_threshold.
@@ -451,7 +605,8 @@ class MiniMarkGC(MovingGCBase):
             newnurs = self.debug_rotating_nurseries.pop(0)
             llarena.arena_protect(newnurs, self._nursery_memory_size(), False)
             self.nursery = newnurs
-            self.nursery_top = self.nursery + self.nursery_size
+            self.nursery_real_top = self.nursery + self.nursery_size
+            self.nursery_top = self.nursery_real_top
             debug_print("switching from nursery", oldnurs,
                         "to nursery", self.nursery,
                         "size", self.nursery_size)
@@ -578,6 +733,15 @@ class MiniMarkGC(MovingGCBase):
         and finally reserve 'totalsize' bytes at the start of the
         now-empty nursery.
         """
+        # If pinned objects split the nursery, first try the free
+        # segments that follow the current one.
+        while self.nursery_barriers.non_empty():
+            self.move_to_next_nursery_segment()
+            if self.nursery_free + totalsize <= self.nursery_top:
+                result = self.nursery_free
+                self.nursery_free = result + totalsize
+                return result
+        #
         self.minor_collection()
         #
         if self.get_total_memory_used() > self.next_major_collection_threshold:
@@ -589,6 +753,14 @@ class MiniMarkGC(MovingGCBase):
             if self.nursery_free + totalsize > self.nursery_top:
                 self.minor_collection()
         #
+        # The pinned objects might have left too little room at the start
+        # of the nursery.  pin() limits their number so that at least one
+        # free segment is large enough.
+        while self.nursery_free + totalsize > self.nursery_top:
+            ll_assert(self.nursery_barriers.non_empty(),
+                      "no room in a nursery split by pinned objects")
+            self.move_to_next_nursery_segment()
+        #
         result = self.nursery_free
         self.nursery_free = result + totalsize
         ll_assert(self.nursery_free <= self.nursery_top, "nursery overflow")
@@ -600,6 +772,18 @@ class MiniMarkGC(MovingGCBase):
         return result
     collect_and_reserve._dont_inline_ = True
 
+    def move_to_next_nursery_segment(self):
+        self.nursery_free = self.nursery_barriers.popleft()
+        self.nursery_top = self.nursery_barriers.popleft()
+
+    def minor_collection_with_major_progress(self, reserving_size=0):
+        """Do a minor collection, followed by a major collection.
+        Overridden in incminimark.py to do only the next step of the
+        major collection.
+        """
+        self.minor_collection()
+        self.major_collection(reserving_size)
+
 
     def external_malloc(self, typeid, length, can_make_young=True):
         """Allocate a large object using the ArenaCollection or
@@ -637,8 +821,8 @@ class MiniMarkGC(MovingGCBase):
         # force a full collection.
         if (float(self.get_total_memory_used()) + raw_malloc_usage(totalsize) >
                 self.next_major_collection_threshold):
-            self.minor_collection()
-            self.major_collection(raw_malloc_usage(totalsize))
+            self.minor_collection_with_major_progress(
+                raw_malloc_usage(totalsize))
         #
         # Check if the object would fit in the ArenaCollection.
         if raw_malloc_usage(totalsize) <= self.small_request_threshold:
@@ -763,6 +947,46 @@ class MiniMarkGC(MovingGCBase):
         """Overrides the parent can_move()."""
         return self.is_in_nursery(obj)
 
+    def pin(self, obj):
+        """Try to prevent the nursery object 'obj' from moving, until
+        unpin() is called.  Only objects without GC pointers, like
+        strings, can be pinned.  Return False if 'obj' is not pinned;
+        in that case, the caller should not call unpin().
+        """
+        if not self.is_in_nursery(obj):
+            return False     # not a young object: it cannot move anyway
+        if self.pinned_objects_in_nursery >= self.max_pinned_objects():
+            return False
+        typeid = self.get_type_id(obj)
+        if (not self.is_varsize(typeid) or
+                self.has_gcptr_in_varsize(typeid) or
+                len(self.offsets_to_gc_pointers(typeid)) > 0 or
+                self.has_custom_trace(typeid)):
+            return False
+        if self.header(obj).tid & (GCFLAG_PINNED | GCFLAG_HAS_SHADOW):
+            return False
+        self.header(obj).tid |= GCFLAG_PINNED
+        self.pinned_objects_in_nursery += 1
+        return True
+
+    def unpin(self, obj):
+        ll_assert(self._is_pinned(obj), "unpin() of an object not pinned")
+        self.header(obj).tid &= ~GCFLAG_PINNED
+        self.pinned_objects_in_nursery -= 1
+
+    def _is_pinned(self, obj):
+        return (self.is_in_nursery(obj) and
+                self.header(obj).tid & GCFLAG_PINNED != 0)
+
+    def max_pinned_objects(self):
+        # Each pinned object is smaller than 'nonlarge_max'.  With at
+        # most this number of them, the nursery always keeps one free
+        # segment in which any young object can be allocated.
+        max_pinned = (self.nursery_size // (self.nonlarge_max + 1) - 1) // 2
+        if max_pinned > self.max_number_of_pinned_objects:
+            max_pinned = self.max_number_of_pinned_objects
+        return max_pinned
+
 
     def shrink_array(self, obj, smallerlength):
         #
@@ -772,10 +996,11 @@ class MiniMarkGC(MovingGCBase):
         # In particular, an array with GCFLAG_HAS_CARDS is never resized.
         # Also, a nursery object with GCFLAG_HAS_SHADOW is not resized
         # either, as this would potentially loose part of the memory in
-        # the already-allocated shadow.
+        # the already-allocated shadow.  Neither is a pinned object, whose
+        # size is used to find the free nursery segment after it.
         if not self.is_in_nursery(obj):
             return False
-        if self.header(obj).tid & GCFLAG_HAS_SHADOW:
+        if self.header(obj).tid & (GCFLAG_HAS_SHADOW | GCFLAG_PINNED):
             return False
         #
         size_gc_header = self.gcheaderbuilder.size_gc_header
@@ -829,7 +1054,7 @@ class MiniMarkGC(MovingGCBase):
     def is_in_nursery(self, addr):
         ll_assert(llmemory.cast_adr_to_int(addr) & 1 == 0,
                   "odd-valued (i.e. tagged) pointer unexpected here")
-        return self.nursery <= addr < self.nursery_top
+        return self.nursery <= addr < self.nursery_real_top
 
     def appears_to_be_young(self, addr):
         # "is a valid addr to a young object?"
@@ -849,7 +1074,7 @@ class MiniMarkGC(MovingGCBase):
             if not self.is_valid_gc_object(addr):
                 return False
 
-        if self.nursery <= addr < self.nursery_top:
+        if self.nursery <= addr < self.nursery_real_top:
             return True      # addr is in the nursery
         #
         # Else, it may be in the set 'young_rawmalloced_objects'
@@ -885,6 +1110,31 @@ class MiniMarkGC(MovingGCBase):
         """
         return self.ac.total_memory_used + self.rawmalloced_total_size
 
+    def get_stat(self, index):
+        if index == rgc.GC_STAT_MINOR_COLLECTIONS:
+            return float(self.num_minor_collects)
+        if index == rgc.GC_STAT_MINOR_COLLECTION_TIME:
+            return self.minor_collection_time
+        if index == rgc.GC_STAT_MINOR_COLLECTION_MAX_TIME:
+            return self.minor_collection_max_time
+        if index == rgc.GC_STAT_MAJOR_COLLECTIONS:
+            return float(self.num_major_collects)
+        if index == rgc.GC_STAT_MAJOR_COLLECTION_PAUSES:
+            return float(self.num_major_collection_pauses)
+        if index == rgc.GC_STAT_MAJOR_COLLECTION_TIME:
+            return self.major_collection_time
+        if index == rgc.GC_STAT_MAJOR_COLLECTION_MAX_TIME:
+            return self.major_collection_max_time
+        if index == rgc.GC_STAT_FINALIZER_TIME:
+            return self.finalizer_time
+        if index == rgc.GC_STAT_BYTES_PROMOTED:
+            return self.bytes_promoted
+        if index == rgc.GC_STAT_CARD_MARKING_SCANS:
+            return float(self.card_marking_scans)
+        if index == rgc.GC_STAT_NURSERY_SIZE:
+            return float(self.nursery_size)
+        return -1.0
+
     def card_marking_words_for_length(self, length):
         # --- Unoptimized version:
         #num_bits = ((length-1) >> self.card_page_shift) + 1
@@ -912,9 +1162,12 @@ class MiniMarkGC(MovingGCBase):
             MovingGCBase.debug_check_consistency(self)
 
     def debug_check_object(self, obj):
-        # after a minor or major collection, no object should be in the nursery
-        ll_assert(not self.is_in_nursery(obj),
-                  "object in nursery after collection")
+        # after a minor or major collection, no object should be in the
+        # nursery, apart from the pinned ones
+        if self.is_in_nursery(obj):
+            ll_assert(self.header(obj).tid & GCFLAG_PINNED != 0,
+                      "object in nursery after collection")
+            return
         # similarily, all objects should have this flag:
         ll_assert(self.header(obj).tid & GCFLAG_TRACK_YOUNG_PTRS != 0,
                   "missing GCFLAG_TRACK_YOUNG_PTRS")
@@ -1235,12 +1488,22 @@ class MiniMarkGC(MovingGCBase):
         that remain alive and move them out."""
         #
         debug_start("gc-minor")
+        start_time = time.time()
+        used = self.nursery_free - self.nursery
+        if used > self.nursery_size:
+            used = self.nursery_size
+        bytes_promoted_before = self.bytes_promoted
         #
         # Before everything else, remove from 'old_objects_pointing_to_young'
         # the young arrays.
         if self.young_rawmalloced_objects:
             self.remove_young_arrays_from_old_objects_pointing_to_young()
         #
+        # The old objects that pointed to pinned objects at the previous
+        # minor collection must be traced again.
+        if self.old_objects_pointing_to_pinned.non_empty():
+            self.move_old_objects_pointing_to_pinned()
+        #
         # First, find the roots that point to young objects.  All nursery
         # objects found are copied out of the nursery, and the occasional
         # young raw-malloced object is flagged with GCFLAG_VISITED.
@@ -1288,17 +1551,73 @@ class MiniMarkGC(MovingGCBase):
         #
         # All live nursery objects are out, and the rest dies.  Fill
         # the whole nursery with zero and reset the current nursery pointer.
-        llarena.arena_reset(self.nursery, self.nursery_size, 2)
-        self.debug_rotate_nursery()
-        self.nursery_free = self.nursery
+        # If there are pinned objects, only fill the space around them.
+        while self.nursery_barriers.non_empty():
+            self.nursery_barriers.popleft()
+        if self.surviving_pinned_objects.non_empty():
+            self.reset_nursery_around_pinned_objects()
+        else:
+            self.pinned_objects_in_nursery = 0
+            self.pinned_objects_kept = 0
+            llarena.arena_reset(self.nursery, self.nursery_size, 2)
+            self.debug_rotate_nursery()
+            self.nursery_free = self.nursery
+            self.nursery_top = self.nursery_real_top
         #
         debug_print("minor collect, total memory used:",
                     self.get_total_memory_used())
         if self.DEBUG >= 2:
             self.debug_check_consistency()     # expensive!
+        #
+        duration = time.time() - start_time
+        self.num_minor_collects += 1
+        self.minor_collection_time += duration
+        if duration > self.minor_collection_max_time:
+            self.minor_collection_max_time = duration
+        if (self.nursery_max_size > self.nursery_min_size and
+                self.pinned_objects_kept == 0):
+            promoted = self.bytes_promoted - bytes_promoted_before
+            self.adapt_nursery_size(float(used), promoted, duration)
         debug_stop("gc-minor")
 
 
+    def move_old_objects_pointing_to_pinned(self):
+        while self.old_objects_pointing_to_pinned.non_empty():
+            obj = self.old_objects_pointing_to_pinned.pop()
+            hdr = self.header(obj)
+            if hdr.tid & GCFLAG_TRACK_YOUNG_PTRS:
+                hdr.tid &= ~GCFLAG_TRACK_YOUNG_PTRS
+                self.old_objects_pointing_to_young.append(obj)
+
+    def reset_nursery_around_pinned_objects(self):
+        # Sort the pinned objects that survived by address, and fill with
+        # zero the free segments between them.  They are listed in
+        # 'nursery_barriers', and we continue allocating in the first one.
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        pinned = self.surviving_pinned_objects
+        pinned.sort()
+        count = 0
+        prev = self.nursery
+        while pinned.non_empty():
+            start = pinned.pop()
+            obj = start + size_gc_header
+            self.header(obj).tid &= ~GCFLAG_VISITED
+            count += 1
+            self._add_nursery_segment(prev, start)
+            totalsize = size_gc_header + self.get_size(obj)
+            prev = start + llarena.round_up_for_allocation(totalsize)
+        self._add_nursery_segment(prev, self.nursery_real_top)
+        debug_print("pinned objects kept in the nursery:", count)
+        self.pinned_objects_in_nursery = count
+        self.pinned_objects_kept = count
+        self.move_to_next_nursery_segment()
+
+    def _add_nursery_segment(self, start, stop):
+        if stop - start > 0:
+            llarena.arena_reset(start, stop - start, 2)
+            self.nursery_barriers.append(start)
+            self.nursery_barriers.append(stop)
+
     def collect_roots_in_nursery(self):
         # we don't need to trace prebuilt GcStructs during a minor collect:
         # if a prebuilt GcStruct contains a pointer to a young object,
@@ -1309,6 +1628,7 @@ class MiniMarkGC(MovingGCBase):
             MiniMarkGC._trace_drag_out1,  # stack roots
             MiniMarkGC._trace_drag_out1,  # static in prebuilt non-gc
             None)                         # static in prebuilt gc
+        self.any_pinned_object_kept = False     # the roots are walked anyway
         debug_stop("gc-minor-walkroots")
 
     def collect_cardrefs_to_nursery(self):
@@ -1316,6 +1636,7 @@ class MiniMarkGC(MovingGCBase):
         oldlist = self.old_objects_with_cards_set
         while oldlist.non_empty():
             obj = oldlist.pop()
+            self.card_marking_scans += 1
             #
             # Remove the GCFLAG_CARDS_SET flag.
             ll_assert(self.header(obj).tid & GCFLAG_CARDS_SET != 0,
@@ -1366,6 +1687,10 @@ class MiniMarkGC(MovingGCBase):
                         interval_start = interval_stop
                         cardbyte >>= 1
                     interval_start = next_byte_start
+                #
+                if self.any_pinned_object_kept:
+                    self.any_pinned_object_kept = False
+                    self.old_objects_pointing_to_pinned.append(obj)
 
 
     def collect_oldrefs_to_nursery(self):
@@ -1389,6 +1714,12 @@ class MiniMarkGC(MovingGCBase):
             # outside the nursery, possibly forcing nursery objects out
             # and adding them to 'old_objects_pointing_to_young' as well.
             self.trace_and_drag_out_of_nursery(obj)
+            #
+            # If it points to a pinned object, we must trace it again at
+            # the next minor collection.
+            if self.any_pinned_object_kept:
+                self.any_pinned_object_kept = False
+                self.old_objects_pointing_to_pinned.append(obj)
 
     def trace_and_drag_out_of_nursery(self, obj):
         """obj must not be in the nursery.  This copies all the
@@ -1427,12 +1758,12 @@ class MiniMarkGC(MovingGCBase):
             return
         #
         size_gc_header = self.gcheaderbuilder.size_gc_header
-        if self.header(obj).tid & GCFLAG_HAS_SHADOW == 0:
+        if self.header(obj).tid & (GCFLAG_HAS_SHADOW | GCFLAG_PINNED) == 0:
             #
             # Common case: 'obj' was not already forwarded (otherwise
             # tid == -42, containing all flags), and it doesn't have the
-            # HAS_SHADOW flag either.  We must move it out of the nursery,
-            # into a new nonmovable location.
+            # HAS_SHADOW or PINNED flag either.  We must move it out of the
+            # nursery, into a new nonmovable location.
             totalsize = size_gc_header + self.get_size(obj)
             newhdr = self._malloc_out_of_nursery(totalsize)
             #
@@ -1443,6 +1774,20 @@ class MiniMarkGC(MovingGCBase):
             root.address[0] = self.get_forwarding_address(obj)
             return
             #
+        elif self.header(obj).tid & GCFLAG_PINNED:
+            #
+            # 'obj' is pinned: leave it in the nursery.  Record it the
+            # first time (GCFLAG_VISITED is otherwise unused in the
+            # nursery), and tell the caller that it points to it.
+            hdr = self.header(obj)
+            if hdr.tid & GCFLAG_VISITED == 0:
+                hdr.tid |= GCFLAG_VISITED
+                size_gc_header = self.gcheaderbuilder.size_gc_header
+                self.surviving_pinned_objects.append(
+                    llarena.getfakearenaaddress(obj - size_gc_header))
+            self.any_pinned_object_kept = True
+            return
+            #
         else:
             # First visit to an object that has already a shadow.
             newobj = self.nursery_objects_shadows.get(obj)
@@ -1458,6 +1803,7 @@ class MiniMarkGC(MovingGCBase):
         # Copy it.  Note that references to other objects in the
         # nursery are kept unchanged in this step.
         llmemory.raw_memcopy(obj - size_gc_header, newhdr, totalsize)
+        self.bytes_promoted += raw_malloc_usage(totalsize)
         #
         # Set the old object's tid to -42 (containing all flags) and
         # replace the old object's content with the target address.
@@ -1567,6 +1913,7 @@ class MiniMarkGC(MovingGCBase):
         """Do a major collection.  Only for when the nursery is empty."""
         #
         debug_start("gc-collect")
+        start_time = time.time()
         debug_print()
         debug_print(".----------- Full collection ------------------")
         debug_print("| used before collection:")
@@ -1576,7 +1923,8 @@ class MiniMarkGC(MovingGCBase):
                     self.rawmalloced_total_size, "bytes")
         #
         # Debugging checks
-        ll_assert(self.nursery_free == self.nursery,
+        ll_assert(self.nursery_free == self.nursery or
+                  self.pinned_objects_kept > 0,
                   "nursery not empty in major_collection()")
         self.debug_check_consistency()
         #
@@ -1588,21 +1936,53 @@ class MiniMarkGC(MovingGCBase):
         self.collect_roots()
         self.visit_all_objects()
         #
-        # Finalizer support: adds the flag GCFLAG_VISITED to all objects
-        # with a finalizer and all objects reachable from there (and also
-        # moves some objects from 'objects_with_finalizers' to
-        # 'run_finalizers').
-        if self.objects_with_finalizers.non_empty():
-            self.deal_with_objects_with_finalizers()
-        #
+        # Deal with finalizers and weakrefs, and free the objects that
+        # have not been visited.
+        self.sweep_after_marking()
         self.objects_to_trace.delete()
         #
-        # Weakref support: clear the weak pointers to dying objects
-        if self.old_objects_with_weakrefs.non_empty():
-            self.invalidate_old_weakrefs()
-        if self.old_objects_with_light_finalizers.non_empty():
-            self.deal_with_old_objects_with_finalizers()
+        self.debug_check_consistency()
+        #
+        self.num_major_collects += 1
+        debug_print("| used after collection:")
+        debug_print("|          in ArenaCollection:     ",
+                    self.ac.total_memory_used, "bytes")
+        debug_print("|          raw_malloced:           ",
+                    self.rawmalloced_total_size, "bytes")
+        debug_print("| number of major collects:        ",
+                    self.num_major_collects)
+        debug_print("`----------------------------------------------")
+        self.record_major_collection_pause(start_time)
+        debug_stop("gc-collect")
+        #
+        self.update_major_threshold_after_collection(reserving_size)
+        #
+        # At the end, we can execute the finalizers of the objects
+        # listed in 'run_finalizers'.  Note that this will typically do
+        # more allocations.
+        self.execute_finalizers()
+
+
+    def record_major_collection_pause(self, start_time):
+        duration = time.time() - start_time
+        self.num_major_collection_pauses += 1
+        self.major_collection_time += duration
+        if duration > self.major_collection_max_time:
+            self.major_collection_max_time = duration
 
+    def execute_finalizers(self):
+        start_time = time.time()
+        MovingGCBase.execute_finalizers(self)
+        self.finalizer_time += time.time() - start_time
+
+    def sweep_after_marking(self):
+        """Called at the end of the marking phase of a major collection,
+        when all objects reachable from the roots have GCFLAG_VISITED.
+        Deals with finalizers and weakrefs, then frees the objects that
+        were not visited and resets GCFLAG_VISITED on the others.
+        """
+        self.deal_with_finalizers_and_weakrefs()
+        self.forget_dying_objects_pointing_to_pinned()
         #
         # Walk all rawmalloced objects and free the ones that don't
         # have the GCFLAG_VISITED flag.
@@ -1615,19 +1995,35 @@ class MiniMarkGC(MovingGCBase):
         #
         # We also need to reset the GCFLAG_VISITED on prebuilt GC objects.
         self.prebuilt_root_objects.foreach(self._reset_gcflag_visited, None)
+
+    def forget_dying_objects_pointing_to_pinned(self):
+        # The old objects that point to pinned objects and are going to
+        # be freed must be removed from 'old_objects_pointing_to_pinned'.
+        if self.old_objects_pointing_to_pinned.non_empty():
+            oldlist = self.old_objects_pointing_to_pinned
+            newlist = self.AddressStack()
+            while oldlist.non_empty():
+                obj = oldlist.pop()
+                if self.header(obj).tid & GCFLAG_VISITED:
+                    newlist.append(obj)
+            oldlist.delete()
+            self.old_objects_pointing_to_pinned = newlist
+
+    def deal_with_finalizers_and_weakrefs(self):
+        # Finalizer support: adds the flag GCFLAG_VISITED to all objects
+        # with a finalizer and all objects reachable from there (and also
+        # moves some objects from 'objects_with_finalizers' to
+        # 'run_finalizers').
+        if self.objects_with_finalizers.non_empty():
+            self.deal_with_objects_with_finalizers()
         #
-        self.debug_check_consistency()
-        #
-        self.num_major_collects += 1
-        debug_print("| used after collection:")
-        debug_print("|          in ArenaCollection:     ",
-                    self.ac.total_memory_used, "bytes")
-        debug_print("|          raw_malloced:           ",
-                    self.rawmalloced_total_size, "bytes")
-        debug_print("| number of major collects:        ",
-                    self.num_major_collects)
-        debug_print("`----------------------------------------------")
-        debug_stop("gc-collect")
+        # Weakref support: clear the weak pointers to dying objects
+        if self.old_objects_with_weakrefs.non_empty():
+            self.invalidate_old_weakrefs()
+        if self.old_objects_with_light_finalizers.non_empty():
+            self.deal_with_old_objects_with_finalizers()
+
+    def update_major_threshold_after_collection(self, reserving_size):
         #
         # Set the threshold for the next major collection to be when we
         # have allocated 'major_collection_threshold' times more than
@@ -1655,11 +2051,6 @@ class MiniMarkGC(MovingGCBase):
                                       "Using too much memory, aborting")
             self.max_heap_size_already_raised = True
             raise MemoryError
-        #
-        # At the end, we can execute the finalizers of the objects
-        # listed in 'run_finalizers'.  Note that this will typically do
-        # more allocations.
-        self.execute_finalizers()
 
 
     def _free_if_unvisited(self, hdr):
@@ -1761,8 +2152,10 @@ class MiniMarkGC(MovingGCBase):
         # flag set, then the object should be in 'prebuilt_root_objects',
         # and the GCFLAG_VISITED will be reset at the end of the
         # collection.
+        # The same for the pinned objects, which are young objects without
+        # GC pointers.
         hdr = self.header(obj)
-        if hdr.tid & (GCFLAG_VISITED | GCFLAG_NO_HEAP_PTRS):
+        if hdr.tid & (GCFLAG_VISITED | GCFLAG_NO_HEAP_PTRS | GCFLAG_PINNED):
             return
         #
         # It's the first time.  We set the flag.
@@ -1788,7 +2181,10 @@ class MiniMarkGC(MovingGCBase):
                 # The object is not a tagged pointer, and it is still in the
                 # nursery.  Find or allocate a "shadow" object, which is
                 # where the object will be moved by the next minor
-                # collection
+                # collection.  This is not supported for pinned objects,
+                # which may stay in the nursery across minor collections.
+                ll_assert(self.header(obj).tid & GCFLAG_PINNED == 0,
+                          "id() or identityhash() of a pinned object")
                 if self.header(obj).tid & GCFLAG_HAS_SHADOW:
                     shadow = self.nursery_objects_shadows.get(obj)
                     ll_assert(shadow != NULL,
@@ -2046,6 +2442,7 @@ class SimpleArenaCollection(object):
         self.page_size = page_size
         self.small_request_threshold = small_request_threshold
         self.all_objects = []
+        self.old_all_objects = []
         self.total_memory_used = 0
 
     def malloc(self, size):
@@ -2061,12 +2458,25 @@ class SimpleArenaCollection(object):
         return result
 
     def mass_free(self, ok_to_free_func):
-        objs = self.all_objects
+        self.mass_free_prepare()
+        res = self.mass_free_incremental(ok_to_free_func, sys.maxint)
+        assert res
+
+    def mass_free_prepare(self):
+        self.old_all_objects = self.all_objects
         self.all_objects = []
         self.total_memory_used = 0
-        for rawobj, nsize in objs:
+
+    def mass_free_incremental(self, ok_to_free_func, max_pages):
+        old = self.old_all_objects
+        while old:
+            rawobj, nsize = old.pop()
             if ok_to_free_func(rawobj):
                 llarena.arena_free(rawobj)
             else:
                 self.all_objects.append((rawobj, nsize))
                 self.total_memory_used += nsize
+            max_pages -= 1
+            if max_pages <= 0:
+                return False
+        return True
@@ -1,3 +1,4 @@
+import sys
 from pypy.rpython.lltypesystem import lltype, llmemory, llarena, rffi
 from pypy.rlib.rarithmetic import LONG_BIT, r_uint
 from pypy.rlib.objectmodel import we_are_translated
@@ -105,6 +106,15 @@ class ArenaCollection(object):
         self.full_page_for_size = lltype.malloc(rffi.CArray(PAGE_PTR), length,
                                                 flavor='raw', zero=True,
                                                 immortal=True)
+        # The two arrays above are moved to the two arrays below by
+        # mass_free_prepare(), and then moved back page by page by
+        # mass_free_incremental().
+        self.old_page_for_size = lltype.malloc(rffi.CArray(PAGE_PTR), length,
+                                               flavor='raw', zero=True,
+                                               immortal=True)
+        self.old_full_page_for_size = lltype.malloc(rffi.CArray(PAGE_PTR),
+                                                    length, flavor='raw',
+                                                    zero=True, immortal=True)
         self.nblocks_for_size = lltype.malloc(rffi.CArray(lltype.Signed),
                                               length, flavor='raw',
                                               immortal=True)
@@ -119,7 +129,7 @@ class ArenaCollection(object):
                                           self.max_pages_per_arena,
                                           flavor='raw', zero=True,
                                           immortal=True)
-        # this is used in mass_free() only
+        # this is used in _rehash_arenas_lists() only
         self.old_arenas_lists = lltype.malloc(rffi.CArray(ARENA_PTR),
                                               self.max_pages_per_arena,
                                               flavor='raw', zero=True,
@@ -141,6 +151,11 @@ class ArenaCollection(object):
         # the total memory used, counting every block in use, without
         # the additional bookkeeping stuff.
         self.total_memory_used = r_uint(0)
+        #
+        # while sweeping, the highest size class that may still have
+        # pages in 'old_page_for_size' or 'old_full_page_for_size';
+        # or -1 if we are not sweeping.
+        self.size_class_with_old_pages = -1
 
 
     def malloc(self, size):
@@ -251,21 +266,16 @@ class ArenaCollection(object):
     def allocate_new_arena(self):
         """Loads in self.current_arena the arena to allocate from next."""
         #
-        # Pick an arena from 'arenas_lists[i]', with i as small as possible
-        # but > 0.  Use caching with 'min_empty_nfreepages', which guarantees
-        # that 'arenas_lists[1:min_empty_nfreepages]' are all empty.
-        i = self.min_empty_nfreepages
-        while i < self.max_pages_per_arena:
-            #
-            if self.arenas_lists[i] != ARENA_NULL:
-                #
-                # Found it.
-                self.current_arena = self.arenas_lists[i]
-                self.arenas_lists[i] = self.current_arena.nextarena
+        if self._pick_next_arena():
+            return
+        #
+        # While sweeping, the arenas are not in the correct arenas_lists[i]:
+        # the pages freed so far are not taken into account.  Rehash them
+        # now, and try again.
+        if self.size_class_with_old_pages >= 0:
+            self._rehash_arenas_lists()
+            if self._pick_next_arena():
                 return
-            #
-            i += 1
-            self.min_empty_nfreepages = i
         #
         # No more arena with any free page.  We must allocate a new arena.
         if not we_are_translated():
@@ -297,26 +307,91 @@ class ArenaCollection(object):
     allocate_new_arena._dont_inline_ = True
 
 
+    def _pick_next_arena(self):
+        # Pick an arena from 'arenas_lists[i]', with i as small as possible
+        # but > 0.  Use caching with 'min_empty_nfreepages', which guarantees
+        # that 'arenas_lists[1:min_empty_nfreepages]' are all empty.
+        i = self.min_empty_nfreepages
+        while i < self.max_pages_per_arena:
+            #
+            if self.arenas_lists[i] != ARENA_NULL:
+                #
+                # Found it.
+                self.current_arena = self.arenas_lists[i]
+                self.arenas_lists[i] = self.current_arena.nextarena
+                return True
+            #
+            i += 1
+            self.min_empty_nfreepages = i
+        return False
+
+
     def mass_free(self, ok_to_free_func):
         """For each object, if ok_to_free_func(obj) returns True, then free
         the object.
         """
+        self.mass_free_prepare()
+        res = self.mass_free_incremental(ok_to_free_func, sys.maxint)
+        ll_assert(res, "non-incremental mass_free did not complete")
+
+
+    def mass_free_prepare(self):
+        """Prepare calls to mass_free_incremental(): moves the chained lists
+        of pages into 'old_page_for_size' and 'old_full_page_for_size'.
+        Objects allocated from now on go to other pages, and will not be
+        passed to 'ok_to_free_func'.
+        """
+        ll_assert(self.size_class_with_old_pages < 0,
+                  "mass_free_prepare() called while already sweeping")
         self.total_memory_used = r_uint(0)
         #
-        # For each size class:
         size_class = self.small_request_threshold >> WORD_POWER_2
+        self.size_class_with_old_pages = size_class
+        while size_class >= 1:
+            self.old_page_for_size[size_class] = (
+                self.page_for_size[size_class])
+            self.old_full_page_for_size[size_class] = (
+                self.full_page_for_size[size_class])
+            self.page_for_size[size_class] = PAGE_NULL
+            self.full_page_for_size[size_class] = PAGE_NULL
+            size_class -= 1
+
+
+    def mass_free_incremental(self, ok_to_free_func, max_pages):
+        """For each object in the pages moved away by mass_free_prepare(),
+        if ok_to_free_func(obj) returns True, then free the object.  Stops
+        after having walked 'max_pages' pages.  Returns True if all pages
+        have been walked, or False if there are more.  Until then,
+        'total_memory_used' does not include the objects that are in the
+        pages not walked so far.
+        """
+        size_class = self.size_class_with_old_pages
+        ll_assert(size_class >= 0,
+                  "mass_free_incremental() called without mass_free_prepare()")
+        #
         while size_class >= 1:
             #
-            # Walk the pages in 'page_for_size[size_class]' and
-            # 'full_page_for_size[size_class]' and free some objects.
+            # Walk the pages in 'old_page_for_size[size_class]' and
+            # 'old_full_page_for_size[size_class]' and free some objects.
             # Pages completely freed are added to 'page.arena.freepages',
             # and become available for reuse by any size class.  Pages
             # not completely freed are re-chained either in
             # 'full_page_for_size[]' or 'page_for_size[]'.
-            self.mass_free_in_pages(size_class, ok_to_free_func)
+            max_pages = self.mass_free_in_pages(size_class, ok_to_free_func,
+                                                max_pages)
+            if max_pages <= 0:
+                self.size_class_with_old_pages = size_class
+                return False
             #
             size_class -= 1
         #
+        self.size_class_with_old_pages = -1
+        self._rehash_arenas_lists()
+        return True
+
+
+    def _rehash_arenas_lists(self):
+        #
         # Rehash arenas into the correct arenas_lists[i].  If
         # 'self.current_arena' contains an arena too, it remains there.
         (self.old_arenas_lists, self.arenas_lists) = (
@@ -353,20 +428,23 @@ class ArenaCollection(object):
         self.min_empty_nfreepages = 1
 
 
-    def mass_free_in_pages(self, size_class, ok_to_free_func):
+    def mass_free_in_pages(self, size_class, ok_to_free_func, max_pages):
+        """Walk at most 'max_pages' of the old pages of the given size
+        class.  Returns the number of pages that could still be walked."""
         nblocks = self.nblocks_for_size[size_class]
         block_size = size_class * WORD
-        remaining_partial_pages = PAGE_NULL
-        remaining_full_pages = PAGE_NULL
+        # pages allocated since mass_free_prepare() are already there
+        remaining_partial_pages = self.page_for_size[size_class]
+        remaining_full_pages = self.full_page_for_size[size_class]
         #
         step = 0
         while step < 2:
             if step == 0:
-                page = self.full_page_for_size[size_class]
+                page = self.old_full_page_for_size[size_class]
             else:
-                page = self.page_for_size[size_class]
+                page = self.old_page_for_size[size_class]
             #
-            while page != PAGE_NULL:
+            while page != PAGE_NULL and max_pages > 0:
                 #
                 # Collect the page.
                 surviving = self.walk_page(page, block_size, ok_to_free_func)
@@ -393,11 +471,18 @@ class ArenaCollection(object):
                     self.free_page(page)
 
                 page = nextpage
+                max_pages -= 1
             #
+            # keep the pages not walked so far for the next call
+            if step == 0:
+                self.old_full_page_for_size[size_class] = page
+            else:
+                self.old_page_for_size[size_class] = page
             step += 1
         #
         self.page_for_size[size_class] = remaining_partial_pages
         self.full_page_for_size[size_class] = remaining_full_pages
+        return max_pages
 
 
     def free_page(self, page):
@@ -405,7 +490,7 @@ class ArenaCollection(object):
         #
         # Insert the freed page in the arena's 'freepages' list.
         # If nfreepages == totalpages, then it will be freed at the
-        # end of mass_free().
+        # end of mass_free_incremental().
         arena = page.arena
         arena.nfreepages += 1
         pageaddr = llmemory.cast_ptr_to_adr(page)
@@ -22,6 +22,8 @@ S.become(lltype.GcStruct('S',
 RAW = lltype.Struct('RAW', ('p', lltype.Ptr(S)), ('q', lltype.Ptr(S)))
 VAR = lltype.GcArray(lltype.Ptr(S))
 VARNODE = lltype.GcStruct('VARNODE', ('a', lltype.Ptr(VAR)))
+CHARS = lltype.GcArray(lltype.Char)
+CHARSNODE = lltype.GcStruct('CHARSNODE', ('c', lltype.Ptr(CHARS)))
 
 
 class DirectRootWalker(object):
@@ -596,6 +598,324 @@ class TestMiniMarkGCSimple(DirectGCTest):
     test_writebarrier_before_copy_preserving_cards.GC_PARAMS = {
         "card_page_indices": 4}
 
+    def test_stats(self):
+        from pypy.rlib import rgc
+        get_stat = self.gc.get_stat
+        assert get_stat(rgc.GC_STAT_MINOR_COLLECTIONS) == 0.0
+        assert get_stat(rgc.GC_STAT_BYTES_PROMOTED) == 0.0
+        assert get_stat(rgc.GC_STAT_NURSERY_SIZE) == self.gc.nursery_size
+        p = self.malloc(S)
+        self.stackroots.append(p)
+        self.gc.minor_collection()
+        assert get_stat(rgc.GC_STAT_MINOR_COLLECTIONS) == 1.0
+        assert get_stat(rgc.GC_STAT_BYTES_PROMOTED) > 0.0
+        assert get_stat(rgc.GC_STAT_MINOR_COLLECTION_TIME) >= 0.0
+        assert (get_stat(rgc.GC_STAT_MINOR_COLLECTION_MAX_TIME) <=
+                get_stat(rgc.GC_STAT_MINOR_COLLECTION_TIME))
+        pauses = get_stat(rgc.GC_STAT_MAJOR_COLLECTION_PAUSES)
+        majors = get_stat(rgc.GC_STAT_MAJOR_COLLECTIONS)
+        self.gc.collect()
+        assert get_stat(rgc.GC_STAT_MAJOR_COLLECTIONS) == majors + 1
+        assert get_stat(rgc.GC_STAT_MAJOR_COLLECTION_PAUSES) > pauses
+        assert (get_stat(rgc.GC_STAT_MAJOR_COLLECTION_MAX_TIME) <=
+                get_stat(rgc.GC_STAT_MAJOR_COLLECTION_TIME))
+        assert get_stat(rgc.GC_STAT_FINALIZER_TIME) >= 0.0
+        assert get_stat(len(rgc.GC_STATS)) == -1.0
+
+    def test_adaptive_nursery_size(self):
+        gc = self.gc
+        assert gc.nursery_size == 32*WORD
+        # only garbage: the nursery shrinks down to its minimal size
+        for i in range(3 * gc.NURSERY_ADAPT_INTERVAL):
+            for j in range(10):
+                self.malloc(S)
+            gc.minor_collection()
+        assert gc.nursery_size == 16*WORD
+        assert gc.nursery_top == gc.nursery + 16*WORD
+        # everything survives: the nursery grows up to its maximal size
+        for i in range(5 * gc.NURSERY_ADAPT_INTERVAL):
+            for j in range(10):
+                self.stackroots.append(self.malloc(S))
+            gc.minor_collection()
+        assert gc.nursery_size == 128*WORD
+        assert gc.nursery_top == gc.nursery + 128*WORD
+        # a nursery that is not full still works
+        for p in self.stackroots:
+            p.x = 42
+        gc.collect()
+        for p in self.stackroots:
+            assert p.x == 42
+    test_adaptive_nursery_size.GC_PARAMS = {'nursery_min_size': 16*WORD,
+                                            'nursery_max_size': 128*WORD}
+
+    def test_pin_young_object(self):
+        gc = self.gc
+        c = self.malloc(CHARS, 10)
+        for i in range(10):
+            c[i] = chr(65 + i)
+        self.stackroots.append(c)
+        addr = llmemory.cast_ptr_to_adr(c)
+        assert gc.pin(addr)
+        assert gc._is_pinned(addr)
+        # the pinned object stays in place, while the nursery is still
+        # used around it by many other allocations
+        for i in range(5):
+            for j in range(20):
+                p = self.malloc(S)
+                p.x = j
+                self.stackroots.append(p)
+            gc.minor_collection()
+            assert llmemory.cast_ptr_to_adr(self.stackroots[0]) == addr
+            for j in range(20):
+                assert self.stackroots[-20 + j].x == j
+        gc.collect()
+        assert llmemory.cast_ptr_to_adr(self.stackroots[0]) == addr
+        # once unpinned, it is moved out of the nursery as usual
+        gc.unpin(addr)
+        assert not gc._is_pinned(addr)
+        gc.minor_collection()
+        c = self.stackroots[0]
+        assert not gc.is_in_nursery(llmemory.cast_ptr_to_adr(c))
+        assert ''.join([c[i] for i in range(10)]) == 'ABCDEFGHIJ'
+    test_pin_young_object.GC_PARAMS = {'nursery_size': 64*WORD}
+
+    def test_pin_referenced_from_old_object(self):
+        gc = self.gc
+        node = self.malloc(CHARSNODE)
+        self.stackroots.append(node)
+        gc.minor_collection()
+        node = self.stackroots[0]
+        c = self.malloc(CHARS, 3)
+        c[0] = 'x'
+        self.write(node, 'c', c)
+        addr = llmemory.cast_ptr_to_adr(c)
+        assert gc.pin(addr)
+        del c
+        for i in range(3):
+            gc.minor_collection()
+            assert llmemory.cast_ptr_to_adr(self.stackroots[0].c) == addr
+        gc.unpin(addr)
+        gc.minor_collection()
+        c = self.stackroots[0].c
+        assert not gc.is_in_nursery(llmemory.cast_ptr_to_adr(c))
+        assert c[0] == 'x'
+        gc.collect()
+        assert self.stackroots[0].c[0] == 'x'
+    test_pin_referenced_from_old_object.GC_PARAMS = {'nursery_size': 64*WORD}
+
+    def test_pin_refused(self):
+        gc = self.gc
+        assert gc.max_pinned_objects() == 3
+        # not varsize, or with GC pointers
+        assert not gc.pin(llmemory.cast_ptr_to_adr(self.malloc(S)))
+        assert not gc.pin(llmemory.cast_ptr_to_adr(self.malloc(VAR, 2)))
+        # not young
+        c = self.malloc(CHARS, 2)
+        self.stackroots.append(c)
+        gc.minor_collection()
+        assert not gc.pin(llmemory.cast_ptr_to_adr(self.stackroots[0]))
+        # too many pinned objects
+        pinned = [self.malloc(CHARS, 2) for i in range(4)]
+        assert [gc.pin(llmemory.cast_ptr_to_adr(c)) for c in pinned] == [
+            True, True, True, False]
+        self.stackroots.extend(pinned)
+        gc.minor_collection()
+        addrs = [llmemory.cast_ptr_to_adr(c) for c in self.stackroots[1:]]
+        assert [gc.is_in_nursery(addr) for addr in addrs] == [
+            True, True, True, False]
+        for addr in addrs[:3]:
+            gc.unpin(addr)
+        gc.minor_collection()
+        for c in self.stackroots:
+            assert not gc.is_in_nursery(llmemory.cast_ptr_to_adr(c))
+    test_pin_refused.GC_PARAMS = {'nursery_size': 64*WORD}
+
 
 class TestMiniMarkGCFull(DirectGCTest):
     from pypy.rpython.memory.gc.minimark import MiniMarkGC as GCClass
+
+
+class TestIncrementalMiniMarkGCSimple(TestMiniMarkGCSimple):
+    from pypy.rpython.memory.gc.incminimark import IncrementalMiniMarkGC \
+         as GCClass
+
+    def start_marking(self):
+        from pypy.rpython.memory.gc import incminimark
+        self.gc.minor_collection()
+        if self.gc.gc_state != incminimark.STATE_SCANNING:
+            # finish the major collection started by the allocations
+            self.gc.major_collection_step(complete=True)
+            self.gc.minor_collection()
+        self.gc.start_major_collection()
+        assert self.gc.gc_state == incminimark.STATE_MARKING
+
+    def test_write_into_black_object(self):
+        from pypy.rpython.memory.gc import incminimark
+        a = self.malloc(S)
+        b = self.malloc(S)
+        self.write(a, 'next', self.malloc(S))
+        a.next.x = 42
+        self.stackroots.append(a)
+        self.stackroots.append(b)
+        self.gc.collect()
+        #
+        self.start_marking()
+        # visit one object only: 'b', the last root pushed
+        self.gc.visit_all_objects_step(0.0)
+        b = self.stackroots[1]
+        assert self.gc.header(llmemory.cast_ptr_to_adr(b)).tid & \
+            incminimark.GCFLAG_VISITED
+        # move the reference from the grey 'a' to the black 'b'
+        a = self.stackroots[0]
+        self.write(b, 'next', a.next)
+        self.write(a, 'next', lltype.nullptr(S))
+        #
+        self.gc.minor_collection()
+        self.gc.major_collection_step(complete=True)
+        assert self.gc.gc_state == incminimark.STATE_SCANNING
+        assert self.stackroots[1].next.x == 42
+
+    def test_write_into_black_array(self):
+        from pypy.rpython.memory.gc import incminimark
+        largeobj_size = self.gc.nonlarge_max + 1
+        a = self.malloc(VAR, largeobj_size)
+        self.stackroots.append(a)
+        p = self.malloc(S)
+        p.x = 43
+        self.stackroots.append(p)
+        self.gc.collect()
+        #
+        self.start_marking()
+        self.gc.visit_all_objects_step(0.0)    # visits 'p'
+        self.gc.visit_all_objects_step(0.0)    # visits the array
+        a = self.stackroots[0]
+        assert self.gc.header(llmemory.cast_ptr_to_adr(a)).tid & \
+            incminimark.GCFLAG_VISITED
+        self.writearray(a, largeobj_size - 1, self.stackroots.pop())
+        #
+        self.gc.minor_collection()
+        self.gc.major_collection_step(complete=True)
+        assert self.stackroots[0][largeobj_size - 1].x == 43
+    test_write_into_black_array.GC_PARAMS = {"card_page_indices": 4}
+
+    def test_write_into_prebuilt_object(self):
+        k = lltype.malloc(S, immortal=True)
+        self.consider_constant(k)
+        p = self.malloc(S)
+        p.x = 44
+        self.stackroots.append(p)
+        self.gc.collect()
+        #
+        self.start_marking()
+        self.write(k, 'next', self.stackroots.pop())
+        self.gc.visit_all_objects_step(1E9)
+        self.gc.minor_collection()
+        self.gc.major_collection_step(complete=True)
+        assert k.next.x == 44
+
+    def test_major_collection_in_many_steps(self):
+        from pypy.rpython.memory.gc import incminimark
+        head = self.malloc(S)
+        self.stackroots.append(head)
+        for i in range(200):
+            p = self.malloc(S)
+            p.x = i
+            self.write(p, 'next', self.stackroots[0].next)
+            self.write(self.stackroots[0], 'next', p)
+        self.gc.collect()
+        #
+        num_major_collects = self.gc.num_major_collects
+        self.start_marking()
+        steps = 0
+        while self.gc.gc_state != incminimark.STATE_SCANNING:
+            # keep mutating the list while the collection is in progress
+            head = self.stackroots[0]
+            p = self.malloc(S)
+            p.x = 1000 + steps
+            self.write(p, 'next', head.next.next)
+            self.write(head, 'next', p)
+            self.gc.minor_collection()
+            self.gc.major_collection_step()
+            steps += 1
+        assert steps > 5
+        assert self.gc.num_major_collects == num_major_collects + 1
+        #
+        p = self.stackroots[0].next
+        count = 0
+        while p:
+            count += 1
+            p = p.next
+        assert count == 200
+
+    def test_sweeping_in_many_steps(self):
+        from pypy.rpython.memory.gc import incminimark
+        largeobj_size = self.gc.nonlarge_max + 1
+        for i in range(100):
+            p = self.malloc(S)
+            p.x = i
+            self.stackroots.append(p)
+            if i % 10 == 0:
+                self.stackroots.append(self.malloc(VAR, largeobj_size))
+        self.gc.minor_collection()
+        # half of the objects become garbage, now that they are old
+        del self.stackroots[1::2]
+        expected = [p.x for p in self.stackroots if p._TYPE == lltype.Ptr(S)]
+        #
+        self.start_marking()
+        used_before = self.gc.get_total_memory_used()
+        self.gc.visit_all_objects_step(1E9)
+        self.gc.minor_collection()
+        self.gc.major_collection_step()
+        assert self.gc.gc_state == incminimark.STATE_SWEEPING
+        steps = 0
+        while self.gc.gc_state == incminimark.STATE_SWEEPING:
+            # objects allocated while sweeping are not freed
+            p = self.malloc(S)
+            p.x = 1000 + steps
+            self.stackroots.append(p)
+            self.gc.minor_collection()
+            self.gc.major_collection_step()
+            steps += 1
+        assert steps > 2
+        assert self.gc.get_total_memory_used() < used_before
+        self.gc.debug_check_consistency()
+        seen = [p.x for p in self.stackroots if p._TYPE == lltype.Ptr(S)]
+        assert seen == expected + range(1000, 1000 + steps)
+    test_sweeping_in_many_steps.GC_PARAMS = {"gc_increment_step": 4*WORD}
+
+    def test_random_mutations_while_marking(self):
+        import random
+        r = random.Random(42)
+        N = 30
+        for i in range(N):
+            p = self.malloc(S)
+            p.x = i
+            self.stackroots.append(p)
+        expected = {}
+        for step in range(300):
+            i = r.randrange(N)
+            j = r.randrange(N)
+            fieldname = r.choice(['prev', 'next'])
+            if r.random() < 0.3:
+                newvalue = self.malloc(S)
+                newvalue.x = 1000 + step
+                self.write(newvalue, 'next', self.stackroots[j])
+                target = 1000 + step
+            else:
+                newvalue = self.stackroots[j]
+                target = j
+            self.write(self.stackroots[i], fieldname, newvalue)
+            expected[i, fieldname] = target
+            if r.random() < 0.2:
+                self.gc.minor_collection()
+                self.gc.major_collection_step()
+        self.gc.collect()
+        for (i, fieldname), target in expected.items():
+            assert getattr(self.stackroots[i], fieldname).x == target
+    test_random_mutations_while_marking.GC_PARAMS = {
+        "gc_increment_step": 4*WORD}
+
+
+class TestIncrementalMiniMarkGCFull(DirectGCTest):
+    from pypy.rpython.memory.gc.incminimark import IncrementalMiniMarkGC \
+         as GCClass
@@ -455,3 +455,41 @@ def test_random():
             assert ac.total_memory_used == surviving_total_size
     except DoneTesting:
         pass
+
+def test_mass_free_incremental():
+    import random
+    pagesize = hdrsize + 24*WORD
+    ac = arena_collection_for_test(pagesize, " " * 3)
+    del ac.allocate_new_arena    # restore the one from the class
+    live_objects = {}
+    #
+    def allocate_some(count):
+        for i in range(count):
+            size_class = random.randrange(1, 7)
+            obj = ac.malloc(size_class * WORD)
+            at = (obj.arena, obj.offset)
+            assert at not in live_objects
+            live_objects[at] = size_class * WORD
+    #
+    for i in range(20):
+        allocate_some(random.randrange(50, 100))
+        #
+        # Free half the objects, randomly, walking only a few pages at
+        # a time and allocating more objects in-between
+        old_objects = set(live_objects)
+        def answer(obj):
+            at = (obj.arena, obj.offset)
+            old_objects.remove(at)     # must be old, and seen only once
+            if random.random() < 0.5:
+                del live_objects[at]
+                return True
+            return False
+        ok_to_free = OkToFree(ac, answer, multiarenas=True)
+        ac.mass_free_prepare()
+        while not ac.mass_free_incremental(ok_to_free,
+                                           random.randrange(1, 3)):
+            allocate_some(random.randrange(0, 10))
+        #
+        assert not old_objects
+        assert ac.size_class_with_old_pages == -1
+        assert ac.total_memory_used == sum(live_objects.values())
@@ -287,6 +287,15 @@ class FrameworkGCTransformer(GCTransformer):
         self.can_move_ptr = getfn(GCClass.can_move.im_func,
                                   [s_gc, annmodel.SomeAddress()],
                                   annmodel.SomeBool())
+        self.pin_ptr = getfn(GCClass.pin.im_func,
+                             [s_gc, annmodel.SomeAddress()],
+                             annmodel.SomeBool())
+        self.unpin_ptr = getfn(GCClass.unpin.im_func,
+                               [s_gc, annmodel.SomeAddress()],
+                               annmodel.s_None)
+        self._is_pinned_ptr = getfn(GCClass._is_pinned.im_func,
+                                    [s_gc, annmodel.SomeAddress()],
+                                    annmodel.SomeBool())
 
         if hasattr(GCClass, 'shrink_array'):
             self.shrink_array_ptr = getfn(
@@ -486,6 +495,9 @@ class FrameworkGCTransformer(GCTransformer):
         self.statistics_ptr = getfn(GCClass.statistics.im_func,
                                     [s_gc, annmodel.SomeInteger()],
                                     annmodel.SomeInteger())
+        self.get_stat_ptr = getfn(GCClass.get_stat.im_func,
+                                  [s_gc, annmodel.SomeInteger()],
+                                  annmodel.SomeFloat())
 
         # thread support
         if translator.config.translation.continuation:
@@ -746,6 +758,26 @@ class FrameworkGCTransformer(GCTransformer):
         hop.genop("direct_call", [self.can_move_ptr, self.c_const_gc, v_addr],
                   resultvar=op.result)
 
+    def gct_gc_pin(self, hop):
+        op = hop.spaceop
+        v_addr = hop.genop('cast_ptr_to_adr',
+                           [op.args[0]], resulttype=llmemory.Address)
+        hop.genop("direct_call", [self.pin_ptr, self.c_const_gc, v_addr],
+                  resultvar=op.result)
+
+    def gct_gc_unpin(self, hop):
+        op = hop.spaceop
+        v_addr = hop.genop('cast_ptr_to_adr',
+                           [op.args[0]], resulttype=llmemory.Address)
+        hop.genop("direct_call", [self.unpin_ptr, self.c_const_gc, v_addr])
+
+    def gct_gc__is_pinned(self, hop):
+        op = hop.spaceop
+        v_addr = hop.genop('cast_ptr_to_adr',
+                           [op.args[0]], resulttype=llmemory.Address)
+        hop.genop("direct_call", [self._is_pinned_ptr, self.c_const_gc, v_addr],
+                  resultvar=op.result)
+
     def gct_shrink_array(self, hop):
         if self.shrink_array_ptr is None:
             return GCTransformer.gct_shrink_array(self, hop)
@@ -1096,6 +1128,12 @@ class FrameworkGCTransformer(GCTransformer):
                   resultvar=hop.spaceop.result)
         self.pop_roots(hop, livevars)
 
+    def gct_gc_get_stat(self, hop):
+        [v_index] = hop.spaceop.args
+        hop.genop("direct_call",
+                  [self.get_stat_ptr, self.c_const_gc, v_index],
+                  resultvar=hop.spaceop.result)
+
     def gct_malloc_nonmovable_varsize(self, hop):
         TYPE = hop.spaceop.result.concretetype
         if self.gcdata.gc.can_malloc_nonmovable():
@@ -636,5 +636,14 @@ class GCTransformer(BaseGCTransformer):
     def gct_gc_can_move(self, hop):
         return hop.cast_result(rmodel.inputconst(lltype.Bool, False))
 
+    def gct_gc_pin(self, hop):
+        return hop.cast_result(rmodel.inputconst(lltype.Bool, False))
+
+    def gct_gc_unpin(self, hop):
+        pass
+
+    def gct_gc__is_pinned(self, hop):
+        return hop.cast_result(rmodel.inputconst(lltype.Bool, False))
+
     def gct_shrink_array(self, hop):
         return hop.cast_result(rmodel.inputconst(lltype.Bool, False))
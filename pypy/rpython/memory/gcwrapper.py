@@ -70,6 +70,18 @@ class GCManagedHeap(object):
         if hasattr(self.gc, 'raw_malloc_memory_pressure'):
             self.gc.raw_malloc_memory_pressure(size)
 
+    def get_gc_stat(self, index):
+        return self.gc.get_stat(index)
+
+    def pin(self, addr):
+        return self.gc.pin(addr)
+
+    def unpin(self, addr):
+        self.gc.unpin(addr)
+
+    def _is_pinned(self, addr):
+        return self.gc._is_pinned(addr)
+
     def shrink_array(self, p, smallersize):
         if hasattr(self.gc, 'shrink_array'):
             addr = llmemory.cast_ptr_to_adr(p)
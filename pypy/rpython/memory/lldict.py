@@ -23,6 +23,7 @@ def dict_allocate():
 
 def dict_delete(d):
     dict_delete_entries(d.entries)
+    dict_delete_indexes(d.indexes)
     lltype.free(d, flavor="raw")
     if not we_are_translated(): count_alloc(-1)
 
@@ -41,6 +42,19 @@ def dict_delete_entries(entries):
     lltype.free(entries, flavor="raw")
     if not we_are_translated(): count_alloc(-1)
 
+def dict_allocate_indexes(n):
+    if not we_are_translated(): count_alloc(+1)
+    indexes = lltype.malloc(INDEXES, n, flavor="raw")
+    i = 0
+    while i < n:
+        indexes[i] = rdict.FREE
+        i += 1
+    return indexes
+
+def dict_delete_indexes(indexes):
+    lltype.free(indexes, flavor="raw")
+    if not we_are_translated(): count_alloc(-1)
+
 def _hash(adr):
     return mangle_hash(llmemory.cast_adr_to_int(adr))
 
@@ -64,7 +78,7 @@ def dict_insertclean(d, key, value):
 
 def dict_foreach(d, callback, arg):
     entries = d.entries
-    i = len(entries) - 1
+    i = d.num_used_items - 1
     while i >= 0:
         if dict_entry_valid(entries, i):
             callback(entries[i].key, entries[i].value, arg)
@@ -78,13 +92,20 @@ ENTRIES = lltype.Array(ENTRY,
                            'allocate': dict_allocate_entries,
                            'delete': dict_delete_entries,
                            'valid': dict_entry_valid,
-                           'everused': dict_entry_valid,
                            'hash': dict_entry_hash,
                        })
+INDEXES = lltype.Array(lltype.Signed,
+                       adtmeths = {
+                           'allocate': dict_allocate_indexes,
+                           'delete': dict_delete_indexes,
+                       })
 DICT = lltype.Struct('DICT', ('entries', lltype.Ptr(ENTRIES)),
+                             ('indexes', lltype.Ptr(INDEXES)),
                              ('num_items', lltype.Signed),
+                             ('num_used_items', lltype.Signed),
                              ('resize_counter', lltype.Signed),
                      adtmeths = {
+                         'raw_indexes': True,
                          'allocate': dict_allocate,
                          'delete': dict_delete,
                          'length': rdict.ll_dict_len,
@@ -157,6 +157,22 @@ def get_address_stack(chunk_size=DEFAULT_CHUNK_SIZE, cache={}):
             self.foreach(_add, lst)
             return lst
 
+        def sort(self):
+            """Sorts the addresses in the stack, in decreasing order, so
+            that pop() returns the smallest address first.  There must
+            not be more than one chunk of them."""
+            ll_assert(not self.chunk.next, "too many addresses to sort")
+            items = self.chunk.items
+            i = 1
+            while i < self.used_in_last_chunk:
+                addr = items[i]
+                j = i
+                while j > 0 and items[j - 1] < addr:
+                    items[j] = items[j - 1]
+                    j -= 1
+                items[j] = addr
+                i += 1
+
         def remove(self, addr):
             """Remove 'addr' from the stack.  The addr *must* be in the list,
             and preferrably near the top.
@@ -919,5 +919,25 @@ class TestMiniMarkGC(TestSemiSpaceGC):
     GC_CAN_MALLOC_NONMOVABLE = True
     BUT_HOW_BIG_IS_A_BIG_STRING = 11*WORD
 
+    def test_get_gc_stat(self):
+        class A(object):
+            pass
+        def func():
+            before = rgc.get_gc_stat(rgc.GC_STAT_MINOR_COLLECTIONS)
+            for i in range(100):
+                A()
+            rgc.collect()
+            after = rgc.get_gc_stat(rgc.GC_STAT_MINOR_COLLECTIONS)
+            pauses = rgc.get_gc_stat(rgc.GC_STAT_MAJOR_COLLECTION_PAUSES)
+            return (after > before) * 10 + (pauses > 0.0)
+        assert self.interpret(func, []) == 11
+
 class TestMiniMarkGCCardMarking(TestMiniMarkGC):
     GC_PARAMS = {'card_page_indices': 4}
+
+class TestIncrementalMiniMarkGC(TestMiniMarkGC):
+    from pypy.rpython.memory.gc.incminimark import IncrementalMiniMarkGC \
+         as GCClass
+
+class TestIncrementalMiniMarkGCCardMarking(TestIncrementalMiniMarkGC):
+    GC_PARAMS = {'card_page_indices': 4}
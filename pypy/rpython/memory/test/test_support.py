@@ -94,6 +94,24 @@ class TestAddressStack(object):
             assert a == addrs[i]
         assert not ll.non_empty()
 
+    def test_sort(self):
+        from pypy.rpython.lltypesystem import llarena
+        import random
+        AddressStack = get_address_stack()
+        arena = llarena.arena_malloc(1000, 2)
+        offsets = range(0, 1000, 8)
+        random.shuffle(offsets)
+        ll = AddressStack()
+        for ofs in offsets:
+            ll.append(arena + ofs)
+        ll.sort()
+        for ofs in sorted(offsets):
+            a = ll.pop()
+            assert a == arena + ofs
+        assert not ll.non_empty()
+        ll.delete()
+        llarena.arena_free(arena)
+
 
 class TestAddressDeque:
     def test_big_access(self):
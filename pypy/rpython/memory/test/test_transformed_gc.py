@@ -1312,6 +1312,24 @@ class TestMiniMarkGC(TestHybridGC):
         res = run([])
         assert res == 123
 
+class TestIncrementalMiniMarkGC(TestMiniMarkGC):
+    gcname = "incminimark"
+
+    class gcpolicy(gc.FrameworkGcPolicy):
+        class transformerclass(framework.FrameworkGCTransformer):
+            from pypy.rpython.memory.gc.incminimark \
+                 import IncrementalMiniMarkGC as GCClass
+            GC_PARAMS = {'nursery_size': 32*WORD,
+                         'page_size': 16*WORD,
+                         'arena_size': 64*WORD,
+                         'small_request_threshold': 5*WORD,
+                         'large_object': 8*WORD,
+                         'card_page_indices': 4,
+                         'gc_increment_step': 16*WORD,
+                         'translated_to_c': False,
+                         }
+            root_stack_depth = 200
+
 # ________________________________________________________________
 # tagged pointers
 
@@ -723,8 +723,8 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
             return d
 
         res = self.interpret(func2, [ord(x), ord(y)])
-        for i in range(len(res.entries)):
-            assert not (res.entries.everused(i) and not res.entries.valid(i))
+        for i in range(len(res.indexes_byte)):
+            assert res.indexes_byte[i] != rdict.DELETED
 
         def func3(c0, c1, c2, c3, c4, c5, c6, c7):
             d = {}
@@ -743,8 +743,8 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         res = self.interpret(func3, [ord(char_by_hash[i][0])
                                    for i in range(rdict.DICT_INITSIZE)])
         count_frees = 0
-        for i in range(len(res.entries)):
-            if not res.entries.everused(i):
+        for i in range(len(res.indexes_byte)):
+            if res.indexes_byte[i] == rdict.FREE:
                 count_frees += 1
         assert count_frees >= 3
 
@@ -764,10 +764,11 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
                     d[chr(ord('A') - i)] = i
                     del d[chr(ord('A') - i)]
             return d
+        initial_entries = rdict._ll_num_entries(rdict.DICT_INITSIZE)
         res = self.interpret(func, [0])
-        assert len(res.entries) > rdict.DICT_INITSIZE
+        assert len(res.entries) > initial_entries
         res = self.interpret(func, [1])
-        assert len(res.entries) == rdict.DICT_INITSIZE
+        assert len(res.entries) == initial_entries
 
     def test_dict_valid_resize(self):
         # see if we find our keys after resize
@@ -783,6 +784,59 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         # if it does not crash, we are fine. It crashes if you forget the hash field.
         self.interpret(func, [])
 
+    def test_dict_insertion_order(self):
+        def func(n):
+            d = {}
+            for i in range(n):
+                d[(i * 7) % n] = i
+            del d[3]
+            d[3] = -1
+            d[5] = -5
+            res = 0
+            for key in d:
+                res = res * 10 + key
+            values = d.values()
+            return res, values[2] * values[-1], d.popitem()[0], len(d)
+        res = self.interpret(func, [9])
+        # keys: 0 7 5 3 1 8 6 4 2 without 3, then 3
+        assert res.item0 == 75186423
+        assert res.item1 == 5
+        assert res.item2 == 3
+        assert res.item3 == 8
+
+    def test_dict_index_size(self):
+        def func(n):
+            d = {}
+            for i in range(n):
+                d[i] = i
+            for i in range(n):
+                assert d[i] == i
+            return d
+        res = self.interpret(func, [50])
+        assert len(res.indexes_byte) == 128
+        assert not res.indexes_short
+        assert len(res.entries) == 85
+        res = self.interpret(func, [300])
+        assert len(res.indexes_short) == 512
+        assert not res.indexes_byte
+        assert res.num_used_items == res.num_items == 300
+
+    def test_dict_compaction(self):
+        def func(n):
+            d = {}
+            for i in range(n):
+                d[str(i)] = i
+                if i % 3:
+                    del d[str(i)]
+            return d
+        res = self.interpret(func, [60])
+        assert res.num_items == 20
+        # the deleted entries are removed when the dict is resized
+        assert res.num_used_items < 40
+        keys = [''.join(res.entries[i].key.chars)
+                for i in range(res.num_used_items) if res.entries.valid(i)]
+        assert keys == [str(i) for i in range(0, 60, 3)]
+
     # ____________________________________________________________
 
     def test_opt_nullkeymarker(self):
@@ -793,7 +847,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         res = self.interpret(f, [])
         assert res.item0 == True
         DICT = lltype.typeOf(res.item1).TO
-        assert not hasattr(DICT.entries.TO.OF, 'f_everused')# non-None string keys
         assert not hasattr(DICT.entries.TO.OF, 'f_valid')   # strings have a dummy
 
     def test_opt_nullvaluemarker(self):
@@ -804,7 +857,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         res = self.interpret(f, [-5])
         assert res.item0 == 4
         DICT = lltype.typeOf(res.item1).TO
-        assert not hasattr(DICT.entries.TO.OF, 'f_everused')# non-None str values
         assert not hasattr(DICT.entries.TO.OF, 'f_valid')   # strs have a dummy
 
     def test_opt_nonullmarker(self):
@@ -821,7 +873,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         res = self.interpret(f, [-5])
         assert res.item0 == -5441
         DICT = lltype.typeOf(res.item1).TO
-        assert hasattr(DICT.entries.TO.OF, 'f_everused') # can-be-None A instances
         assert not hasattr(DICT.entries.TO.OF, 'f_valid')# with a dummy A instance
 
         res = self.interpret(f, [6])
@@ -837,7 +888,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         assert res.item0 == 1
         assert res.item1 == 24
         DICT = lltype.typeOf(res.item2).TO
-        assert hasattr(DICT.entries.TO.OF, 'f_everused') # all ints can be zero
         assert not hasattr(DICT.entries.TO.OF, 'f_valid')# nonneg int: dummy -1
 
     def test_opt_no_dummy(self):
@@ -850,7 +900,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         assert res.item0 == 1
         assert res.item1 == -24
         DICT = lltype.typeOf(res.item2).TO
-        assert hasattr(DICT.entries.TO.OF, 'f_everused') # all ints can be zero
         assert hasattr(DICT.entries.TO.OF, 'f_valid')    # no dummy available
 
     def test_opt_boolean_has_no_dummy(self):
@@ -863,7 +912,6 @@ class TestLLtype(BaseTestRdict, LLRtypeMixin):
         assert res.item0 == 1
         assert res.item1 is True
         DICT = lltype.typeOf(res.item2).TO
-        assert hasattr(DICT.entries.TO.OF, 'f_everused') # all ints can be zero
         assert hasattr(DICT.entries.TO.OF, 'f_valid')    # no dummy available
 
     def test_opt_multiple_identical_dicts(self):
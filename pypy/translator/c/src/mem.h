@@ -253,3 +253,4 @@ void boehm_gc_startup_code(void)
 #define OP_GC_GET_RPY_TYPE_INDEX(x, r)   r = -1
 #define OP_GC_IS_RPY_INSTANCE(x, r)      r = 0
 #define OP_GC_DUMP_RPY_HEAP(fd, r)       r = 0
+#define OP_GC_GET_STAT(x, r)             r = -1.0
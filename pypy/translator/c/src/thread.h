@@ -41,5 +41,8 @@ long RPyGilAllocate(void);
 long RPyGilYieldThread(void);
 void RPyGilRelease(void);
 void RPyGilAcquire(void);
+long RPyGilLastWait(void);
+void RPyGilSetSwitchInterval(long microseconds);
+long RPyGilGetSwitchInterval(void);
 
 #endif
@@ -229,21 +229,53 @@ static volatile LONG pending_acquires = -1;
 static CRITICAL_SECTION mutex_gil;
 static HANDLE cond_gil;
 
+/* see thread_pthread.h for the switch interval, 'drop_request' and the
+   wait times.  The times are kept as 64-bit microseconds because 'long'
+   is only 32 bits here. */
+static volatile long switch_interval = 5000;
+static volatile long drop_request = 0;
+static LONGLONG acquired_at = 0;
+static long last_wait = 0;
+
+static LONGLONG _gil_now(void)
+{
+    static LARGE_INTEGER frequency;
+    LARGE_INTEGER counter;
+    if (frequency.QuadPart == 0)
+        QueryPerformanceFrequency(&frequency);
+    QueryPerformanceCounter(&counter);
+    return (counter.QuadPart / frequency.QuadPart) * 1000000 +
+           (counter.QuadPart % frequency.QuadPart) * 1000000 /
+               frequency.QuadPart;
+}
+
+static void _gil_taken(LONGLONG wait_started)
+{
+    acquired_at = _gil_now();
+    drop_request = 0;
+    last_wait = wait_started ? (long)(acquired_at - wait_started) : 0;
+}
+
 long RPyGilAllocate(void)
 {
     pending_acquires = 0;
     InitializeCriticalSection(&mutex_gil);
     EnterCriticalSection(&mutex_gil);
     cond_gil = CreateEvent (NULL, FALSE, FALSE, NULL);
+    _gil_taken(0);
     return 1;
 }
 
 long RPyGilYieldThread(void)
 {
+    LONGLONG wait_started;
     /* can be called even before RPyGilAllocate(), but in this case,
        pending_acquires will be -1 */
     if (pending_acquires <= 0)
         return 0;
+    wait_started = _gil_now();
+    if (!drop_request && wait_started - acquired_at < switch_interval)
+        return 0;
     InterlockedIncrement(&pending_acquires);
     PulseEvent(cond_gil);
 
@@ -257,6 +289,7 @@ long RPyGilYieldThread(void)
     EnterCriticalSection(&mutex_gil);
 
     InterlockedDecrement(&pending_acquires);
+    _gil_taken(wait_started);
     return 1;
 }
 
@@ -268,9 +301,33 @@ void RPyGilRelease(void)
 
 void RPyGilAcquire(void)
 {
+    LONGLONG wait_started = 0;
     InterlockedIncrement(&pending_acquires);
-    EnterCriticalSection(&mutex_gil);
+    if (!TryEnterCriticalSection(&mutex_gil)) {
+        /* contended: ask the holder to drop the GIL at its next check */
+        wait_started = _gil_now();
+        drop_request = 1;
+        EnterCriticalSection(&mutex_gil);
+    }
     InterlockedDecrement(&pending_acquires);
+    _gil_taken(wait_started);
+}
+
+long RPyGilLastWait(void)
+{
+    long result = last_wait;
+    last_wait = 0;
+    return result;
+}
+
+void RPyGilSetSwitchInterval(long microseconds)
+{
+    switch_interval = microseconds;
+}
+
+long RPyGilGetSwitchInterval(void)
+{
+    return switch_interval;
 }
 
 
@@ -13,6 +13,8 @@
 #include <stdio.h>
 #include <errno.h>
 #include <assert.h>
+#include <sys/time.h>
+#include <time.h>
 
 /* The following is hopefully equivalent to what CPython does
    (which is trying to compile a snippet of code using it) */
@@ -507,6 +509,32 @@ static volatile long pending_acquires = -1;
 static pthread_mutex_t mutex_gil = PTHREAD_MUTEX_INITIALIZER;
 static pthread_cond_t cond_gil = PTHREAD_COND_INITIALIZER;
 
+/* The GIL is only yielded to the other threads once the current thread
+   has owned it for 'switch_interval' microseconds, or earlier if a
+   thread coming back from an external call (typically I/O) is waiting
+   for it and has set 'drop_request'.  The fields below are only written
+   by the thread owning the GIL, apart from 'drop_request'. */
+static volatile long switch_interval = 5000;
+static volatile long drop_request = 0;
+static long acquired_at = 0;
+static long last_wait = 0;
+
+static long _gil_now(void)
+{
+    /* monotonic, so that wall-clock adjustments don't disturb the
+       switch interval or the reported wait times */
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec * 1000000L + ts.tv_nsec / 1000L;
+}
+
+static void _gil_taken(long wait_started)
+{
+    acquired_at = _gil_now();
+    drop_request = 0;
+    last_wait = wait_started ? acquired_at - wait_started : 0;
+}
+
 static void assert_has_the_gil(void)
 {
 #ifdef RPY_ASSERT
@@ -521,11 +549,13 @@ long RPyGilAllocate(void)
     pending_acquires = 0;
     pthread_mutex_trylock(&mutex_gil);
     assert_has_the_gil();
+    _gil_taken(0);
     return 1;
 }
 
 long RPyGilYieldThread(void)
 {
+    long wait_started;
     /* can be called even before RPyGilAllocate(), but in this case,
        pending_acquires will be -1 */
 #ifdef RPY_ASSERT
@@ -534,6 +564,15 @@ long RPyGilYieldThread(void)
 #endif
     if (pending_acquires <= 0)
         return 0;
+    if (!drop_request) {
+        wait_started = _gil_now();
+        if (wait_started - acquired_at < switch_interval)
+            return 0;
+    }
+    else
+        wait_started = _gil_now();
+    /* forced handoff: pthread_cond_wait() returns only after another
+       thread has released the GIL or yielded it back to us */
     atomic_add(&pending_acquires, 1L);
     _debug_print("{");
     ASSERT_STATUS(pthread_cond_signal(&cond_gil));
@@ -541,6 +580,7 @@ long RPyGilYieldThread(void)
     _debug_print("}");
     atomic_add(&pending_acquires, -1L);
     assert_has_the_gil();
+    _gil_taken(wait_started);
     return 1;
 }
 
@@ -557,16 +597,43 @@ void RPyGilRelease(void)
 
 void RPyGilAcquire(void)
 {
+    long wait_started = 0;
     _debug_print("about to RPyGilAcquire...\n");
 #ifdef RPY_ASSERT
     assert(pending_acquires >= 0);
 #endif
     atomic_add(&pending_acquires, 1L);
-    ASSERT_STATUS(pthread_mutex_lock(&mutex_gil));
+    if (pthread_mutex_trylock(&mutex_gil) != 0) {
+        /* contended: ask the owner to yield the GIL at its next check,
+           instead of after its full switch interval */
+        wait_started = _gil_now();
+        drop_request = 1;
+        ASSERT_STATUS(pthread_mutex_lock(&mutex_gil));
+    }
     atomic_add(&pending_acquires, -1L);
     assert_has_the_gil();
+    _gil_taken(wait_started);
     _debug_print("RPyGilAcquire\n");
 }
 
+long RPyGilLastWait(void)
+{
+    /* the time, in microseconds, that the current owner of the GIL
+       waited for it, if it had to; reset to 0 by this call */
+    long result = last_wait;
+    last_wait = 0;
+    return result;
+}
+
+void RPyGilSetSwitchInterval(long microseconds)
+{
+    switch_interval = microseconds;
+}
+
+long RPyGilGetSwitchInterval(void)
+{
+    return switch_interval;
+}
+
 
 #endif /* PYPY_NOT_MAIN_FILE */
@@ -1506,6 +1506,34 @@ class TestMiniMarkGC(TestSemiSpaceGC):
         res = self.run("nongc_opaque_attached_to_gc")
         assert res == 0
 
+    def define_alloc_buffer_is_pinned(cls):
+        from pypy.rpython.lltypesystem import rffi
+        class A:
+            pass
+        def f(n):
+            raw_buf, gc_buf = rffi.alloc_buffer(n)
+            try:
+                in_place = bool(gc_buf)
+                a = None
+                for i in range(100000):
+                    a = A()     # minor collections, with the buffer pinned
+                for i in range(n):
+                    raw_buf[i] = 'hello'[i]
+                s = rffi.str_from_buffer(raw_buf, gc_buf, n, n)
+            finally:
+                rffi.keep_buffer_alive_until_here(raw_buf, gc_buf)
+            for i in range(100000):
+                a = A()
+            return in_place * 10 + (s == 'hello')
+        return f
+
+    def test_alloc_buffer_is_pinned(self):
+        res = self.run("alloc_buffer_is_pinned", 5)
+        assert res == 11
+
+class TestIncrementalMiniMarkGC(TestMiniMarkGC):
+    gcpolicy = "incminimark"
+
 # ____________________________________________________________________
 
 class TaggedPointersTest(object):
@@ -0,0 +1,114 @@
+"""
+A benchmark for the big integers of pypy/rlib/rbigint.py: multiplication,
+squaring, division, modular exponentiation and conversions to and from
+decimal strings.  Translate it with
+
+    ./translate.py targetbigintbench.py
+
+and run it as
+
+    ./targetbigintbench-c [workload...] [digits [repeat]]
+
+where the sizes are given in digits of rbigint.SHIFT bits.  The cutoffs
+(KARATSUBA_CUTOFF, TOOM_CUTOFF, DIV_CUTOFF, FORMAT_CUTOFF, PARSE_CUTOFF,
+WINDOW_CUTOFF) are constants for the translator, so comparing two of
+them means translating this target once for each value.
+"""
+
+import os, time
+from pypy.rlib.rbigint import rbigint, MASK, _store_digit
+
+# __________  Entry point  __________
+
+WORKLOADS = ['mul', 'square', 'lopsided', 'divmod', 'pow', 'str', 'parse']
+
+DEF_DIGITS = 3000
+DEF_REPEAT = 10
+
+def make_number(ndigits, seed):
+    # a pseudo-random positive number of exactly ndigits digits
+    digits = [_store_digit(0)] * ndigits
+    x = seed
+    for i in range(ndigits):
+        x = (x * 1103515245 + 12345) & MASK
+        digits[i] = _store_digit(x)
+    digits[ndigits - 1] = _store_digit(x | 1)
+    return rbigint(digits, 1)
+
+def run_workload(name, ndigits, repeat):
+    a = make_number(ndigits, 1)
+    b = make_number(ndigits, 2)
+    if name == 'mul':
+        start = time.time()
+        for i in range(repeat):
+            a.mul(b)
+    elif name == 'square':
+        start = time.time()
+        for i in range(repeat):
+            a.mul(a)
+    elif name == 'lopsided':
+        c = make_number(ndigits * 5, 3)
+        start = time.time()
+        for i in range(repeat):
+            a.mul(c)
+    elif name == 'divmod':
+        c = a.mul(b).add(make_number(ndigits // 2 + 1, 3))
+        start = time.time()
+        for i in range(repeat):
+            c.divmod(b)
+    elif name == 'pow':
+        # exponents and moduli much smaller, as for cryptography
+        e = make_number(ndigits // 20 + 1, 3)
+        m = make_number(ndigits // 20 + 1, 4)
+        start = time.time()
+        for i in range(repeat):
+            a.pow(e, m)
+    elif name == 'str':
+        start = time.time()
+        for i in range(repeat):
+            a.str()
+    else:
+        assert name == 'parse'
+        s = a.str()
+        start = time.time()
+        for i in range(repeat):
+            rbigint.fromdecimalstr(s)
+    return time.time() - start
+
+def entry_point(argv):
+    names = []
+    numbers = []
+    for s in argv[1:]:
+        if s in WORKLOADS:
+            names.append(s)
+        else:
+            try:
+                numbers.append(abs(int(s)))
+            except ValueError:
+                os.write(2, '"%s" is neither a workload (%s) nor an integer\n'
+                            % (s, ', '.join(WORKLOADS)))
+                return 1
+    if not names:
+        names = WORKLOADS
+    ndigits = DEF_DIGITS
+    repeat = DEF_REPEAT
+    if len(numbers) > 0:
+        ndigits = numbers[0]
+    if len(numbers) > 1:
+        repeat = numbers[1]
+    if ndigits < 1:
+        ndigits = 1
+    for name in names:
+        total = run_workload(name, ndigits, repeat)
+        os.write(1, "%s: %d digits, %d times: %f secs\n" %
+                    (name, ndigits, repeat, total))
+    return 0
+
+# _____ Define and setup target ___
+
+def target(*args):
+    return entry_point, None
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(entry_point(sys.argv))